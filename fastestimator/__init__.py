@@ -16,6 +16,7 @@ from fastestimator import architecture, backend, dataset, layers, op, schedule,
 from fastestimator.estimator import Estimator, enable_deterministic
 from fastestimator.network import Network, build
 from fastestimator.pipeline import Pipeline
+from fastestimator.util.distributed import enable_distributed
 
 # Fix known bugs with libraries which use multi-processing in a way which conflicts with pytorch data loader
 import cv2
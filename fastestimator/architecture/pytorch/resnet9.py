@@ -72,7 +72,7 @@ class ResNet9(nn.Module):
         x = fn.leaky_relu(x, negative_slope=0.1)
         x = x + self.residual3(x)
         # layer 4
-        x = nn.AdaptiveMaxPool2d((1, 1))(x)
+        x = fn.adaptive_max_pool2d(x, (1, 1))
         x = torch.flatten(x, 1)
         x = self.fc1(x)
         x = fn.softmax(x, dim=-1)
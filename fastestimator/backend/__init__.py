@@ -18,8 +18,12 @@ from fastestimator.backend.binary_crossentropy import binary_crossentropy
 from fastestimator.backend.cast import cast
 from fastestimator.backend.categorical_crossentropy import categorical_crossentropy
 from fastestimator.backend.check_nan import check_nan
+from fastestimator.backend.checkpoint_forward import checkpoint_forward
 from fastestimator.backend.clip_by_value import clip_by_value
 from fastestimator.backend.concat import concat
+from fastestimator.backend.confusion_matrix import confusion_matrix
+from fastestimator.backend.count_correct import count_correct
+from fastestimator.backend.dice_score import dice_score
 from fastestimator.backend.exp import exp
 from fastestimator.backend.expand_dims import expand_dims
 from fastestimator.backend.feed_forward import feed_forward
@@ -47,6 +51,7 @@ from fastestimator.backend.reduce_min import reduce_min
 from fastestimator.backend.reduce_sum import reduce_sum
 from fastestimator.backend.reshape import reshape
 from fastestimator.backend.roll import roll
+from fastestimator.backend.running_total import RunningTotal
 from fastestimator.backend.save_model import save_model
 from fastestimator.backend.set_lr import set_lr
 from fastestimator.backend.sign import sign
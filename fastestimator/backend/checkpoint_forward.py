@@ -0,0 +1,450 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import inspect
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, TypeVar, Union
+
+import numpy as np
+import tensorflow as tf
+import torch
+from torch.nn.parallel import DataParallel, DistributedDataParallel
+from torch.utils.checkpoint import checkpoint
+
+from fastestimator.backend.to_tensor import to_tensor
+
+Tensor = TypeVar('Tensor', tf.Tensor, torch.Tensor)
+
+
+class _Segment(NamedTuple):
+    """A contiguous piece of a model's computation graph.
+
+    Args:
+        run: A function which computes the `outputs` of the segment from its `inputs`.
+        inputs: The keys of the values which the segment consumes.
+        outputs: The keys of the values which the segment produces for later segments (or the final output).
+    """
+    run: Callable[..., Any]
+    inputs: List[Any]
+    outputs: List[Any]
+
+
+class _Plan(NamedTuple):
+    """How to run a model in checkpointed segments.
+
+    Args:
+        inputs: The keys of the model inputs.
+        segments: The segments of the model, in execution order.
+        output: A function which assembles the final model output from a dictionary of computed values.
+    """
+    inputs: List[Any]
+    segments: List[_Segment]
+    output: Callable[[Dict[Any, Any]], Any]
+
+
+# The segmentation plans of each model, keyed by the number of segments (None if a model cannot be segmented)
+_PLANS: 'weakref.WeakKeyDictionary[Any, Dict[int, Optional[_Plan]]]' = weakref.WeakKeyDictionary()
+# The models which have already been warned about
+_WARNED: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+
+
+def checkpoint_forward(model: Union[tf.keras.Model, torch.nn.Module],
+                       x: Union[Tensor, np.ndarray],
+                       segments: int,
+                       training: bool = True) -> Tensor:
+    """Run a forward step on a given model using activation checkpointing.
+
+    The computation graph of the `model` is split into `segments` pieces, and only the tensors which flow between the
+    pieces are kept for the backward pass. The activations within each piece are discarded, and then recomputed when
+    they are needed to compute gradients (using torch.utils.checkpoint or tf.recompute_grad). This trades extra
+    computation for a (potentially much) smaller memory footprint. The boundaries between the pieces are placed where
+    as few tensors as possible are alive, such as between the blocks of the models in fe.architecture.
+
+    This method can be used with TensorFlow models:
+    ```python
+    m = fe.architecture.tensorflow.WideResidualNetwork(input_shape=(32, 32, 3), depth=10, widen_factor=1)
+    x = tf.ones((3, 32, 32, 3))  # (batch, height, width, channels)
+    b = fe.backend.checkpoint_forward(m, x, segments=4)  # [[~0.1, ~0.1, ...], ...]
+    ```
+
+    This method can be used with PyTorch models:
+    ```python
+    m = fe.architecture.pytorch.WideResidualNetwork(depth=10, widen_factor=1)
+    x = torch.ones((3, 3, 32, 32))  # (batch, channels, height, width)
+    b = fe.backend.checkpoint_forward(m, x, segments=4)  # [[~0.1, ~0.1, ...], ...]
+    ```
+
+    TensorFlow models must be functional or Sequential models, and PyTorch models must be traceable by torch.fx (which
+    is the case for nn.Sequential models and most models without data-dependent control flow). Other models, as well as
+    PyTorch models wrapped in nn.DataParallel, are simply run without checkpointing. Be aware that layers which update
+    their state during the forward pass (ex. batch normalization statistics) will do so again when they are recomputed.
+
+    Args:
+        model: A neural network to run the forward step through.
+        x: An input tensor for the `model`. This value will be auto-cast to either a tf.Tensor or torch.Tensor as
+            applicable for the `model`.
+        segments: How many pieces to split the model into.
+        training: Whether this forward step is part of training or not. This may impact the behavior of `model` layers
+            such as dropout. Checkpointing is only performed during training.
+
+    Returns:
+        The result of `model(x)`.
+
+    Raises:
+        ValueError: If `model` is an unacceptable data type.
+    """
+    if isinstance(model, tf.keras.Model):
+        if not tf.is_tensor(x):
+            x = to_tensor(x, "tf")
+        plan = _get_plan(model, segments, _plan_tf) if training else None
+        if plan is None:
+            return model(x, training=training)
+        return _run_plan(plan, tf.nest.flatten(x), lambda seg, *args: tf.recompute_grad(
+            lambda *inputs: seg.run(*inputs, training=training))(*args))
+    elif isinstance(model, torch.nn.Module):
+        model.train(mode=training)
+        if not isinstance(x, torch.Tensor):
+            x = to_tensor(x, "torch")
+        if not training or not torch.is_grad_enabled():
+            return model(x)
+        if isinstance(model, DataParallel):
+            # The model replicas which DataParallel creates for each device can't be run in segments
+            _warn_once(model, "activation checkpointing is not supported for DataParallel models")
+            return model(x)
+        # DistributedDataParallel needs to be invoked itself (for gradient synchronization), so it will run the
+        # segmented forward of the model which it wraps
+        module = model.module if isinstance(model, DistributedDataParallel) else model
+        plan = _get_plan(module, segments, _plan_torch)
+        if plan is None:
+            return model(x)
+        with _override_forward(module, lambda inp: _run_plan(plan, [inp], _checkpoint_torch)):
+            return model(x)
+    else:
+        raise ValueError("Unrecognized model instance {}".format(type(model)))
+
+
+def _get_plan(model: Union[tf.keras.Model, torch.nn.Module], segments: int,
+              make_plan: Callable[[Any, int], Optional[_Plan]]) -> Optional[_Plan]:
+    """Get the (cached) plan for running a model in segments.
+
+    Args:
+        model: The model to be run.
+        segments: How many segments to split the model into.
+        make_plan: A function which builds a new plan.
+
+    Returns:
+        The plan, or None if the model should be run without checkpointing.
+    """
+    plans = _PLANS.setdefault(model, {})
+    if segments not in plans:
+        if isinstance(model, tf.keras.Sequential) and not model.built:
+            # Sequential models only become functional once they have been built, which will happen on the first call
+            return None
+        try:
+            plans[segments] = make_plan(model, segments) if segments > 1 else None
+        except Exception as err:  # Models may fail to be traced for many reasons, none of which are fatal
+            _warn_once(model, "unable to apply activation checkpointing ({})".format(err))
+            plans[segments] = None
+    return plans[segments]
+
+
+def _warn_once(model: Any, message: str) -> None:
+    """Print a warning about a model, unless it has already been printed.
+
+    Args:
+        model: The model which the warning is about.
+        message: The warning.
+    """
+    if model not in _WARNED:
+        _WARNED.add(model)
+        print("FastEstimator-Warn: {}, so the model {} will run without it".format(
+            message, getattr(model, "model_name", type(model).__name__)))
+
+
+def _choose_cuts(costs: Sequence[Optional[int]], segments: int) -> List[int]:
+    """Decide where to split a sequence of operations into segments.
+
+    Args:
+        costs: The number of tensors which would need to be kept if the sequence were cut after each operation, or None
+            if it must not be cut there.
+        segments: The desired number of segments.
+
+    Returns:
+        The (increasing) indices of the operations after which the sequence should be cut. Each cut is placed at the
+        cheapest position within half a segment of where an even split would put it.
+    """
+    n_ops = len(costs)
+    segments = min(segments, n_ops)
+    cuts = []
+    for k in range(1, segments):
+        target = k * n_ops / segments
+        start = max(int(target - n_ops / (2 * segments)), cuts[-1] + 1 if cuts else 0)
+        stop = min(int(target + n_ops / (2 * segments)) + 1, n_ops - 1)
+        candidates = [idx for idx in range(start, stop) if costs[idx] is not None]
+        if candidates:
+            cuts.append(min(candidates, key=lambda idx: (costs[idx], abs(idx + 1 - target))))
+    return cuts
+
+
+def _split(n_ops: int, cuts: List[int]) -> List[range]:
+    """Convert cut positions into the ranges of operations which make up each segment.
+
+    Args:
+        n_ops: The number of operations.
+        cuts: The indices of the operations after which the sequence is cut.
+
+    Returns:
+        The indices of the operations within each segment.
+    """
+    bounds = [-1] + cuts + [n_ops - 1]
+    return [range(start + 1, stop + 1) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _run_plan(plan: _Plan, inputs: List[Any], run_segment: Callable[..., Any]) -> Any:
+    """Run a model in segments.
+
+    Args:
+        plan: The plan for the model.
+        inputs: The inputs of the model.
+        run_segment: A function which runs a segment on its inputs with checkpointing.
+
+    Returns:
+        The output of the model.
+    """
+    values = dict(zip(plan.inputs, inputs))
+    for segment in plan.segments:
+        outputs = run_segment(segment, *[values[key] for key in segment.inputs])
+        values.update(zip(segment.outputs, outputs))
+    return plan.output(values)
+
+
+def _plan_tf(model: tf.keras.Model, segments: int) -> Optional[_Plan]:
+    """Split a TensorFlow functional model into segments.
+
+    Args:
+        model: The model to split.
+        segments: How many segments to split the model into.
+
+    Returns:
+        A plan whose segments are sub-models which share the layers of the `model`.
+    """
+    if not getattr(model, "_is_graph_network", False):
+        raise ValueError("only functional and Sequential models can be split into segments")
+    nodes = [
+        node for depth in sorted(model._nodes_by_depth, reverse=True) for node in model._nodes_by_depth[depth]
+        if not node.is_input
+    ]
+    tensors = {}  # id -> KerasTensor
+    last_use = {}  # id -> index of the last node which consumes the tensor
+    for idx, node in enumerate(nodes):
+        for tensor in node.keras_inputs:
+            tensors[id(tensor)] = tensor
+            last_use[id(tensor)] = idx
+    for tensor in model.outputs:
+        last_use[id(tensor)] = len(nodes)
+    produced_at = {id(tensor): -1 for tensor in model.inputs}
+    for idx, node in enumerate(nodes):
+        for tensor in tf.nest.flatten(node.outputs):
+            tensors[id(tensor)] = tensor
+            produced_at[id(tensor)] = idx
+    costs = [
+        sum(1 for key, at in produced_at.items() if at <= idx < last_use.get(key, -1)) for idx in range(len(nodes))
+    ]
+    plan_segments = []
+    for ops in _split(len(nodes), _choose_cuts(costs, segments)):
+        inputs = []
+        for idx in ops:
+            for tensor in nodes[idx].keras_inputs:
+                if produced_at[id(tensor)] < ops.start and id(tensor) not in inputs:
+                    inputs.append(id(tensor))
+        outputs = [key for key, at in produced_at.items() if at in ops and last_use.get(key, -1) > ops[-1]]
+        sub_model = tf.keras.Model(inputs=[tensors[key] for key in inputs], outputs=[tensors[key] for key in outputs])
+        plan_segments.append(
+            _Segment(run=lambda *args, sub_model=sub_model, **kwargs: tf.nest.flatten(sub_model(list(args), **kwargs)),
+                     inputs=inputs,
+                     outputs=outputs))
+    structure = model._nested_outputs
+    return _Plan(inputs=[id(tensor) for tensor in model.inputs],
+                 segments=plan_segments,
+                 output=lambda values: tf.nest.map_structure(lambda tensor: values[id(tensor)], structure))
+
+
+def _plan_torch(model: torch.nn.Module, segments: int) -> Optional[_Plan]:
+    """Split a PyTorch model into segments by tracing it with torch.fx.
+
+    Args:
+        model: The model to split.
+        segments: How many segments to split the model into.
+
+    Returns:
+        A plan whose segments run the traced operations using the layers of the `model`.
+    """
+    if "use_reentrant" not in inspect.signature(checkpoint).parameters:
+        # Reentrant checkpointing does not work with torch.autograd.grad, which FE uses to compute gradients
+        raise RuntimeError("PyTorch 1.11 or later is required")
+    import torch.fx  # Imported here since torch.fx isn't available in older versions of PyTorch
+    graph = torch.fx.Tracer().trace(model)
+    placeholders = [node for node in graph.nodes if node.op == "placeholder"]
+    if len(placeholders) != 1:
+        raise ValueError("only models which take a single input can be split into segments")
+    output_node = [node for node in graph.nodes if node.op == "output"][0]
+    # Parameters and buffers can be fetched by whichever segment needs them, so they don't need to be passed along
+    nodes = [node for node in graph.nodes if node.op in ("call_module", "call_function", "call_method")]
+    position = {node: idx for idx, node in enumerate(nodes)}
+    position[placeholders[0]] = -1
+
+    def last_use(node: 'torch.fx.Node') -> int:
+        return max((position.get(user, len(nodes)) for user in node.users), default=-1)
+
+    # A segment must not modify the tensors which it receives in place, since they are needed to recompute it later
+    mutated_at = {}
+    for idx, node in enumerate(nodes):
+        if _is_inplace(model, node) and node.args and isinstance(node.args[0], torch.fx.Node):
+            mutated_at.setdefault(node.args[0], []).append(idx)
+    live = [node for node in position]
+    costs = []
+    for idx in range(len(nodes)):
+        crossing = [node for node in live if position[node] <= idx < last_use(node)]
+        if any(pos > idx for node in crossing for pos in mutated_at.get(node, [])):
+            costs.append(None)
+        else:
+            costs.append(len(crossing))
+    plan_segments = []
+    for ops in _split(len(nodes), _choose_cuts(costs, segments)):
+        segment_nodes = [nodes[idx] for idx in ops]
+        inputs = []
+        for node in segment_nodes:
+            for arg in node.all_input_nodes:
+                if arg.op != "get_attr" and position[arg] < ops.start and arg not in inputs:
+                    inputs.append(arg)
+        outputs = [node for node in segment_nodes if last_use(node) > ops[-1]]
+        plan_segments.append(
+            _Segment(run=lambda *args, segment_nodes=segment_nodes, inputs=inputs, outputs=outputs: _run_torch_nodes(
+                model, segment_nodes, dict(zip(inputs, args)), outputs),
+                     inputs=inputs,
+                     outputs=outputs))
+    return _Plan(inputs=placeholders,
+                 segments=plan_segments,
+                 output=lambda values: torch.fx.node.map_arg(output_node.args[0], lambda node: _get_value(
+                     model, node, values)))
+
+
+def _is_inplace(model: torch.nn.Module, node: 'torch.fx.Node') -> bool:
+    """Determine whether a traced PyTorch operation modifies its first argument in place.
+
+    Args:
+        model: The traced model.
+        node: The operation.
+
+    Returns:
+        True iff the operation is in-place.
+    """
+    if node.op == "call_module":
+        return getattr(_get_attr(model, node.target), "inplace", False) is True
+    if node.op == "call_method":
+        return node.target.endswith("_") and not node.target.endswith("__")
+    return node.kwargs.get("inplace", False) is True
+
+
+def _get_attr(model: torch.nn.Module, target: str) -> Any:
+    """Fetch a (nested) attribute of a model, such as a layer or parameter.
+
+    Args:
+        model: The model.
+        target: The qualified name of the attribute (ex. 'block1.conv.weight').
+
+    Returns:
+        The attribute.
+    """
+    value = model
+    for name in target.split("."):
+        value = getattr(value, name)
+    return value
+
+
+def _get_value(model: torch.nn.Module, node: 'torch.fx.Node', values: Dict['torch.fx.Node', Any]) -> Any:
+    """Look up the value of a traced PyTorch operation.
+
+    Args:
+        model: The traced model.
+        node: The operation.
+        values: The values which have been computed so far.
+
+    Returns:
+        The value of the `node`.
+    """
+    if node.op == "get_attr":
+        return _get_attr(model, node.target)
+    return values[node]
+
+
+def _run_torch_nodes(model: torch.nn.Module,
+                     nodes: List['torch.fx.Node'],
+                     values: Dict['torch.fx.Node', Any],
+                     outputs: List['torch.fx.Node']) -> List[Any]:
+    """Execute a sequence of traced PyTorch operations.
+
+    Args:
+        model: The traced model.
+        nodes: The operations to execute.
+        values: The values of the inputs to the operations.
+        outputs: Which of the values should be returned.
+
+    Returns:
+        The values of the `outputs`.
+    """
+    import torch.fx
+    for node in nodes:
+        args = torch.fx.node.map_arg(node.args, lambda arg: _get_value(model, arg, values))
+        kwargs = torch.fx.node.map_arg(node.kwargs, lambda arg: _get_value(model, arg, values))
+        if node.op == "call_module":
+            values[node] = _get_attr(model, node.target)(*args, **kwargs)
+        elif node.op == "call_method":
+            values[node] = getattr(args[0], node.target)(*args[1:], **kwargs)
+        else:  # node.op == "call_function"
+            values[node] = node.target(*args, **kwargs)
+    return [values[node] for node in outputs]
+
+
+def _checkpoint_torch(segment: _Segment, *args: Any) -> List[Any]:
+    """Run a segment of a PyTorch model with checkpointing.
+
+    Args:
+        segment: The segment to run.
+        *args: The inputs of the segment.
+
+    Returns:
+        The outputs of the segment.
+    """
+    return checkpoint(segment.run, *args, use_reentrant=False)
+
+
+@contextmanager
+def _override_forward(module: torch.nn.Module, forward: Callable[..., Any]) -> Iterator[None]:
+    """Temporarily replace the forward function of a PyTorch module.
+
+    Args:
+        module: The module to modify.
+        forward: The forward function to use instead.
+    """
+    previous = module.__dict__.get("forward")
+    module.forward = forward
+    try:
+        yield
+    finally:
+        if previous is None:
+            del module.forward
+        else:
+            module.forward = previous
@@ -0,0 +1,91 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+from typing import TypeVar
+
+import numpy as np
+import tensorflow as tf
+import torch
+
+Tensor = TypeVar('Tensor', tf.Tensor, torch.Tensor, np.ndarray)
+
+
+def confusion_matrix(y_true: Tensor, y_pred: Tensor, num_classes: int) -> Tensor:
+    """Count how often each true class was predicted as each other class.
+
+    The counting is done wherever the tensors already are (ex. on the GPU), so that only the small resulting matrix
+    needs to be copied elsewhere.
+
+    This method can be used with Numpy data:
+    ```python
+    y_true = np.array([0, 1, 1, 2])
+    y_pred = np.array([0, 1, 2, 2])
+    b = fe.backend.confusion_matrix(y_true, y_pred, num_classes=3)  # [[1, 0, 0], [0, 1, 1], [0, 0, 1]]
+    ```
+
+    This method can be used with TensorFlow tensors:
+    ```python
+    y_true = tf.constant([0, 1, 1, 2])
+    y_pred = tf.constant([0, 1, 2, 2])
+    b = fe.backend.confusion_matrix(y_true, y_pred, num_classes=3)  # [[1, 0, 0], [0, 1, 1], [0, 0, 1]]
+    ```
+
+    This method can be used with PyTorch tensors:
+    ```python
+    y_true = torch.tensor([0, 1, 1, 2])
+    y_pred = torch.tensor([0, 1, 2, 2])
+    b = fe.backend.confusion_matrix(y_true, y_pred, num_classes=3)  # [[1, 0, 0], [0, 1, 1], [0, 0, 1]]
+    ```
+
+    Args:
+        y_true: The true class indices. Any shape is allowed.
+        y_pred: The predicted class indices, with the same number of elements as `y_true`. Floating point values are
+            truncated to integers.
+        num_classes: The number of classes. Any pair of labels which contains a value outside of [0, num_classes) is
+            ignored.
+
+    Returns:
+        An int64 matrix of shape (num_classes, num_classes), where the rows correspond to `y_true` and the columns to
+        `y_pred`.
+
+    Raises:
+        ValueError: If `y_true` or `y_pred` are unacceptable data types.
+    """
+    size = num_classes * num_classes
+    if tf.is_tensor(y_true) and tf.is_tensor(y_pred):
+        y_true = tf.reshape(tf.cast(y_true, tf.int32), [-1])
+        y_pred = tf.reshape(tf.cast(y_pred, tf.int32), [-1])
+        valid = (y_true >= 0) & (y_true < num_classes) & (y_pred >= 0) & (y_pred < num_classes)
+        index = tf.boolean_mask(num_classes * y_true + y_pred, valid)
+        counts = tf.math.bincount(index, minlength=size, maxlength=size, dtype=tf.int64)
+        return tf.reshape(counts, [num_classes, num_classes])
+    elif isinstance(y_true, torch.Tensor) and isinstance(y_pred, torch.Tensor):
+        # The labels are moved to the predictions rather than the reverse, since those are usually on the GPU already
+        y_pred = y_pred.reshape(-1).long()
+        y_true = y_true.reshape(-1).to(device=y_pred.device, dtype=torch.int64, non_blocking=True)
+        valid = (y_true >= 0) & (y_true < num_classes) & (y_pred >= 0) & (y_pred < num_classes)
+        # A scatter (unlike torch.bincount or boolean indexing) doesn't need to wait for the GPU to know its output size
+        index = torch.where(valid, num_classes * y_true + y_pred, torch.zeros_like(y_true))
+        counts = torch.zeros(size, dtype=torch.int64, device=y_pred.device).scatter_add_(0, index, valid.long())
+        return counts.reshape(num_classes, num_classes)
+    elif isinstance(y_true, np.ndarray) and isinstance(y_pred, np.ndarray):
+        y_true = y_true.reshape(-1).astype(np.int64)
+        y_pred = y_pred.reshape(-1).astype(np.int64)
+        index = num_classes * y_true + y_pred
+        valid = (y_true >= 0) & (y_true < num_classes) & (y_pred >= 0) & (y_pred < num_classes)
+        if not valid.all():
+            index = index[valid]
+        return np.bincount(index, minlength=size).reshape(num_classes, num_classes)
+    else:
+        raise ValueError("Unrecognized tensor types {} and {}".format(type(y_true), type(y_pred)))
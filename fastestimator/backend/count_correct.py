@@ -0,0 +1,97 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+from typing import TypeVar
+
+import numpy as np
+import tensorflow as tf
+import torch
+
+Tensor = TypeVar('Tensor', tf.Tensor, torch.Tensor, np.ndarray)
+
+
+def count_correct(y_true: Tensor, y_pred: Tensor, from_logits: bool = False) -> Tensor:
+    """Count how many classification predictions are correct.
+
+    The counting is done wherever `y_pred` already is (ex. on the GPU), so the result can be accumulated without waiting
+    for the device or copying the predictions anywhere.
+
+    This method can be used with Numpy data:
+    ```python
+    y_true = np.array([0, 1, 2])
+    y_pred = np.array([[0.8, 0.1, 0.1], [0.6, 0.3, 0.1], [0.1, 0.2, 0.7]])
+    b = fe.backend.count_correct(y_true, y_pred)  # 2
+    y_pred = np.array([[0.2], [0.9], [0.6]])
+    b = fe.backend.count_correct(np.array([0, 1, 0]), y_pred)  # 2
+    ```
+
+    This method can be used with TensorFlow tensors:
+    ```python
+    y_true = tf.constant([[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+    y_pred = tf.constant([[0.8, 0.1, 0.1], [0.6, 0.3, 0.1], [0.1, 0.2, 0.7]])
+    b = fe.backend.count_correct(y_true, y_pred)  # 2
+    ```
+
+    This method can be used with PyTorch tensors:
+    ```python
+    y_true = torch.tensor([0, 1, 2])
+    y_pred = torch.tensor([[0.8, 0.1, 0.1], [0.6, 0.3, 0.1], [0.1, 0.2, 0.7]])
+    b = fe.backend.count_correct(y_true, y_pred)  # 2
+    ```
+
+    Args:
+        y_true: The true class indices, or their one-hot encodings.
+        y_pred: The predicted scores of each class. If the last dimension has a size of 1 then this is treated as a
+            binary classification, where the score is the probability of class 1.
+        from_logits: Whether binary classification scores are logits rather than probabilities.
+
+    Returns:
+        The number of predictions which match `y_true`.
+
+    Raises:
+        ValueError: If `y_pred` is an unacceptable data type.
+    """
+    one_hot = len(y_true.shape) > 1 and y_true.shape[-1] > 1
+    if tf.is_tensor(y_pred):
+        y_true = tf.convert_to_tensor(y_true)
+        if one_hot:
+            y_true = tf.argmax(y_true, axis=-1)
+        if y_pred.shape[-1] > 1:
+            y_pred = tf.argmax(y_pred, axis=-1)
+        else:
+            y_pred = tf.cast(y_pred, tf.float32)
+            y_pred = tf.round(tf.sigmoid(y_pred) if from_logits else y_pred)
+        y_true = tf.cast(tf.reshape(y_true, [-1]), y_pred.dtype)
+        return tf.reduce_sum(tf.cast(tf.equal(tf.reshape(y_pred, [-1]), y_true), tf.int64))
+    elif isinstance(y_pred, torch.Tensor):
+        y_true = torch.as_tensor(y_true).to(y_pred.device, non_blocking=True)
+        if one_hot:
+            y_true = torch.argmax(y_true, dim=-1)
+        if y_pred.shape[-1] > 1:
+            y_pred = torch.argmax(y_pred, dim=-1)
+        else:
+            y_pred = y_pred.float()
+            y_pred = torch.round(torch.sigmoid(y_pred) if from_logits else y_pred)
+        return torch.sum(y_pred.reshape(-1) == y_true.reshape(-1).to(y_pred.dtype))
+    elif isinstance(y_pred, np.ndarray):
+        y_true = np.asarray(y_true)
+        if one_hot:
+            y_true = np.argmax(y_true, axis=-1)
+        if y_pred.shape[-1] > 1:
+            y_pred = np.argmax(y_pred, axis=-1)
+        else:
+            y_pred = np.round(1 / (1 + np.exp(-y_pred)) if from_logits else y_pred)
+        return np.sum(y_pred.ravel() == y_true.ravel())
+    else:
+        raise ValueError("Unrecognized tensor type {}".format(type(y_pred)))
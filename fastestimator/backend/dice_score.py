@@ -0,0 +1,81 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+from typing import TypeVar
+
+import numpy as np
+import tensorflow as tf
+import torch
+
+Tensor = TypeVar('Tensor', tf.Tensor, torch.Tensor, np.ndarray)
+
+
+def dice_score(y_true: Tensor, y_pred: Tensor, threshold: float = 0.5, smooth: float = 1e-8) -> Tensor:
+    """Compute the dice score of each sample within a batch of binary segmentation masks.
+
+    The computation is done wherever `y_pred` already is (ex. on the GPU), so that the (potentially large) masks don't
+    need to be copied anywhere.
+
+    This method can be used with Numpy data:
+    ```python
+    y_true = np.array([[[0, 1], [1, 1]], [[1, 0], [0, 0]]])
+    y_pred = np.array([[[0.1, 0.8], [0.7, 0.2]], [[0.9, 0.6], [0.2, 0.1]]])
+    b = fe.backend.dice_score(y_true, y_pred)  # [0.8, 0.6667]
+    ```
+
+    This method can be used with TensorFlow tensors:
+    ```python
+    y_true = tf.constant([[[0, 1], [1, 1]], [[1, 0], [0, 0]]])
+    y_pred = tf.constant([[[0.1, 0.8], [0.7, 0.2]], [[0.9, 0.6], [0.2, 0.1]]])
+    b = fe.backend.dice_score(y_true, y_pred)  # [0.8, 0.6667]
+    ```
+
+    This method can be used with PyTorch tensors:
+    ```python
+    y_true = torch.tensor([[[0, 1], [1, 1]], [[1, 0], [0, 0]]])
+    y_pred = torch.tensor([[[0.1, 0.8], [0.7, 0.2]], [[0.9, 0.6], [0.2, 0.1]]])
+    b = fe.backend.dice_score(y_true, y_pred)  # [0.8, 0.6667]
+    ```
+
+    Args:
+        y_true: The ground truth masks, with the batch as the first dimension.
+        y_pred: The predicted probabilities of each mask element.
+        threshold: The threshold for binarizing `y_pred`.
+        smooth: A small value added to the numerator and denominator, to avoid dividing by zero.
+
+    Returns:
+        The dice score of each sample, of shape (batch_size, ).
+
+    Raises:
+        ValueError: If `y_pred` is an unacceptable data type.
+    """
+    batch_size = y_true.shape[0]
+    if tf.is_tensor(y_pred):
+        y_true = tf.reshape(tf.cast(tf.convert_to_tensor(y_true), tf.float32), [batch_size, -1])
+        y_pred = tf.cast(tf.cast(tf.reshape(y_pred, [batch_size, -1]), tf.float32) >= threshold, tf.float32)
+        intersection = tf.reduce_sum(y_true * y_pred, axis=-1)
+        area_sum = tf.reduce_sum(y_true, axis=-1) + tf.reduce_sum(y_pred, axis=-1)
+    elif isinstance(y_pred, torch.Tensor):
+        y_true = torch.as_tensor(y_true).to(y_pred.device, non_blocking=True).reshape(batch_size, -1).float()
+        y_pred = (y_pred.reshape(batch_size, -1) >= threshold).float()
+        intersection = torch.sum(y_true * y_pred, dim=-1)
+        area_sum = torch.sum(y_true, dim=-1) + torch.sum(y_pred, dim=-1)
+    elif isinstance(y_pred, np.ndarray):
+        y_true = np.asarray(y_true).reshape((batch_size, -1))
+        y_pred = (y_pred.reshape((batch_size, -1)) >= threshold).astype(np.int32)
+        intersection = np.sum(y_true * y_pred, axis=-1)
+        area_sum = np.sum(y_true, axis=-1) + np.sum(y_pred, axis=-1)
+    else:
+        raise ValueError("Unrecognized tensor type {}".format(type(y_pred)))
+    return (2. * intersection + smooth) / (area_sum + smooth)
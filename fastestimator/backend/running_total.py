@@ -0,0 +1,113 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+from typing import TypeVar, Union
+
+import numpy as np
+import tensorflow as tf
+import torch
+
+Tensor = TypeVar('Tensor', tf.Tensor, torch.Tensor, np.ndarray)
+
+
+class RunningTotal:
+    """A running sum of values, which is kept on whichever device the values are on.
+
+    This class is intentionally not @traceable.
+
+    Traces can use this to accumulate metrics over an epoch without a device sync or copy every step. Adding a GPU
+    tensor just queues one more addition on the GPU, and only reading the `total` (or `mean`) copies the result back to
+    the host. Floating point values are accumulated in double precision.
+
+    ```python
+    correct = RunningTotal()
+    for batch in batches:
+        correct.add(fe.backend.count_correct(batch["y"], batch["y_pred"]))  # Stays on the GPU
+    correct.total()  # The sum as a numpy value
+    ```
+    """
+    def __init__(self) -> None:
+        self.value = None
+        self.count = 0
+
+    def reset(self) -> None:
+        """Discard everything which has been added so far.
+        """
+        self.value = None
+        self.count = 0
+
+    def add(self, value: Union[Tensor, float, int], count: int = 1) -> None:
+        """Add a value to the total.
+
+        Args:
+            value: The value to be added. Tensors must all have the same shape (or else be broadcastable).
+            count: How many items the `value` represents, which is used to compute the `mean`.
+        """
+        if isinstance(value, torch.Tensor):
+            value = value.detach()
+            if value.is_floating_point():
+                value = value.double()
+        elif tf.is_tensor(value):
+            if value.dtype.is_floating:
+                value = tf.cast(value, tf.float64)
+        else:
+            value = np.asarray(value)
+            if np.issubdtype(value.dtype, np.floating):
+                value = value.astype(np.float64)
+        if self.value is None:
+            self.value = value
+        elif type(self.value) is type(value) or (tf.is_tensor(self.value) and tf.is_tensor(value)):
+            self.value = self.value + value
+        else:
+            # Values from different frameworks can't be added on a device
+            self.value = _to_numpy(self.value) + _to_numpy(value)
+        self.count += count
+
+    def total(self) -> Union[np.ndarray, int, float]:
+        """Get the sum of every value which has been added.
+
+        Returns:
+            The total, copied to the host. If nothing has been added then this is 0.
+        """
+        if self.value is None:
+            return 0
+        total = _to_numpy(self.value)
+        return total.item() if total.ndim == 0 else total
+
+    def mean(self) -> Union[np.ndarray, float]:
+        """Get the average of every value which has been added, weighted by their counts.
+
+        Returns:
+            The mean, copied to the host.
+
+        Raises:
+            ZeroDivisionError: If nothing has been added.
+        """
+        return self.total() / self.count
+
+
+def _to_numpy(value: Tensor) -> np.ndarray:
+    """Copy a tensor to the host as a numpy array.
+
+    Args:
+        value: The tensor to be copied.
+
+    Returns:
+        The numpy equivalent of the `value`.
+    """
+    if isinstance(value, torch.Tensor):
+        return value.cpu().numpy()
+    elif tf.is_tensor(value):
+        return value.numpy()
+    return np.asarray(value)
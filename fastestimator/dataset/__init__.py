@@ -21,4 +21,5 @@ from fastestimator.dataset.generator_dataset import GeneratorDataset
 from fastestimator.dataset.labeled_dir_dataset import LabeledDirDataset
 from fastestimator.dataset.numpy_dataset import NumpyDataset
 from fastestimator.dataset.pickle_dataset import PickleDataset
+from fastestimator.dataset.record_dataset import RecordDataset, write_records
 from fastestimator.dataset.siamese_dir_dataset import SiameseDirDataset
\ No newline at end of file
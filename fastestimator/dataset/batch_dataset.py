@@ -277,13 +277,12 @@ class BatchDataset(FEDataset):
         if self.probability:
             num_samples = num_samples * len(self.datasets)
         self.index_maps = []
+        # A single generator for every block, so that oversampled datasets don't repeat the same permutation
+        rng = random if seed is None else random.Random(seed)
         for dataset, num_sample in zip(self.datasets, num_samples):
             if hasattr(dataset, "reset_index_maps"):
                 dataset.reset_index_maps(seed)
             index_map = [list(range(len(dataset))) for _ in range(math.ceil(len(self) * num_sample / len(dataset)))]
             for mapping in index_map:
-                if seed is not None:
-                    random.Random(seed).shuffle(mapping)
-                else:
-                    random.shuffle(mapping)
+                rng.shuffle(mapping)
             self.index_maps.append([item for sublist in index_map for item in sublist])
@@ -12,13 +12,244 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import csv
+import mmap
 import os
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 
-from fastestimator.dataset.dataset import InMemoryDataset
+from fastestimator.dataset.dataset import ColumnarData, InMemoryDataset
 from fastestimator.util.traceability_util import traceable
 
+# The strings which pandas.read_csv interprets as missing values by default
+_NA_VALUES = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA',
+    'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+})
+
+
+class _CSVReader:
+    """A helper class which decodes individual rows of a CSV file on demand.
+
+    This class is intentionally not @traceable.
+
+    The file is memory-mapped rather than read, so only the pages which are actually accessed are ever loaded into
+    memory (and they may be evicted again by the OS at any time). The memory map is opened lazily within each process,
+    so that instances of this class may be safely shared with forked / spawned worker processes.
+
+    Args:
+        file_path: The path to the CSV file.
+        delimiter: What delimiter is used by the file.
+        chunk_size: How many bytes of the file to scan at a time when building the row index.
+
+    Raises:
+        ValueError: If the file does not contain a header row.
+    """
+    def __init__(self, file_path: str, delimiter: str, chunk_size: int = 2**26) -> None:
+        self.file_path = file_path
+        self.delimiter = delimiter
+        self._mmap = None
+        self._pid = None
+        self._last_row = (-1, None)
+        self.offsets = self._index_rows(chunk_size)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_mmap'] = None
+        state['_pid'] = None
+        state['_last_row'] = (-1, None)
+        return state
+
+    def _get_mmap(self) -> Optional[mmap.mmap]:
+        """Get a memory map of the file which is valid for the current process.
+
+        Returns:
+            A read-only memory map of the file, or None if the file is empty.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._last_row = (-1, None)
+            self._mmap = None
+            if os.path.getsize(self.file_path) > 0:
+                with open(self.file_path, 'rb') as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _index_rows(self, chunk_size: int) -> np.ndarray:
+        """Find the byte offset at which each (non-blank) data row of the file begins.
+
+        Args:
+            chunk_size: How many bytes of the file to scan at a time.
+
+        Returns:
+            The starting offset of every row of data, excluding the header row.
+
+        Raises:
+            ValueError: If the file does not contain a header row.
+        """
+        buffer = self._get_mmap()
+        if buffer is None:
+            raise ValueError("CSV file {} is empty".format(self.file_path))
+        buffer = np.frombuffer(buffer, dtype=np.uint8)
+        size = len(buffer)
+        dtype = np.uint32 if size < 2**32 else np.int64
+        starts = [np.zeros(1, dtype=dtype)]
+        for begin in range(0, size, chunk_size):
+            newlines = np.flatnonzero(buffer[begin:begin + chunk_size] == ord('\n'))
+            starts.append((newlines + begin + 1).astype(dtype))
+        starts = np.concatenate(starts)
+        starts = starts[starts < size]
+        # Skip blank lines (consistent with pandas), and then the header line
+        first_chars = buffer[starts]
+        starts = starts[(first_chars != ord('\n')) & (first_chars != ord('\r'))]
+        if len(starts) == 0:
+            raise ValueError("CSV file {} does not contain a header row".format(self.file_path))
+        return starts[1:]
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def read_row(self, index: int) -> List[str]:
+        """Decode a single row of the file.
+
+        Args:
+            index: Which row of data to read.
+
+        Returns:
+            The fields of the given row, as strings.
+        """
+        if self._last_row[0] == index and self._pid == os.getpid():
+            return self._last_row[1]
+        buffer = self._get_mmap()
+        start = int(self.offsets[index])
+        end = buffer.find(b'\n', start)
+        line = buffer[start:] if end == -1 else buffer[start:end]
+        row = next(csv.reader([line.decode('utf-8').rstrip('\r')], delimiter=self.delimiter))
+        self._last_row = (index, row)
+        return row
+
+
+class _CSVColumn(Sequence):
+    """A read-only column of a CSV file whose elements are decoded on demand.
+
+    This class is intentionally not @traceable.
+
+    The dtype is inferred from a sample of the file (unless it was specified explicitly), so a later row may contain a
+    value which doesn't fit it (ex. a missing value or a float in an integer column). Such values raise an error rather
+    than silently changing the dtype, since a change would only be seen by whichever process happened to read the value.
+
+    Args:
+        reader: The reader responsible for decoding rows of the file.
+        key: The name of the column.
+        position: The position of the column within each row of the file.
+        dtype: The dtype of the column (as inferred by pandas).
+    """
+    def __init__(self, reader: _CSVReader, key: str, position: int, dtype: np.dtype) -> None:
+        self.reader = reader
+        self.key = key
+        self.position = position
+        self.dtype = dtype
+
+    def _mismatch(self, field: str) -> ValueError:
+        """Build the error which is raised when a field doesn't fit the dtype of this column.
+
+        Args:
+            field: The field which didn't fit.
+
+        Returns:
+            An error describing the problem.
+        """
+        return ValueError("CSV column '{}' contains the value '{}' which does not fit its inferred dtype ({}). Specify "
+                          "the dtype of the column explicitly, ex. CSVDataset(..., lazy=True, dtype={{'{}': "
+                          "'float64'}})".format(self.key, field, self.dtype, self.key))
+
+    def _convert(self, field: str) -> Any:
+        """Convert a raw CSV field into the same value that pandas would have produced.
+
+        Args:
+            field: The field to be converted.
+
+        Returns:
+            The value of the `field`.
+
+        Raises:
+            ValueError: If the `field` does not fit the dtype of this column.
+        """
+        if field in _NA_VALUES or (self.dtype.kind in 'biuf' and not field.strip()):
+            if self.dtype.kind in 'biu':
+                raise self._mismatch(field)
+            return self.dtype.type(np.nan) if self.dtype.kind == 'f' else np.nan
+        if self.dtype.kind == 'b':
+            if field.strip() in ('True', 'TRUE', 'true'):
+                return np.bool_(True)
+            if field.strip() in ('False', 'FALSE', 'false'):
+                return np.bool_(False)
+            raise self._mismatch(field)
+        if self.dtype.kind in 'iu':
+            try:
+                return self.dtype.type(int(field))
+            except (ValueError, OverflowError):
+                raise self._mismatch(field) from None
+        if self.dtype.kind == 'f':
+            try:
+                return self.dtype.type(field)
+            except ValueError:
+                raise self._mismatch(field) from None
+        return field
+
+    def __len__(self) -> int:
+        return len(self.reader)
+
+    def __getitem__(self, index: int) -> Any:
+        if not isinstance(index, (int, np.integer)):
+            raise TypeError("{} indices must be integers".format(self.__class__.__name__))
+        return self._convert(self.reader.read_row(index)[self.position])
+
+    def _iter_chunks(self, chunk_size: int = 2**20) -> Iterator[np.ndarray]:
+        """Read the column sequentially, a chunk of rows at a time.
+
+        Args:
+            chunk_size: How many rows to read at once.
+
+        Yields:
+            Consecutive chunks of the column.
+
+        Raises:
+            ValueError: If the column contains a value which does not fit its dtype.
+        """
+        reader = pd.read_csv(self.reader.file_path,
+                             delimiter=self.reader.delimiter,
+                             usecols=[self.position],
+                             dtype={self.key: self.dtype},
+                             chunksize=chunk_size)
+        with reader:
+            while True:
+                try:
+                    chunk = next(reader)
+                except StopIteration:
+                    return
+                except (ValueError, TypeError) as err:
+                    raise ValueError("CSV column '{}' contains a value which does not fit its inferred dtype ({}). "
+                                     "Specify the dtype of the column explicitly, ex. CSVDataset(..., lazy=True, "
+                                     "dtype={{'{}': 'float64'}})".format(self.key, self.dtype, self.key)) from err
+                yield chunk[self.key].to_numpy()
+
+    def __iter__(self) -> Iterator[Any]:
+        for chunk in self._iter_chunks():
+            yield from chunk
+
+    def __array__(self, dtype: Optional[np.dtype] = None) -> np.ndarray:
+        chunks = list(self._iter_chunks())
+        result = np.concatenate(chunks) if chunks else np.array([], dtype=self.dtype)
+        return result if dtype is None else result.astype(dtype)
+
+    def __setitem__(self, index: int, value: Any) -> None:
+        raise TypeError("Data in a lazily loaded CSVDataset is read-only. Replace the entire '{}' column instead (ex. "
+                        "dataset['{}'] = new_values).".format(self.key, self.key))
+
 
 @traceable()
 class CSVDataset(InMemoryDataset):
@@ -28,13 +259,57 @@ class CSVDataset(InMemoryDataset):
     may be accessed using dataset.parent_path. This may be useful if the csv contains relative path information
     that you want to feed into, say, an ImageReader Op.
 
+    By default the file is loaded into memory column-by-column. For very large files, `lazy` mode can be used instead.
+    In this mode only the byte offset of each row is held in memory, the file is memory-mapped, and rows are decoded on
+    demand whenever they are accessed. Column dtypes are inferred from the first rows of the file unless they are given
+    via `dtype`, and accessing a later row whose value doesn't fit (ex. a missing value in a column of integers) raises
+    an error. Lazy mode does not support quoted fields containing line breaks, and its data is read-only (though entire
+    columns may still be replaced via dataset[key] = values).
+
     Args:
         file_path: The (absolute) path to the CSV file.
         delimiter: What delimiter is used by the file.
+        lazy: Whether to decode rows on demand rather than loading the entire file into memory.
         kwargs: Other arguments to be passed through to pandas csv reader function. See the pandas docs for details:
-            https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.read_csv.html.
+            https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.read_csv.html. When `lazy` is True only
+            `dtype` is supported, which may be used to fix the dtype of columns whose later rows don't fit the dtype
+            inferred from the first rows (ex. dtype={'label': 'float64'}).
+
+    Raises:
+        ValueError: If `kwargs` other than `dtype` are provided when `lazy` is True.
     """
-    def __init__(self, file_path: str, delimiter: str = ",", **kwargs) -> None:
-        df = pd.read_csv(file_path, delimiter=delimiter, **kwargs)
+    def __init__(self, file_path: str, delimiter: str = ",", lazy: bool = False, **kwargs) -> None:
         self.parent_path = os.path.dirname(file_path)
-        super().__init__(df.to_dict(orient='index'))
+        if lazy:
+            dtype = kwargs.pop('dtype', None)
+            if kwargs:
+                raise ValueError("CSVDataset does not support pandas arguments ({}) in lazy mode".format(
+                    ", ".join(kwargs.keys())))
+            super().__init__(self._load_lazy(file_path, delimiter, dtype=dtype))
+        else:
+            df = pd.read_csv(file_path, delimiter=delimiter, **kwargs)
+            super().__init__(ColumnarData({key: df[key].to_numpy() for key in df.columns}))
+
+    @staticmethod
+    def _load_lazy(file_path: str,
+                   delimiter: str,
+                   dtype: Union[None, str, np.dtype, Dict[str, Any]] = None,
+                   n_sample: int = 1000) -> ColumnarData:
+        """Index a CSV file so that its rows may be decoded on demand.
+
+        Args:
+            file_path: The path to the CSV file.
+            delimiter: What delimiter is used by the file.
+            dtype: The dtype of every column, or a mapping from column names to dtypes. Any columns which aren't
+                specified here are inferred.
+            n_sample: How many rows to inspect in order to infer the dtype of each column.
+
+        Returns:
+            Columnar data backed by the CSV file.
+        """
+        sample = pd.read_csv(file_path, delimiter=delimiter, nrows=n_sample, dtype=dtype)
+        reader = _CSVReader(file_path, delimiter)
+        return ColumnarData({
+            key: _CSVColumn(reader, key=key, position=position, dtype=sample[key].dtype)
+            for position, key in enumerate(sample.columns)
+        })
@@ -17,7 +17,7 @@ import random
 from collections import defaultdict
 from copy import deepcopy
 from functools import lru_cache
-from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, MutableMapping, Optional, Sequence, Set, Tuple, Union
 
 import jsonpickle
 import numpy as np
@@ -260,6 +260,42 @@ class FEDataset(Dataset):
             return splits[0]
         return splits
 
+    def _get_stratify_labels(self, stratify: str) -> Sequence[Any]:
+        """Get the value of the stratify key for every element of the dataset.
+
+        Subclasses which are able to read these values without loading entire data instances (ex. without decoding
+        images) should override this method in order to speed up stratified splitting.
+
+        Args:
+            stratify: A class key within the dataset.
+
+        Returns:
+            The value of the `stratify` key for every element of the dataset, in index order.
+        """
+        return [self[idx][stratify] for idx in range(self._split_length())]
+
+    @staticmethod
+    def _get_class_ids(labels: Sequence[Any]) -> Tuple[np.ndarray, int]:
+        """Convert a sequence of class labels into integer class ids.
+
+        Args:
+            labels: The class label of every element of a dataset.
+
+        Returns:
+            The class id of every element, and the total number of classes. Class ids are assigned in order of first
+            appearance within the `labels`.
+        """
+        if isinstance(labels, np.ndarray) and labels.ndim == 1 and labels.dtype.kind in "biufUS":
+            _, first_idx, ids = np.unique(labels, return_index=True, return_inverse=True)
+            # np.unique sorts the labels, so re-number them based on the order in which they were encountered
+            rank = np.empty_like(first_idx)
+            rank[np.argsort(first_idx)] = np.arange(len(first_idx))
+            return rank[ids], len(first_idx)
+        mapping = {}
+        # Numpy arrays aren't hashable, so use their bytes instead
+        ids = [mapping.setdefault(key.tobytes() if hasattr(key, "tobytes") else key, len(mapping)) for key in labels]
+        return np.array(ids, dtype=np.int64), len(mapping)
+
     def _get_stratified_splits(self, split_counts: List[int], seed: Optional[int],
                                stratify: str) -> Sequence[Iterable[int]]:
         """Get sequence(s) of indices to split from the current dataset in order to generate new dataset(s).
@@ -278,13 +314,10 @@ class FEDataset(Dataset):
         seed_offset = 0
 
         # Compute the distribution over the stratify key
-        distribution = defaultdict(list)
-        for idx in range(original_size):
-            sample = self[idx]
-            key = sample[stratify]
-            if hasattr(key, "tobytes"):
-                key = key.tobytes()  # Makes numpy arrays hashable
-            distribution[key].append(idx)
+        class_ids, n_classes = self._get_class_ids(self._get_stratify_labels(stratify))
+        order = np.argsort(class_ids, kind='stable')
+        bounds = np.cumsum(np.bincount(class_ids, minlength=n_classes))[:-1]
+        distribution = {key: indices.tolist() for key, indices in enumerate(np.split(order, bounds))}
 
         supply = {key: len(values) for key, values in distribution.items()}
         split_requests = [{key: (n_split * n_tot) / original_size
@@ -325,18 +358,17 @@ class FEDataset(Dataset):
             # Step 3: Perform the actual sampling
             split_indices = []
             for key, n_samples in split_actual.items():
-                # Dicts have preserved insertion order since python 3.6, so we can increase the seed as we use it
-                # to prevent any unintended patterns from emerging while still having consistency over multiple runs.
-                # This wouldn't work if the order of encounter of a class can change (like in a generator), but in such
-                # cases consistency would be impossible anyways.
+                # Classes are numbered in order of first appearance, so we can increase the seed as we use it to prevent
+                # any unintended patterns from emerging while still having consistency over multiple runs
                 if seed is not None:
                     indices = random.Random(seed + seed_offset).sample(distribution[key], n_samples)
                     seed_offset += 1  # We'll use a different seed each time
                 else:
                     indices = random.sample(distribution[key], n_samples)
                 split_indices.extend(indices)
-                # Sort to allow deterministic seed to work alongside sets
-                distribution[key] = sorted(list(set(distribution[key]) - set(indices)))
+                chosen = set(indices)
+                # The remaining indices stay sorted, so that the same seed always selects the same elements
+                distribution[key] = [idx for idx in distribution[key] if idx not in chosen]
             if seed is not None:
                 random.Random(seed + seed_offset).shuffle(split_indices)
                 seed_offset += 1
@@ -355,20 +387,9 @@ class FEDataset(Dataset):
         Returns:
             Which data indices to include in each split of data. len(return[i]) == split_counts[i].
         """
-        splits = []
-        original_size = self._split_length()
-        int_sum = sum(split_counts)
-        # TODO - convert to a linear congruential generator for large datasets?
-        # https://stackoverflow.com/questions/9755538/how-do-i-create-a-list-of-random-numbers-without-duplicates
-        if seed is not None:
-            indices = random.Random(seed).sample(range(original_size), int_sum)
-        else:
-            indices = random.sample(range(original_size), int_sum)
-        start = 0
-        for stop in split_counts:
-            splits.append((indices[i] for i in range(start, start + stop)))
-            start += stop
-        return splits
+        rng = random.Random(seed) if seed is not None else random
+        indices = np.array(rng.sample(range(self._split_length()), sum(split_counts)), dtype=np.int64)
+        return np.split(indices, np.cumsum(split_counts)[:-1])
 
     def _split_length(self) -> int:
         """The length of a dataset to be used for the purpose of computing splits.
@@ -403,17 +424,229 @@ class FEDataset(Dataset):
         return str(self.summary())
 
 
+class ColumnarData(MutableMapping):
+    """A dictionary-like {data_index: {<instance dictionary>}} view of data which is stored column-by-column.
+
+    This class is intentionally not @traceable.
+
+    Rather than holding a separate dictionary for every datapoint, each key is stored as a single contiguous column (a
+    numpy array, which may also be a np.memmap, a list, or a read-only Sequence which decodes elements on demand).
+    Instance dictionaries are built lazily whenever an index is accessed, and contain views into the columns rather than
+    copies. This avoids creating millions of small python objects for large datasets, and means that forked worker
+    processes do not dirty (and therefore duplicate) memory pages simply by reading the data. Subsets of the data (ex.
+    from splitting) share the same underlying columns, so np.memmap data is never loaded into memory by a split.
+
+    Since instance dictionaries are built on demand, modifying one does not modify the stored data. Elements should
+    instead be replaced by assigning a new dictionary to their index. The first such write to a column copies it (or
+    the part of it which is visible through this object), so that the caller's original arrays, read-only memmaps, and
+    any other subsets sharing the column are never modified. A value which doesn't fit into a numpy column without
+    changing its dtype or shape converts that column into a list, so values are always stored exactly as given.
+
+    ```python
+    data = ColumnarData({"x": np.ones((1000, 28, 28)), "y": [0] * 1000})
+    element = data[0]  # {"x": <28x28 view>, "y": 0}
+    element["y"] = 1  # data[0]["y"] is still 0
+    data[0] = {"x": np.zeros((28, 28)), "y": 1}  # data[0]["y"] is now 1
+    ```
+
+    Args:
+        columns: A dictionary like {"key1": <numpy array>, "key2": [list]}. Every column must have the same length.
+
+    Raises:
+        AssertionError: If the columns have differing numbers of elements.
+    """
+    columns: Dict[str, Union[np.ndarray, List[Any]]]
+    rows: Dict[str, Optional[np.ndarray]]  # Which rows of each column are visible (None means all of them, in order)
+    owned: Set[str]  # Which columns are private copies that this object may write into
+
+    def __init__(self, columns: Dict[str, Union[np.ndarray, List[Any]]]) -> None:
+        self.columns = {key: self._to_column(val) for key, val in columns.items()}
+        self.rows = {key: None for key in self.columns}
+        self.owned = set()
+        sizes = {len(column) for column in self.columns.values()}
+        assert len(sizes) <= 1, "All data columns must have the same number of elements"
+        self.size = sizes.pop() if sizes else 0
+
+    @staticmethod
+    def _to_column(value: Sequence[Any]) -> Union[np.ndarray, List[Any]]:
+        """Convert a sequence of values into a column.
+
+        Args:
+            value: The values to be stored.
+
+        Returns:
+            The `value` itself if it is a numpy array or a custom Sequence (ex. a column which decodes its elements on
+            demand), so that no copy is made. Otherwise a list of the values.
+        """
+        if isinstance(value, np.ndarray) or (isinstance(value, Sequence) and not isinstance(value, (list, tuple, str))):
+            return value
+        return list(value)
+
+    def _check_index(self, index: Any) -> None:
+        """Ensure that a given index is valid for this object.
+
+        Args:
+            index: The index to be checked.
+
+        Raises:
+            KeyError: If the `index` is out of bounds.
+        """
+        if index not in self:
+            raise KeyError(index)
+
+    def _get_rows(self, key: str) -> np.ndarray:
+        """Get the rows of a column which are visible through this object.
+
+        Args:
+            key: Which column to inspect.
+
+        Returns:
+            An array of row indices into the column.
+        """
+        rows = self.rows[key]
+        return np.arange(self.size) if rows is None else rows
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.size))
+
+    def __contains__(self, index: Any) -> bool:
+        return isinstance(index, (int, np.integer)) and 0 <= index < self.size
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        self._check_index(index)
+        return {
+            key: column[index if self.rows[key] is None else self.rows[key][index]]
+            for key, column in self.columns.items()
+        }
+
+    def __setitem__(self, index: int, value: Dict[str, Any]) -> None:
+        self._check_index(index)
+        assert value.keys() == self.columns.keys(), \
+            "the data dictionary must contain exactly the keys: {}".format(list(self.columns.keys()))
+        for key in self.columns:
+            self._own_column(key)
+            column = self.columns[key]
+            if isinstance(column, np.ndarray) and not self._fits(value[key], column):
+                column = self.columns[key] = list(column)
+            column[index] = value[key]
+
+    def _own_column(self, key: str) -> None:
+        """Ensure that a column is a private copy which can safely be written into.
+
+        Args:
+            key: Which column to copy (if it hasn't been already).
+        """
+        if key in self.owned:
+            return
+        column = self.get_column(key)
+        if column is self.columns[key]:
+            column = np.array(column) if isinstance(column, np.ndarray) else list(column)
+        self.columns[key] = column
+        self.rows[key] = None
+        self.owned.add(key)
+
+    @staticmethod
+    def _fits(value: Any, column: np.ndarray) -> bool:
+        """Check whether a value can be stored into an element of a numpy column without any loss of information.
+
+        Args:
+            value: The value to be stored.
+            column: The column in which to store the `value`.
+
+        Returns:
+            Whether the `value` has the same shape as the column's elements, and survives conversion to its dtype.
+        """
+        if column.dtype == object:
+            return False
+        value = np.asarray(value)
+        if value.shape != column.shape[1:] or value.dtype == object:
+            return False
+        if value.dtype == column.dtype:
+            return True
+        try:
+            converted = value.astype(column.dtype)
+        except (TypeError, ValueError):
+            return False
+        equal_nan = value.dtype.kind in 'fc' and column.dtype.kind in 'fc'
+        return np.array_equal(converted, value, equal_nan=equal_nan)
+
+    def __delitem__(self, index: int) -> None:
+        self._check_index(index)
+        # Indices are always contiguous, so later elements shift down to fill the gap
+        self.rows = {key: np.delete(self._get_rows(key), index) for key in self.columns}
+        self.size -= 1
+
+    def get_column(self, key: str) -> Union[np.ndarray, List[Any]]:
+        """Retrieve the column of data corresponding to a given key.
+
+        Args:
+            key: Which column to retrieve.
+
+        Returns:
+            The column corresponding to the `key`. This is the underlying storage itself (rather than a copy) unless
+            this object only covers a subset of the column's rows.
+        """
+        column, rows = self.columns[key], self.rows[key]
+        if rows is None:
+            return column
+        if isinstance(column, list):
+            return [column[row] for row in rows]
+        # Columns which decode their elements on demand can typically convert themselves to arrays far more efficiently
+        # than they can perform many random accesses
+        return np.asarray(column)[rows]
+
+    def set_column(self, key: str, value: Sequence[Any]) -> None:
+        """Add or replace the column of data corresponding to a given key.
+
+        Args:
+            key: Which column to write.
+            value: The data to be stored, with the same length as this object.
+
+        Raises:
+            AssertionError: If the `value` has the wrong length.
+        """
+        assert len(value) == self.size, \
+            "input value must be of length {}, but had length {}".format(self.size, len(value))
+        self.columns[key] = self._to_column(value)
+        self.rows[key] = None
+        self.owned.discard(key)
+
+    def take(self, indices: Sequence[int]) -> 'ColumnarData':
+        """Create a view of a subset of the data.
+
+        Args:
+            indices: Which elements to include, in order.
+
+        Returns:
+            A new ColumnarData containing the elements at the specified `indices`. It shares the underlying columns with
+            this object, so no data is copied.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        result = ColumnarData.__new__(ColumnarData)
+        result.columns = dict(self.columns)
+        result.rows = {key: self._get_rows(key)[indices] for key in self.columns}
+        result.size = len(indices)
+        result.owned = set()
+        # The columns are now shared, so neither object may write into them directly any more
+        self.owned = set()
+        return result
+
+
 @traceable(blacklist=('data', 'summary'))
 class InMemoryDataset(FEDataset):
     """A dataset abstraction to simplify the implementation of datasets which hold their data in memory.
 
     Args:
-        data: A dictionary like {data_index: {<instance dictionary>}}.
+        data: A dictionary like {data_index: {<instance dictionary>}}, or a ColumnarData object holding the same
+            information in a more memory-efficient column-oriented format.
     """
-    data: Dict[int, Dict[str, Any]]  # Index-based data dictionary
+    data: Union[Dict[int, Dict[str, Any]], ColumnarData]  # Index-based data dictionary
     summary: lru_cache
 
-    def __init__(self, data: Dict[int, Dict[str, Any]]) -> None:
+    def __init__(self, data: Union[Dict[int, Dict[str, Any]], ColumnarData]) -> None:
         self.data = data
         # Normally lru cache annotation is shared over all class instances, so calling cache_clear would reset all
         # caches (for example when calling .split()). Instead we make the lru cache per-instance
@@ -440,11 +673,19 @@ class InMemoryDataset(FEDataset):
         """
         if isinstance(index, int):
             return self.data[index]
+        elif isinstance(self.data, ColumnarData):
+            result = self.data.get_column(index)
+            if isinstance(result, np.ndarray) and result.ndim > 1:
+                # Return a read-only view rather than a copy. Modifications should be made via __setitem__
+                result = result.view()
+                result.flags.writeable = False
+                return result
+            result = list(result)
         else:
             result = [elem[index] for elem in self.data.values()]
-            if isinstance(result[0], np.ndarray):
-                return np.array(result)
-            return result
+        if isinstance(result[0], np.ndarray):
+            return np.array(result)
+        return result
 
     def __setitem__(self, key: Union[int, str], value: Union[Dict[str, Any], Sequence[Any]]) -> None:
         """Modify data in the dataset.
@@ -471,15 +712,35 @@ class InMemoryDataset(FEDataset):
         else:
             assert len(value) == len(self.data), \
                 "input value must be of length {}, but had length {}".format(len(self.data), len(value))
-            for i in range(len(self.data)):
-                self.data[i][key] = value[i]
+            if isinstance(self.data, ColumnarData):
+                self.data.set_column(key, value)
+            else:
+                for i in range(len(self.data)):
+                    self.data[i][key] = value[i]
         self.summary.cache_clear()
 
-    def _skip_init(self, data: Dict[int, Dict[str, Any]], **kwargs) -> 'InMemoryDataset':
+    def _get_stratify_labels(self, stratify: str) -> Sequence[Any]:
+        """Get the value of the stratify key for every element of the dataset.
+
+        Args:
+            stratify: A class key within the dataset.
+
+        Returns:
+            The value of the `stratify` key for every element of the dataset, in index order.
+        """
+        if type(self).__getitem__ is not InMemoryDataset.__getitem__:
+            # A subclass may be modifying the data on the fly, so the stored values can't be used directly
+            return super()._get_stratify_labels(stratify)
+        if isinstance(self.data, ColumnarData):
+            labels = self.data.get_column(stratify)
+            return labels if isinstance(labels, (np.ndarray, list)) else np.asarray(labels)
+        return [elem[stratify] for elem in self.data.values()]
+
+    def _skip_init(self, data: Union[Dict[int, Dict[str, Any]], ColumnarData], **kwargs) -> 'InMemoryDataset':
         """A helper method to create new dataset instances without invoking their __init__ methods.
 
         Args:
-            data: The data dictionary to be used in the new dataset.
+            data: The data to be used in the new dataset.
             **kwargs: Any other member variables to be assigned in the new dataset.
 
         Returns:
@@ -506,6 +767,16 @@ class InMemoryDataset(FEDataset):
             New Datasets generated by removing data at the indices specified by `splits` from the current dataset.
         """
         results = []
+        if isinstance(self.data, ColumnarData):
+            keep = np.ones(len(self.data), dtype=bool)
+            for split in splits:
+                split = list(split)
+                keep[split] = False
+                data = self.data.take(split)
+                results.append(self._skip_init(data, **{k: v for k, v in self.__dict__.items() if k not in {'data'}}))
+            self.data = self.data.take(np.flatnonzero(keep))
+            self.summary.cache_clear()
+            return results
         for split in splits:
             data = {new_idx: self.data.pop(old_idx) for new_idx, old_idx in enumerate(split)}
             results.append(self._skip_init(data, **{k: v for k, v in self.__dict__.items() if k not in {'data'}}))
@@ -542,7 +813,10 @@ class InMemoryDataset(FEDataset):
                 # If no changes, then we can relatively quickly count the unique values using self.data
                 if dtypes[key] == original_dtype and shapes[key] == original_shape and isinstance(
                         original_val, Hashable):
-                    n_unique_vals[key] = len({self.data[i][key] for i in range(len(self.data))})
+                    if isinstance(self.data, ColumnarData):
+                        n_unique_vals[key] = len(set(self.data.get_column(key)))
+                    else:
+                        n_unique_vals[key] = len({self.data[i][key] for i in range(len(self.data))})
 
         key_summary = {
             key: KeySummary(dtype=dtypes[key], num_unique_values=n_unique_vals[key] or None, shape=shapes[key])
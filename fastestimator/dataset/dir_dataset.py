@@ -16,6 +16,7 @@ import os
 from typing import Dict, Optional
 
 from fastestimator.dataset.dataset import InMemoryDataset
+from fastestimator.dataset.dir_scan import scan_dir
 from fastestimator.util.traceability_util import traceable
 
 
@@ -28,6 +29,8 @@ class DirDataset(InMemoryDataset):
         data_key: What key to assign to the data values in the data dictionary.
         file_extension: If provided then only files ending with the file_extension will be included.
         recursive_search: Whether to search within subdirectories for files.
+        manifest_dir: A directory in which to cache the results of scanning the `root_dir`, so that later constructions
+            of this dataset can skip re-listing any unmodified directories. If None, no caching will be performed.
     """
     data: Dict[int, Dict[str, str]]
 
@@ -35,22 +38,15 @@ class DirDataset(InMemoryDataset):
                  root_dir: str,
                  data_key: str = "x",
                  file_extension: Optional[str] = None,
-                 recursive_search: bool = True) -> None:
-        data = []
+                 recursive_search: bool = True,
+                 manifest_dir: Optional[str] = None) -> None:
         root_dir = os.path.normpath(root_dir)
-        if not os.path.isdir(root_dir):
-            raise AssertionError("Provided path is not a directory")
-        try:
-            for root, dirs, files in os.walk(root_dir):
-                for file_name in files:
-                    if file_name.startswith(".") or (file_extension is not None
-                                                     and not file_name.endswith(file_extension)):
-                        continue
-                    data.append(os.path.join(root, file_name))
-                if not recursive_search:
-                    break
-        except StopIteration:
-            raise ValueError("Invalid directory structure for DirDataset at root: {}".format(root_dir))
+        listings = scan_dir(root_dir, recursive=recursive_search, manifest_dir=manifest_dir)
+        data = [
+            os.path.join(root_dir, key, file_name) if key else os.path.join(root_dir, file_name)
+            for key, files in listings.items() for file_name in files
+            if file_extension is None or file_name.endswith(file_extension)
+        ]
         # Sort the data so that deterministic split will work properly
         data.sort()
         super().__init__({i: {data_key: data[i]} for i in range(len(data))})
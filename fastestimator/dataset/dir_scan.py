@@ -0,0 +1,176 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Set, Tuple
+
+_MANIFEST_VERSION = 1
+# Directories modified less than this long before being listed are listed again by the next scan. This needs to cover
+# the timestamp granularity of the file system plus any clock skew between this machine and a network file system
+_RACY_WINDOW_NS = 60 * 10**9
+
+# A directory listing: (mtime in ns, file names, sub-directory names)
+_Listing = Tuple[int, List[str], List[str]]
+
+
+def _list_dir(path: str, cached: Optional[_Listing]) -> _Listing:
+    """List the contents of a single directory, re-using a cached listing if the directory has not been modified.
+
+    Args:
+        path: The directory to list.
+        cached: A previous listing of the directory (if any).
+
+    Returns:
+        The modification time, (sorted) files, and sub-directories of the `path`. Hidden files are excluded, as are
+        symbolic links to directories (consistent with os.walk).
+    """
+    mtime = os.stat(path).st_mtime_ns
+    if cached is not None and cached[0] == mtime:
+        return cached
+    if abs(time.time_ns() - mtime) < _RACY_WINDOW_NS:
+        # File system timestamps can be coarse (and network file systems have their own clocks), so a directory which
+        # was modified recently could be modified again without its mtime changing. Such listings are marked so that
+        # they will not be trusted by later scans
+        mtime = -1
+    files, dirs = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                if not entry.name.startswith("."):
+                    files.append(entry.name)
+            elif not entry.is_symlink():
+                dirs.append(entry.name)
+    files.sort()
+    return mtime, files, dirs
+
+
+def _get_manifest_path(root_dir: str, manifest_dir: str) -> str:
+    """Determine where the manifest for a given directory should be stored.
+
+    Args:
+        root_dir: The (absolute) directory being scanned.
+        manifest_dir: The directory in which manifests are stored.
+
+    Returns:
+        The path to the manifest file.
+    """
+    return os.path.join(manifest_dir, hashlib.sha1(root_dir.encode('utf-8')).hexdigest() + ".json")
+
+
+def _load_manifest(root_dir: str, manifest_path: str) -> Dict[str, _Listing]:
+    """Load a previously saved manifest.
+
+    Args:
+        root_dir: The (absolute) directory being scanned.
+        manifest_path: The path to the manifest file.
+
+    Returns:
+        The saved listings of the `root_dir` and its sub-directories, or an empty dictionary if no (valid) manifest
+        exists.
+    """
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != _MANIFEST_VERSION or manifest.get("root") != root_dir:
+        return {}
+    return {key: tuple(listing) for key, listing in manifest["dirs"].items()}
+
+
+def _save_manifest(root_dir: str, manifest_path: str, listings: Dict[str, _Listing]) -> None:
+    """Save a manifest to disk.
+
+    Args:
+        root_dir: The (absolute) directory which was scanned.
+        manifest_path: Where to save the manifest.
+        listings: The listings of the `root_dir` and its sub-directories.
+    """
+    try:
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        # Write to a temporary file first so that concurrent readers never see a partial manifest
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(manifest_path), suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"version": _MANIFEST_VERSION, "root": root_dir, "dirs": listings}, f)
+        os.replace(tmp_path, manifest_path)
+    except OSError as err:
+        print("FastEstimator-Warn: Unable to save the directory manifest for {}: {}".format(root_dir, err))
+
+
+def scan_dir(root_dir: str,
+             recursive: bool = True,
+             manifest_dir: Optional[str] = None,
+             num_threads: Optional[int] = None) -> Dict[str, List[str]]:
+    """Find all of the files within a directory.
+
+    Directories are listed using os.scandir, with the listing of different directories spread across a thread pool
+    (which is much faster than a sequential os.walk, especially on network file systems). If a `manifest_dir` is
+    provided, the results are saved in a manifest along with the modification time of every directory. Subsequent scans
+    then only need to check the directory modification times, and will only re-list directories which have had files
+    added, removed, or renamed (or which had been modified within a minute of being listed, since their modification
+    times can't be trusted yet).
+
+    Args:
+        root_dir: The directory to scan.
+        recursive: Whether to search within sub-directories.
+        manifest_dir: Where to save directory manifests, or None (the default) to disable manifest caching.
+        num_threads: How many threads to use. Defaults to a multiple of the number of CPUs.
+
+    Returns:
+        A dictionary mapping the path of every directory (relative to `root_dir`, or "" for the `root_dir` itself) to
+        a sorted list of the names of files which it contains. Hidden files are not included.
+
+    Raises:
+        AssertionError: If the `root_dir` is not a directory.
+    """
+    root_dir = os.path.abspath(root_dir)
+    if not os.path.isdir(root_dir):
+        raise AssertionError("Provided path is not a directory")
+    manifest_path = _get_manifest_path(root_dir, manifest_dir) if manifest_dir else None
+    cached = _load_manifest(root_dir, manifest_path) if manifest_path else {}
+    listings: Dict[str, _Listing] = {}
+    with ThreadPoolExecutor(max_workers=num_threads or min(32, 4 * (os.cpu_count() or 1))) as pool:
+        pending: Set[Future] = set()
+        keys: Dict[Future, str] = {}
+
+        def submit(key: str) -> None:
+            future = pool.submit(_list_dir, os.path.join(root_dir, key), cached.get(key))
+            keys[future] = key
+            pending.add(future)
+
+        submit("")
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = keys.pop(future)
+                listings[key] = future.result()
+                if recursive:
+                    for sub_dir in listings[key][2]:
+                        submit(os.path.join(key, sub_dir))
+    if recursive:
+        changed = listings.keys() != cached.keys()
+    else:
+        # Keep the entries which weren't visited by this scan so that they can still be used by later recursive scans
+        listings = {**cached, **listings}
+        changed = False
+    if manifest_path and (changed or any(cached.get(key) is not listing for key, listing in listings.items())):
+        _save_manifest(root_dir, manifest_path, listings)
+    if not recursive:
+        listings = {"": listings[""]}
+    return {key: files for key, (_, files, _) in listings.items()}
@@ -13,10 +13,10 @@
 # limitations under the License.
 # ==============================================================================
 import os
-from collections import deque
 from typing import Any, Dict, Optional
 
 from fastestimator.dataset.dataset import DatasetSummary, InMemoryDataset
+from fastestimator.dataset.dir_scan import scan_dir
 from fastestimator.util.traceability_util import traceable
 
 
@@ -30,6 +30,8 @@ class LabeledDirDataset(InMemoryDataset):
         label_key: What key to assign to the label values in the data dictionary.
         label_mapping: A dictionary defining the mapping to use. If not provided will map classes to int labels.
         file_extension: If provided then only files ending with the file_extension will be included.
+        manifest_dir: A directory in which to cache the results of scanning the `root_dir`, so that later constructions
+            of this dataset can skip re-listing any unmodified directories. If None, no caching will be performed.
     """
     data: Dict[int, Dict[str, Any]]
     mapping: Dict[str, Any]
@@ -40,19 +42,13 @@ class LabeledDirDataset(InMemoryDataset):
                  data_key: str = "x",
                  label_key: str = "y",
                  label_mapping: Optional[Dict[str, Any]] = None,
-                 file_extension: Optional[str] = None) -> None:
+                 file_extension: Optional[str] = None,
+                 manifest_dir: Optional[str] = None) -> None:
         # Recursively find all the data
         root_dir = os.path.normpath(root_dir)
         data = {}
-        keys = deque([""])
-        for _, dirs, entries in os.walk(root_dir):
-            key = keys.popleft()
-            dirs = [os.path.join(key, d) for d in dirs]
-            dirs.reverse()
-            keys.extendleft(dirs)
-            entries = [
-                os.path.join(key, e) for e in entries if not e.startswith(".") and e.endswith(file_extension or "")
-            ]
+        for key, entries in sorted(scan_dir(root_dir, manifest_dir=manifest_dir).items()):
+            entries = [os.path.join(key, e) for e in entries if e.endswith(file_extension or "")]
             if entries:
                 data[key] = entries
         # Compute label mappings
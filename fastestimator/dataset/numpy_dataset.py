@@ -16,7 +16,7 @@ from typing import Dict, List, Union
 
 import numpy as np
 
-from fastestimator.dataset.dataset import InMemoryDataset
+from fastestimator.dataset.dataset import ColumnarData, InMemoryDataset
 from fastestimator.util.traceability_util import traceable
 
 
@@ -24,6 +24,12 @@ from fastestimator.util.traceability_util import traceable
 class NumpyDataset(InMemoryDataset):
     """A dataset constructed from a dictionary of Numpy data or list of data.
 
+    The data is stored column-by-column, so numpy arrays are used directly rather than being copied. This means that
+    np.memmap arrays may also be provided in order to leave large datasets on disk until they are needed. Elements are
+    built on demand, so modifying an element which was retrieved from the dataset does not change the dataset. To do
+    that, assign a new dictionary to the element's index instead (which never writes into the arrays that were provided
+    here).
+
     Args:
         data: A dictionary of data like {"key1": <numpy array>, "key2": [list]}.
     Raises:
@@ -43,4 +49,4 @@ class NumpyDataset(InMemoryDataset):
                 assert size == current_size, "All data arrays must have the same number of elements"
             else:
                 size = current_size
-        super().__init__({i: {k: v[i] for k, v in data.items()} for i in range(size)})
+        super().__init__(ColumnarData(data))
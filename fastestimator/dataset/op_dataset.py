@@ -12,9 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import hashlib
+import json
+import os
+import shutil
+import tempfile
 from copy import deepcopy
-from typing import Any, Dict, List, Mapping, Optional, Set
+from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Set, Union
 
+import jsonpickle
 import numpy as np
 from torch.utils.data import Dataset
 
@@ -24,6 +30,18 @@ from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import pad_batch
 
 
+def _is_vectorized(op: NumpyOp) -> bool:
+    """Determine whether a given op provides its own (vectorized) implementation of `forward_batch`.
+
+    Args:
+        op: The op to inspect.
+
+    Returns:
+        True iff the `op` overrides NumpyOp.forward_batch.
+    """
+    return type(op).forward_batch is not NumpyOp.forward_batch
+
+
 class _DelayedDeepDict(dict):
     """A class to perform delayed deep copying from another dictionary.
 
@@ -93,9 +111,200 @@ class _DelayedDeepDict(dict):
         self.base = {}
         # We need to mark all of the arrays as writeable again to avoid warnings from pytorch. Once torch wraps the
         # arrays, in-place edits on the torch tensors do not impact the numpy arrays anyways.
-        for val in self.values():
-            if isinstance(val, np.ndarray):
-                val.flags.writeable = True
+        for key, val in self.items():
+            if isinstance(val, np.ndarray) and not val.flags.writeable:
+                try:
+                    val.flags.writeable = True
+                except ValueError:
+                    # The array is a view of read-only memory (ex. a np.memmap opened in 'r' mode), so copy it instead
+                    self[key] = np.array(val)
+
+
+def _hash_element(hasher: Any, element: Mapping[str, Any]) -> None:
+    """Add the contents of a dataset element to a hash.
+
+    Args:
+        hasher: The hashlib object to be updated.
+        element: The dataset element to be hashed.
+    """
+    for key in sorted(element):
+        val = element[key]
+        hasher.update(str(key).encode())
+        if isinstance(val, np.ndarray):
+            hasher.update("{}{}".format(val.dtype, val.shape).encode())
+            hasher.update(np.ascontiguousarray(val).tobytes())
+        elif val is None or isinstance(val, (str, bytes, int, float, np.generic)):
+            hasher.update(repr(val).encode())
+        else:
+            # The repr of arbitrary objects may contain memory addresses, which would never match between runs
+            hasher.update(type(val).__qualname__.encode())
+
+
+class _OpCache:
+    """A memory-mapped on-disk cache for the outputs of a sequence of deterministic NumpyOps.
+
+    This class is intentionally not @traceable.
+
+    Every key written by the cached ops is stored in its own .npy file of shape [<num_elements>, <element shape>], which
+    each worker process opens as a memmap. A separate flag array records which dataset indices have already been
+    filled. The cache location is derived from the execution mode, a signature of the cached ops, and a fingerprint of
+    the dataset (its type, length, and a few of its elements), so modifying the cached ops or pointing them at different
+    data will cause a new cache to be built rather than re-using stale data. The fingerprint can't detect edits to
+    elements which it doesn't sample though, so use a fresh `cache_dir` if a dataset is modified in place.
+
+    Args:
+        cache_dir: The directory in which to store the cached data.
+        ops: The deterministic ops whose outputs should be cached.
+        mode: What mode the system is currently running in ('train', 'eval', 'test', or 'infer').
+        dataset: The dataset being cached.
+    """
+    warned: Set[str] = set()
+
+    def __init__(self, cache_dir: str, ops: List[NumpyOp], mode: str, dataset: Dataset) -> None:
+        self.ops = ops
+        self.mode = mode
+        self.size = len(dataset)
+        self.keys = sorted({key for op in ops for key in op.outputs})
+        self.path = os.path.join(cache_dir, mode, self._get_signature(ops, dataset))
+        self.enabled = True
+        # The memmaps are opened lazily so that every worker process gets its own file handles
+        self.arrays = None
+        self.filled = None
+
+    @staticmethod
+    def _get_signature(ops: List[NumpyOp], dataset: Dataset) -> str:
+        """Compute a signature which uniquely identifies a sequence of ops applied to a given dataset.
+
+        Args:
+            ops: The ops to be considered.
+            dataset: The dataset to which the `ops` are applied.
+
+        Returns:
+            A hex digest summarizing the `ops` configuration and the `dataset` fingerprint.
+        """
+        size = len(dataset)
+        hasher = hashlib.md5(str(size).encode())
+        hasher.update("{}.{}".format(type(dataset).__module__, type(dataset).__qualname__).encode())
+        # Sources such as file paths are usually plain string attributes (ex. CSVDataset.file_path)
+        for key, val in sorted(getattr(dataset, '__dict__', {}).items()):
+            if isinstance(val, str) and not key.startswith('_'):
+                hasher.update("{}={}".format(key, val).encode())
+        for index in sorted({0, size // 2, size - 1}):
+            if index >= 0:
+                _hash_element(hasher, dataset[index])
+        for op in ops:
+            # in_place_edits may flip at runtime, and private variables (such as traceability info) contain object ids
+            config = {
+                key: val
+                for key, val in op.__dict__.items() if not key.startswith('_') and key != 'in_place_edits'
+            }
+            hasher.update("{}.{}".format(type(op).__module__, type(op).__qualname__).encode())
+            hasher.update(jsonpickle.dumps(config, unpicklable=False).encode())
+        return hasher.hexdigest()
+
+    def _disable(self, reason: str) -> None:
+        """Turn off the cache, warning the user about why this happened.
+
+        Args:
+            reason: Why the cache cannot be used.
+        """
+        self.enabled = False
+        if self.path not in self.warned:
+            self.warned.add(self.path)
+            print("FastEstimator-Warn: Pipeline caching is disabled for {} mode since {}".format(self.mode, reason))
+
+    def initialize(self, sample: Dict[str, Any]) -> None:
+        """Allocate the on-disk storage for the cache, unless a matching cache already exists.
+
+        This must be invoked from the main process before any worker processes are started. Several processes (ex.
+        every rank of a distributed run) may initialize the same cache at once, so the storage is built in a temporary
+        directory and then renamed into place. Whichever process renames first wins, and the others use its cache
+        rather than overwriting files which may already be in use.
+
+        Args:
+            sample: An element of the dataset which will be used to infer the shapes and dtypes of the cached outputs.
+        """
+        if os.path.exists(os.path.join(self.path, "keys.json")):
+            return
+        data = _DelayedDeepDict(sample)
+        forward_numpyop(self.ops, data, {'mode': self.mode})
+        for key in self.keys:
+            if not isinstance(data[key], np.ndarray):
+                self._disable("the key '{}' is of type {} rather than np.ndarray".format(key, type(data[key])))
+                return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=os.path.dirname(self.path), prefix=".tmp-")
+        try:
+            for idx, key in enumerate(self.keys):
+                val = data[key]
+                np.lib.format.open_memmap(os.path.join(tmp_path, "{}.npy".format(idx)),
+                                          mode='w+',
+                                          dtype=val.dtype,
+                                          shape=(self.size, ) + val.shape)
+            np.lib.format.open_memmap(os.path.join(tmp_path, "filled.npy"),
+                                      mode='w+',
+                                      dtype=np.uint8,
+                                      shape=(self.size, ))
+            with open(os.path.join(tmp_path, "keys.json"), 'w') as file:
+                json.dump(self.keys, file)
+            try:
+                os.replace(tmp_path, self.path)
+            except OSError:
+                # Normally another process finished building the same cache first, in which case it is used instead
+                if not os.path.exists(os.path.join(self.path, "keys.json")):
+                    self._disable("the cache directory '{}' is incomplete and could not be replaced".format(self.path))
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _open(self) -> bool:
+        """Open the memmaps backing this cache (if they are not already open).
+
+        Returns:
+            Whether the cache is available for use.
+        """
+        if self.enabled and self.arrays is None:
+            if not os.path.exists(os.path.join(self.path, "keys.json")):
+                self._disable("the cache directory '{}' was not initialized".format(self.path))
+                return False
+            self.arrays = {
+                key: np.load(os.path.join(self.path, "{}.npy".format(idx)), mmap_mode='r+')
+                for idx, key in enumerate(self.keys)
+            }
+            self.filled = np.load(os.path.join(self.path, "filled.npy"), mmap_mode='r+')
+        return self.enabled
+
+    def load(self, index: int) -> Optional[Dict[str, np.ndarray]]:
+        """Retrieve the cached outputs for a given dataset index.
+
+        Args:
+            index: Which datapoint to retrieve.
+
+        Returns:
+            The cached outputs, or None if the `index` has not been cached yet.
+        """
+        if not self._open() or not self.filled[index]:
+            return None
+        # Copy out of the memmap so that in-place edits by later ops cannot corrupt the cache
+        return {key: np.array(arr[index]) for key, arr in self.arrays.items()}
+
+    def store(self, index: int, data: MutableMapping[str, Any]) -> None:
+        """Write the outputs of the cached ops for a given dataset index into the cache.
+
+        Args:
+            index: Which datapoint is being stored.
+            data: The data dictionary after the cached ops have been applied to it.
+        """
+        if not self._open():
+            return
+        for key, arr in self.arrays.items():
+            val = data[key]
+            if not isinstance(val, np.ndarray) or val.shape != arr.shape[1:] or val.dtype != arr.dtype:
+                self._disable("the key '{}' does not have a consistent shape and dtype".format(key))
+                return
+        for key, arr in self.arrays.items():
+            arr[index] = data[key]
+        # The flag is set only after all of the data is written so that a partial write will never be read back
+        self.filled[index] = 1
 
 
 @traceable()
@@ -113,6 +322,11 @@ class OpDataset(Dataset):
         deep_remainder: Whether data which is not modified by Ops should be deep copied or not. This argument is used to
             help with RAM management, but end users can almost certainly ignore it.
         shuffle: Whether to shuffle batched datasets every epoch.
+        cache_dir: A directory in which to cache the outputs of the longest prefix of `ops` which are all deterministic
+            (see NumpyOp.deterministic). If None, no caching will be performed. Caching is not supported for batched
+            or self-shuffling datasets, since their indices do not consistently map to the same data, and is skipped
+            for empty datasets.
+        seed: A random seed to use when shuffling batched datasets, or None to shuffle them randomly.
     """
     def __init__(self,
                  dataset: Dataset,
@@ -120,24 +334,40 @@ class OpDataset(Dataset):
                  mode: str,
                  output_keys: Optional[Set[str]] = None,
                  deep_remainder: bool = True,
-                 shuffle: bool = True) -> None:
+                 shuffle: bool = True,
+                 cache_dir: Optional[str] = None,
+                 seed: Optional[int] = None) -> None:
         self.dataset = dataset
         if hasattr(self.dataset, "reset_index_maps") and shuffle:
-            self.dataset.reset_index_maps()
+            self.dataset.reset_index_maps(seed)
         self.ops = ops
         self.mode = mode
         self.output_keys = output_keys
         self.deep_remainder = deep_remainder
+        self.n_cached = 0
+        self.cache = None
+        if cache_dir is not None and len(self.dataset) > 0 and not getattr(self.dataset, "fe_batch", 0) \
+                and not getattr(self.dataset, "fe_shuffle", False):
+            for op in self.ops:
+                if not op.deterministic:
+                    break
+                self.n_cached += 1
+            if self.n_cached:
+                self.cache = _OpCache(cache_dir, self.ops[:self.n_cached], mode, self.dataset)
+                self.cache.initialize(self.dataset[0])
 
-    def __getitem__(self, index: int) -> Mapping[str, Any]:
+    def __getitem__(self, index: Union[int, List[int]]) -> Mapping[str, Any]:
         """Fetch a data instance at a specified index, and apply transformations to it.
 
         Args:
-            index: Which datapoint to retrieve.
+            index: Which datapoint to retrieve. If a list of indices is provided, the corresponding datapoints will be
+                processed together and returned as a single batch.
 
         Returns:
             The data dictionary from the specified index, with transformations applied.
         """
+        if isinstance(index, list):
+            return self._get_batch(index)
         item = self.dataset[index]
         if isinstance(item, list):
             # BatchDataset may randomly sample the same elements multiple times, so need to avoid reprocessing
@@ -157,10 +387,89 @@ class OpDataset(Dataset):
                 pad_batch(results, self.dataset.pad_value)
             results = {key: np.array([result[key] for result in results]) for key in results[0]}
         else:
-            results = _DelayedDeepDict(item)
-            forward_numpyop(self.ops, results, {'mode': self.mode})
+            results = self._get_cached(index, item)
+            forward_numpyop(self.ops[self.n_cached:], results, {'mode': self.mode})
             results.finalize(retain=self.output_keys, deep_remainder=self.deep_remainder)
         return results
 
+    def _get_cached(self, index: int, item: Dict[str, Any]) -> _DelayedDeepDict:
+        """Wrap a datapoint for processing, applying the cached prefix of ops to it (if any).
+
+        Args:
+            index: Which datapoint is being processed.
+            item: The raw datapoint from the base dataset.
+
+        Returns:
+            The wrapped datapoint, with the first `n_cached` ops already applied.
+        """
+        if not self.cache:
+            return _DelayedDeepDict(item)
+        cached = self.cache.load(index)
+        if cached is None:
+            results = _DelayedDeepDict(item)
+            forward_numpyop(self.ops[:self.n_cached], results, {'mode': self.mode})
+            self.cache.store(index, results)
+        else:
+            results = _DelayedDeepDict({**item, **cached})
+        return results
+
+    def _get_batch(self, indices: List[int]) -> Dict[str, Any]:
+        """Fetch a batch of data instances, running vectorized ops once over the whole batch.
+
+        Consecutive ops which implement a vectorized `forward_batch` are executed together on stacked arrays, while all
+        other ops are executed element-by-element as usual.
+
+        Args:
+            indices: Which datapoints to retrieve.
+
+        Returns:
+            The batched data dictionary, with transformations applied.
+        """
+        samples = [self._get_cached(index, self.dataset[index]) for index in indices]
+        ops = self.ops[self.n_cached:]
+        state = {'mode': self.mode}
+        start = 0
+        while start < len(ops):
+            vectorized = _is_vectorized(ops[start])
+            end = start + 1
+            while end < len(ops) and _is_vectorized(ops[end]) == vectorized:
+                end += 1
+            if vectorized:
+                self._forward_vectorized(ops[start:end], samples, state)
+            else:
+                for sample in samples:
+                    forward_numpyop(ops[start:end], sample, state)
+            start = end
+        for sample in samples:
+            sample.finalize(retain=self.output_keys, deep_remainder=self.deep_remainder)
+        if hasattr(self.dataset, "pad_value") and self.dataset.pad_value is not None:
+            pad_batch(samples, self.dataset.pad_value)
+        return {key: np.array([sample[key] for sample in samples]) for key in samples[0]}
+
+    @staticmethod
+    def _forward_vectorized(ops: List[NumpyOp], samples: List[_DelayedDeepDict], state: Dict[str, Any]) -> None:
+        """Run a sequence of vectorized ops over a list of samples, modifying the samples in place.
+
+        Args:
+            ops: The ops to be executed. Each of them must implement a vectorized `forward_batch`.
+            samples: The data dictionaries of the elements in the batch.
+            state: Information about the current execution context, ex. {"mode": "train"}.
+        """
+        inputs, outputs = [], []
+        for op in ops:
+            inputs.extend(key for key in op.inputs if key not in outputs and key not in inputs)
+            outputs.extend(key for key in op.outputs if key not in outputs)
+        try:
+            batch = {key: np.stack([sample[key] for sample in samples]) for key in inputs}
+        except ValueError:
+            # The inputs have inconsistent shapes (ex. before padding), so they cannot be stacked into a batch
+            for sample in samples:
+                forward_numpyop(ops, sample, state)
+            return
+        forward_numpyop(ops, batch, state, batched=True)
+        for key in outputs:
+            for sample, value in zip(samples, batch[key]):
+                sample[key] = value
+
     def __len__(self):
         return len(self.dataset)
@@ -0,0 +1,276 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import ctypes
+import math
+import multiprocessing as mp
+import pickle
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import torch
+from torch.utils.data import Dataset, Sampler
+from torch.utils.data.dataloader import default_collate, default_convert
+
+from fastestimator.dataset.op_dataset import OpDataset
+from fastestimator.util.distributed import get_rank, get_world_size
+
+if TYPE_CHECKING:
+    from fastestimator.pipeline import Pipeline
+
+
+class _SharedConfig:
+    """A small value which the main process can publish to (already running) worker processes.
+
+    This class is intentionally not @traceable.
+
+    The value is stored in shared memory which is allocated before any workers are forked, so every worker sees the
+    latest value without any messages needing to be sent to it.
+
+    Args:
+        capacity: The maximum size of the (pickled) value in bytes.
+    """
+    def __init__(self, capacity: int = 2**16) -> None:
+        self.capacity = capacity
+        self.lock = mp.Lock()
+        self.version = mp.RawValue(ctypes.c_int64, 0)
+        self.size = mp.RawValue(ctypes.c_int64, 0)
+        self.buffer = mp.RawArray(ctypes.c_char, capacity)
+
+    def write(self, value: Any) -> int:
+        """Publish a new value.
+
+        Args:
+            value: The value to publish.
+
+        Returns:
+            The version number of the new value.
+
+        Raises:
+            ValueError: If the `value` is too large to be stored.
+        """
+        payload = pickle.dumps(value)
+        if len(payload) > self.capacity:
+            raise ValueError("Pipeline configuration is too large to share with persistent workers ({} bytes)".format(
+                len(payload)))
+        with self.lock:
+            self.buffer[:len(payload)] = payload
+            self.size.value = len(payload)
+            self.version.value += 1
+            return self.version.value
+
+    def read(self, known_version: int) -> Optional[Tuple[int, Any]]:
+        """Read the latest value, if it is newer than a given version.
+
+        Args:
+            known_version: The version which the caller already has.
+
+        Returns:
+            The latest version number and value, or None if the `known_version` is already up to date.
+        """
+        if self.version.value == known_version:
+            return None
+        with self.lock:
+            return self.version.value, pickle.loads(self.buffer[:self.size.value])
+
+
+class EpochSampler(Sampler):
+    """A sampler whose size, batching, and shuffling can be changed after a DataLoader has been built around it.
+
+    This class is intentionally not @traceable.
+
+    The sampler always yields lists of indices, so it should be used with a DataLoader whose `batch_size` is None.
+    """
+    def __init__(self) -> None:
+        self.length = 0
+        self.batch_size: Optional[int] = None
+        self.shuffle = False
+        self.drop_last = False
+        self.num_replicas = 1
+        self.rank = 0
+        self.pad = True
+        self.seed: Optional[int] = None
+
+    def configure(self,
+                  length: int,
+                  batch_size: Optional[int],
+                  shuffle: bool,
+                  drop_last: bool,
+                  num_replicas: int = 1,
+                  rank: int = 0,
+                  pad: bool = True,
+                  seed: Optional[int] = None) -> None:
+        """Change the behavior of the sampler for subsequent iterations.
+
+        Args:
+            length: The number of elements in the dataset.
+            batch_size: How many indices to yield at a time, or None to yield indices one at a time (though still
+                wrapped in a list).
+            shuffle: Whether to shuffle the indices.
+            drop_last: Whether to drop the last batch if it is incomplete.
+            num_replicas: How many processes the indices should be split between (for distributed training).
+            rank: Which process's share of the indices to yield.
+            pad: Whether to repeat some indices if necessary so that every process gets the same number of them (like a
+                DistributedSampler). This is required during training, but otherwise double counts some elements.
+            seed: A random seed to shuffle with. This must be identical in every process when `num_replicas` > 1.
+        """
+        self.length = length
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.pad = pad
+        self.seed = seed
+
+    def _num_samples(self) -> int:
+        if self.pad:
+            return math.ceil(self.length / self.num_replicas)
+        return len(range(self.rank, self.length, self.num_replicas))
+
+    def __len__(self) -> int:
+        num_samples = self._num_samples()
+        if self.batch_size is None:
+            return num_samples
+        if self.drop_last:
+            return num_samples // self.batch_size
+        return (num_samples + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self) -> Iterator[List[int]]:
+        if self.shuffle:
+            generator = None
+            if self.seed is not None:
+                generator = torch.Generator()
+                generator.manual_seed(self.seed)
+            indices = torch.randperm(self.length, generator=generator).tolist()
+        else:
+            indices = list(range(self.length))
+        if self.num_replicas > 1 and indices:
+            if self.pad:
+                total = self._num_samples() * self.num_replicas
+                indices = (indices * math.ceil(total / len(indices)))[:total]
+            indices = indices[self.rank::self.num_replicas]
+        step = self.batch_size or 1
+        for batch_idx in range(len(self)):
+            yield indices[batch_idx * step:(batch_idx + 1) * step]
+
+
+class PersistentOpDataset(Dataset):
+    """An OpDataset wrapper which long-lived DataLoader workers can use across many epochs.
+
+    This class is intentionally not @traceable.
+
+    Worker processes are forked with a reference to the Pipeline which owns this object. Whenever the Pipeline is
+    re-targeted to a new epoch it publishes a small description of that epoch (rather than the datasets or ops
+    themselves, which may be huge or unpicklable). Each worker then rebuilds its own OpDataset from the Pipeline, using
+    whatever datasets, ops, and batch size are scheduled for the new epoch.
+
+    This class should not be directly instantiated by the end user. The fe.Pipeline will automatically use it when its
+    `persistent_workers` argument is enabled.
+
+    Args:
+        pipeline: The Pipeline which owns this dataset.
+        mode: The mode which this dataset serves.
+    """
+    def __init__(self, pipeline: 'Pipeline', mode: str) -> None:
+        self.pipeline = pipeline
+        self.mode = mode
+        self.config = _SharedConfig()
+        self.version = 0
+        self.op_dataset: Optional[OpDataset] = None
+        self.batch_size: Optional[int] = None
+        self.sample_shuffle = False
+        self.vectorize = False
+        self.collate_fn: Optional[Callable] = None
+
+    @property
+    def dataset(self) -> Dataset:
+        """The dataset currently being wrapped."""
+        return self.op_dataset.dataset
+
+    def retarget(self, epoch: int, shuffle: bool, output_keys: Optional[Set[str]], seed: int,
+                 sampler: EpochSampler) -> None:
+        """Point this dataset (in every process) at a new epoch.
+
+        Args:
+            epoch: The epoch which should be loaded.
+            shuffle: Whether the data should be shuffled.
+            output_keys: What keys can be produced from the pipeline. If None, all keys will be considered.
+            seed: A random seed which ensures that datasets which shuffle themselves do so identically in every process.
+            sampler: The sampler which provides indices to this dataset, to be re-configured for the new epoch. During
+                distributed training it will only provide the share of the indices which belongs to this process.
+        """
+        config = (epoch, shuffle, output_keys, seed)
+        self._build(config)
+        self.version = self.config.write(config)
+        sampler.configure(length=len(self.op_dataset),
+                          batch_size=self.batch_size,
+                          shuffle=self.sample_shuffle,
+                          drop_last=self.pipeline.drop_last,
+                          num_replicas=get_world_size(),
+                          rank=get_rank(),
+                          pad=self.mode == "train",
+                          seed=seed)
+
+    def _build(self, config: Tuple[int, bool, Optional[Set[str]], int]) -> None:
+        """Build the OpDataset for a given epoch configuration.
+
+        Args:
+            config: The epoch, shuffle, output_keys, and seed to use.
+        """
+        epoch, shuffle, output_keys, seed = config
+        self.op_dataset, self.batch_size, self.sample_shuffle, self.vectorize, self.collate_fn = \
+            self.pipeline._build_op_dataset(self.mode, epoch, shuffle, output_keys, seed)
+
+    def _sync(self) -> None:
+        """Make sure that this process is using the latest epoch configuration."""
+        update = self.config.read(self.version)
+        if update is not None:
+            self.version, config = update
+            self._build(config)
+
+    def __len__(self) -> int:
+        return len(self.op_dataset)
+
+    @staticmethod
+    def collate(batch: Dict[str, Any]) -> Dict[str, Any]:
+        """The collate function which DataLoaders should use with this dataset, since it collates its own batches.
+
+        Args:
+            batch: A batch of data produced by this dataset.
+
+        Returns:
+            The `batch`, unchanged.
+        """
+        return batch
+
+    def __getitem__(self, index: Union[int, List[int]]) -> Dict[str, Any]:
+        """Fetch data from the dataset.
+
+        Args:
+            index: A single index, in which case the corresponding (uncollated) element is returned exactly as the
+                underlying OpDataset would. Otherwise a list of indices from an EpochSampler, in which case a collated
+                batch is returned.
+
+        Returns:
+            The requested data.
+        """
+        self._sync()
+        if not isinstance(index, list):
+            return self.op_dataset[index]
+        if self.batch_size is None:
+            # The underlying dataset is already batched
+            return (self.collate_fn or default_convert)(self.op_dataset[index[0]])
+        if self.vectorize:
+            return default_convert(self.op_dataset[index])
+        return (self.collate_fn or default_collate)([self.op_dataset[idx] for idx in index])
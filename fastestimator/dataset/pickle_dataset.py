@@ -16,7 +16,7 @@ import os
 
 import pandas as pd
 
-from fastestimator.dataset.dataset import InMemoryDataset
+from fastestimator.dataset.dataset import ColumnarData, InMemoryDataset
 from fastestimator.util.traceability_util import traceable
 
 
@@ -34,4 +34,4 @@ class PickleDataset(InMemoryDataset):
     def __init__(self, file_path: str) -> None:
         df = pd.read_pickle(file_path)
         self.parent_path = os.path.dirname(file_path)
-        super().__init__(df.to_dict(orient='index'))
+        super().__init__(ColumnarData({key: df[key].to_numpy() for key in df.columns}))
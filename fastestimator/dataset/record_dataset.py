@@ -0,0 +1,319 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import os
+import pickle
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from torch.utils.data import DataLoader
+
+from fastestimator.dataset.dataset import DatasetSummary, FEDataset, KeySummary
+from fastestimator.dataset.op_dataset import OpDataset
+from fastestimator.op.numpyop.numpyop import NumpyOp
+from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import get_shape, get_type
+
+_EXTENSION = ".ferec"
+_MAGIC = b"FEREC\x00\x01\x00"
+_FOOTER = np.dtype('<u8')
+
+
+def _identity(data: Any) -> Any:
+    """A collate function which leaves data unchanged.
+
+    Args:
+        data: The data to be collated.
+
+    Returns:
+        The `data`.
+    """
+    return data
+
+
+def _read_index(file: BinaryIO, path: str) -> np.ndarray:
+    """Read the index footer of a record shard.
+
+    Args:
+        file: An open handle to the shard.
+        path: The path to the shard (for error messages).
+
+    Returns:
+        The byte offset of every record within the shard, followed by the offset at which the index begins.
+
+    Raises:
+        ValueError: If the file is not a valid record shard.
+    """
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    if size < 2 * len(_MAGIC) + _FOOTER.itemsize:
+        raise ValueError("{} is not a valid record shard".format(path))
+    file.seek(size - len(_MAGIC) - _FOOTER.itemsize)
+    n_records = int(np.frombuffer(file.read(_FOOTER.itemsize), dtype=_FOOTER)[0])
+    if file.read(len(_MAGIC)) != _MAGIC:
+        raise ValueError("{} is not a valid record shard".format(path))
+    file.seek(size - len(_MAGIC) - (n_records + 2) * _FOOTER.itemsize)
+    return np.frombuffer(file.read((n_records + 1) * _FOOTER.itemsize), dtype=_FOOTER).astype(np.int64)
+
+
+def write_records(dataset: FEDataset,
+                  save_dir: str,
+                  ops: Optional[List[NumpyOp]] = None,
+                  mode: str = "train",
+                  max_shard_bytes: int = 256 * 2**20,
+                  num_process: int = 0) -> List[str]:
+    """Pack a dataset into a small number of large record shards which can be read by a RecordDataset.
+
+    Reading data from many small files (ex. one image per sample) is typically dominated by file open latency,
+    especially on network file systems. This function writes every element of a `dataset` into large shard files
+    instead, each of which ends with an index footer so that individual records can still be accessed randomly.
+
+    ```python
+    train_data = fe.dataset.LabeledDirDataset("/data/train")
+    write_records(train_data, "/data/train_records", ops=[ReadImage(inputs="x", outputs="x")])
+    train_data = fe.dataset.RecordDataset("/data/train_records")
+    ```
+
+    Args:
+        dataset: The dataset to be written.
+        save_dir: The directory into which to write the shards. It will be created if it does not exist.
+        ops: NumpyOps to apply to each element before it is written. These should be deterministic (see
+            NumpyOp.deterministic), since their results will be frozen into the records.
+        mode: The mode in which to run the `ops`.
+        max_shard_bytes: The approximate maximum size of each shard. A new shard will be started once this size is
+            exceeded.
+        num_process: How many worker processes to use in order to load (and apply `ops` to) the data.
+
+    Returns:
+        The paths of the shards which were written.
+
+    Raises:
+        ValueError: If the `dataset` produces batches of data rather than individual elements.
+    """
+    ops = ops or []
+    for op in ops:
+        if not op.deterministic:
+            print("FastEstimator-Warn: {} is not deterministic, so its randomness will be frozen into the records "
+                  "written to {}".format(type(op).__name__, save_dir))
+    if isinstance(dataset[0], list):
+        raise ValueError("write_records does not support batched datasets. Write their component datasets instead.")
+    os.makedirs(save_dir, exist_ok=True)
+    loader = DataLoader(OpDataset(dataset, ops, mode, deep_remainder=False, shuffle=False),
+                        batch_size=None,
+                        shuffle=False,
+                        num_workers=num_process,
+                        collate_fn=_identity)
+    paths = []
+    file = None
+    offsets = []
+    for sample in loader:
+        if file is None:
+            paths.append(os.path.join(save_dir, "records-{:05d}{}".format(len(paths), _EXTENSION)))
+            file = open(paths[-1], 'wb')
+            file.write(_MAGIC)
+            offsets = []
+        offsets.append(file.tell())
+        pickle.dump(dict(sample), file, protocol=pickle.HIGHEST_PROTOCOL)
+        if file.tell() >= max_shard_bytes:
+            _close_shard(file, offsets)
+            file = None
+    if file is not None:
+        _close_shard(file, offsets)
+    return paths
+
+
+def _close_shard(file: BinaryIO, offsets: List[int]) -> None:
+    """Write the index footer of a record shard, and then close it.
+
+    Args:
+        file: The open shard.
+        offsets: The byte offset of every record which was written into the shard.
+    """
+    offsets.append(file.tell())
+    file.write(np.array(offsets, dtype=_FOOTER).tobytes())
+    file.write(np.array([len(offsets) - 1], dtype=_FOOTER).tobytes())
+    file.write(_MAGIC)
+    file.close()
+
+
+@traceable(blacklist=('shard_ids', 'starts', 'ends', 'indices', 'order', 'summary', '_handles', '_pid'))
+class RecordDataset(FEDataset):
+    """A dataset which reads data from record shards written by `write_records`.
+
+    Records are read through a single open file handle per shard (per process), so that loading an element does not
+    require any file system metadata operations. By default elements are accessed randomly using the index footer of
+    each shard. If `shard_shuffle` is enabled, the dataset instead shuffles itself every epoch by randomly ordering the
+    shards, and then shuffling records within consecutive windows of `shuffle_buffer` elements. The fe.Pipeline then
+    reads the data in that order, so that the underlying files are mostly read sequentially. This is much faster on
+    network file systems and spinning disks, at the cost of a less thorough shuffle.
+
+    Args:
+        root_dir: The directory containing the record shards.
+        shard_shuffle: Whether to use shard-sequential shuffling rather than fully random access.
+        shuffle_buffer: How many consecutive records to shuffle together when `shard_shuffle` is enabled.
+
+    Raises:
+        ValueError: If the `root_dir` does not contain any record shards.
+    """
+    shard_ids: np.ndarray  # Which shard each record is in
+    starts: np.ndarray  # Where each record begins within its shard
+    ends: np.ndarray  # Where each record ends within its shard
+    indices: np.ndarray  # Which records are part of this dataset
+    order: Optional[np.ndarray]  # The order in which to visit the indices (if shard shuffling)
+
+    def __init__(self, root_dir: str, shard_shuffle: bool = False, shuffle_buffer: int = 1024) -> None:
+        self.root_dir = os.path.normpath(root_dir)
+        self.paths = sorted(
+            os.path.join(self.root_dir, name) for name in os.listdir(self.root_dir) if name.endswith(_EXTENSION))
+        if not self.paths:
+            raise ValueError("No record shards ('*{}' files) were found in {}".format(_EXTENSION, self.root_dir))
+        self.shard_shuffle = shard_shuffle
+        self.shuffle_buffer = max(1, shuffle_buffer)
+        # The fe.Pipeline should read datasets which shuffle themselves in order
+        self.fe_shuffle = shard_shuffle
+        shard_ids, starts, ends = [], [], []
+        for shard_id, path in enumerate(self.paths):
+            with open(path, 'rb') as file:
+                offsets = _read_index(file, path)
+            shard_ids.append(np.full(len(offsets) - 1, shard_id, dtype=np.int32))
+            starts.append(offsets[:-1])
+            ends.append(offsets[1:])
+        self.shard_ids = np.concatenate(shard_ids)
+        self.starts = np.concatenate(starts)
+        self.ends = np.concatenate(ends)
+        self.indices = np.arange(len(self.shard_ids))
+        self.order = None
+        self._handles = {}
+        self._pid = None
+        self.summary = lru_cache(maxsize=1)(self.summary)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        # File handles are specific to a process, and the summary cache can't be pickled
+        state['_handles'] = {}
+        state['_pid'] = None
+        state.pop('summary', None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.summary = lru_cache(maxsize=1)(self.summary)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def _get_handle(self, shard_id: int) -> BinaryIO:
+        """Get an open file handle for a given shard, which is valid within the current process.
+
+        Args:
+            shard_id: Which shard to open.
+
+        Returns:
+            A handle to the shard.
+        """
+        if self._pid != os.getpid():
+            # Handles inherited from a parent process share its file position, so they can't be safely used
+            self._handles = {}
+            self._pid = os.getpid()
+        handle = self._handles.get(shard_id)
+        if handle is None:
+            handle = open(self.paths[shard_id], 'rb')
+            self._handles[shard_id] = handle
+        return handle
+
+    def _read(self, record: int) -> Dict[str, Any]:
+        """Read a record from disk.
+
+        Args:
+            record: The id of the record to read.
+
+        Returns:
+            The data dictionary stored in the record.
+        """
+        handle = self._get_handle(int(self.shard_ids[record]))
+        start = int(self.starts[record])
+        if handle.tell() != start:
+            handle.seek(start)
+        return pickle.loads(handle.read(int(self.ends[record]) - start))
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """Fetch a data instance at a specified index.
+
+        Args:
+            index: Which datapoint to retrieve.
+
+        Returns:
+            The data dictionary from the specified index.
+        """
+        if index >= len(self) or index < -len(self):
+            raise IndexError("index {} is out of range for a dataset of length {}".format(index, len(self)))
+        if self.order is not None:
+            index = self.order[index]
+        return self._read(self.indices[index])
+
+    def reset_index_maps(self, seed: Optional[int] = None) -> None:
+        """Re-shuffle the order of the data (only applicable when `shard_shuffle` is enabled).
+
+        Args:
+            seed: The random seed to use when shuffling.
+        """
+        if not self.shard_shuffle:
+            return
+        rng = np.random.RandomState(seed) if seed is not None else np.random
+        shard_rank = np.argsort(rng.permutation(len(self.paths)))
+        # Visit the shards in a random order, and the records within each shard in the order they are stored
+        order = np.lexsort((self.indices, shard_rank[self.shard_ids[self.indices]]))
+        # Then shuffle records within each window of the sequence
+        keys = np.arange(len(order)) // self.shuffle_buffer + rng.random_sample(len(order))
+        self.order = order[np.argsort(keys, kind='stable')]
+
+    def _do_split(self, splits: Sequence[Iterable[int]]) -> List['RecordDataset']:
+        """Split the current dataset apart into several smaller datasets.
+
+        Args:
+            splits: Which indices to remove from the current dataset in order to create new dataset(s). One dataset will
+                be generated for every iterable within the `splits` sequence.
+
+        Returns:
+            New datasets generated by removing data at the indices specified by `splits` from the current dataset.
+        """
+        results = []
+        keep = np.ones(len(self.indices), dtype=bool)
+        for split in splits:
+            split = np.asarray(list(split), dtype=np.int64)
+            if self.order is not None:
+                # The split positions refer to the current (shuffled) order, which is what __getitem__ serves
+                split = self.order[split]
+            keep[split] = False
+            result = RecordDataset.__new__(RecordDataset)
+            result.__setstate__(self.__getstate__())
+            result.indices = self.indices[split]
+            result.order = None
+            results.append(result)
+        self.indices = self.indices[keep]
+        self.order = None
+        self.summary.cache_clear()
+        return results
+
+    def summary(self) -> DatasetSummary:
+        """Generate a summary representation of this dataset.
+        Returns:
+            A summary representation of this dataset.
+        """
+        sample = self[0]
+        key_summary = {}
+        for key, val in sample.items():
+            key_summary[key] = KeySummary(num_unique_values=None, shape=get_shape(val), dtype=get_type(val))
+        return DatasetSummary(num_instances=len(self), keys=key_summary)
@@ -0,0 +1,386 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import ctypes
+import queue
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torch.multiprocessing as torch_mp
+from torch._utils import ExceptionWrapper
+from torch.utils.data import DataLoader, Dataset
+
+
+def _storage_use_count(tensor: torch.Tensor) -> Optional[int]:
+    """Count how many tensors are currently referencing the memory of a given `tensor`.
+
+    Args:
+        tensor: The tensor to inspect.
+
+    Returns:
+        The number of references to the underlying storage, or None if this version of PyTorch cannot report it.
+    """
+    if not hasattr(torch._C, "_storage_Use_Count"):
+        return None
+    return torch._C._storage_Use_Count(tensor.untyped_storage()._cdata)
+
+
+def _to_shareable(value: Any) -> Optional[torch.Tensor]:
+    """Convert a collated value into a tensor which can be written into shared memory (if possible).
+
+    Args:
+        value: A value from a collated batch.
+
+    Returns:
+        A torch tensor view of the `value`, or None if the `value` cannot be placed into a shared memory buffer.
+    """
+    if isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+        value = torch.from_numpy(value)
+    if isinstance(value, torch.Tensor) and value.ndim > 0 and not value.requires_grad:
+        return value
+    return None
+
+
+def _worker_loop(dataset: Dataset,
+                 collate_fn: Callable,
+                 auto_collation: bool,
+                 worker_init_fn: Optional[Callable],
+                 worker_id: int,
+                 index_queue: torch_mp.Queue,
+                 result_queue: torch_mp.Queue,
+                 generation: ctypes.c_int64) -> None:
+    """The main loop of a SharedMemoryDataLoader worker process.
+
+    Args:
+        dataset: The dataset from which to draw data.
+        collate_fn: The function used to combine elements into a batch.
+        auto_collation: Whether tasks contain lists of indices which need to be collated (as opposed to single indices).
+        worker_init_fn: A function to invoke when the worker starts.
+        worker_id: The id of this worker.
+        index_queue: The queue from which tasks are received.
+        result_queue: The queue into which batches are written.
+        generation: A shared counter identifying the iterator which is currently using the workers. Tasks from earlier
+            iterators (which were abandoned before they finished) are skipped.
+    """
+    torch.set_num_threads(1)
+    if worker_init_fn is not None:
+        worker_init_fn(worker_id)
+    slots = {}
+    slots_generation = None
+    while True:
+        task = index_queue.get()
+        if task is None:
+            break
+        task_generation, task_idx, slot, buffers, indices = task
+        if task_generation != generation.value:
+            continue
+        if task_generation != slots_generation:
+            # Every iterator allocates its own shared memory ring
+            slots = {}
+            slots_generation = task_generation
+        if buffers is not None:
+            slots[slot] = buffers
+        written = {}
+        try:
+            if auto_collation:
+                batch = collate_fn([dataset[idx] for idx in indices])
+            else:
+                batch = collate_fn(dataset[indices])
+            if slot is not None:
+                for key, buffer in slots[slot].items():
+                    value = _to_shareable(batch.get(key))
+                    if value is not None and value.dtype == buffer.dtype and value.shape[1:] == buffer.shape[1:] \
+                            and value.shape[0] <= buffer.shape[0]:
+                        buffer[:value.shape[0]].copy_(value)
+                        written[key] = value.shape[0]
+                batch = {key: value for key, value in batch.items() if key not in written}
+        except Exception:
+            batch = ExceptionWrapper(where="in SharedMemoryDataLoader worker process {}".format(worker_id))
+        result_queue.put((task_generation, task_idx, slot, batch, written))
+
+
+class _WorkerPool:
+    """A set of SharedMemoryDataLoader worker processes, along with the queues used to communicate with them.
+
+    This class is intentionally not @traceable.
+
+    Args:
+        loader: The loader which the workers will serve.
+    """
+    def __init__(self, loader: 'SharedMemoryDataLoader') -> None:
+        self.num_workers = loader.num_workers
+        context = loader.multiprocessing_context or torch_mp
+        self.generation = context.RawValue(ctypes.c_int64, 0)
+        self.result_queue = context.Queue()
+        self.index_queues = []
+        self.workers = []
+        for worker_id in range(self.num_workers):
+            index_queue = context.Queue()
+            worker = context.Process(target=_worker_loop,
+                                     args=(loader.dataset,
+                                           loader.collate_fn,
+                                           loader.batch_sampler is not None,
+                                           loader.worker_init_fn,
+                                           worker_id,
+                                           index_queue,
+                                           self.result_queue,
+                                           self.generation),
+                                     daemon=True)
+            worker.start()
+            self.index_queues.append(index_queue)
+            self.workers.append(worker)
+        self.shutdown = False
+
+    def new_generation(self) -> int:
+        """Invalidate any outstanding tasks, so that the workers are ready to serve a new iterator.
+
+        Returns:
+            The id of the new generation.
+        """
+        self.generation.value += 1
+        return self.generation.value
+
+    def get_dead_workers(self) -> List[str]:
+        """Find any worker processes which have exited.
+
+        Returns:
+            The pids of the dead workers.
+        """
+        return [str(worker.pid) for worker in self.workers if not worker.is_alive()]
+
+    def shutdown_workers(self) -> None:
+        """Stop all of the worker processes."""
+        if self.shutdown:
+            return
+        self.shutdown = True
+        for index_queue in self.index_queues:
+            index_queue.put(None)
+        for worker in self.workers:
+            worker.join(timeout=5.0)
+            if worker.is_alive():
+                worker.terminate()
+        for index_queue in self.index_queues:
+            index_queue.cancel_join_thread()
+            index_queue.close()
+        self.result_queue.cancel_join_thread()
+        self.result_queue.close()
+
+    def __del__(self) -> None:
+        self.shutdown_workers()
+
+
+class SharedMemoryDataLoader(DataLoader):
+    """A DataLoader whose worker processes deliver batches through a ring of reusable shared memory buffers.
+
+    This class is intentionally not @traceable.
+
+    A regular DataLoader pickles every batch in order to send it from the worker processes back to the main process, and
+    allocates fresh shared memory for every batch. This loader instead learns the shapes and dtypes of the batch entries
+    from the first batch, and then pre-allocates a set of shared memory buffers ('slots') which the workers collate
+    subsequent batches directly into. The main process yields zero-copy tensor views of these buffers. A slot is only
+    re-used once every view of it has been released, so it is safe for consumers to hold on to the data they are given.
+    Entries which cannot be stored in the buffers (ex. lists of strings, or arrays whose shape changes from batch to
+    batch) are transferred in the normal way.
+
+    This class should not be directly instantiated by the end user. The fe.Pipeline will automatically use it when its
+    `shared_memory` argument is enabled. It accepts the same arguments as a torch DataLoader. When `num_workers` is 0,
+    it behaves exactly like a regular DataLoader. If `persistent_workers` is True, the same worker processes are re-used
+    by every iteration over the loader.
+    """
+    _pool: Optional[_WorkerPool] = None
+
+    def __iter__(self) -> Union['_SharedMemoryIterator', Any]:
+        if self.num_workers == 0:
+            return super().__iter__()
+        if not self.persistent_workers:
+            return _SharedMemoryIterator(self, _WorkerPool(self), owns_pool=True)
+        if self._pool is None or self._pool.shutdown:
+            self._pool = _WorkerPool(self)
+        return _SharedMemoryIterator(self, self._pool, owns_pool=False)
+
+    def shutdown_workers(self) -> None:
+        """Stop the persistent worker processes of this loader (if any)."""
+        if self._pool is not None:
+            self._pool.shutdown_workers()
+            self._pool = None
+
+
+class _SharedMemoryIterator:
+    """An iterator which feeds the worker processes of a SharedMemoryDataLoader for a single epoch.
+
+    This class is intentionally not @traceable.
+
+    Args:
+        loader: The loader to iterate over.
+        pool: The worker processes to use.
+        owns_pool: Whether the `pool` should be shut down once this iterator is finished with it. Otherwise the pool is
+            left running so that it can be re-used by later iterators.
+    """
+    def __init__(self, loader: SharedMemoryDataLoader, pool: _WorkerPool, owns_pool: bool) -> None:
+        self.auto_collation = loader.batch_sampler is not None
+        self.sampler_iter = iter(loader.batch_sampler if self.auto_collation else loader.sampler)
+        self.num_workers = loader.num_workers
+        self.prefetch = loader.num_workers * (loader.prefetch_factor or 2)
+        self.pool = pool
+        self.owns_pool = owns_pool
+        self.generation = pool.new_generation()
+        # The shared memory ring. It is allocated once the first batch reveals the shapes and dtypes of the data
+        self.spec: Optional[Dict[str, Tuple[torch.Size, torch.dtype]]] = None
+        self.slots: Dict[int, Dict[str, torch.Tensor]] = {}
+        self.baselines: Dict[int, Dict[str, Optional[int]]] = {}
+        self.free_slots: List[int] = []
+        self.lent_slots: List[int] = []
+        self.next_slot = 0
+        self.worker_slots = [set() for _ in range(self.num_workers)]
+        # Task bookkeeping. Results may arrive out of order, so they are buffered until their turn comes
+        self.send_idx = 0
+        self.rcvd_idx = 0
+        self.results = {}
+        self.shutdown = False
+        for _ in range(self.prefetch):
+            self._dispatch()
+
+    def __iter__(self) -> '_SharedMemoryIterator':
+        return self
+
+    def _allocate_slot(self) -> int:
+        """Create a new set of shared memory buffers.
+
+        Returns:
+            The id of the new slot.
+        """
+        slot = self.next_slot
+        self.next_slot += 1
+        self.slots[slot] = {
+            key: torch.empty(shape, dtype=dtype).share_memory_()
+            for key, (shape, dtype) in self.spec.items()
+        }
+        self.baselines[slot] = {key: _storage_use_count(buffer) for key, buffer in self.slots[slot].items()}
+        return slot
+
+    def _reclaim_slots(self) -> None:
+        """Move any slots which are no longer referenced by the consumer back into the free pool."""
+        still_lent = []
+        for slot in self.lent_slots:
+            counts = {key: _storage_use_count(buffer) for key, buffer in self.slots[slot].items()}
+            if any(count is None for count in counts.values()):
+                # Usage can't be tracked, so the slot can never be safely re-used. Let it be garbage collected instead
+                del self.slots[slot]
+                del self.baselines[slot]
+                for known_slots in self.worker_slots:
+                    known_slots.discard(slot)
+            elif all(counts[key] <= self.baselines[slot][key] for key in counts):
+                self.free_slots.append(slot)
+            else:
+                still_lent.append(slot)
+        self.lent_slots = still_lent
+
+    def _acquire_slot(self) -> Optional[int]:
+        """Get a slot into which the next batch can be written.
+
+        Returns:
+            The id of a free slot, or None if the shared memory ring has not been allocated yet.
+        """
+        if self.spec is None:
+            return None
+        if not self.free_slots:
+            self._reclaim_slots()
+        if self.free_slots:
+            return self.free_slots.pop()
+        return self._allocate_slot()
+
+    def _dispatch(self) -> None:
+        """Send the next batch of indices to a worker process (if there are any indices left)."""
+        indices = next(self.sampler_iter, None)
+        if indices is None:
+            return
+        slot = self._acquire_slot()
+        worker_id = self.send_idx % self.num_workers
+        buffers = None
+        if slot is not None and slot not in self.worker_slots[worker_id]:
+            # Each worker only needs to receive the handles for a given slot once
+            buffers = self.slots[slot]
+            self.worker_slots[worker_id].add(slot)
+        self.pool.index_queues[worker_id].put((self.generation, self.send_idx, slot, buffers, indices))
+        self.send_idx += 1
+
+    def _get_result(self) -> Tuple[int, Optional[int], Any, Dict[str, int]]:
+        """Wait for the next result to arrive from any of the worker processes.
+
+        Returns:
+            The task index, slot, partial batch, and the number of rows written into each shared buffer.
+
+        Raises:
+            RuntimeError: If a worker process died unexpectedly.
+        """
+        while True:
+            try:
+                result = self.pool.result_queue.get(timeout=5.0)
+            except queue.Empty:
+                dead = self.pool.get_dead_workers()
+                if dead:
+                    # The remaining workers may be waiting on tasks which will never complete, so the pool is discarded
+                    self.pool.shutdown_workers()
+                    raise RuntimeError("SharedMemoryDataLoader worker (pid(s) {}) exited unexpectedly".format(
+                        ", ".join(dead)))
+                continue
+            # Results of tasks from an earlier (abandoned) iterator over a persistent pool are discarded
+            if result[0] == self.generation:
+                return result[1:]
+
+    def _learn_spec(self, batch: Dict[str, Any]) -> None:
+        """Infer the shapes and dtypes of the shared memory buffers from a batch of data.
+
+        Args:
+            batch: A batch of data received from a worker.
+        """
+        self.spec = {}
+        for key, value in batch.items():
+            value = _to_shareable(value)
+            if value is not None:
+                self.spec[key] = (value.shape, value.dtype)
+
+    def __next__(self) -> Dict[str, Any]:
+        while self.rcvd_idx not in self.results:
+            if self.rcvd_idx >= self.send_idx:
+                self._shutdown()
+                raise StopIteration
+            task_idx, slot, batch, written = self._get_result()
+            self.results[task_idx] = (slot, batch, written)
+        slot, batch, written = self.results.pop(self.rcvd_idx)
+        self.rcvd_idx += 1
+        if isinstance(batch, ExceptionWrapper):
+            self._shutdown()
+            batch.reraise()
+        if self.spec is None and isinstance(batch, dict):
+            self._learn_spec(batch)
+        for key, n_rows in written.items():
+            # Always hand out a view (even of the whole buffer) so that the slot's usage can be tracked
+            batch[key] = self.slots[slot][key][:n_rows]
+        if slot is not None:
+            self.lent_slots.append(slot)
+        self._dispatch()
+        return batch
+
+    def _shutdown(self) -> None:
+        """Stop all of the worker processes (unless they are persistent)."""
+        if self.shutdown:
+            return
+        self.shutdown = True
+        if self.owns_pool:
+            self.pool.shutdown_workers()
+
+    def __del__(self) -> None:
+        self._shutdown()
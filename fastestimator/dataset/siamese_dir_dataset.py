@@ -40,6 +40,8 @@ class SiameseDirDataset(LabeledDirDataset):
         percent_matching_data: What percentage of the time should data be paired by class (label value = 1).
         label_mapping: A dictionary defining the mapping to use. If not provided will map classes to int labels.
         file_extension: If provided then only files ending with the file_extension will be included.
+        manifest_dir: A directory in which to cache the results of scanning the `root_dir`, so that later constructions
+            of this dataset can skip re-listing any unmodified directories. If None, no caching will be performed.
     """
 
     class_data: Dict[Any, Set[int]]
@@ -51,8 +53,9 @@ class SiameseDirDataset(LabeledDirDataset):
                  label_key: str = "y",
                  percent_matching_data: float = 0.5,
                  label_mapping: Optional[Dict[str, Any]] = None,
-                 file_extension: Optional[str] = None):
-        super().__init__(root_dir, data_key_left, label_key, label_mapping, file_extension)
+                 file_extension: Optional[str] = None,
+                 manifest_dir: Optional[str] = None):
+        super().__init__(root_dir, data_key_left, label_key, label_mapping, file_extension, manifest_dir)
         self.class_data = self._data_to_class(self.data, label_key)
         self.percent_matching_data = percent_matching_data
         self.data_key_left = data_key_left
@@ -13,9 +13,11 @@
 # limitations under the License.
 # ==============================================================================
 import os
+import queue
 import random
+import threading
 from collections import ChainMap
-from typing import Any, Dict, Iterable, List, Optional, Set, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 import numpy as np
 import tensorflow as tf
@@ -28,16 +30,20 @@ from fastestimator.backend.to_shape import to_shape
 from fastestimator.backend.to_tensor import to_tensor
 from fastestimator.backend.to_type import to_type
 from fastestimator.dataset.op_dataset import OpDataset
+from fastestimator.dataset.persistent_dataset import PersistentOpDataset
 from fastestimator.network import BaseNetwork, TFNetwork, TorchNetwork
 from fastestimator.pipeline import Pipeline
 from fastestimator.schedule.schedule import Scheduler, get_current_items, get_signature_epochs
 from fastestimator.summary.system import Summary, System
 from fastestimator.trace.io.best_model_saver import BestModelSaver
 from fastestimator.trace.io.model_saver import ModelSaver
+from fastestimator.trace.io.profiler import Profiler
 from fastestimator.trace.io.restore_wizard import RestoreWizard
 from fastestimator.trace.io.traceability import Traceability
 from fastestimator.trace.trace import EvalEssential, Logger, TestEssential, Trace, TrainEssential, sort_traces
 from fastestimator.util.data import Data
+from fastestimator.util.distributed import is_main_process, launch, needs_launch
+from fastestimator.util.profiler import profile_phase
 from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import Suppressor, draw, to_list, to_set
 
@@ -62,6 +68,19 @@ class Estimator:
         log_steps: Frequency (in steps) for printing log messages. 0 to disable all step-based printing (though epoch
             information will still print). None to completely disable printing.
         monitor_names: Additional keys from the data dictionary to be written into the logs.
+        staging_depth: How many batches to prepare on a background thread ahead of the batch which is currently being
+            run. Staging selects the inputs required by the network and (when a GPU is available) begins copying them
+            onto the GPU, so that this work overlaps with the computation of earlier batches. 0 disables staging. Since
+            a staged batch has already been handed to the network, any changes which Traces make to the batch inputs
+            during on_batch_begin will be ignored, so staging should only be enabled when no Traces do so. This is only
+            applicable when using PyTorch DataLoaders (including FastEstimator Datasets) with a PyTorch Network.
+        steps_per_execution: How many steps to run within a single (compiled) graph execution. Running several steps at
+            once avoids paying python and function dispatch overhead on every step, which can be significant for small
+            models. This is only applicable to TensorFlow Networks during training when not running in eager mode (eval
+            and test epochs always run one step at a time, so that metric Traces see every batch). Traces are then only
+            invoked once per execution: on_batch_begin receives the first batch of the execution, while on_batch_end
+            receives the final batch and predictions of the execution (and the global step will have advanced by up to
+            `steps_per_execution`). `log_steps` should therefore be a multiple of `steps_per_execution`.
     """
     monitor_names: Set[str]
     traces_in_use: List[Union[Trace, Scheduler[Trace]]]
@@ -75,11 +94,17 @@ class Estimator:
                  max_eval_steps_per_epoch: Optional[int] = None,
                  traces: Union[None, Trace, Scheduler[Trace], Iterable[Union[Trace, Scheduler[Trace]]]] = None,
                  log_steps: Optional[int] = 100,
-                 monitor_names: Union[None, str, Iterable[str]] = None):
+                 monitor_names: Union[None, str, Iterable[str]] = None,
+                 staging_depth: int = 0,
+                 steps_per_execution: int = 1):
         self.traces_in_use = []
         assert log_steps is None or log_steps >= 0, \
             "log_steps must be None or positive (or 0 to disable only train logging)"
         self.monitor_names = to_set(monitor_names) | network.get_loss_keys()
+        assert staging_depth >= 0, "staging_depth must be non-negative"
+        self.staging_depth = staging_depth
+        assert steps_per_execution >= 1, "steps_per_execution must be positive"
+        self.steps_per_execution = steps_per_execution
         self.system = System(network=network,
                              pipeline=pipeline,
                              traces=to_list(traces),
@@ -101,7 +126,11 @@ class Estimator:
     def traces(self) -> List[Union[Trace, Scheduler[Trace]]]:
         return self.system.traces
 
-    def fit(self, summary: Optional[str] = None, warmup: bool = True, eager: bool = False) -> Optional[Summary]:
+    def fit(self,
+            summary: Optional[str] = None,
+            warmup: bool = True,
+            eager: bool = False,
+            profile: Optional[Profiler] = None) -> Optional[Summary]:
         """Train the network for the number of epochs specified by the estimator's constructor.
 
         Args:
@@ -113,29 +142,38 @@ class Estimator:
                 mismatch.
             eager: Whether to run the training in eager mode. This is only related to TensorFlow training because
                 PyTorch by nature is always in eager mode.
+            profile: A window of steps to capture with the native framework profiler and save as a Chrome trace, for
+                example `fe.trace.io.Profiler("trace.json", epoch=2, start_step=100, end_step=120)`.
 
         Returns:
             A summary object containing the training history for this session iff a `summary` name was provided.
         """
-        draw()
+        if needs_launch() and isinstance(self.network, TorchNetwork):
+            return self._launch(lambda: self.fit(summary=summary, warmup=warmup, eager=eager, profile=profile))
+        if is_main_process():
+            draw()
         self.system.reset(summary, self.fe_summary())
-        self._prepare_traces(run_modes={"train", "eval"})
+        self._prepare_traces(run_modes={"train", "eval"}, profile=profile)
         if warmup:
             self._warmup(eager=eager)
         self._start(run_modes={"train", "eval"}, eager=eager)
         return self.system.summary or None
 
-    def _prepare_traces(self, run_modes: Set[str]) -> None:
+    def _prepare_traces(self, run_modes: Set[str], profile: Optional[Profiler] = None) -> None:
         """Prepare information about the traces for training.
 
         Add default traces into the traces_in_use list, also prints a warning if no model saver trace is detected.
 
         Args:
             run_modes: The current execution modes.
+            profile: A Profiler to capture part of the run with, if any.
         """
         self.traces_in_use = [trace for trace in self.traces]
         if self.system.log_steps is not None:
             self.traces_in_use.append(Logger())
+        if profile:
+            # Added after the Logger so that it runs last, and hence captures the whole of every step
+            self.traces_in_use.append(profile)
         # Look for any monitor names which should be automagically added.
         trace_outputs = set()
         extra_monitor_keys = set()
@@ -155,6 +193,9 @@ class Estimator:
             self.traces_in_use.insert(1, EvalEssential(monitor_names=self.monitor_names.union(extra_monitor_keys)))
         if "test" in run_modes and "test" in self.pipeline.get_modes():
             self.traces_in_use.insert(0, TestEssential(monitor_names=self.monitor_names.union(extra_monitor_keys)))
+        if not is_main_process():
+            # Traces which only perform IO are left to the main process during distributed training
+            self.traces_in_use = [trace for trace in self.traces_in_use if not _is_main_process_only(trace)]
         # insert system instance to trace
         for trace in get_current_items(self.traces_in_use, run_modes=run_modes):
             trace.system = self.system
@@ -173,11 +214,40 @@ class Estimator:
             A summary object containing the training history for this session iff the `summary` name is not None (after
             considering the default behavior above).
         """
+        if needs_launch() and isinstance(self.network, TorchNetwork):
+            return self._launch(lambda: self.test(summary=summary, eager=eager))
         self.system.reset_for_test(summary)
         self._prepare_traces(run_modes={"test"})
         self._start(run_modes={"test"}, eager=eager)
         return self.system.summary or None
 
+    def _launch(self, run: Callable[[], Optional[Summary]]) -> Optional[Summary]:
+        """Run training (or testing) in several processes at once, as configured by fe.enable_distributed.
+
+        Once the processes have finished, the final model weights, optimizer states, and summary of the main process are
+        copied back into this process.
+
+        Args:
+            run: The function to execute in every process.
+
+        Returns:
+            The return value of `run` from the main process.
+        """
+        def run_and_collect() -> Tuple[Any, ...]:
+            summary = run()
+            # Models have already been moved back to the CPU at the end of _start()
+            return (summary, (self.system.summary, self.system.global_step, self.system.epoch_idx),
+                    [model.state_dict() for model in self.network.models],
+                    [[optimizer.state_dict() for optimizer in _get_optimizers(model)] for model in self.network.models])
+
+        summary, (system_summary, global_step, epoch_idx), model_states, optimizer_states = launch(run_and_collect)
+        self.system.summary, self.system.global_step, self.system.epoch_idx = system_summary, global_step, epoch_idx
+        for model, model_state, optimizer_state in zip(self.network.models, model_states, optimizer_states):
+            model.load_state_dict(model_state)
+            for optimizer, state in zip(_get_optimizers(model), optimizer_state):
+                optimizer.load_state_dict(state)
+        return summary
+
     def _warmup(self, eager: bool = True) -> None:
         """Perform a test run of each pipeline and network signature epoch to make sure that training won't fail later.
 
@@ -275,6 +345,7 @@ class Estimator:
         except EarlyStop:
             pass  # On early stopping we still want to run the final traces and return results
         self._run_traces_on_end(traces=all_traces)
+        self.network.unload_models()
 
     def _run_epoch(self, eager: bool) -> None:
         """A method to perform an epoch of activity.
@@ -300,31 +371,59 @@ class Estimator:
                                 epoch=self.system.epoch_idx,
                                 output_keys=trace_input_keys,
                                 eager=eager)
+        # The Suppressor can't be used on a background thread, so only torch loaders (which don't need it) are staged
+        stager = None
+        if self.staging_depth and isinstance(loader, DataLoader) and isinstance(self.network, TorchNetwork):
+            iterator = stager = _BatchStager(iterator, self.network.stage_batch, depth=self.staging_depth)
+        max_steps = {
+            "train": self.system.max_train_steps_per_epoch, "eval": self.system.max_eval_steps_per_epoch
+        }.get(self.system.mode)
+        # Traces only see the last step of each execution, so fusing steps would skip data in eval/test metrics
+        fused = self.steps_per_execution > 1 and self.system.mode == "train" and isinstance(
+            self.network, TFNetwork) and not eager and isinstance(loader, (tf.data.Dataset, DistributedDataset))
         self.system.batch_idx = None
-        with Suppressor():
-            batch = next(iterator)
-        traces = sort_traces(traces, available_outputs=to_set(batch.keys()) | network_output_keys)
-        self._run_traces_on_epoch_begin(traces=traces)
-        while True:
-            try:
-                if self.system.mode == "train":
-                    self.system.update_global_step()
-                self.system.update_batch_idx()
-                batch = self._configure_tensor(loader, batch)
-                self._run_traces_on_batch_begin(batch, traces=traces)
-                batch, prediction = self.network.run_step(batch)
-                self._run_traces_on_batch_end(batch, prediction, traces=traces)
-                if isinstance(loader, DataLoader) and (
-                    (self.system.batch_idx == self.system.max_train_steps_per_epoch and self.system.mode == "train") or
-                    (self.system.batch_idx == self.system.max_eval_steps_per_epoch and self.system.mode == "eval")):
-                    raise StopIteration
-                with Suppressor():
-                    batch = next(iterator)
-            except StopIteration:
-                break
+        try:
+            with Suppressor():
+                batch = next(iterator)
+            traces = sort_traces(traces, available_outputs=to_set(batch.keys()) | network_output_keys)
+            self._run_traces_on_epoch_begin(traces=traces)
+            while True:
+                try:
+                    if self.system.mode == "train":
+                        self.system.update_global_step()
+                    self.system.update_batch_idx()
+                    with profile_phase("data"):
+                        batch = self._configure_tensor(loader, batch)
+                    self._run_traces_on_batch_begin(batch, traces=traces)
+                    if fused:
+                        # Any step limit has already been applied to the tf.data loader by _configure_loader
+                        batch, prediction, num_steps = self.network.run_steps(batch, iterator, self.steps_per_execution)
+                        self._skip_steps(num_steps - 1)
+                    else:
+                        batch, prediction = self.network.run_step(batch, staged=stager.staged if stager else None)
+                    self._run_traces_on_batch_end(batch, prediction, traces=traces)
+                    if isinstance(loader, DataLoader) and self.system.batch_idx == max_steps:
+                        raise StopIteration
+                    with Suppressor(), profile_phase("data"):
+                        batch = next(iterator)
+                except StopIteration:
+                    break
+        finally:
+            if stager:
+                stager.close()
         self._run_traces_on_epoch_end(traces=traces)
         self.network.unload_epoch()
 
+    def _skip_steps(self, num_steps: int) -> None:
+        """Advance the step counters of the system past steps which were run without invoking any Traces.
+
+        Args:
+            num_steps: How many steps to advance by.
+        """
+        if self.system.mode == "train":
+            self.system.global_step += num_steps
+        self.system.batch_idx += num_steps
+
     def _configure_loader(self, loader: Union[DataLoader, tf.data.Dataset]) -> Union[DataLoader, tf.data.Dataset]:
         """A method to configure a given dataloader for use with this Estimator's Network.
 
@@ -340,7 +439,7 @@ class Estimator:
         new_loader = loader
         if isinstance(new_loader, DataLoader) and isinstance(self.network, TFNetwork):
             add_batch = True
-            if isinstance(loader.dataset, OpDataset) and loader.dataset.dataset.fe_batch:
+            if isinstance(loader.dataset, (OpDataset, PersistentOpDataset)) and loader.dataset.dataset.fe_batch:
                 add_batch = False
             batch = to_tensor(loader.dataset[0], target_type="tf")
             data_type = to_type(batch)
@@ -413,7 +512,8 @@ class Estimator:
         """
         data = Data(batch)
         for trace in traces:
-            trace.on_batch_begin(data)
+            with profile_phase(_trace_phase(trace)):
+                trace.on_batch_begin(data)
         self._check_early_exit()
 
     def _run_traces_on_batch_end(self, batch: Dict[str, Any], prediction: Dict[str, Any],
@@ -427,7 +527,8 @@ class Estimator:
         """
         data = Data(ChainMap(prediction, batch))
         for trace in traces:
-            trace.on_batch_end(data)
+            with profile_phase(_trace_phase(trace)):
+                trace.on_batch_end(data)
         self._check_early_exit()
 
     def _run_traces_on_epoch_end(self, traces: Iterable[Trace]) -> None:
@@ -476,6 +577,44 @@ class EarlyStop(Exception):
     """
 
 
+def _is_main_process_only(trace: Union[Trace, Scheduler[Trace]]) -> bool:
+    """Determine whether a trace (or every trace within a scheduler) should only be run by the main process.
+
+    Args:
+        trace: The trace or scheduler to inspect.
+
+    Returns:
+        Whether the `trace` can be skipped by processes other than the main process.
+    """
+    traces = trace.get_all_values() if isinstance(trace, Scheduler) else [trace]
+    return all(elem is None or elem.fe_main_process_only for elem in traces)
+
+
+def _trace_phase(trace: Trace) -> str:
+    """Get the name of the profiling phase which a trace's per-batch callbacks are recorded under.
+
+    Args:
+        trace: The trace being invoked.
+
+    Returns:
+        The phase name, which is shared by every trace of the same class.
+    """
+    return "trace:" + type(trace).__name__
+
+
+def _get_optimizers(model: torch.nn.Module) -> List[torch.optim.Optimizer]:
+    """Get all of the optimizers which belong to a model.
+
+    Args:
+        model: A model built by fe.build.
+
+    Returns:
+        The model's optimizers (several if they are scheduled).
+    """
+    optimizers = model.optimizer.get_all_values() if isinstance(model.optimizer, Scheduler) else [model.optimizer]
+    return [optimizer for optimizer in optimizers if optimizer is not None]
+
+
 def enable_deterministic(seed):
     """Invoke to set random seed for deterministic training. The determinism only works for tensorflow >= 2.1 and
     pytorch >= 1.14, and some model layers don't support.
@@ -491,3 +630,85 @@ def enable_deterministic(seed):
     np.random.seed(seed)
     tf.random.set_seed(seed)
     torch.manual_seed(seed)
+
+
+class _BatchStager:
+    """An iterator which stages batches of data on a background thread, ahead of when they will be used.
+
+    This class is intentionally not @traceable.
+
+    Args:
+        iterator: The iterator providing batches of data.
+        stage_fn: A function to invoke on each batch from the background thread (ex. Network.stage_batch).
+        depth: How many staged batches to hold in advance.
+    """
+    _END = object()
+
+    def __init__(self, iterator: Iterator[Dict[str, Any]], stage_fn: Callable[[Dict[str, Any]], Any],
+                 depth: int) -> None:
+        self.queue = queue.Queue(maxsize=depth)
+        self.stop = threading.Event()
+        self.done = False
+        # The staged result corresponding to the most recently returned batch
+        self.staged = None
+        self.thread = threading.Thread(target=self._run, args=(iterator, stage_fn), daemon=True)
+        self.thread.start()
+
+    def _run(self, iterator: Iterator[Dict[str, Any]], stage_fn: Callable[[Dict[str, Any]], Any]) -> None:
+        """The main loop of the background thread.
+
+        Args:
+            iterator: The iterator providing batches of data.
+            stage_fn: The function to invoke on each batch.
+        """
+        try:
+            for batch in iterator:
+                if not self._put((batch, stage_fn(batch))):
+                    return
+        except Exception as err:
+            self._put(err)
+            return
+        self._put(self._END)
+
+    def _put(self, item: Any) -> bool:
+        """Pass an item to the consumer, waiting for space to become available if necessary.
+
+        Args:
+            item: The item to pass along.
+
+        Returns:
+            False if the stager was closed before the `item` could be passed along, otherwise True.
+        """
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __iter__(self) -> '_BatchStager':
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        if self.done:
+            raise StopIteration
+        item = self.queue.get()
+        if item is self._END:
+            self.done = True
+            raise StopIteration
+        if isinstance(item, Exception):
+            self.done = True
+            raise item
+        batch, self.staged = item
+        return batch
+
+    def close(self) -> None:
+        """Stop the background thread.
+
+        The thread is waited on so that it is guaranteed to have stopped using the underlying iterator.
+        """
+        self.stop.set()
+        self.thread.join()
+        self.done = True
+        self.staged = None
@@ -14,8 +14,9 @@
 # ==============================================================================
 import os
 import tempfile
-from collections import ChainMap
-from typing import Any, Callable, Dict, Iterable, List, MutableMapping, Optional, Set, Tuple, TypeVar, Union
+from collections import ChainMap, OrderedDict
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Set, Tuple, TypeVar, Union
 
 import gdown
 import numpy as np
@@ -23,6 +24,7 @@ import tensorflow as tf
 import tensorflow.keras.mixed_precision as mixed_precision_tf
 import torch
 from tensorflow.python.distribute.values import DistributedValues
+from torch.nn.parallel import DistributedDataParallel
 
 from fastestimator.backend.load_model import load_model
 from fastestimator.backend.to_tensor import to_tensor
@@ -31,6 +33,8 @@ from fastestimator.op.op import get_inputs_by_op, write_outputs_by_op
 from fastestimator.op.tensorop.model.update import UpdateOp
 from fastestimator.op.tensorop.tensorop import TensorOp
 from fastestimator.schedule.schedule import EpochScheduler, RepeatScheduler, Scheduler, get_current_items
+from fastestimator.util.distributed import distributed_enabled, get_device, is_distributed
+from fastestimator.util.profiler import profile_phase, profile_span
 from fastestimator.util.traceability_util import trace_model, traceable
 from fastestimator.util.util import NonContext, get_batch_size, to_list
 
@@ -159,6 +163,11 @@ class BaseNetwork:
         """
         pass
 
+    def unload_models(self) -> None:
+        """Release any device memory which is being held by models in between epochs.
+        """
+        pass
+
     def get_loss_keys(self) -> Set[str]:
         """Find all of the keys associated with model losses.
 
@@ -230,34 +239,57 @@ class BaseNetwork:
             ops: Which ops to execute.
         """
         for op in ops:
-            data = get_inputs_by_op(op, batch)
-            data = op.forward(data, state)
-            if op.outputs:
-                write_outputs_by_op(op, batch, data)
-        for fn_list in state['deferred'].values():
-            for fn in fn_list:
-                fn()
-        state['deferred'].clear()
-
-    def run_step(self, batch: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:  # Batch, Prediction
+            with profile_span(type(op).__name__):
+                data = get_inputs_by_op(op, batch)
+                data = op.forward(data, state)
+                if op.outputs:
+                    write_outputs_by_op(op, batch, data)
+        if state['deferred']:
+            with profile_phase("optimizer"):
+                for fn_list in state['deferred'].values():
+                    for fn in fn_list:
+                        fn()
+            state['deferred'].clear()
+
+    def stage_batch(self, batch: Dict[str, Any]) -> Optional[Any]:
+        """Prepare the network inputs for a batch of data ahead of time.
+
+        This method expects that Network.load_epoch() has already been invoked. It may be invoked from a background
+        thread while a previous batch is still being run, so that data preparation overlaps with computation.
+
+        Args:
+            batch: The batch of data which will later be passed to `run_step`.
+
+        Returns:
+            An object which should be passed to `run_step` along with the `batch`, or None if this network does not
+            support staging.
+        """
+        return None
+
+    def run_step(self,
+                 batch: Dict[str, Any],
+                 staged: Optional[Any] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:  # Batch, Prediction
         """Run a forward step through the Network on a batch of data, including postprocessing.
 
         This method expects that Network.load_epoch() has already been invoked. The return data will be on the CPU.
 
         Args:
             batch: The batch of data serving as input to the Network.
+            staged: The result of invoking `stage_batch` on the `batch`, if available.
 
         Returns:
             (batch_data, prediction_data)
         """
-        batch, prediction = self._run_step(batch)
+        batch, prediction = self._run_step(batch, staged)
         forward_numpyop(ops=self.epoch_postprocessing,
                         data=ChainMap(prediction, batch),
                         state=self.epoch_state,
                         batched=True)
         return batch, prediction
 
-    def _run_step(self, batch: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:  # Batch, Prediction
+    def _run_step(self,
+                  batch: Dict[str, Any],
+                  staged: Optional[Any] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:  # Batch, Prediction
         """Run a forward step through the Network on a batch of data, excluding postprocessing.
 
         Implementations of this method within derived classes should handle bringing the prediction data back from the
@@ -265,6 +297,7 @@ class BaseNetwork:
 
         Args:
             batch: The batch of data serving as input to the Network.
+            staged: The result of invoking `stage_batch` on the `batch`, if available.
 
         Returns:
             (batch_data, prediction_data)
@@ -286,9 +319,81 @@ class BaseNetwork:
         data = to_tensor(data, target_type=self.target_type)
         data, prediction = self.run_step(data)
         self.unload_epoch()
+        # This is a one-off call, so don't leave the models occupying device memory
+        self.unload_models()
         return {**data, **prediction}
 
 
+class LazyPrediction(MutableMapping[str, Any]):
+    """A dictionary of prediction data whose values are only materialized when they are first accessed.
+
+    This class is intentionally not @traceable.
+
+    Networks return their predictions in this form when moving them into their final form would be expensive (ex.
+    copying them from the GPU back to the CPU, which forces a device sync). Keys which are never read by any Trace or
+    postprocessing op are then never materialized. Values which are written into the dictionary are stored as-is.
+
+    ```python
+    pred = LazyPrediction({"y_pred": gpu_tensor}, lambda x: x.to("cpu"))
+    "y_pred" in pred  # True (without copying anything)
+    pred["y_pred"]  # The tensor is copied to the cpu here, and the result is cached for any later reads
+    pred.read_raw("y_pred")  # The tensor on the gpu (or the cpu copy, if one was already made)
+    ```
+
+    Args:
+        data: The raw prediction data.
+        materialize: A function which converts a raw value into its final form.
+        raw_readable: Whether the raw values are regular tensors which can be used as-is (ex. because they only live on
+            a different device). If not, `read_raw` materializes them just like a normal read.
+    """
+    def __init__(self, data: Dict[str, Any], materialize: Callable[[Any], Any], raw_readable: bool = True) -> None:
+        self.data = data
+        self.materialize = materialize
+        self.raw_readable = raw_readable
+        self.pending = set(data.keys())
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.data[key]
+        if key in self.pending:
+            value = self.materialize(value)
+            self.data[key] = value
+            self.pending.discard(key)
+        return value
+
+    def read_raw(self, key: str) -> Any:
+        """Read a value without materializing it, if possible.
+
+        Args:
+            key: The key to read.
+
+        Returns:
+            The value, in whichever form it currently exists.
+        """
+        if self.raw_readable:
+            return self.data[key]
+        return self[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.data[key] = value
+        self.pending.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        del self.data[key]
+        self.pending.discard(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return "LazyPrediction({})".format(repr(self.data))
+
+
 def _collect_models(ops: Iterable[Union[TensorOp, Scheduler[TensorOp]]]) -> Set[Model]:
     """Collect all model instances from amongst a list of ops.
 
@@ -305,10 +410,11 @@ def _collect_models(ops: Iterable[Union[TensorOp, Scheduler[TensorOp]]]) -> Set[
 
 
 # noinspection PyPep8Naming
-def Network(
-        ops: Iterable[Union[TensorOp, Scheduler[TensorOp]]],
-        pops: Union[None, NumpyOp, Scheduler[NumpyOp], Iterable[Union[NumpyOp,
-                                                                      Scheduler[NumpyOp]]]] = None) -> BaseNetwork:
+def Network(ops: Iterable[Union[TensorOp, Scheduler[TensorOp]]],
+            pops: Union[None, NumpyOp, Scheduler[NumpyOp], Iterable[Union[NumpyOp, Scheduler[NumpyOp]]]] = None,
+            max_resident_models: Optional[int] = None,
+            memory_headroom: float = 0.2,
+            compile_ops: Union[bool, Dict[str, Any]] = False) -> BaseNetwork:
     """A function to automatically instantiate the correct Network derived class based on the given `ops`.
 
     Args:
@@ -318,6 +424,15 @@ def Network(
         pops: Postprocessing Ops. A collection of NumpyOps to be run on the CPU after all of the normal `ops` have been
             executed. Unlike the NumpyOps found in the pipeline, these ops will run on batches of data rather than
             single points.
+        max_resident_models: (PyTorch only) The maximum number of models to keep on the GPU at once, or None for no
+            limit. Models which are not needed by the current epoch are moved back to the CPU in least-recently-used
+            order once this limit is reached.
+        memory_headroom: (PyTorch only) The fraction of GPU memory which should be left free when moving models onto
+            the GPU (to hold activations and gradients). Idle models will be evicted from the GPU in order to maintain
+            this headroom.
+        compile_ops: (PyTorch only) Whether to capture the forward step with torch.compile, analogous to the static
+            graphs which TensorFlow networks always use. A dictionary may be provided instead of True, in which case it
+            will be passed as keyword arguments to torch.compile (ex. {"mode": "reduce-overhead"}).
 
     Returns:
         A network instance containing the given `ops`.
@@ -345,9 +460,16 @@ def Network(
 
     framework = framework.pop()
     if framework == "tf":
+        if max_resident_models is not None or memory_headroom != 0.2 or compile_ops:
+            print("FastEstimator-Warn: max_resident_models, memory_headroom, and compile_ops only apply to PyTorch "
+                  "networks, and will be ignored")
         network = TFNetwork(ops, pops)
     elif framework == "torch":
-        network = TorchNetwork(ops, pops)
+        network = TorchNetwork(ops,
+                               pops,
+                               max_resident_models=max_resident_models,
+                               memory_headroom=memory_headroom,
+                               compile_ops=compile_ops)
     else:
         raise ValueError("Unknown model type")
     return network
@@ -357,21 +479,53 @@ def Network(
 class TorchNetwork(BaseNetwork):
     """An extension of BaseNetwork for PyTorch models.
 
+    Models (and their optimizer states) are moved onto the GPU when they are first needed, and then kept there between
+    epochs rather than being moved back to the CPU after every epoch. Models which are not needed by the current epoch
+    are moved back to the CPU in least-recently-used order only when the GPU is running short of memory, or when more
+    than `max_resident_models` models would be held at once. Call `unload_models` to move every model back to the CPU.
+
+    When distributed training is enabled (see fe.enable_distributed), each process runs on its own device, and models
+    which are being trained are wrapped in DistributedDataParallel so that their gradients are averaged across the
+    processes.
+
     Args:
         ops: The ops defining the execution graph for this Network.
         postprocessing: A collection of NumpyOps to be run on the CPU after all of the normal `ops` have been executed.
             Unlike the NumpyOps found in the pipeline, these ops will run on batches of data rather than single points.
-
+        max_resident_models: The maximum number of models to keep on the GPU at once, or None for no limit.
+        memory_headroom: The fraction of GPU memory which should be left free when moving models onto the GPU (to hold
+            activations and gradients). Idle models will be evicted from the GPU in order to maintain this headroom.
+        compile_ops: Whether to capture the forward step (the epoch's whole op chain, including any loss computations
+            and UpdateOps) with torch.compile, analogous to the static graphs used by TensorFlow networks. This can fuse
+            kernels and reduce python overhead. A dictionary may be provided instead of True, in which case it will be
+            passed as keyword arguments to torch.compile (ex. {"mode": "reduce-overhead"}). Each distinct op chain is
+            captured once and then re-used by every epoch which shares it. Steps are still run eagerly when
+            Estimator.fit(eager=True) is used, or during warmup.
     """
     def __init__(
         self,
         ops: Iterable[Union[TensorOp, Scheduler[TensorOp]]],
-        postprocessing: Union[None, NumpyOp, Scheduler[NumpyOp], Iterable[Union[NumpyOp, Scheduler[NumpyOp]]]] = None
-    ) -> None:
+        postprocessing: Union[None, NumpyOp, Scheduler[NumpyOp], Iterable[Union[NumpyOp, Scheduler[NumpyOp]]]] = None,
+        max_resident_models: Optional[int] = None,
+        memory_headroom: float = 0.2,
+        compile_ops: Union[bool, Dict[str, Any]] = False) -> None:
         super().__init__(target_type='torch',
                          device=torch.device("cuda:0" if torch.cuda.is_available() else "cpu"),
                          ops=ops,
                          postprocessing=postprocessing)
+        self.max_resident_models = max_resident_models
+        self.memory_headroom = memory_headroom
+        # The models which are currently on the GPU (in least-recently-used order), and their on-GPU optimizers
+        self.resident_models: Dict[torch.nn.Module, Set[torch.optim.Optimizer]] = OrderedDict()
+        self._staging_stream: Optional[torch.cuda.Stream] = None
+        if compile_ops and not hasattr(torch, "compile"):
+            print("FastEstimator-Warn: compile_ops requires PyTorch 2.0 or later, so ops will be run eagerly")
+            compile_ops = False
+        self.compile_ops = compile_ops
+        # Compiled forward steps, keyed by mode and op chain
+        self._compiled_steps: Dict[Tuple[str, Tuple[TensorOp, ...]], Callable] = {}
+        self._epoch_step: Optional[Callable] = None
+        self._ddp_models: Dict[torch.nn.Module, DistributedDataParallel] = {}
 
     def load_epoch(self,
                    mode: str,
@@ -382,7 +536,7 @@ class TorchNetwork(BaseNetwork):
         """Prepare the network to run a given epoch and mode.
 
         This method is necessary since schedulers and op mode restrictions may result in different computation graphs
-        every epoch. This also moves all of the necessary models from the CPU onto the GPU(s).
+        every epoch. This also moves any of the necessary models which are not already on the GPU(s) onto them.
 
         Args:
             mode: The mode to prepare to execute. One of 'train', 'eval', 'test', or 'infer'.
@@ -393,13 +547,15 @@ class TorchNetwork(BaseNetwork):
                 PyTorch by nature is always in eager mode.
         """
         super().load_epoch(mode=mode, epoch=epoch, output_keys=output_keys, warmup=warmup, eager=eager)
+        if is_distributed():
+            self.device = get_device()
         if self.device.type == "cuda":
-            for model in self.epoch_models:
-                # move model variables to gpu
-                model.to(self.device)
-                if model.current_optimizer and mode == "train":
-                    # move optimizer variables to gpu
-                    self._move_optimizer_between_device(model.current_optimizer.state, self.device)
+            self._make_resident(mode)
+        if is_distributed() and mode == "train" and not warmup:
+            self.epoch_state["ddp"] = self._get_ddp_models()
+        self._epoch_step = None
+        if self.compile_ops and not eager and not warmup:
+            self._epoch_step = self._get_compiled_step(mode)
         # Set all of the contiguous final updates to defer their updates by default to enable things like CycleGan
         # This is not necessary for TF because overriding tf weights does not confuse the gradient tape computation
         for op in reversed(self.epoch_ops):
@@ -409,6 +565,65 @@ class TorchNetwork(BaseNetwork):
             else:
                 break
 
+    def _get_ddp_models(self) -> Dict[torch.nn.Module, DistributedDataParallel]:
+        """Wrap the models which are updated during the current epoch in DistributedDataParallel.
+
+        Models which are only used for inference (or which are not trained this epoch) are left unwrapped, since their
+        weights are already identical in every process.
+
+        Returns:
+            A mapping from models to their DistributedDataParallel wrappers, which ModelOps and UpdateOps will use in
+            place of the models.
+        """
+        ddp_models = {}
+        for op in self.epoch_ops:
+            if isinstance(op, UpdateOp):
+                model = op.model
+                if model not in self._ddp_models:
+                    # Creating the wrapper also broadcasts the model weights from the main process
+                    self._ddp_models[model] = DistributedDataParallel(
+                        model, device_ids=[self.device] if self.device.type == "cuda" else None)
+                ddp_models[model] = self._ddp_models[model]
+        return ddp_models
+
+    def _get_accumulating_ddp_models(self) -> List[DistributedDataParallel]:
+        """Find the DistributedDataParallel models which will only accumulate gradients during the next step.
+
+        The gradients of these models don't need to be synchronized between processes until the step on which they are
+        actually updated (see the `merge_grad` argument of UpdateOp), so the next step can run them with no_sync().
+
+        Returns:
+            The models whose gradients do not need to be synchronized during the next step.
+        """
+        ddp_models = self.epoch_state.get("ddp")
+        if not ddp_models:
+            return []
+        accumulating = {}
+        for op in self.epoch_ops:
+            if isinstance(op, UpdateOp) and op.model in ddp_models:
+                accumulating[op.model] = accumulating.get(op.model, True) and op.is_accumulating()
+        return [ddp_models[model] for model, skip_sync in accumulating.items() if skip_sync]
+
+    def _get_compiled_step(self, mode: str) -> Callable[[Dict[str, Any], Dict[str, Any]], None]:
+        """Get a compiled forward step for the current epoch.
+
+        A step is only compiled the first time that a given op chain is seen (in a given mode). Epochs which the
+        schedulers map onto the same op chain (see get_signature_epochs) then re-use the compiled step.
+
+        Args:
+            mode: The current execution mode. One of 'train', 'eval', 'test', or 'infer'.
+
+        Returns:
+            A function which runs the current epoch's ops on a batch of data and a state dictionary.
+        """
+        key = (mode, tuple(self.epoch_ops))
+        if key not in self._compiled_steps:
+            ops = self.epoch_ops
+            kwargs = self.compile_ops if isinstance(self.compile_ops, dict) else {}
+            self._compiled_steps[key] = torch.compile(lambda batch, state: self._forward_batch(batch, state, ops),
+                                                      **kwargs)
+        return self._compiled_steps[key]
+
     def _move_optimizer_between_device(self, data: Dict[str, Any], device: Union[str, torch.device]) -> None:
         """Move optimizer state between gpu and cpu recursively.
 
@@ -425,24 +640,120 @@ class TorchNetwork(BaseNetwork):
                 except:
                     pass
 
+    def _make_resident(self, mode: str) -> None:
+        """Ensure that all of the models (and optimizers) required by the current epoch are on the GPU.
+
+        Args:
+            mode: The current execution mode. One of 'train', 'eval', 'test', or 'infer'.
+        """
+        required = {}
+        for model in self.epoch_models:
+            optimizers = set()
+            if model.current_optimizer and mode == "train":
+                optimizers.add(model.current_optimizer)
+            required[model] = optimizers - self.resident_models.get(model, set())
+        self._evict(keep=self.epoch_models, required=required)
+        for model, optimizers in required.items():
+            if model not in self.resident_models:
+                # move model variables to gpu
+                model.to(self.device)
+                self.resident_models[model] = set()
+            for optimizer in optimizers:
+                # move optimizer variables to gpu
+                self._move_optimizer_between_device(optimizer.state, self.device)
+            self.resident_models[model] |= optimizers
+            self.resident_models.move_to_end(model)
+
+    def _evict(self, keep: Set[torch.nn.Module], required: Dict[torch.nn.Module, Set[torch.optim.Optimizer]]) -> None:
+        """Move idle models back to the CPU (least recently used first) until there is room for the `required` models.
+
+        Args:
+            keep: Models which must not be evicted.
+            required: The models which are about to be moved onto the GPU, along with any of their optimizers which are
+                not yet on the GPU.
+        """
+        candidates = [model for model in self.resident_models if model not in keep]
+        n_resident = len(set(self.resident_models) | set(required))
+        while candidates and self.max_resident_models is not None and n_resident > self.max_resident_models:
+            self._unload_model(candidates.pop(0))
+            n_resident -= 1
+        # Processes must make identical eviction decisions when distributed, so they can't depend on free memory
+        if candidates and not is_distributed():
+            required_bytes = 0
+            for model, optimizers in required.items():
+                if model not in self.resident_models:
+                    required_bytes += self._count_bytes(model.parameters(), model.buffers())
+                required_bytes += sum(self._count_bytes(optimizer.state.values()) for optimizer in optimizers)
+            while candidates and self._is_memory_short(required_bytes):
+                self._unload_model(candidates.pop(0))
+
+    def _is_memory_short(self, required_bytes: int) -> bool:
+        """Determine whether moving more data onto the GPU would leave less than the desired amount of free memory.
+
+        Args:
+            required_bytes: How much data is going to be moved onto the GPU.
+
+        Returns:
+            True iff the GPU memory is running short.
+        """
+        if not hasattr(torch.cuda, "mem_get_info"):
+            return False
+        free, total = torch.cuda.mem_get_info(self.device)
+        # Memory which is reserved by torch's caching allocator but not in use is also available
+        free += torch.cuda.memory_reserved(self.device) - torch.cuda.memory_allocated(self.device)
+        return free - required_bytes < self.memory_headroom * total
+
+    @staticmethod
+    def _count_bytes(*collections: Iterable[Any]) -> int:
+        """Count the size of the tensors within some (nested) collections which are not already on the GPU.
+
+        Args:
+            *collections: The collections of tensors to be measured.
+
+        Returns:
+            The number of bytes occupied by the CPU tensors.
+        """
+        n_bytes = 0
+        for collection in collections:
+            for item in collection:
+                if isinstance(item, dict):
+                    n_bytes += TorchNetwork._count_bytes(item.values())
+                elif isinstance(item, torch.Tensor) and not item.is_cuda:
+                    n_bytes += item.numel() * item.element_size()
+        return n_bytes
+
+    def _unload_model(self, model: torch.nn.Module) -> None:
+        """Move a model (and its optimizer variables) from the GPU back to the CPU.
+
+        Args:
+            model: The model to be moved.
+        """
+        model.to("cpu")
+        self._ddp_models.pop(model, None)
+        for optimizer in self.resident_models.pop(model):
+            self._move_optimizer_between_device(optimizer.state, "cpu")
+
+    def unload_models(self) -> None:
+        """Move all of the models from the GPU(s) back to the CPU.
+        """
+        for model in list(self.resident_models):
+            self._unload_model(model)
+        if self.device.type == "cuda":
+            torch.cuda.empty_cache()
+
     def unload_epoch(self) -> None:
         """Clean up the network after running an epoch.
 
-        In this case we move all of the models from the GPU(s) back to the CPU.
+        The models are left on the GPU(s) so that they do not need to be moved again for the next epoch. See
+        `unload_models`.
         """
-        if self.device.type == "cuda":
-            for model in self.epoch_models:
-                # move model variables to cpu
-                model.to("cpu")
-                if model.current_optimizer and self.epoch_state["mode"] == "train":
-                    # move optimizer variables to cpu
-                    self._move_optimizer_between_device(model.current_optimizer.state, "cpu")
         # Set the final update ops back to their original defer status
         for op in reversed(self.epoch_ops):
             if isinstance(op, UpdateOp):
                 op.defer = op.__dict__.get('_old_defer', op.defer)
             else:
                 break
+        self._epoch_step = None
 
     def _get_effective_batch_input(self, batch: MutableMapping[str, Any], mode: str) -> Dict[str, Any]:
         """Copy input data from the the CPU onto the GPU(s).
@@ -466,7 +777,72 @@ class TorchNetwork(BaseNetwork):
             new_batch = {key: batch[key] for key in self.effective_inputs[mode] if key in batch}
         return new_batch
 
-    def _run_step(self, batch: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    def stage_batch(self, batch: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[torch.cuda.Event]]:
+        """Filter the network inputs from a batch of data, and begin copying them onto the GPU.
+
+        The copies are issued from pinned memory on a dedicated CUDA stream, so they do not block either the calling
+        thread or any computation which is currently running on the GPU.
+
+        Args:
+            batch: The batch of data which will later be passed to `run_step`.
+
+        Returns:
+            The network inputs, and an event which will be complete once they have finished moving onto the GPU (or None
+            if there is no GPU).
+        """
+        keys = [key for key in self.effective_inputs[self.epoch_state["mode"]] if key in batch]
+        if self.device.type != "cuda":
+            return {key: batch[key] for key in keys}, None
+        if self._staging_stream is None:
+            self._staging_stream = torch.cuda.Stream(self.device)
+        with torch.cuda.stream(self._staging_stream):
+            staged = {key: self._stage_tensor(batch[key]) for key in keys}
+        return staged, self._staging_stream.record_event()
+
+    def _stage_tensor(self, data: T) -> T:
+        """Copy data onto the GPU asynchronously, recursively.
+
+        Args:
+            data: The data to be copied.
+
+        Returns:
+            The data on the GPU.
+        """
+        if isinstance(data, dict):
+            return {key: self._stage_tensor(value) for (key, value) in data.items()}
+        elif isinstance(data, list):
+            return [self._stage_tensor(val) for val in data]
+        elif isinstance(data, tuple):
+            return tuple([self._stage_tensor(val) for val in data])
+        elif isinstance(data, torch.Tensor):
+            if not data.is_cuda and not data.is_pinned():
+                data = data.pin_memory()
+            return data.to(self.device, non_blocking=True)
+        return data
+
+    def _record_stream(self, data: Any, stream: torch.cuda.Stream) -> None:
+        """Mark GPU data as being in use by a given stream, recursively.
+
+        This prevents the caching allocator from re-using the memory of staged data (which was allocated on the staging
+        stream) before the computation which uses it has finished.
+
+        Args:
+            data: The data to be marked.
+            stream: The stream which will use the data.
+        """
+        if isinstance(data, dict):
+            for val in data.values():
+                self._record_stream(val, stream)
+        elif isinstance(data, (list, tuple)):
+            for val in data:
+                self._record_stream(val, stream)
+        elif isinstance(data, torch.Tensor) and data.is_cuda:
+            data.record_stream(stream)
+
+    def _run_step(self,
+                  batch: Dict[str, Any],
+                  staged: Optional[Tuple[Dict[str, Any], Optional[torch.cuda.Event]]] = None
+                  ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """Run a forward step through the Network on a batch of data.
 
         Implementations of this method within derived classes should handle bringing the prediction data back from the
@@ -474,31 +850,53 @@ class TorchNetwork(BaseNetwork):
 
         Args:
             batch: The batch of data serving as input to the Network.
+            staged: The result of invoking `stage_batch` on the `batch`, if available.
 
         Returns:
             (batch_data, prediction_data)
         """
         mode = self.epoch_state["mode"]
-        batch_in = self._get_effective_batch_input(batch, mode)
+        with profile_phase("to_device"):
+            if staged is None:
+                batch_in = self._get_effective_batch_input(batch, mode)
+            else:
+                batch_in, event = staged
+                if event is not None:
+                    stream = torch.cuda.current_stream(self.device)
+                    stream.wait_event(event)
+                    self._record_stream(batch_in, stream)
         self.epoch_state["tape"] = NonContext()
         # gpu operation
-        with torch.no_grad() if not self.epoch_state["req_grad"] else NonContext():
-            with torch.cuda.amp.autocast() if self.mixed_precision else NonContext():
-                self._forward_batch(batch_in, self.epoch_state, self.epoch_ops)
+        with torch.no_grad() if not self.epoch_state["req_grad"] else NonContext(), ExitStack() as no_sync:
+            for ddp_model in self._get_accumulating_ddp_models():
+                no_sync.enter_context(ddp_model.no_sync())
+            with torch.cuda.amp.autocast() if self.mixed_precision else NonContext(), profile_phase("forward"):
+                if self._epoch_step is None:
+                    self._forward_batch(batch_in, self.epoch_state, self.epoch_ops)
+                else:
+                    self._epoch_step(batch_in, self.epoch_state)
 
-        # copy data to cpu
+        prediction = {
+            key: self._detach_tensor(batch_in[key])
+            for key in self.effective_outputs[mode] if key in batch_in
+        }
         if self.device.type == "cuda":
-            prediction = {
-                key: self._move_tensor_between_device(self._detach_tensor(batch_in[key]), "cpu")
-                for key in self.effective_outputs[mode] if key in batch_in
-            }
-        else:
-            prediction = {
-                key: self._detach_tensor(batch_in[key])
-                for key in self.effective_outputs[mode] if key in batch_in
-            }
+            # Copying data to the cpu forces a device sync, so only do it for values which are actually used
+            prediction = LazyPrediction(prediction, self._to_host)
         return batch, prediction
 
+    def _to_host(self, data: T) -> T:
+        """Copy prediction data from the GPU back onto the CPU.
+
+        Args:
+            data: The data to be copied.
+
+        Returns:
+            The data on the CPU.
+        """
+        with profile_phase("to_host"):
+            return self._move_tensor_between_device(data, "cpu")
+
     def _move_tensor_between_device(self, data: T, device: Union[str, torch.device]) -> T:
         """Move tensor between gpu and cpu recursively.
 
@@ -587,7 +985,9 @@ class TFNetwork(BaseNetwork):
             [str(id(model.current_optimizer)) for model in self.epoch_models if hasattr(model, 'current_optimizer')])
         self.epoch_state["_force_tf_retrace"] = hash(opt_str)  # Hash to keep at fixed memory overhead
 
-    def _run_step(self, batch: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    def _run_step(self,
+                  batch: Dict[str, Any],
+                  staged: Optional[Any] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """Run a forward step through the Network on a batch of data.
 
         Implementations of this method within derived classes should handle bringing the prediction data back from the
@@ -595,6 +995,7 @@ class TFNetwork(BaseNetwork):
 
         Args:
             batch: The batch of data serving as input to the Network.
+            staged: Unused, since TensorFlow networks do not support staging.
 
         Returns:
             (batch_data, prediction_data)
@@ -603,29 +1004,45 @@ class TFNetwork(BaseNetwork):
         batch_in = self._get_effective_batch_input(batch, mode)
         strategy = tf.distribute.get_strategy()
         if isinstance(strategy, tf.distribute.MirroredStrategy):
-            if self.epoch_state["eager"]:
-                prediction = strategy.run(
-                    self._forward_step_eager,
-                    args=(batch_in, self.epoch_state, self.epoch_ops, to_list(self.effective_outputs[mode])))
-            else:
-                prediction = strategy.run(
-                    self._forward_step_static,
-                    args=(batch_in, self.epoch_state, self.epoch_ops, to_list(self.effective_outputs[mode])))
+            with profile_phase("forward"):
+                if self.epoch_state["eager"]:
+                    prediction = strategy.run(
+                        self._forward_step_eager,
+                        args=(batch_in, self.epoch_state, self.epoch_ops, to_list(self.effective_outputs[mode])))
+                else:
+                    prediction = strategy.run(
+                        self._forward_step_static,
+                        args=(batch_in, self.epoch_state, self.epoch_ops, to_list(self.effective_outputs[mode])))
             batch = self._per_replica_to_global(batch)
-            prediction = self._per_replica_to_global(prediction)
+            # Only gather the predictions from each replica if they are actually used
+            prediction = LazyPrediction(prediction, self._gather_prediction, raw_readable=False)
         else:
-            if self.epoch_state["eager"]:
-                prediction = self._forward_step_eager(batch_in,
-                                                      self.epoch_state,
-                                                      self.epoch_ops,
-                                                      to_list(self.effective_outputs[mode]))
-            else:
-                prediction = self._forward_step_static(batch_in,
-                                                       self.epoch_state,
-                                                       self.epoch_ops,
-                                                       to_list(self.effective_outputs[mode]))
+            # Within a static graph, the backward pass and optimizer step can't be timed apart from the forward pass
+            with profile_phase("forward"):
+                if self.epoch_state["eager"]:
+                    prediction = self._forward_step_eager(batch_in,
+                                                          self.epoch_state,
+                                                          self.epoch_ops,
+                                                          to_list(self.effective_outputs[mode]))
+                else:
+                    prediction = self._forward_step_static(batch_in,
+                                                           self.epoch_state,
+                                                           self.epoch_ops,
+                                                           to_list(self.effective_outputs[mode]))
         return batch, prediction
 
+    def _gather_prediction(self, data: T) -> T:
+        """Combine prediction data from every replica.
+
+        Args:
+            data: Distributed prediction data.
+
+        Returns:
+            The combined prediction data.
+        """
+        with profile_phase("to_host"):
+            return self._per_replica_to_global(data)
+
     def _per_replica_to_global(self, data: T) -> T:
         """Combine data from "per-replica" values recursively.
 
@@ -640,7 +1057,9 @@ class TFNetwork(BaseNetwork):
         """
         if isinstance(data, DistributedValues):
             if data.values[0].shape.rank == 0:
-                return tf.reduce_mean(tuple(d for d in data.values if not tf.math.is_nan(d)))
+                values = tf.stack(data.values)
+                # Tensor ops (rather than python conditionals) keep this usable inside of a tf.function
+                return tf.reduce_mean(tf.boolean_mask(values, tf.logical_not(tf.math.is_nan(values))))
             else:
                 return tf.concat(data.values, axis=0)
         elif isinstance(data, dict):
@@ -732,6 +1151,106 @@ class TFNetwork(BaseNetwork):
                 prediction[key] = batch[key]
         return prediction
 
+    def run_steps(self, batch: Dict[str, Any], iterator: Iterator[Dict[str, Any]],
+                  num_steps: int) -> Tuple[Dict[str, Any], Dict[str, Any], int]:
+        """Run several forward steps through the Network within a single graph execution, including postprocessing.
+
+        The first step is run on the given `batch`, and up to `num_steps` - 1 further batches are then drawn from the
+        `iterator` inside of the graph. This avoids paying python and function dispatch overhead on every step. This
+        method expects that Network.load_epoch() has already been invoked, and that eager mode is not being used.
+
+        Args:
+            batch: The batch of data for the first step.
+            iterator: An iterator over the tf.data.Dataset (or distributed dataset) which produced the `batch`.
+            num_steps: The maximum number of steps to run. Fewer steps will be run if the `iterator` is exhausted.
+
+        Returns:
+            (batch_data, prediction_data, num_steps_run), where the data are from the final step which was run.
+        """
+        mode = self.epoch_state["mode"]
+        with profile_phase("forward"):
+            batch, prediction, steps_run = self._forward_steps_static(batch,
+                                                                      iterator,
+                                                                      self.epoch_state,
+                                                                      self.epoch_ops,
+                                                                      to_list(self.effective_outputs[mode]),
+                                                                      tf.constant(num_steps))
+            steps_run = int(steps_run)
+        forward_numpyop(ops=self.epoch_postprocessing,
+                        data=ChainMap(prediction, batch),
+                        state=self.epoch_state,
+                        batched=True)
+        return batch, prediction, steps_run
+
+    @tf.function
+    def _forward_steps_static(self,
+                              batch: Dict[str, Any],
+                              iterator: Iterator[Dict[str, Any]],
+                              state: Dict[str, Any],
+                              ops: List[TensorOp],
+                              effective_outputs: List[str],
+                              num_steps: tf.Tensor) -> Tuple[Dict[str, Any], Dict[str, Any], tf.Tensor]:
+        """Run several forward steps of the Network in a single static graph.
+
+        Args:
+            batch: The input data for the first step.
+            iterator: The iterator from which to draw the input data for subsequent steps.
+            state: A dictionary containing information about the current execution environment.
+            ops: A list of Ops to run during each forward step.
+            effective_outputs: Which outputs should be copied from the GPU back onto the CPU for further use in Traces.
+            num_steps: The maximum number of steps to run.
+
+        Returns:
+            The input data and prediction dictionary of the final step, and the number of steps which were run.
+        """
+        batch, prediction = self._forward_step_replicas(batch, state, ops, effective_outputs)
+        steps_run = tf.constant(1)
+        while steps_run < num_steps:
+            # The final batch of an epoch may be smaller than the others
+            tf.autograph.experimental.set_loop_options(shape_invariants=[(batch, self._relax_shapes(batch)),
+                                                                         (prediction, self._relax_shapes(prediction))])
+            next_batch = iterator.get_next_as_optional()
+            if not next_batch.has_value():
+                break
+            batch, prediction = self._forward_step_replicas(next_batch.get_value(), state, ops, effective_outputs)
+            steps_run += 1
+        return batch, prediction, steps_run
+
+    def _forward_step_replicas(self,
+                               batch: Dict[str, Any],
+                               state: Dict[str, Any],
+                               ops: List[TensorOp],
+                               effective_outputs: List[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Run a forward step of the Network on every replica (if multi-gpu), from within a static graph.
+
+        Args:
+            batch: The input data for the Network.
+            state: A dictionary containing information about the current execution environment.
+            ops: A list of Ops to run during the forward step.
+            effective_outputs: Which outputs should be copied from the GPU back onto the CPU for further use in Traces.
+
+        Returns:
+            The (combined) input data and prediction dictionary.
+        """
+        strategy = tf.distribute.get_strategy()
+        if isinstance(strategy, tf.distribute.MirroredStrategy):
+            prediction = strategy.run(self._forward_step_static, args=(batch, state, ops, effective_outputs))
+            return self._per_replica_to_global(batch), self._per_replica_to_global(prediction)
+        return batch, self._forward_step_static(batch, state, ops, effective_outputs)
+
+    @staticmethod
+    def _relax_shapes(data: Dict[str, tf.Tensor]) -> Dict[str, tf.TensorShape]:
+        """Get shapes which are compatible with any tensor of the same rank as the tensors in `data`.
+
+        Args:
+            data: A dictionary of tensors.
+
+        Returns:
+            The relaxed shape of each tensor.
+        """
+        return tf.nest.map_structure(
+            lambda tensor: tf.TensorShape(None if tensor.shape.rank is None else [None] * tensor.shape.rank), data)
+
     def transform(self, data: Dict[str, Any], mode: str, epoch: int = 1) -> Dict[str, Any]:
         """Run a forward step through the Network on an element of data.
 
@@ -869,7 +1388,8 @@ def build(model_fn: Callable[[], Union[Model, List[Model]]],
         if framework == "tf" and not isinstance(tf.distribute.get_strategy(), tf.distribute.MirroredStrategy):
             tf.distribute.experimental_set_strategy(tf.distribute.MirroredStrategy())
             models = to_list(model_fn())
-        if framework == "torch":
+        # Distributed training instead gives each process its own device, see TorchNetwork
+        if framework == "torch" and not distributed_enabled():
             models = [torch.nn.DataParallel(model) for model in models]
     # mark models with its mixed_precision flag
     for model in models:
@@ -50,6 +50,7 @@ class Fuse(NumpyOp):
                     outputs.append(out)
         super().__init__(inputs=inputs, outputs=outputs, mode=mode)
         self.ops = ops
+        self.deterministic = all(op.deterministic for op in ops)
 
     def __getstate__(self) -> Dict[str, List[Dict[Any, Any]]]:
         return {'ops': [elem.__getstate__() if hasattr(elem, '__getstate__') else {} for elem in self.ops]}
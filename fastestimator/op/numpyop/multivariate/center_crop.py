@@ -77,3 +77,4 @@ class CenterCrop(MultiVariateAlbumentation):
                          bbox_params=bbox_params,
                          keypoint_params=keypoint_params,
                          mode=mode)
+        self.deterministic = True
@@ -79,3 +79,4 @@ class LongestMaxSize(MultiVariateAlbumentation):
                          bbox_params=bbox_params,
                          keypoint_params=keypoint_params,
                          mode=mode)
+        self.deterministic = True
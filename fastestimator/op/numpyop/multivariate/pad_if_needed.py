@@ -90,3 +90,4 @@ class PadIfNeeded(MultiVariateAlbumentation):
             bbox_params=bbox_params,
             keypoint_params=keypoint_params,
             mode=mode)
+        self.deterministic = True
@@ -43,6 +43,7 @@ class ReadMat(NumpyOp):
         super().__init__(inputs=file, outputs=keys, mode=mode)
         self.parent_path = parent_path
         self.out_list = True
+        self.deterministic = True
 
     def forward(self, data: str, state: Dict[str, Any]) -> List[Dict[str, Any]]:
         data = loadmat(os.path.normpath(os.path.join(self.parent_path, data)))
@@ -81,3 +81,4 @@ class Resize(MultiVariateAlbumentation):
                          bbox_params=bbox_params,
                          keypoint_params=keypoint_params,
                          mode=mode)
+        self.deterministic = True
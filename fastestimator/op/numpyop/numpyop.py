@@ -48,6 +48,11 @@ class NumpyOp(Op):
         # This is inferred automatically by the system and is used for memory management optimization. If you are
         # developing a NumpyOp which does in-place edits, the best practice is to set this to True in your init method.
         self.in_place_edits = False
+        # deterministic tracks whether the .forward() method of this op will always produce the same outputs given the
+        # same inputs. A leading run of deterministic ops within a Pipeline may have its outputs cached to disk so that
+        # they need not be recomputed every epoch. If you are developing a NumpyOp without any randomness, you can set
+        # this to True in your init method.
+        self.deterministic = False
 
     def forward(self, data: Union[np.ndarray, List[np.ndarray]],
                 state: Dict[str, Any]) -> Union[np.ndarray, List[np.ndarray]]:
@@ -72,7 +77,8 @@ class NumpyOp(Op):
         This method will be invoked on batches of data during network postprocessing. Note that the inputs may be numpy
         arrays or TF/Torch tensors. Outputs are expected to be Numpy arrays, though this is not enforced. Developers
         should probably not need to override this implementation unless they are building an op specifically intended
-        for postprocessing.
+        for postprocessing. Ops which do override it with a vectorized implementation will also be run once per batch
+        (rather than once per element) within a Pipeline when its `vectorize_ops` argument is enabled.
 
         Args:
             data: The arrays from the data dictionary corresponding to whatever keys this Op declares as its `inputs`.
@@ -40,6 +40,7 @@ class Binarize(NumpyOp):
         super().__init__(inputs=inputs, outputs=outputs, mode=mode)
         self.threshold = threshold
         self.in_list, self.out_list = True, True
+        self.deterministic = True
 
     def forward(self, data: List[np.ndarray], state: Dict[str, Any]) -> List[np.ndarray]:
         return [(dat >= self.threshold).astype(np.float32) for dat in data]
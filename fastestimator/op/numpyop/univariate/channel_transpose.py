@@ -40,6 +40,7 @@ class ChannelTranspose(NumpyOp):
         super().__init__(inputs=inputs, outputs=outputs, mode=mode)
         self.axes = axes
         self.in_list, self.out_list = True, True
+        self.deterministic = True
 
     def forward(self, data: List[np.ndarray], state: Dict[str, Any]) -> List[np.ndarray]:
         return [np.transpose(elem, self.axes) for elem in data]
@@ -16,8 +16,9 @@ from typing import Any, Dict, Iterable, List, Union
 
 import numpy as np
 
-from fastestimator.op.numpyop.numpyop import NumpyOp
+from fastestimator.op.numpyop.numpyop import NumpyOp, Tensor
 from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import to_number
 
 
 @traceable()
@@ -40,6 +41,12 @@ class ExpandDims(NumpyOp):
         super().__init__(inputs=inputs, outputs=outputs, mode=mode)
         self.axis = axis
         self.in_list, self.out_list = True, True
+        self.deterministic = True
 
     def forward(self, data: List[np.ndarray], state: Dict[str, Any]) -> List[np.ndarray]:
         return [np.expand_dims(elem, self.axis) for elem in data]
+
+    def forward_batch(self, data: List[Tensor], state: Dict[str, Any]) -> List[np.ndarray]:
+        # Non-negative axes need to be shifted to account for the batch dimension
+        axis = self.axis + 1 if self.axis >= 0 else self.axis
+        return [np.expand_dims(to_number(elem), axis) for elem in data]
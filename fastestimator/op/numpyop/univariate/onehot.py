@@ -16,8 +16,9 @@ from typing import Any, Dict, Iterable, List, Union
 
 import numpy as np
 
-from fastestimator.op.numpyop.numpyop import NumpyOp
+from fastestimator.op.numpyop.numpyop import NumpyOp, Tensor
 from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import to_number
 
 
 @traceable()
@@ -47,6 +48,7 @@ class Onehot(NumpyOp):
         self.num_classes = num_classes
         self.label_smoothing = label_smoothing
         self.in_list, self.out_list = True, True
+        self.deterministic = True
 
     def forward(self, data: List[Union[int, np.ndarray]], state: Dict[str, Any]) -> List[np.ndarray]:
         return [self._apply_onehot(elem) for elem in data]
@@ -60,3 +62,18 @@ class Onehot(NumpyOp):
         output = np.full((self.num_classes), fill_value=self.label_smoothing / self.num_classes)
         output[class_index] = 1.0 - self.label_smoothing + self.label_smoothing / self.num_classes
         return output
+
+    def forward_batch(self, data: List[Tensor], state: Dict[str, Any]) -> List[np.ndarray]:
+        return [self._apply_onehot_batch(to_number(elem)) for elem in data]
+
+    def _apply_onehot_batch(self, data: np.ndarray) -> np.ndarray:
+        class_index = data.reshape(data.shape[0], -1)
+        assert "int" in str(class_index.dtype)
+        assert class_index.shape[1] == 1, "data must have only one item"
+        class_index = class_index[:, 0]
+        assert np.all(class_index < self.num_classes), "label value should be smaller than num_classes"
+        batch_size = class_index.shape[0]
+        output = np.full((batch_size, self.num_classes), fill_value=self.label_smoothing / self.num_classes)
+        output[np.arange(batch_size), class_index] = \
+            1.0 - self.label_smoothing + self.label_smoothing / self.num_classes
+        return output
@@ -56,6 +56,7 @@ class ReadImage(NumpyOp):
         elif self.color_flag in {"gray", "grey"}:
             self.color_flag = cv2.IMREAD_GRAYSCALE
         self.in_list, self.out_list = True, True
+        self.deterministic = True
 
     def forward(self, data: List[str], state: Dict[str, Any]) -> List[np.ndarray]:
         return [self._read(elem) for elem in data]
@@ -16,8 +16,9 @@ from typing import Any, Dict, Iterable, List, Tuple, Union
 
 import numpy as np
 
-from fastestimator.op.numpyop.numpyop import NumpyOp
+from fastestimator.op.numpyop.numpyop import NumpyOp, Tensor
 from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import to_list, to_number
 
 
 @traceable()
@@ -40,10 +41,14 @@ class Reshape(NumpyOp):
         super().__init__(inputs=inputs, outputs=outputs, mode=mode)
         self.shape = shape
         self.in_list, self.out_list = True, True
+        self.deterministic = True
 
     def forward(self, data: List[np.ndarray], state: Dict[str, Any]) -> List[np.ndarray]:
         return [self._apply_reshape(elem) for elem in data]
 
+    def forward_batch(self, data: List[Tensor], state: Dict[str, Any]) -> List[np.ndarray]:
+        return [np.reshape(to_number(elem), [elem.shape[0]] + to_list(self.shape)) for elem in data]
+
     def _apply_reshape(self, data):
         data = np.reshape(data, self.shape)
         return data
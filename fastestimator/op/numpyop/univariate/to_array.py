@@ -40,6 +40,7 @@ class ToArray(NumpyOp):
         super().__init__(inputs=inputs, outputs=outputs, mode=mode)
         self.dtype = dtype
         self.in_list, self.out_list = True, True
+        self.deterministic = True
 
     def forward(self, data: List[Any], state: Dict[str, Any]) -> List[np.ndarray]:
         return [self._apply_transform(elem) for elem in data]
@@ -12,12 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
-from typing import Iterable, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Union
 
+import numpy as np
+from albumentations.augmentations.functional import to_float
 from albumentations.augmentations.transforms import ToFloat as ToFloatAlb
 
+from fastestimator.op.numpyop.numpyop import Tensor
 from fastestimator.op.numpyop.univariate.univariate import ImageOnlyAlbumentation
 from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import to_number
 
 
 @traceable()
@@ -41,3 +45,8 @@ class ToFloat(ImageOnlyAlbumentation):
                  mode: Union[None, str, Iterable[str]] = None,
                  max_value: Optional[float] = None):
         super().__init__(ToFloatAlb(max_value=max_value, always_apply=True), inputs=inputs, outputs=outputs, mode=mode)
+        self.max_value = max_value
+        self.deterministic = True
+
+    def forward_batch(self, data: List[Tensor], state: Dict[str, Any]) -> List[np.ndarray]:
+        return [to_float(to_number(elem), self.max_value) for elem in data]
@@ -17,6 +17,7 @@ from typing import Any, Dict, Iterable, List, Set, TypeVar, Union
 import tensorflow as tf
 import torch
 
+from fastestimator.backend.checkpoint_forward import checkpoint_forward
 from fastestimator.backend.feed_forward import feed_forward
 from fastestimator.op.tensorop.tensorop import TensorOp
 from fastestimator.util.traceability_util import FeInputSpec, traceable
@@ -37,17 +38,29 @@ class ModelOp(TensorOp):
             regardless of mode, pass None. To execute in all modes except for a particular one, you can pass an argument
             like "!infer" or "!train".
         trainable: Indicates whether the model should have its weights tracked for update.
+        checkpoint_segments: How many segments to split the model into for activation checkpointing during training,
+            or 0 to disable it. Only the tensors which flow between segments are kept for the backward pass, with the
+            activations inside of each segment being recomputed when they are needed. This trades extra computation for
+            less memory, allowing larger batch sizes or inputs. More segments keep more tensors, but each recomputation
+            needs less memory. See fe.backend.checkpoint_forward for details.
+
+    Raises:
+        ValueError: If `checkpoint_segments` is negative.
     """
     def __init__(self,
                  model: Union[tf.keras.Model, torch.nn.Module],
                  inputs: Union[None, str, Iterable[str]] = None,
                  outputs: Union[None, str, Iterable[str]] = None,
                  mode: Union[None, str, Iterable[str]] = None,
-                 trainable: bool = True):
+                 trainable: bool = True,
+                 checkpoint_segments: int = 0):
         super().__init__(inputs=inputs, outputs=outputs, mode=mode)
         assert hasattr(model, "fe_compiled"), "must use fe.build to compile the model before use"
+        if checkpoint_segments < 0:
+            raise ValueError("checkpoint_segments must be non-negative, but got {}".format(checkpoint_segments))
         self.model = model
         self.trainable = trainable
+        self.checkpoint_segments = checkpoint_segments
         self.epoch_spec = None
 
     def get_fe_models(self) -> Set[Model]:
@@ -59,5 +72,10 @@ class ModelOp(TensorOp):
             # Gather model input specs for the sake of TensorBoard and Traceability
             self.model.fe_input_spec = FeInputSpec(data, self.model)
             self.epoch_spec = state['epoch']
-        data = feed_forward(self.model, data, training=training)
+        # During distributed training, models which are being updated must be run through their DDP wrappers
+        model = state.get("ddp", {}).get(self.model, self.model)
+        if training and self.checkpoint_segments:
+            data = checkpoint_forward(model, data, segments=self.checkpoint_segments, training=training)
+        else:
+            data = feed_forward(model, data, training=training)
         return data
@@ -21,6 +21,7 @@ from fastestimator.backend.get_gradient import get_gradient
 from fastestimator.backend.reduce_mean import reduce_mean
 from fastestimator.backend.update_model import update_model
 from fastestimator.op.tensorop.tensorop import TensorOp
+from fastestimator.util.profiler import profile_phase
 from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import to_set
 
@@ -44,7 +45,9 @@ class UpdateOp(TensorOp):
             like "!infer" or "!train".
         merge_grad: The gradient accumulation times before model update. Ex: if `merge_grad` = 3, for every three Op
             calls only the third one updates the model. The first two calls only accumulate its gradients. This default
-            value is 1 and it will update the model at every step.
+            value is 1 and it will update the model at every step. PyTorch gradients are accumulated in place within
+            the `.grad` of each parameter. When training on multiple devices, gradients are only combined across the
+            devices on the calls which update the model.
         defer: Whether to defer the actual application of the update until the end of the step. This can be necessary
             in PyTorch when trying to update multiple models which depend on one another (ex. certain GANs). By default,
             all UpdateOps which appear contiguously as the last ops of a Network will be deferred. We hope that you will
@@ -53,7 +56,6 @@ class UpdateOp(TensorOp):
     Raise:
         ValueError: When model is mixed-precision and `gradients` is provided.
         ValueError: Network framework is not one of "tf" or "torch".
-        ValueError: `merge_grad` is larger than 1 in multi-GPU configuration.
         RuntimeError: If attempting to modify a PyTorch model which relied on gradients within a different PyTorch model
             which has in turn already undergone a non-deferred update.
     """
@@ -76,10 +78,6 @@ class UpdateOp(TensorOp):
                 " are not computed in UpdateOp class.")
             super().__init__(inputs=gradients, outputs=None, mode=mode)
 
-        if torch.cuda.device_count() > 1 and merge_grad > 1:
-            raise ValueError("Currently FastEstimator doesn't support merge_grad feature in multi-GPU configuration "
-                             "and thus 'merge_grad' cannot be larger than 1")
-
         if not hasattr(model, "loss_name"):
             model.loss_name = {loss_name}
         else:
@@ -101,11 +99,21 @@ class UpdateOp(TensorOp):
 
         if self.merge_grad > 1:
             if framework == "tf":
-                self.step = tf.Variable(0, trainable=False, dtype=tf.int64)
-                self.grad_sum = [tf.Variable(tf.zeros_like(x), trainable=False) for x in self.model.trainable_variables]
+                # On-read variables let each replica accumulate its own gradients without communicating
+                self.step = tf.Variable(0,
+                                        trainable=False,
+                                        dtype=tf.int64,
+                                        synchronization=tf.VariableSynchronization.ON_READ,
+                                        aggregation=tf.VariableAggregation.ONLY_FIRST_REPLICA)
+                self.grad_sum = [
+                    tf.Variable(tf.zeros_like(x),
+                                trainable=False,
+                                synchronization=tf.VariableSynchronization.ON_READ,
+                                aggregation=tf.VariableAggregation.SUM) for x in self.model.trainable_variables
+                ]
             else:  # framework == "torch"
-                self.step = torch.tensor(0, dtype=torch.int64).to(device)
-                self.grad_sum = [torch.zeros_like(x).to(device) for x in self.model.parameters() if x.requires_grad]
+                # Gradients are accumulated in the .grad of the parameters, so only a step counter is needed
+                self.step = 0
 
     def get_fe_models(self) -> Set[Model]:
         return {self.model}
@@ -118,21 +126,35 @@ class UpdateOp(TensorOp):
             self.retain_graph = retain
         return self.retain_graph
 
+    def is_accumulating(self) -> bool:
+        """Whether the next invocation of this Op will only accumulate gradients, rather than updating the model.
+
+        Returns:
+            True iff the model will not be updated by the next invocation.
+        """
+        return self.merge_grad > 1 and (int(self.step) + 1) % self.merge_grad != 0
+
     def forward(self, data: Union[Tensor, List[Tensor]], state: Dict[str, Any]) -> None:
         if state["warmup"]:
             return
 
+        if self.framework == "torch" and self.merge_grad > 1:
+            self._merge_torch_grad_update(data, deferred=state["deferred"])
+            return
+
         if self.gradients is None:  # data is loss
             loss = self._loss_preprocess(data)
-            gradients = self._get_gradient(loss, state["tape"])
+            with profile_phase("backward"):
+                gradients = self._get_gradient(loss, state["tape"], distributed=self.model in state.get("ddp", {}))
         else:  # data is gradients
             gradients = data
         gradients = self._gradient_postprocess(gradients)
 
-        if self.merge_grad > 1:
-            self._merge_grad_update(gradients, deferred=state["deferred"])
-        else:
-            update_model(model=self.model, gradients=gradients, defer=self.defer, deferred=state["deferred"])
+        with profile_phase("optimizer"):
+            if self.merge_grad > 1:
+                self._merge_grad_update(gradients)
+            else:
+                update_model(model=self.model, gradients=gradients, defer=self.defer, deferred=state["deferred"])
 
     def _loss_preprocess(self, loss: Union[Tensor, List[Tensor]]) -> Union[Tensor, List[Tensor]]:
         """Loss preprocess for multi-GPU and mixed-precision training.
@@ -163,13 +185,16 @@ class UpdateOp(TensorOp):
 
         return loss
 
-    def _get_gradient(self, loss: Union[Tensor, List[Tensor]],
-                      tape: Optional[tf.GradientTape] = None) -> Union[Tensor, List[Tensor]]:
+    def _get_gradient(self,
+                      loss: Union[Tensor, List[Tensor]],
+                      tape: Optional[tf.GradientTape] = None,
+                      distributed: bool = False) -> Union[Tensor, List[Tensor]]:
         """Get gradient from loss with repect to self.model.
 
         Args:
             loss: Input loss.
             tape: A TensorFlow GradientTape which was recording when the `loss` was computed (iff using TensorFlow).
+            distributed: Whether the model is wrapped in DistributedDataParallel (iff using PyTorch).
 
         Returns:
             Computed gradients.
@@ -180,19 +205,54 @@ class UpdateOp(TensorOp):
         else:  # self.framework == "torch"
             trainable_params = [p for p in self.model.parameters() if p.requires_grad]
             try:
-                gradients = get_gradient(loss, trainable_params, retain_graph=self.retain_graph)
+                if distributed:
+                    gradients = self._get_synchronized_gradient(loss, trainable_params)
+                else:
+                    gradients = get_gradient(loss, trainable_params, retain_graph=self.retain_graph)
             except RuntimeError as err:
-                if err.args and isinstance(err.args[0], str) and err.args[0].startswith(
-                        'one of the variables needed for gradient computation has been modified by an inplace operation'
-                ):
-                    raise RuntimeError(
-                        "When computing gradients for '{}', some variables it relied on during the forward pass had"
-                        " been updated. Consider setting defer=True in earlier UpdateOps related to models which "
-                        "interact with this one.".format(self.model.model_name))
-                raise err
+                raise self._explain_error(err)
 
         return gradients
 
+    def _explain_error(self, err: RuntimeError) -> RuntimeError:
+        """Provide a more helpful message for PyTorch errors caused by models being updated too early.
+
+        Args:
+            err: An error raised while computing gradients.
+
+        Returns:
+            An error with a more helpful message, or the original `err` if it was raised for some other reason.
+        """
+        if err.args and isinstance(err.args[0], str) and err.args[0].startswith(
+                'one of the variables needed for gradient computation has been modified by an inplace operation'):
+            return RuntimeError(
+                "When computing gradients for '{}', some variables it relied on during the forward pass had"
+                " been updated. Consider setting defer=True in earlier UpdateOps related to models which "
+                "interact with this one.".format(self.model.model_name))
+        return err
+
+    def _get_synchronized_gradient(self, loss: torch.Tensor, params: List[torch.Tensor]) -> List[torch.Tensor]:
+        """Compute gradients which are averaged across every process (for DistributedDataParallel models).
+
+        DistributedDataParallel averages gradients as a backward pass accumulates them into the `.grad` of each
+        parameter, which torch.autograd.grad (as used by get_gradient) would bypass.
+
+        Args:
+            loss: Input loss.
+            params: The trainable parameters of the model.
+
+        Returns:
+            The averaged gradients. The `.grad` of each parameter is left unchanged.
+        """
+        previous = [param.grad for param in params]
+        for param in params:
+            param.grad = None
+        loss.backward(retain_graph=self.retain_graph, inputs=params)
+        gradients = [torch.zeros_like(param) if param.grad is None else param.grad for param in params]
+        for param, grad in zip(params, previous):
+            param.grad = grad
+        return gradients
+
     def _gradient_postprocess(self, gradients: Union[Tensor, List[Tensor]]) -> Union[Tensor, List[Tensor]]:
         """Gradient postprocess for multi-GPU and mixed-precision training.
 
@@ -215,39 +275,71 @@ class UpdateOp(TensorOp):
 
         return gradients
 
-    def _merge_grad_update(self,
-                           gradients: Union[Tensor, List[Tensor]],
-                           deferred: Optional[Dict[str, List[Callable[[], None]]]] = None) -> None:
-        """Accumulate gradients and update the model at certain frequency of invocation.
+    def _merge_grad_update(self, gradients: List[tf.Tensor]) -> None:
+        """Accumulate TensorFlow gradients and update the model at certain frequency of invocation.
 
         Args:
             gradients: Input gradients.
-            deferred: A dictionary in which model update functions are stored.
         """
-
         # add current gradient to the cumulative gradient
         for gs, g in zip(self.grad_sum, gradients):
-            self._assign_add(gs, g)
+            gs.assign_add(g)
+        self.step.assign_add(1)
+        # Updating the model is a synchronization point between replicas, which a MirroredStrategy does not allow within
+        # control flow. The condition is therefore evaluated in a cross-replica context, which then runs the update on
+        # every replica. With the default strategy this simply invokes the functions directly.
+        tf.distribute.get_replica_context().merge_call(self._cross_replica_update)
 
-        self._assign_add(self.step, 1)
+    def _cross_replica_update(self, strategy: tf.distribute.Strategy) -> None:
+        """Update the model on every replica if enough gradients have been accumulated.
 
-        if self.step % self.merge_grad == 0:
-            average_grad = [gs / self.merge_grad for gs in self.grad_sum]
-            update_model(model=self.model,
-                         gradients=average_grad,
-                         defer=self.defer,
-                         deferred=deferred)
-            for gs in self.grad_sum:
-                self._assign_add(gs, -gs)  # zero the gradient in place
+        Args:
+            strategy: The current distribution strategy.
+        """
+        def update() -> tf.Tensor:
+            strategy.run(self._apply_merged_gradients)
+            return tf.constant(True)
+
+        tf.cond(self.step % self.merge_grad == 0, update, lambda: tf.constant(False))
+
+    def _apply_merged_gradients(self) -> None:
+        """Update the model using the average of the accumulated TensorFlow gradients, and then reset them.
+        """
+        # The optimizer combines the gradients across replicas, so that only happens when the model is updated
+        update_model(model=self.model, gradients=[gs / self.merge_grad for gs in self.grad_sum])
+        for gs in self.grad_sum:
+            gs.assign(tf.zeros_like(gs))
+
+    def _merge_torch_grad_update(self,
+                                 data: Union[torch.Tensor, List[torch.Tensor]],
+                                 deferred: Optional[Dict[str, List[Callable[[], None]]]] = None) -> None:
+        """Accumulate PyTorch gradients and update the model at certain frequency of invocation.
 
-    def _assign_add(self, a: Tensor, b: Tensor) -> None:
-        """In-place addition for both Tensorflow and PyTorch. `a` = `a` + `b`
+        The gradients are accumulated in place within the `.grad` of each parameter, rather than in a separate buffer.
+        During distributed training the Network disables the DistributedDataParallel gradient synchronization on every
+        step which does not update the model (see `is_accumulating`), so the accumulated gradients are only averaged
+        across processes once per update.
 
         Args:
-            a: A tensor where in-place addition happens.
-            b: Amount to be added.
+            data: Either the loss, or the gradients if they were provided as an input.
+            deferred: A dictionary in which model update functions are stored.
         """
-        if self.framework == "tf":
-            a.assign_add(b)
-        else:  # self.framework == "torch"
-            a += b
+        trainable_params = [p for p in self.model.parameters() if p.requires_grad]
+        if self.gradients is None:  # data is loss
+            loss = self._loss_preprocess(data) / self.merge_grad
+            try:
+                with profile_phase("backward"):
+                    loss.backward(retain_graph=self.retain_graph, inputs=trainable_params)
+            except RuntimeError as err:
+                raise self._explain_error(err)
+        else:  # data is gradients
+            for gradient, param in zip(data, trainable_params):
+                if param.grad is None:
+                    param.grad = gradient / self.merge_grad
+                else:
+                    param.grad.add_(gradient, alpha=1 / self.merge_grad)
+        self.step += 1
+        if self.step % self.merge_grad == 0:
+            # The accumulated gradients are already in place, so there are no new gradients to add
+            with profile_phase("optimizer"):
+                update_model(model=self.model, gradients=[], defer=self.defer, deferred=deferred)
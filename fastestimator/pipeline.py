@@ -12,30 +12,71 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import math
 import multiprocessing as mp
 import os
 import random
 import time
 from copy import deepcopy
-from typing import Any, Callable, Dict, List, MutableMapping, Optional, Set, TypeVar, Union
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional, Set, Tuple, TypeVar, Union
 
 import numpy as np
 import tensorflow as tf
-from torch.utils.data import DataLoader, Dataset, RandomSampler
+import torch
+from torch.utils.data import BatchSampler, DataLoader, Dataset, DistributedSampler, RandomSampler, Sampler, \
+    SequentialSampler
 from torch.utils.data.dataloader import default_collate
 
 from fastestimator.dataset.batch_dataset import BatchDataset
 from fastestimator.dataset.op_dataset import OpDataset
+from fastestimator.dataset.persistent_dataset import EpochSampler, PersistentOpDataset
+from fastestimator.dataset.shared_memory_loader import SharedMemoryDataLoader
 from fastestimator.op.numpyop.meta.one_of import OneOf
 from fastestimator.op.numpyop.meta.sometimes import Sometimes
 from fastestimator.op.numpyop.numpyop import NumpyOp, forward_numpyop
 from fastestimator.schedule.schedule import Scheduler, get_current_items
+from fastestimator.util.distributed import get_rank, get_shared_seed, get_world_size, is_distributed
 from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import pad_batch, to_list, to_set
 
 DataSource = TypeVar('DataSource', Dataset, DataLoader, tf.data.Dataset)
 
 
+class _ShardSampler(Sampler):
+    """A sampler which yields the share of a dataset's indices belonging to the current process, without any padding.
+
+    This class is intentionally not @traceable.
+
+    A DistributedSampler repeats some indices so that every process gets the same number of them, which is required
+    during training (where every step synchronizes the gradients). Outside of training this would count the repeated
+    elements twice in any metric which is summed over the processes, so each element is instead yielded exactly once.
+    The processes may therefore run different numbers of steps.
+
+    Args:
+        dataset: The dataset to sample from.
+        shuffle: Whether to shuffle the indices.
+        seed: A random seed to shuffle with. This must be identical in every process.
+    """
+    def __init__(self, dataset: Dataset, shuffle: bool, seed: int) -> None:
+        self.length = len(dataset)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.num_replicas = get_world_size()
+        self.rank = get_rank()
+
+    def __len__(self) -> int:
+        return len(range(self.rank, self.length, self.num_replicas))
+
+    def __iter__(self) -> Iterator[int]:
+        if self.shuffle:
+            generator = torch.Generator()
+            generator.manual_seed(self.seed)
+            indices = torch.randperm(self.length, generator=generator).tolist()
+        else:
+            indices = list(range(self.length))
+        return iter(indices[self.rank::self.num_replicas])
+
+
 @traceable()
 class Pipeline:
     """A data pipeline class that takes care of data pre-processing.
@@ -44,17 +85,42 @@ class Pipeline:
         train_data: The training data, or None if no training data is available.
         eval_data: The evaluation data, or None if no evaluation data is available.
         test_data: The testing data, or None if no evaluation data is available.
-        batch_size: The batch size to be used by the pipeline. NOTE: This argument is only applicable when using a
-            FastEstimator Dataset.
+        batch_size: The batch size to be used by the pipeline. During distributed training this is the global batch
+            size, which is split evenly between the processes (so it should be divisible by the number of processes).
+            NOTE: This argument is only applicable when using a FastEstimator Dataset.
         ops: NumpyOps to be used for pre-processing. NOTE: This argument is only applicable when using a FastEstimator
             Dataset.
         num_process: Number of CPU threads to use for data pre-processing. NOTE: This argument is only applicable when
             using a FastEstimator Dataset. None will default to the system CPU count. Multiprocessing can be disabled by
-            passing 0 here, which can be useful for debugging.
+            passing 0 here, which can be useful for debugging. If "auto", the Pipeline will benchmark a range of worker
+            counts (and prefetch depths) the first time that it builds a loader for a given mode, and then use the
+            fastest configuration. Fewer workers are preferred unless more workers are significantly faster, so that
+            CPU resources are not wasted. Tuning is repeated whenever the ops, dataset, or batch size change (ex. due
+            to a Scheduler).
         drop_last: Whether to drop the last batch if the last batch is incomplete.
         pad_value: The padding value if batch padding is needed. None indicates that no padding is needed. NOTE: This
             argument is only applicable when using a FastEstimator Dataset.
         collate_fn: Function to merge data into one batch with input being list of elements.
+        cache_dir: A directory in which to cache the outputs of the leading deterministic `ops` (see
+            NumpyOp.deterministic), so that after the first epoch only the remaining (random) ops need to be executed.
+            The cache is memory-mapped from disk, so it must have enough space to hold the cached outputs for every
+            element of the datasets. If the underlying data changes, the cache directory should be cleared. NOTE: This
+            argument is only applicable when using a FastEstimator Dataset.
+        vectorize_ops: Whether to hand whole batches of indices to the dataset, so that ops which implement a vectorized
+            `forward_batch` (ex. Normalize, Minmax, Onehot) are run once per batch rather than once per element. Other
+            ops will still be run element-by-element. This can significantly reduce the CPU cost of small datasets
+            where per-op overhead dominates the actual compute. NOTE: This argument is only applicable when using a
+            FastEstimator Dataset without a custom `collate_fn`.
+        shared_memory: Whether the worker processes should deliver batches through a set of re-usable shared memory
+            buffers rather than pickling them. This avoids serialization and allocation costs, which can be significant
+            for large batches (ex. high resolution images). NOTE: This argument is only applicable when using a
+            FastEstimator Dataset with `num_process` > 0.
+        persistent_workers: Whether to keep the worker processes alive from one epoch to the next rather than starting
+            new ones every epoch. Whenever the data, ops, or batch size change (ex. due to a Scheduler), the existing
+            workers rebuild their copy of the data pipeline instead of being restarted. Since the workers are forked
+            from the main process when they are first started, any later in-place modifications of the datasets or ops
+            will not be seen by them. NOTE: This argument is only applicable when using a FastEstimator Dataset with
+            `num_process` > 0.
     """
     ops: List[Union[NumpyOp, Scheduler[NumpyOp]]]
 
@@ -64,10 +130,14 @@ class Pipeline:
                  test_data: Union[None, DataSource, Scheduler[DataSource]] = None,
                  batch_size: Union[None, int, Scheduler[Union[int, Dict[str, int]]], Dict[str, int]] = None,
                  ops: Union[None, NumpyOp, Scheduler[NumpyOp], List[Union[NumpyOp, Scheduler[NumpyOp]]]] = None,
-                 num_process: Optional[int] = None,
+                 num_process: Union[None, int, str] = None,
                  drop_last: bool = False,
                  pad_value: Optional[Union[int, float]] = None,
-                 collate_fn: Optional[Callable] = None):
+                 collate_fn: Optional[Callable] = None,
+                 cache_dir: Optional[str] = None,
+                 vectorize_ops: bool = False,
+                 shared_memory: bool = False,
+                 persistent_workers: bool = False):
         self.data = {x: y for (x, y) in zip(["train", "eval", "test"], [train_data, eval_data, test_data]) if y}
         self.batch_size = batch_size
         self.ops = to_list(ops)
@@ -77,9 +147,16 @@ class Pipeline:
             print("FastEstimator-Warn: Pipeline multiprocessing is disabled. OS must support the 'fork' start method.")
             num_process = 0
         self.num_process = num_process if num_process is not None else os.cpu_count()
+        self._autotuned: Dict[Tuple[Any, ...], Tuple[int, Optional[int]]] = {}
+        self._warned_batch_sizes: Set[Tuple[int, int]] = set()
         self.drop_last = drop_last
         self.pad_value = pad_value
         self.collate_fn = collate_fn
+        self.cache_dir = cache_dir
+        self.vectorize_ops = vectorize_ops
+        self.shared_memory = shared_memory
+        self.persistent_workers = persistent_workers
+        self._persistent_loaders: Dict[str, Tuple[DataLoader, Tuple[Any, ...]]] = {}
         self._verify_inputs(**{k: v for k, v in locals().items() if k != 'self'})
 
     def _verify_inputs(self, **kwargs) -> None:
@@ -127,7 +204,8 @@ class Pipeline:
             for op in get_current_items(self.ops):
                 assert isinstance(op, NumpyOp), "unsupported op format, must provide NumpyOp in Pipeline"
             # num_process check
-            assert isinstance(self.num_process, int), "number of processes must be an integer"
+            assert isinstance(self.num_process, int) or self.num_process == "auto", \
+                "number of processes must be an integer or 'auto'"
             return True
         elif isinstance(dataset, (DataLoader, tf.data.Dataset)):
             if kwargs['batch_size'] is not None:
@@ -136,6 +214,14 @@ class Pipeline:
                 print("FastEstimator-Warn: ops will only be used for built-in dataset")
             if kwargs['num_process'] is not None:
                 print("FastEstimator-Warn: num_process will only be used for built-in dataset")
+            if kwargs['cache_dir'] is not None:
+                print("FastEstimator-Warn: cache_dir will only be used for built-in dataset")
+            if kwargs['vectorize_ops']:
+                print("FastEstimator-Warn: vectorize_ops will only be used for built-in dataset")
+            if kwargs['shared_memory']:
+                print("FastEstimator-Warn: shared_memory will only be used for built-in dataset")
+            if kwargs['persistent_workers']:
+                print("FastEstimator-Warn: persistent_workers will only be used for built-in dataset")
             return False
         else:
             raise ValueError("Unsupported dataset type: {}".format(type(dataset)))
@@ -188,11 +274,14 @@ class Pipeline:
             if idx == num_steps:
                 break
         # Pipeline Operations Benchmarking when using FEDataset
-        if isinstance(loader, DataLoader) and isinstance(loader.dataset, OpDataset) and detailed:
-            op_list = loader.dataset.ops
+        if isinstance(loader, DataLoader) and isinstance(loader.dataset, (OpDataset, PersistentOpDataset)) and detailed:
+            op_dataset = loader.dataset
+            if isinstance(op_dataset, PersistentOpDataset):
+                op_dataset = op_dataset.op_dataset
+            op_list = op_dataset.ops
             duration_list = np.zeros(shape=(len(op_list)))
 
-            data_len = len(loader.dataset.dataset)
+            data_len = len(op_dataset.dataset)
             if self.batch_size:
                 batch_size = self.batch_size.get_current_value(epoch) if isinstance(self.batch_size,
                                                                                     Scheduler) else self.batch_size
@@ -202,22 +291,22 @@ class Pipeline:
             print("\nBreakdown of time taken by Pipeline Operations ({} epoch {})".format(mode, epoch))
             for _ in range(log_interval):
                 index = np.random.randint(data_len)
-                items = deepcopy(loader.dataset.dataset[index])
-                if isinstance(loader.dataset.dataset, BatchDataset):
+                items = deepcopy(op_dataset.dataset[index])
+                if isinstance(op_dataset.dataset, BatchDataset):
                     # BatchDataset may randomly sample the same elements multiple times, so need to avoid reprocessing
                     unique_samples = set()
                     for item in items:
                         if id(item) not in unique_samples:
                             for i, op in enumerate(op_list):
                                 start = time.perf_counter()
-                                forward_numpyop([op], item, {'mode': loader.dataset.mode})
+                                forward_numpyop([op], item, {'mode': op_dataset.mode})
                                 duration = time.perf_counter() - start
                                 duration_list[i] += duration
                             unique_samples.add(id(item))
                 else:
                     for i, op in enumerate(op_list):
                         start = time.perf_counter()
-                        forward_numpyop([op], items, {'mode': loader.dataset.mode})
+                        forward_numpyop([op], items, {'mode': op_dataset.mode})
                         duration = time.perf_counter() - start
                         duration_list[i] += duration
 
@@ -341,43 +430,248 @@ class Pipeline:
         if isinstance(data, Scheduler):
             data = data.get_current_value(epoch)
         if isinstance(data, Dataset):
-            # batch size
-            batch_size = self.batch_size
-            if isinstance(batch_size, Scheduler):
-                batch_size = batch_size.get_current_value(epoch)
-            if isinstance(batch_size, dict):
-                batch_size = batch_size[mode]
-            # check whether to batch the data
-            if not hasattr(data, "fe_batch"):
-                sample_item = data[0]
-                data.fe_batch = len(sample_item) if isinstance(sample_item, list) else 0
-            # batch dataset
-            if data.fe_batch:
-                data.pad_value = self.pad_value
-            batch_size = None if data.fe_batch else batch_size
-            # shuffle
             if shuffle is None:
                 shuffle = mode == "train"
-            # collate_fn
-            collate_fn = self.collate_fn
-            if collate_fn is None and self.pad_value is not None:
-                collate_fn = self._pad_batch_collate
-            op_dataset = OpDataset(data,
-                                   get_current_items(self.ops, mode, epoch),
-                                   mode,
-                                   output_keys,
-                                   deep_remainder=False,
-                                   shuffle=shuffle)
+            op_dataset, batch_size, shuffle, vectorize, collate_fn = self._build_op_dataset(mode, epoch, shuffle,
+                                                                                             output_keys)
             # Results will be immediately converted to tensors, so don't need deep_remainder
-            data = DataLoader(op_dataset,
-                              batch_size=batch_size,
-                              shuffle=shuffle,
-                              num_workers=self.num_process,
-                              drop_last=False if batch_size is None else self.drop_last,
-                              worker_init_fn=lambda _: np.random.seed(random.randint(0, 2**32 - 1)),
-                              collate_fn=collate_fn)
+            loader_cls = SharedMemoryDataLoader if self.shared_memory else DataLoader
+
+            def make_loader(num_workers: int, prefetch_factor: Optional[int]) -> DataLoader:
+                # Torch only accepts a prefetch_factor when there are worker processes
+                extra_args = {"prefetch_factor": prefetch_factor} if num_workers and prefetch_factor else {}
+                sampler = None
+                if is_distributed() and mode == "train":
+                    # Each process reads its own shard of the data, with every process shuffling in the same way
+                    sampler = DistributedSampler(op_dataset, shuffle=shuffle, seed=get_shared_seed())
+                    sampler.set_epoch(epoch)
+                elif is_distributed():
+                    # Padding the shards to equal lengths would double count elements in eval/test metrics
+                    sampler = _ShardSampler(op_dataset, shuffle=shuffle, seed=get_shared_seed() + epoch)
+                if vectorize:
+                    sampler = sampler or (RandomSampler(op_dataset) if shuffle else SequentialSampler(op_dataset))
+                    return loader_cls(op_dataset,
+                                      batch_size=None,
+                                      sampler=BatchSampler(sampler, batch_size=batch_size, drop_last=self.drop_last),
+                                      num_workers=num_workers,
+                                      worker_init_fn=lambda _: np.random.seed(random.randint(0, 2**32 - 1)),
+                                      **extra_args)
+                return loader_cls(op_dataset,
+                                  batch_size=batch_size,
+                                  shuffle=shuffle and sampler is None,
+                                  sampler=sampler,
+                                  num_workers=num_workers,
+                                  drop_last=False if batch_size is None else self.drop_last,
+                                  worker_init_fn=lambda _: np.random.seed(random.randint(0, 2**32 - 1)),
+                                  collate_fn=collate_fn,
+                                  **extra_args)
+
+            if self.num_process == "auto":
+                key = (mode, id(op_dataset.dataset), batch_size, tuple(id(op) for op in op_dataset.ops))
+                if key not in self._autotuned:
+                    self._autotuned[key] = self._autotune(make_loader, mode)
+                num_workers, prefetch_factor = self._autotuned[key]
+            else:
+                num_workers, prefetch_factor = self.num_process, None
+            if self.persistent_workers and num_workers > 0:
+                data = self._get_persistent_loader(mode, epoch, shuffle, output_keys, loader_cls, num_workers,
+                                                   prefetch_factor)
+            else:
+                data = make_loader(num_workers, prefetch_factor)
         return data
 
+    def _build_op_dataset(self,
+                          mode: str,
+                          epoch: int,
+                          shuffle: bool,
+                          output_keys: Optional[Set[str]],
+                          seed: Optional[int] = None
+                          ) -> Tuple[OpDataset, Optional[int], bool, bool, Optional[Callable]]:
+        """Build an OpDataset for a given `mode` and `epoch`, along with the settings needed to load data from it.
+
+        Args:
+            mode: The execution mode for the dataset. This can be 'train', 'eval' or 'test'.
+            epoch: The epoch index for the dataset. Note that epoch indices are 1-indexed.
+            shuffle: Whether to shuffle the data.
+            output_keys: What keys can be produced from pipeline. If None, all keys will be considered.
+            seed: A random seed for datasets which shuffle themselves, or None to shuffle them randomly.
+
+        Returns:
+            The OpDataset, the batch size which the loader should use (None if the dataset is already batched), whether
+            the loader should shuffle the OpDataset indices, whether batches of indices should be handed to the
+            OpDataset (vectorized ops), and the collate_fn which the loader should use.
+        """
+        data = self.data[mode]
+        if isinstance(data, Scheduler):
+            data = data.get_current_value(epoch)
+        # batch size
+        batch_size = self.batch_size
+        if isinstance(batch_size, Scheduler):
+            batch_size = batch_size.get_current_value(epoch)
+        if isinstance(batch_size, dict):
+            batch_size = batch_size[mode]
+        if batch_size and is_distributed():
+            # The batch size is global, so each process loads an equal share of it
+            world_size = get_world_size()
+            if batch_size % world_size and (batch_size, world_size) not in self._warned_batch_sizes:
+                self._warned_batch_sizes.add((batch_size, world_size))
+                print("FastEstimator-Warn: batch_size {} is not divisible by the number of processes ({}), so the "
+                      "global batch size will be {} instead.".format(batch_size,
+                                                                     world_size,
+                                                                     max(batch_size // world_size, 1) * world_size))
+            batch_size = max(batch_size // world_size, 1)
+        if seed is None and is_distributed():
+            # Datasets which shuffle themselves must do so identically in every process in order to be sharded
+            seed = get_shared_seed() + epoch
+        # check whether to batch the data
+        if not hasattr(data, "fe_batch"):
+            sample_item = data[0]
+            data.fe_batch = len(sample_item) if isinstance(sample_item, list) else 0
+        # vectorized batching is performed inside the OpDataset, so it must handle the padding itself
+        vectorize = bool(self.vectorize_ops and batch_size and not data.fe_batch and self.collate_fn is None)
+        # batch dataset
+        if data.fe_batch or vectorize:
+            data.pad_value = self.pad_value
+        batch_size = None if data.fe_batch else batch_size
+        # collate_fn
+        collate_fn = self.collate_fn
+        if collate_fn is None and self.pad_value is not None:
+            collate_fn = self._pad_batch_collate
+        ops = get_current_items(self.ops, mode, epoch)
+        op_dataset = OpDataset(data,
+                               ops,
+                               mode,
+                               output_keys,
+                               deep_remainder=False,
+                               shuffle=shuffle,
+                               cache_dir=self.cache_dir,
+                               seed=seed)
+        # Datasets which shuffle themselves (ex. for sequential disk access) must be read in the order they define
+        shuffle = shuffle and not getattr(data, "fe_shuffle", False)
+        return op_dataset, batch_size, shuffle, vectorize, collate_fn
+
+    def _get_persistent_loader(self,
+                               mode: str,
+                               epoch: int,
+                               shuffle: bool,
+                               output_keys: Optional[Set[str]],
+                               loader_cls: type,
+                               num_workers: int,
+                               prefetch_factor: Optional[int]) -> DataLoader:
+        """Get a loader whose worker processes are kept alive across epochs, re-targeting it to the given `epoch`.
+
+        Args:
+            mode: The execution mode for the loader. This can be 'train', 'eval' or 'test'.
+            epoch: The epoch index for the loader. Note that epoch indices are 1-indexed.
+            shuffle: Whether to shuffle the data.
+            output_keys: What keys can be produced from pipeline. If None, all keys will be considered.
+            loader_cls: The type of loader to use.
+            num_workers: How many worker processes the loader should use.
+            prefetch_factor: How many batches each worker should load in advance (None meaning the torch default).
+
+        Returns:
+            The persistent loader for the given `mode`.
+        """
+        settings = (loader_cls, num_workers, prefetch_factor)
+        loader, old_settings = self._persistent_loaders.get(mode, (None, None))
+        if loader is not None and old_settings != settings:
+            self._shutdown_loader(loader)
+            loader = None
+        if loader is None:
+            extra_args = {"prefetch_factor": prefetch_factor} if prefetch_factor else {}
+            loader = loader_cls(PersistentOpDataset(self, mode),
+                                batch_size=None,
+                                sampler=EpochSampler(),
+                                num_workers=num_workers,
+                                persistent_workers=True,
+                                worker_init_fn=lambda _: np.random.seed(random.randint(0, 2**32 - 1)),
+                                collate_fn=PersistentOpDataset.collate,
+                                **extra_args)
+            self._persistent_loaders[mode] = (loader, settings)
+        # A shared seed ensures that datasets which shuffle themselves do so identically in every worker
+        seed = get_shared_seed() + epoch if is_distributed() else random.randint(0, 2**32 - 1)
+        loader.dataset.retarget(epoch, shuffle, output_keys, seed=seed, sampler=loader.sampler)
+        return loader
+
+    @staticmethod
+    def _shutdown_loader(loader: DataLoader) -> None:
+        """Stop the (persistent) worker processes of a loader.
+
+        Args:
+            loader: The loader whose workers should be stopped.
+        """
+        if isinstance(loader, SharedMemoryDataLoader):
+            loader.shutdown_workers()
+        elif getattr(loader, "_iterator", None) is not None:
+            loader._iterator._shutdown_workers()
+            loader._iterator = None
+
+    def _autotune(self, make_loader: Callable[[int, Optional[int]], DataLoader],
+                  mode: str) -> Tuple[int, Optional[int]]:
+        """Find the number of worker processes and prefetch depth which maximize the throughput of a loader.
+
+        Worker counts are tried in increasing powers of 2, stopping as soon as adding more workers no longer gives a
+        significant speedup. Up to twice the CPU count may be tried, since I/O bound ops can benefit from having more
+        workers than there are cores. Deeper prefetching is then tried with the best worker count.
+
+        Args:
+            make_loader: A function which builds a loader given a number of workers and a prefetch factor.
+            mode: The mode for which the loader is being built.
+
+        Returns:
+            The best number of worker processes, and the best prefetch factor (None meaning the torch default).
+        """
+        min_gain = 1.1  # A more resource-intensive configuration must be at least this much faster to be selected
+        max_workers = 2 * (os.cpu_count() or 1)
+        candidates = sorted({0, max_workers} | {2**i for i in range(int(math.log2(max_workers)) + 1)})
+        best_config, best_speed = (0, None), 0.0
+        for num_workers in candidates:
+            speed = self._measure_throughput(make_loader(num_workers, None), num_workers)
+            if speed >= best_speed * min_gain:
+                best_config, best_speed = (num_workers, None), speed
+            elif num_workers > 1:
+                # A single worker merely moves the work into another process, so only stop searching beyond that
+                break
+        if best_config[0] > 0:
+            for prefetch_factor in (4, 8):
+                speed = self._measure_throughput(make_loader(best_config[0], prefetch_factor), best_config[0])
+                if speed < best_speed * min_gain:
+                    break
+                best_config, best_speed = (best_config[0], prefetch_factor), speed
+        prefetch = " with prefetch_factor={}".format(best_config[1] or 2) if best_config[0] else ""
+        print("FastEstimator: Autotuned the {} Pipeline to use num_process={}{} ({:.1f} steps/sec)".format(
+            mode, best_config[0], prefetch, best_speed))
+        return best_config
+
+    @staticmethod
+    def _measure_throughput(loader: DataLoader, num_workers: int, min_steps: int = 10) -> float:
+        """Measure how quickly a loader can produce batches.
+
+        Args:
+            loader: The loader to measure.
+            num_workers: How many worker processes the `loader` uses.
+            min_steps: The minimum number of steps to time (if the loader contains that many).
+
+        Returns:
+            The throughput of the `loader` in steps per second.
+        """
+        # The first batch from each worker includes the process start-up costs, so they are excluded when possible
+        warmup = min(max(1, num_workers), len(loader) - 1) if len(loader) > 1 else 0
+        num_steps = max(min_steps, 3 * num_workers)
+        iterator = iter(loader)
+        start = time.perf_counter()
+        n_timed = 0
+        for idx, _ in enumerate(iterator, start=1):
+            if idx == warmup:
+                start = time.perf_counter()
+            elif idx > warmup:
+                n_timed += 1
+                if n_timed == num_steps:
+                    break
+        duration = time.perf_counter() - start
+        del iterator
+        return n_timed / max(duration, 1e-9)
+
     def _pad_batch_collate(self, batch: List[MutableMapping[str, Any]]) -> Dict[str, Any]:
         """A collate function which pads a batch of data.
 
@@ -22,6 +22,7 @@ from fastestimator.backend.load_model import load_model
 from fastestimator.backend.save_model import save_model
 from fastestimator.trace.trace import Trace
 from fastestimator.util.data import Data
+from fastestimator.util.distributed import is_main_process
 from fastestimator.util.traceability_util import traceable
 
 
@@ -79,7 +80,7 @@ class BestModelSaver(Trace):
         if self.monitor_op(data[self.metric], self.best):
             self.best = data[self.metric]
             self.since_best = 0
-            if self.save_dir:
+            if self.save_dir and is_main_process():
                 self.model_path = save_model(self.model, self.save_dir, self.model_name)
                 print("FastEstimator-BestModelSaver: Saved model to {}".format(self.model_path))
         else:
@@ -34,6 +34,8 @@ class CSVLogger(Trace):
             regardless of mode, pass None. To execute in all modes except for a particular one, you can pass an argument
             like "!infer" or "!train".
     """
+    fe_main_process_only = True
+
     def __init__(self,
                  filename: str,
                  monitor_names: Optional[Union[List[str], str]] = None,
@@ -35,6 +35,8 @@ class ModelSaver(Trace):
         frequency: Model saving frequency in epoch(s).
         max_to_keep: Maximum number of latest saved files to keep. If 0 or None, all models will be saved.
     """
+    fe_main_process_only = True
+
     def __init__(self,
                  model: Union[tf.keras.Model, torch.nn.Module],
                  save_dir: str,
@@ -0,0 +1,166 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+import tensorflow as tf
+import torch
+
+from fastestimator.trace.trace import Trace
+from fastestimator.util.data import Data
+from fastestimator.util.profiler import SpanRecorder, set_span_recorder
+from fastestimator.util.traceability_util import traceable
+
+
+@traceable()
+class Profiler(Trace):
+    """Capture a window of steps with the native framework profiler, and save it as a Chrome trace.
+
+    This is most easily used via the `profile` argument of `Estimator.fit`. In addition to the events of the native
+    profiler (torch.profiler or tf.profiler.experimental), spans are recorded for the FastEstimator level structure of
+    each step: waiting for the Pipeline ('data'), moving data onto and off of the GPU ('to_device' and 'to_host'), the
+    'forward', 'backward', and 'optimizer' phases of the Network, each individual TensorOp, and the per-batch methods of
+    each Trace ('trace:<name>'). TensorOps which run within a static TensorFlow graph (which is everything when not
+    using eager mode) can't be recorded individually.
+
+    For PyTorch Networks, the native events and the FastEstimator spans are merged into the single JSON file written to
+    `save_path`, which can be opened with chrome://tracing or https://ui.perfetto.dev. TensorFlow no longer exports
+    Chrome traces itself, so its native profile is instead written into a 'tf_profile' directory next to `save_path` for
+    viewing in TensorBoard. The FastEstimator spans are also annotated into that profile, while the JSON file contains
+    only the FastEstimator spans.
+
+    Args:
+        save_path: Where to save the Chrome trace JSON file.
+        epoch: Which epoch to capture.
+        start_step: The first step of the `epoch` to capture, counting from 1. The first few steps of training are
+            typically slower than the rest (due to graph tracing, memory allocation, etc.), so they are often worth
+            skipping.
+        end_step: The last step of the `epoch` to capture (inclusive). The capture will also end if the epoch finishes
+            before this step is reached.
+        mode: Which mode to capture. For example, "train", "eval", or "test".
+
+    Raises:
+        ValueError: If the requested window of steps is invalid.
+    """
+    fe_main_process_only = True
+
+    def __init__(self,
+                 save_path: str,
+                 epoch: int = 1,
+                 start_step: int = 1,
+                 end_step: int = 10,
+                 mode: str = "train") -> None:
+        if epoch < 1 or start_step < 1 or end_step < start_step:
+            raise ValueError("Profiler requires epoch >= 1 and 1 <= start_step <= end_step, but got epoch {} with "
+                             "steps {}-{}".format(epoch, start_step, end_step))
+        super().__init__(inputs="*", mode=mode)
+        self.save_path = os.path.abspath(os.path.normpath(save_path))
+        self.epoch = epoch
+        self.start_step = start_step
+        self.end_step = end_step
+        self.recorder: Optional[SpanRecorder] = None
+        self.native = None
+        self.captured = False
+
+    def on_begin(self, data: Data) -> None:
+        self.captured = False
+
+    def on_epoch_begin(self, data: Data) -> None:
+        # The first batch of the epoch has already been fetched by this point, so its data wait can't be captured
+        if self.system.epoch_idx == self.epoch and self.start_step == 1 and not self.captured:
+            self._start()
+
+    def on_batch_end(self, data: Data) -> None:
+        if self.system.epoch_idx != self.epoch:
+            return
+        if self.recorder is None:
+            # Start during the step before the window, so that the data wait of the first step is captured
+            if not self.captured and self.start_step - 1 <= self.system.batch_idx < self.end_step:
+                self._start()
+        elif self.system.batch_idx >= self.end_step:
+            self._stop()
+
+    def on_epoch_end(self, data: Data) -> None:
+        if self.recorder is not None:
+            self._stop()
+
+    def on_end(self, data: Data) -> None:
+        if self.recorder is not None:
+            self._stop()
+        if not self.captured:
+            print("FastEstimator-Warn: Profiler never reached step {} of {} epoch {}, so nothing was captured".format(
+                self.start_step, ", ".join(self.mode), self.epoch))
+
+    def _start(self) -> None:
+        """Begin capturing.
+        """
+        if self.system.network.target_type == "torch":
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            self.native = torch.profiler.profile(activities=activities, record_shapes=True)
+            self.native.start()
+            self.recorder = SpanRecorder()
+        else:
+            tf.profiler.experimental.start(os.path.join(os.path.dirname(self.save_path), "tf_profile"))
+            self.recorder = SpanRecorder(annotate_tf=True)
+        set_span_recorder(self.recorder)
+
+    def _stop(self) -> None:
+        """Finish capturing, and save the results.
+        """
+        set_span_recorder(None)
+        events = self.recorder.events
+        self.recorder = None
+        if self.system.network.target_type == "torch":
+            self.native.stop()
+            trace = self._export_torch_trace()
+        else:
+            tf.profiler.experimental.stop()
+            trace = {"traceEvents": [], "displayTimeUnit": "ms"}
+        self.native = None
+        # Chrome trace timestamps are relative to a base time (in microseconds), whereas the spans use the unix epoch
+        base = trace.get("baseTimeNanoseconds", 0) / 1000
+        if not trace["traceEvents"] and events:
+            base = min(event["ts"] for event in events)
+        for event in events:
+            event["ts"] -= base
+        trace["traceEvents"].extend(events)
+        folder = os.path.dirname(self.save_path)
+        os.makedirs(folder, exist_ok=True)
+        with open(self.save_path, 'w') as file:
+            json.dump(trace, file)
+        self.captured = True
+        print("FastEstimator-Profiler: Saved Chrome trace of steps {}-{} of epoch {} to {}".format(
+            self.start_step, self.system.batch_idx, self.epoch, self.save_path))
+
+    def _export_torch_trace(self) -> Dict[str, Any]:
+        """Get the events which were captured by the PyTorch profiler.
+
+        Returns:
+            The Chrome trace exported by the profiler.
+        """
+        handle, path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        try:
+            self.native.export_chrome_trace(path)
+            with open(path) as file:
+                trace = json.load(file)
+        finally:
+            os.remove(path)
+        trace.setdefault("traceEvents", [])
+        return trace
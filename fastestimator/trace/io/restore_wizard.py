@@ -19,6 +19,7 @@ from typing import List, Union
 import fastestimator as fe
 from fastestimator.trace.trace import Trace
 from fastestimator.util.data import Data
+from fastestimator.util.distributed import is_main_process
 from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import to_list
 
@@ -44,9 +45,11 @@ class RestoreWizard(Trace):
         if fe.fe_deterministic_seed is not None:
             raise RuntimeError("You cannot use RestoreWizard while in deterministic training mode since a restored" +
                                " training can't guarantee that all prngs will be reset to exactly the same position")
+        # During distributed training every process restores, but only the main process modifies the backups
         if not self.should_restore():
-            self._cleanup(self.dirs)  # Remove any partially completed checkpoints
-            print("FastEstimator-RestoreWizard: Backing up to {}".format(self.directory))
+            if is_main_process():
+                self._cleanup(self.dirs)  # Remove any partially completed checkpoints
+                print("FastEstimator-RestoreWizard: Backing up to {}".format(self.directory))
         else:
             self._load_key()
             directory = self.dirs[self.dir_idx]
@@ -54,17 +57,19 @@ class RestoreWizard(Trace):
             data.write_with_log("epoch", self.system.epoch_idx)
             print("FastEstimator-RestoreWizard: Restoring from {}, resume training".format(directory))
             self.dir_idx = int(not self.dir_idx)  # Flip the idx so that next save goes to other dir
-            self._cleanup(self.dirs[self.dir_idx])  # Clean out the other dir in case it had a partial save
+            if is_main_process():
+                self._cleanup(self.dirs[self.dir_idx])  # Clean out the other dir in case it had a partial save
 
     def on_epoch_end(self, data: Data) -> None:
         if self.system.epoch_idx % self.frequency == 0:
             directory = self.dirs[self.dir_idx]
-            self.system.save_state(directory)
-            self._write_key()
-            # Everything after this is free to die without causing problems with restore
+            if is_main_process():
+                self.system.save_state(directory)
+                self._write_key()
+                # Everything after this is free to die without causing problems with restore
+                self._cleanup(self.dirs[int(not self.dir_idx)])
+                print("FastEstimator-RestoreWizard: Saved milestones to {}".format(directory))
             self.dir_idx = int(not self.dir_idx)
-            self._cleanup(self.dirs[self.dir_idx])
-            print("FastEstimator-RestoreWizard: Saved milestones to {}".format(directory))
 
     def should_restore(self) -> bool:
         """Whether a restore will be performed.
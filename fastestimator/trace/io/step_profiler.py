@@ -0,0 +1,101 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import time
+from typing import Iterable, Optional, Union
+
+from fastestimator.trace.trace import Trace
+from fastestimator.util.data import Data
+from fastestimator.util.profiler import PhaseTimer, set_phase_timer
+from fastestimator.util.traceability_util import traceable
+
+
+@traceable()
+class StepProfiler(Trace):
+    """Break down the time taken by each step into its different phases, and report them alongside the other logs.
+
+    The phases which are recorded are:
+    * data: Waiting for the Pipeline to provide a batch (including any conversion between frameworks).
+    * to_device: Moving the Network inputs onto the GPU (PyTorch only).
+    * forward: Running the Network ops, other than the backward pass and optimizer step. TensorFlow Networks which are
+        not running in eager mode execute an entire step within a single graph, so their backward pass and optimizer
+        step are included here as well.
+    * backward: Computing gradients within UpdateOps.
+    * optimizer: Applying gradients within UpdateOps.
+    * to_host: Copying predictions back to the CPU (only when they live on a GPU, or on several replicas).
+    * trace:<name>: The on_batch_begin and on_batch_end methods of each class of Trace.
+
+    Every phase is reported as "ms/<phase>": the average number of milliseconds per step which were spent in that phase
+    since the previous report. The total wall-clock time per step is reported as "ms/step", so any difference between
+    it and the sum of the phases is time which was spent elsewhere (in postprocessing, for example). Training times are
+    reported whenever the Estimator logs a training step, as well as at the end of every epoch. Other modes are reported
+    once at the end of each epoch. The values are recorded into the Summary history along with the other logs.
+
+    The phases are only timed while this Trace is in use, so leaving it out of the Estimator costs nothing.
+
+    Args:
+        sync: Whether to wait for the GPU to finish all of its pending work at every phase boundary. GPUs run work
+            asynchronously, so otherwise time spent on the GPU would be attributed to whichever later phase first
+            happened to wait for it. Synchronizing makes each phase pay for its own work, but slows training down.
+        mode: What mode(s) to execute this Trace in. For example, "train", "eval", "test", or "infer". To execute
+            regardless of mode, pass None. To execute in all modes except for a particular one, you can pass an argument
+            like "!infer" or "!train".
+    """
+    def __init__(self, sync: bool = True, mode: Union[None, str, Iterable[str]] = None) -> None:
+        super().__init__(
+            mode=mode,
+            outputs=["ms/step"] + ["ms/" + phase for phase in ("data", "to_device", "forward", "backward", "optimizer",
+                                                                "to_host")])
+        self.sync = sync
+        self.timer: Optional[PhaseTimer] = None
+        self.window_start = None
+        self.window_batch_idx = 0
+
+    def on_epoch_begin(self, data: Data) -> None:
+        self.timer = PhaseTimer(sync=self.sync)
+        set_phase_timer(self.timer)
+        self.window_start = time.perf_counter()
+        self.window_batch_idx = 0
+
+    def on_batch_end(self, data: Data) -> None:
+        if self.system.mode == "train" and self.system.log_steps and (self.system.global_step % self.system.log_steps
+                                                                      == 0 or self.system.global_step == 1):
+            self._report(data)
+
+    def on_epoch_end(self, data: Data) -> None:
+        if self.system.mode != "train" or self.system.log_steps:
+            self._report(data)
+        set_phase_timer(None)
+        self.timer = None
+
+    def on_end(self, data: Data) -> None:
+        # The final epoch might not have finished if training was stopped early
+        set_phase_timer(None)
+        self.timer = None
+
+    def _report(self, data: Data) -> None:
+        """Write the average time per step of every phase since the previous report into the logs.
+
+        Args:
+            data: The dictionary to write the logs into.
+        """
+        num_steps = self.system.batch_idx - self.window_batch_idx
+        if num_steps <= 0:
+            return
+        now = time.perf_counter()
+        data.write_with_log("ms/step", round(1000 * (now - self.window_start) / num_steps, 2))
+        for phase, seconds in self.timer.collect().items():
+            data.write_with_log("ms/" + phase, round(1000 * seconds / num_steps, 2))
+        self.window_start = now
+        self.window_batch_idx = self.system.batch_idx
@@ -296,6 +296,7 @@ class TensorBoard(Trace):
     """
     Freq = namedtuple('Freq', ['is_step', 'freq'])
     writer: _BaseWriter
+    fe_main_process_only = True
 
     def __init__(self,
                  log_dir: str = 'logs',
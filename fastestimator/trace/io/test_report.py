@@ -94,6 +94,8 @@ class TestReport(Trace):
         test_title: The title of the test, or None to use the experiment name.
         data_id: Data instance ID key. If provided, then per-instances test will include failing instance IDs.
     """
+    fe_main_process_only = True
+
     def __init__(self,
                  test_cases: Union[TestCase, List[TestCase]],
                  save_path: str,
@@ -76,6 +76,8 @@ class Traceability(Trace):
     Raises:
         OSError: If graphviz is not installed.
     """
+    fe_main_process_only = True
+
     def __init__(self, save_path: str, extra_objects: Any = None):
         # Verify that graphviz is available on this machine
         try:
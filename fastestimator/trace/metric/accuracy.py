@@ -16,10 +16,12 @@ from typing import Set, Union
 
 import numpy as np
 
+from fastestimator.backend.count_correct import count_correct
+from fastestimator.backend.running_total import RunningTotal
 from fastestimator.trace.trace import Trace
 from fastestimator.util.data import Data
+from fastestimator.util.distributed import all_reduce_sum
 from fastestimator.util.traceability_util import traceable
-from fastestimator.util.util import to_number
 
 
 @traceable()
@@ -28,6 +30,9 @@ class Accuracy(Trace):
 
     Consider using MCC instead: https://www.ncbi.nlm.nih.gov/pmc/articles/PMC6941312/
 
+    The predictions are compared and counted on whichever device they were computed on, so that only the final count is
+    copied back to the host at the end of the epoch.
+
     Args:
         true_key: Name of the key that corresponds to ground truth in the batch dictionary.
         pred_key: Name of the key that corresponds to predicted score in the batch dictionary.
@@ -46,7 +51,7 @@ class Accuracy(Trace):
         super().__init__(inputs=(true_key, pred_key), mode=mode, outputs=output_name)
         self.from_logits = from_logits
         self.total = 0
-        self.correct = 0
+        self.correct = RunningTotal()
 
     @property
     def true_key(self) -> str:
@@ -58,21 +63,16 @@ class Accuracy(Trace):
 
     def on_epoch_begin(self, data: Data) -> None:
         self.total = 0
-        self.correct = 0
+        self.correct.reset()
 
     def on_batch_end(self, data: Data) -> None:
-        y_true, y_pred = to_number(data[self.true_key]), to_number(data[self.pred_key])
-        if y_true.shape[-1] > 1 and y_true.ndim > 1:
-            y_true = np.argmax(y_true, axis=-1)
-        if y_pred.shape[-1] > 1:
-            y_pred = np.argmax(y_pred, axis=-1)
-        else:  # binaray classification (pred shape is [batch, 1])
-            if self.from_logits:
-                y_pred = 1 / (1 + np.exp(-y_pred))
-            y_pred = np.round(y_pred)
-        assert y_pred.size == y_true.size
-        self.correct += np.sum(y_pred.ravel() == y_true.ravel())
-        self.total += len(y_pred.ravel())
+        y_true, y_pred = data.read_raw(self.true_key), data.read_raw(self.pred_key)
+        # The number of predictions is known from the shapes alone, without waiting for their values
+        num_pred = int(np.prod(y_pred.shape[:-1] if y_pred.shape[-1] > 1 else y_pred.shape))
+        assert num_pred == int(np.prod(y_true.shape[:-1] if len(y_true.shape) > 1 and y_true.shape[-1] > 1 else
+                                       y_true.shape))
+        self.correct.add(count_correct(y_true, y_pred, from_logits=self.from_logits))
+        self.total += num_pred
 
     def on_epoch_end(self, data: Data) -> None:
-        data.write_with_log(self.outputs[0], self.correct / self.total)
+        data.write_with_log(self.outputs[0], all_reduce_sum(self.correct.total()) / all_reduce_sum(self.total))
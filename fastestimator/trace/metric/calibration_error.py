@@ -13,16 +13,19 @@
 #  limitations under the License.
 # ==============================================================================
 
-from typing import Optional, Set, Union
+from typing import Optional, Set, Tuple, Union
 
-import calibration as cal
 import numpy as np
 
 from fastestimator.summary.summary import ValWithError
 from fastestimator.trace.trace import Trace
 from fastestimator.util.data import Data
+from fastestimator.util.distributed import all_gather_list, all_reduce_sum
 from fastestimator.util.util import to_number
 
+# The histogram is evenly spaced over this range of logits, so that it is finer close to probabilities of 0 and 1
+_LOGIT_RANGE = 12.0
+
 
 class CalibrationError(Trace):
     """A trace which computes the calibration error for a given set of predictions.
@@ -30,6 +33,19 @@ class CalibrationError(Trace):
     Unlike many common calibration error estimation algorithms, this one has actual theoretical bounds on the quality
     of its output: https://arxiv.org/pdf/1909.10155v1.pdf.
 
+    Rather than storing every prediction, this trace accumulates a histogram of the predicted probabilities (along with
+    how many of them belonged to the true class) for each class, so memory usage doesn't grow with the number of
+    samples. At the end of the epoch the histogram is merged into the bins used by the paper above: one per distinct
+    probability if there are few enough of them, or else 15 bins containing equal numbers of predictions.
+
+    The result is the same as `calibration.get_calibration_error` from the paper's authors whenever the predictions are
+    discrete (few enough distinct probabilities to give each its own bin). Otherwise it is an approximation: the
+    histogram doesn't remember individual probabilities, so an equal-mass boundary which lands inside a histogram bin
+    holding several distinct probabilities is moved to the edge of that histogram bin, and a few predictions end up in a
+    neighboring final bin. The debiased estimator is sensitive to exactly where its bins fall, so this typically moves
+    the result by a few thousandths, and by up to about 0.02 when the true calibration error is close to 0 (where both
+    estimates are the square root of a small and noisy quantity). A larger `resolution` narrows the gap.
+
     Args:
         true_key: Name of the key that corresponds to ground truth in the batch dictionary.
         pred_key: Name of the key that corresponds to predicted score in the batch dictionary.
@@ -41,6 +57,9 @@ class CalibrationError(Trace):
             whereas 'top-label' computes the error based on only the most confident predictions.
         confidence_interval: The calibration error confidence interval to be reported (estimated empirically). Should be
             in the range (0, 100), or else None to omit this extra calculation.
+        resolution: How many histogram bins to divide the range of probabilities [0, 1] into (evenly spaced in logit
+            space). Predictions which fall into the same histogram bin can't be told apart, so they always end up in the
+            same final bin. Memory usage is proportional to `resolution` times the number of classes.
     """
     def __init__(self,
                  true_key: str,
@@ -48,17 +67,24 @@ class CalibrationError(Trace):
                  mode: Union[str, Set[str]] = ("eval", "test"),
                  output_name: str = "calibration_error",
                  method: str = "marginal",
-                 confidence_interval: Optional[int] = None):
-        self.y_true = []
-        self.y_pred = []
+                 confidence_interval: Optional[int] = None,
+                 resolution: int = 1000):
         assert method in ('marginal', 'top-label'), \
             f"CalibrationError 'method' must be either 'marginal' or 'top-label', but got {method}."
         self.method = method
         if confidence_interval is not None:
             assert 0 < confidence_interval < 100, \
                 f"CalibrationError 'confidence_interval' must be between 0 and 100, but got {confidence_interval}."
-            confidence_interval = 1.0 - confidence_interval / 100.0
         self.confidence_interval = confidence_interval
+        assert resolution > 0, f"CalibrationError 'resolution' must be positive, but got {resolution}."
+        self.resolution = resolution
+        # Histograms of shape (classes, resolution), which are allocated once the number of classes is known
+        self.count = None  # How many predictions fell into each bin
+        self.positives = None  # How many of those predictions were for the true class
+        self.confidence = None  # The sum of the predicted probabilities
+        self.positive_confidence = None  # The sum of the predicted probabilities which were for the true class
+        self.value = None  # The first probability which fell into each bin
+        self.mixed = None  # Whether a bin has received more than one distinct probability
         super().__init__(inputs=[true_key, pred_key], outputs=output_name, mode=mode)
 
     @property
@@ -70,27 +96,179 @@ class CalibrationError(Trace):
         return self.inputs[1]
 
     def on_epoch_begin(self, data: Data) -> None:
-        self.y_true = []
-        self.y_pred = []
+        self.count = None
+        self.positives = None
+        self.confidence = None
+        self.positive_confidence = None
+        self.value = None
+        self.mixed = None
 
     def on_batch_end(self, data: Data) -> None:
         y_true, y_pred = to_number(data[self.true_key]), to_number(data[self.pred_key])
         if y_true.shape[-1] > 1 and y_true.ndim > 1:
             y_true = np.argmax(y_true, axis=-1)
         assert y_pred.shape[0] == y_true.shape[0]
-        self.y_true.extend(y_true)
-        self.y_pred.extend(y_pred)
+        y_true = y_true.reshape(-1)
+        y_pred = y_pred.reshape(y_pred.shape[0], -1).astype(np.float64)
+        if y_pred.shape[1] == 1:
+            # Binary classification, where the prediction is the probability of class 1
+            probs, positive = y_pred, (y_true == 1)[:, None]
+        elif self.method == 'marginal':
+            probs, positive = y_pred, y_true[:, None] == np.arange(y_pred.shape[1])
+        else:
+            probs, positive = np.max(y_pred, axis=1, keepdims=True), (np.argmax(y_pred, axis=1) == y_true)[:, None]
+        num_classes = probs.shape[1]
+        size = num_classes * self.resolution
+        if self.count is None:
+            self.count = np.zeros(size, dtype=np.int64)
+            self.positives = np.zeros(size, dtype=np.int64)
+            self.confidence = np.zeros(size, dtype=np.float64)
+            self.positive_confidence = np.zeros(size, dtype=np.float64)
+            self.value = np.full(size, np.nan)
+            self.mixed = np.zeros(size, dtype=bool)
+        probs = np.clip(probs, 0.0, 1.0)
+        with np.errstate(divide='ignore'):
+            logits = np.log(probs) - np.log1p(-probs)
+        index = np.clip((logits + _LOGIT_RANGE) * (self.resolution / (2 * _LOGIT_RANGE)), 0, self.resolution - 1)
+        index = (index.astype(np.int64) + np.arange(num_classes) * self.resolution).ravel()
+        positive, probs = positive.ravel(), probs.ravel()
+        unseen = np.isnan(self.value[index])
+        self.value[index[unseen]] = probs[unseen]
+        self.mixed[index[probs != self.value[index]]] = True
+        self.count += np.bincount(index, minlength=size)
+        self.positives += np.bincount(index[positive], minlength=size)
+        self.confidence += np.bincount(index, weights=probs, minlength=size)
+        self.positive_confidence += np.bincount(index[positive], weights=probs[positive], minlength=size)
 
     def on_epoch_end(self, data: Data) -> None:
-        self.y_true = np.squeeze(np.stack(self.y_true))
-        self.y_pred = np.stack(self.y_pred)
-        mid = round(cal.get_calibration_error(probs=self.y_pred, labels=self.y_true, mode=self.method), 4)
-        low = None
-        high = None
-        if self.confidence_interval is not None:
-            low, _, high = cal.get_calibration_error_uncertainties(probs=self.y_pred, labels=self.y_true,
-                                                                   mode=self.method,
-                                                                   alpha=self.confidence_interval)
-            low = round(low, 4)
-            high = round(high, 4)
-        data.write_with_log(self.outputs[0], ValWithError(low, mid, high) if low is not None else mid)
+        if self.count is None:
+            return
+        shape = (-1, self.resolution)
+        count = all_reduce_sum(self.count).reshape(shape)
+        positives = all_reduce_sum(self.positives).reshape(shape)
+        confidence = all_reduce_sum(self.confidence).reshape(shape)
+        positive_confidence = all_reduce_sum(self.positive_confidence).reshape(shape)
+        value, mixed = np.full_like(self.value, np.nan), all_reduce_sum(self.mixed.astype(np.int64)) > 0
+        for process_value in all_gather_list([self.value]):
+            unseen = np.isnan(value)
+            value[unseen] = process_value[unseen]
+            mixed |= ~np.isnan(process_value) & (process_value != value)
+        bins = self._merge_bins(count, mixed.reshape(shape))
+        # The statistics of each (class, bin) cell, split into predictions for the true class and for other classes
+        pos_count, pos_conf = _bin_sums(positives, bins), _bin_sums(positive_confidence, bins)
+        neg_count, neg_conf = _bin_sums(count - positives, bins), _bin_sums(confidence - positive_confidence, bins)
+        mid = round(_debiased_ce(pos_count, neg_count, pos_conf + neg_conf), 4)
+        if self.confidence_interval is None:
+            data.write_with_log(self.outputs[0], mid)
+            return
+        low, high = self._bootstrap(pos_count, neg_count, pos_conf, neg_conf)
+        data.write_with_log(self.outputs[0], ValWithError(round(low, 4), mid, round(high, 4)))
+
+    def _merge_bins(self, count: np.ndarray, mixed: np.ndarray) -> np.ndarray:
+        """Decide which final bin each histogram bin belongs to.
+
+        Each histogram bin is assigned whole to the final bin which its first (smallest) prediction belongs in. This is
+        exact for histogram bins holding a single distinct probability, since the calibration library also puts tied
+        predictions into the lower bin, but only approximates the library's equal-mass bins when a boundary falls
+        inside a histogram bin holding several distinct probabilities.
+
+        Args:
+            count: The number of predictions in each histogram bin, of shape (classes, resolution).
+            mixed: Whether each histogram bin contains more than one distinct probability, of shape (classes,
+                resolution).
+
+        Returns:
+            The index of the final bin of each histogram bin, of shape (classes, resolution).
+        """
+        num_samples = count[0].sum()
+        if not mixed.any() and all(np.count_nonzero(row) < num_samples / 4.0 for row in count):
+            # Few enough distinct probabilities to give each of them their own bin
+            return np.broadcast_to(np.arange(self.resolution), count.shape)
+        # Split the sorted predictions into 15 parts as evenly as possible, larger parts first
+        num_bins = min(15, num_samples)
+        sizes = np.full(num_bins, num_samples // num_bins)
+        sizes[:num_samples % num_bins] += 1
+        first_item = np.cumsum(count, axis=1) - count
+        return np.searchsorted(np.cumsum(sizes), first_item, side='right')
+
+    def _bootstrap(self, pos_count: np.ndarray, neg_count: np.ndarray, pos_conf: np.ndarray,
+                   neg_conf: np.ndarray) -> Tuple[float, float]:
+        """Estimate a confidence interval for the calibration error by bootstrap resampling of the binned statistics.
+
+        A resampled dataset is approximated by drawing a Poisson distributed number of predictions for each cell, all
+        of which have the mean confidence of that cell. Classes are resampled independently of one another.
+
+        Args:
+            pos_count: The number of predictions for the true class in each (class, bin) cell.
+            neg_count: The number of predictions for other classes in each (class, bin) cell.
+            pos_conf: The summed confidence of the predictions for the true class in each cell.
+            neg_conf: The summed confidence of the predictions for other classes in each cell.
+
+        Returns:
+            The (low, high) bounds of the confidence interval.
+        """
+        num_resamples = 100
+        pos_mean = pos_conf / np.maximum(pos_count, 1)
+        neg_mean = neg_conf / np.maximum(neg_count, 1)
+        pos_sample = np.random.poisson(pos_count, size=(num_resamples, ) + pos_count.shape)
+        neg_sample = np.random.poisson(neg_count, size=(num_resamples, ) + neg_count.shape)
+        estimates = _plugin_ce(pos_sample, neg_sample, pos_sample * pos_mean + neg_sample * neg_mean)
+        plugin = _plugin_ce(pos_count, neg_count, pos_conf + neg_conf)
+        alpha = 100 - self.confidence_interval
+        return (float(2 * plugin - np.percentile(estimates, 100 - alpha / 2.0)),
+                float(2 * plugin - np.percentile(estimates, alpha / 2.0)))
+
+
+def _bin_sums(values: np.ndarray, bins: np.ndarray) -> np.ndarray:
+    """Sum histogram values into their final bins.
+
+    Args:
+        values: The values of each histogram bin, of shape (classes, resolution).
+        bins: The index of the final bin of each histogram bin, of shape (classes, resolution).
+
+    Returns:
+        The sum of the `values` within each final bin, of shape (classes, bins).
+    """
+    num_bins = bins.max() + 1
+    index = (bins + np.arange(bins.shape[0])[:, None] * num_bins).ravel()
+    return np.bincount(index, weights=values.ravel(), minlength=bins.shape[0] * num_bins).reshape(-1, num_bins)
+
+
+def _plugin_ce(pos_count: np.ndarray, neg_count: np.ndarray, conf: np.ndarray) -> np.ndarray:
+    """Compute the (biased) L2 calibration error from binned statistics.
+
+    Args:
+        pos_count: The number of predictions for the true class in each bin, of shape (..., classes, bins).
+        neg_count: The number of predictions for other classes in each bin.
+        conf: The summed confidence of the predictions in each bin.
+
+    Returns:
+        The calibration error, averaged over the classes, of shape (...).
+    """
+    count = pos_count + neg_count
+    occupied = np.maximum(count, 1)
+    error = np.square(conf / occupied - pos_count / occupied)
+    square_ce = np.sum(count * error, axis=-1) / np.maximum(np.sum(count, axis=-1), 1)
+    return np.sqrt(np.mean(square_ce, axis=-1))
+
+
+def _debiased_ce(pos_count: np.ndarray, neg_count: np.ndarray, conf: np.ndarray) -> float:
+    """Compute the debiased L2 calibration error from binned statistics.
+
+    Args:
+        pos_count: The number of predictions for the true class in each bin, of shape (classes, bins).
+        neg_count: The number of predictions for other classes in each bin.
+        conf: The summed confidence of the predictions in each bin.
+
+    Returns:
+        The calibration error, where the squared error of each class is clamped to be non-negative and then averaged
+        over the classes.
+    """
+    count = pos_count + neg_count
+    occupied = np.maximum(count, 1)
+    accuracy = pos_count / occupied
+    error = np.square(conf / occupied - accuracy) - accuracy * (1.0 - accuracy) / np.maximum(count - 1, 1)
+    error = np.where(count < 2, 0.0, error)
+    square_ce = np.sum(count * error, axis=-1) / np.sum(count, axis=-1)
+    # Like the calibration library, clamp the debiased estimate of each class at 0 before averaging across classes
+    return float(np.sqrt(np.mean(np.maximum(square_ce, 0.0))))
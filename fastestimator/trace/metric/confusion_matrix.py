@@ -15,10 +15,17 @@
 from typing import Any, Dict, Set, Union
 
 import numpy as np
+import tensorflow as tf
+import torch
 from sklearn.metrics import confusion_matrix
 
+from fastestimator.backend.argmax import argmax
+from fastestimator.backend.confusion_matrix import confusion_matrix as count_confusion
+from fastestimator.backend.tensor_round import tensor_round
+from fastestimator.backend.to_tensor import to_tensor
 from fastestimator.trace.trace import Trace
 from fastestimator.util.data import Data
+from fastestimator.util.distributed import all_reduce_sum
 from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import to_number
 
@@ -35,7 +42,9 @@ class ConfusionMatrix(Trace):
             regardless of mode, pass None. To execute in all modes except for a particular one, you can pass an argument
             like "!infer" or "!train".
         output_name: Name of the key to store to the state.
-        **kwargs: Additional keyword arguments that pass to sklearn.metrics.confusion_matrix()
+        **kwargs: Additional keyword arguments that pass to sklearn.metrics.confusion_matrix(). If any are provided,
+            sklearn is invoked on every batch. Otherwise the matrix is counted directly from the batch tensors, wherever
+            they happen to be, which is much faster.
 
     Raises:
         ValueError: One of ["y_pred", "y_true", "labels"] argument exists in `kwargs`.
@@ -65,16 +74,25 @@ class ConfusionMatrix(Trace):
         self.matrix = None
 
     def on_batch_end(self, data: Data) -> None:
-        y_true, y_pred = to_number(data[self.true_key]), to_number(data[self.pred_key])
-        if y_true.shape[-1] > 1 and y_true.ndim > 1:
-            y_true = np.argmax(y_true, axis=-1)
+        y_true, y_pred = data.read_raw(self.true_key), data.read_raw(self.pred_key)
+        if self.kwargs:
+            y_true, y_pred = to_number(y_true), to_number(y_pred)
+        elif not isinstance(y_pred, (tf.Tensor, torch.Tensor)):
+            y_true, y_pred = to_number(y_true), np.asarray(y_pred)
+        else:
+            y_true = to_tensor(y_true, target_type="tf" if tf.is_tensor(y_pred) else "torch")
+        if y_true.shape[-1] > 1 and len(y_true.shape) > 1:
+            y_true = argmax(y_true, axis=-1)
         if y_pred.shape[-1] > 1:
-            y_pred = np.argmax(y_pred, axis=-1)
+            y_pred = argmax(y_pred, axis=-1)
         else:
-            y_pred = np.round(y_pred)
-        assert y_pred.size == y_true.size
+            y_pred = tensor_round(y_pred)
+        assert np.prod(y_pred.shape) == np.prod(y_true.shape)
 
-        batch_confusion = confusion_matrix(y_true, y_pred, labels=list(range(0, self.num_classes)), **self.kwargs)
+        if self.kwargs:
+            batch_confusion = confusion_matrix(y_true, y_pred, labels=list(range(0, self.num_classes)), **self.kwargs)
+        else:
+            batch_confusion = to_number(count_confusion(y_true, y_pred, num_classes=self.num_classes))
 
         if self.matrix is None:
             self.matrix = batch_confusion
@@ -82,7 +100,7 @@ class ConfusionMatrix(Trace):
             self.matrix += batch_confusion
 
     def on_epoch_end(self, data: Data) -> None:
-        data.write_with_log(self.outputs[0], self.matrix)
+        data.write_with_log(self.outputs[0], all_reduce_sum(self.matrix))
 
     @staticmethod
     def check_kwargs(kwargs: Dict[str, Any]) -> None:
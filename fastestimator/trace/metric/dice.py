@@ -14,18 +14,22 @@
 # ==============================================================================
 from typing import List, Union
 
-import numpy as np
-
+from fastestimator.backend.dice_score import dice_score
+from fastestimator.backend.reduce_sum import reduce_sum
+from fastestimator.backend.running_total import RunningTotal
 from fastestimator.trace.trace import Trace
 from fastestimator.util import Data
+from fastestimator.util.distributed import all_reduce_sum
 from fastestimator.util.traceability_util import traceable
-from fastestimator.util.util import to_number
 
 
 @traceable()
 class Dice(Trace):
     """Dice score for binary classification between y_true and y_predicted.
 
+    The scores are computed and summed on whichever device the predictions are on, so that the masks are never copied
+    back to the host.
+
     Args:
         true_key: The key of the ground truth mask.
         pred_key: The key of the prediction values.
@@ -44,7 +48,7 @@ class Dice(Trace):
         super().__init__(inputs=(true_key, pred_key), mode=mode, outputs=output_name)
         self.threshold = threshold
         self.smooth = 1e-8
-        self.dice = []
+        self.dice = RunningTotal()
 
     @property
     def true_key(self) -> str:
@@ -55,19 +59,12 @@ class Dice(Trace):
         return self.inputs[1]
 
     def on_epoch_begin(self, data: Data) -> None:
-        self.dice = []
+        self.dice.reset()
 
     def on_batch_end(self, data: Data) -> None:
-        y_true, y_pred = to_number(data[self.true_key]), to_number(data[self.pred_key])
-        batch_size = y_true.shape[0]
-        y_true, y_pred = y_true.reshape((batch_size, -1)), y_pred.reshape((batch_size, -1))
-
-        prediction_label = (y_pred >= self.threshold).astype(np.int32)
-
-        intersection = np.sum(y_true * prediction_label, axis=-1)
-        area_sum = np.sum(y_true, axis=-1) + np.sum(prediction_label, axis=-1)
-        dice = (2. * intersection + self.smooth) / (area_sum + self.smooth)
-        self.dice.extend(list(dice))
+        y_true, y_pred = data.read_raw(self.true_key), data.read_raw(self.pred_key)
+        dice = dice_score(y_true, y_pred, threshold=self.threshold, smooth=self.smooth)
+        self.dice.add(reduce_sum(dice), count=y_true.shape[0])
 
     def on_epoch_end(self, data: Data) -> None:
-        data.write_with_log(self.outputs[0], np.mean(self.dice))
+        data.write_with_log(self.outputs[0], all_reduce_sum(self.dice.total()) / all_reduce_sum(self.dice.count))
@@ -14,13 +14,14 @@
 # ==============================================================================
 """COCO Mean average precisin (mAP) implementation."""
 from collections import defaultdict
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 from pycocotools import mask as maskUtils
 
 from fastestimator.trace.trace import Trace
 from fastestimator.util.data import Data
+from fastestimator.util.distributed import all_gather_list, get_rank, get_world_size
 from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import to_number
 
@@ -50,8 +51,8 @@ class MeanAveragePrecision(Trace):
 
         assert len(self.outputs) == 3, 'MeanAvgPrecision trace adds 3 fields mAP AP50 AP75 to state dict'
 
-        self.iou_thres = np.linspace(.5, 0.95, np.round((0.95 - .5) / .05).astype(np.int) + 1, endpoint=True)
-        self.recall_thres = np.linspace(.0, 1.00, np.round((1.00 - .0) / .01).astype(np.int) + 1, endpoint=True)
+        self.iou_thres = np.linspace(.5, 0.95, np.round((0.95 - .5) / .05).astype(int) + 1, endpoint=True)
+        self.recall_thres = np.linspace(.0, 1.00, np.round((1.00 - .0) / .01).astype(int) + 1, endpoint=True)
         self.categories = range(num_classes)
         self.max_detection = 100
         self.image_ids = []
@@ -62,13 +63,10 @@ class MeanAveragePrecision(Trace):
         self.ids_in_epoch = 0  # reset per epoch
 
         # reset per batch
-        self.gt = defaultdict(list)  # gt for evaluation
-        self.det = defaultdict(list)
-        self.batch_image_ids = []  # img_ids per batch
-        self.ious = defaultdict(list)
-        self.ids_unique = []
+        self.gt = {}  # gt for evaluation, (img_id, cat_id) -> array of [x1, y1, w, h]
+        self.det = {}  # det for evaluation, (img_id, cat_id) -> array of [x1, y1, w, h, score] sorted by score
+        self.ious = {}
         self.ids_batch_to_epoch = {}
-        self.counter = 0  # REMOVE
 
     @property
     def true_key(self) -> str:
@@ -78,28 +76,6 @@ class MeanAveragePrecision(Trace):
     def pred_key(self) -> str:
         return self.inputs[1]
 
-    def _get_id_in_epoch(self, idx_in_batch: int) -> int:
-        """Get unique image id in epoch.
-
-        Id starts from 1.
-
-        Args:
-            idx_in_batch: Image id within a batch.
-
-        Returns:
-            Global unique id within one epoch.
-        """
-        # for this batch
-        num_unique_id_previous = len(np.unique(self.ids_unique))
-        self.ids_unique.append(idx_in_batch)
-        num_unique_id = len(np.unique(self.ids_unique))
-
-        if num_unique_id > num_unique_id_previous:
-            # for epoch
-            self.ids_in_epoch += 1
-            self.ids_batch_to_epoch[idx_in_batch] = self.ids_in_epoch
-        return self.ids_in_epoch
-
     def on_epoch_begin(self, data: Data):
         """Reset instance variables."""
         self.image_ids = []  # append all the image ids coming from each iteration
@@ -109,12 +85,9 @@ class MeanAveragePrecision(Trace):
 
     def on_batch_begin(self, data: Data):
         """Reset instance variables."""
-        self.gt = defaultdict(list)  # gt for evaluation
-        self.det = defaultdict(list)  # det for evaluation
-        self.batch_image_ids = []  # img_ids per batch
-
-        self.ious = defaultdict(list)
-        self.ids_unique = []
+        self.gt = {}
+        self.det = {}
+        self.ious = {}
         self.ids_batch_to_epoch = {}
 
     @staticmethod
@@ -172,41 +145,54 @@ class MeanAveragePrecision(Trace):
         gt = to_number(data[self.true_key])  # gt is np.array (batch, box, 5), box dimension is padded
         gt = self._reshape_gt(gt)
 
-        ground_truth_bb = []
-        for gt_item in gt:
-            idx_in_batch, x1, y1, w, h, label = gt_item
-            label = int(label)
-            id_epoch = self._get_id_in_epoch(idx_in_batch)
-            self.batch_image_ids.append(id_epoch)
-            self.image_ids.append(id_epoch)
-            tmp_dict = {'idx': id_epoch, 'x1': x1, 'y1': y1, 'w': w, 'h': h, 'label': label}
-            ground_truth_bb.append(tmp_dict)
-
-        predicted_bb = []
-        for pred_item in pred:
-            idx_in_batch, x1, y1, w, h, label, score = pred_item
-            label = int(label)
-            id_epoch = self.ids_batch_to_epoch[idx_in_batch]
-            self.image_ids.append(id_epoch)
-            tmp_dict = {'idx': id_epoch, 'x1': x1, 'y1': y1, 'w': w, 'h': h, 'label': label, 'score': score}
-            predicted_bb.append(tmp_dict)
-
-        for dict_elem in ground_truth_bb:
-            self.gt[dict_elem['idx'], dict_elem['label']].append(dict_elem)
-
-        for dict_elem in predicted_bb:
-            self.det[dict_elem['idx'], dict_elem['label']].append(dict_elem)
+        # give every image in the batch an id which is unique within the epoch (starting from 1)
+        local_ids = np.unique(np.concatenate([gt[:, 0], pred[:, 0]]))
+        epoch_ids = self.ids_in_epoch + 1 + np.arange(len(local_ids))
+        self.ids_batch_to_epoch = dict(zip(local_ids.tolist(), epoch_ids.tolist()))
+        self.ids_in_epoch += len(local_ids)
+        self.image_ids.extend(epoch_ids.tolist())
+
+        for (img_id, cat_id), rows in self._group(epoch_ids[np.searchsorted(local_ids, gt[:, 0])], gt[:, 5]).items():
+            self.gt[img_id, cat_id] = gt[rows, 1:5]
+        for (img_id, cat_id), rows in self._group(epoch_ids[np.searchsorted(local_ids, pred[:, 0])],
+                                                  pred[:, 5]).items():
+            det = pred[rows][:, [1, 2, 3, 4, 6]]
+            # sort detections by score (keeping the original order for ties), and cap to max_detection
+            det_index = np.argsort(-det[:, 4], kind='mergesort')[:self.max_detection]
+            self.det[img_id, cat_id] = det[det_index]
         # end of reading det and gt
 
+        # only (img_id, cat_id) pairs which have any gt or det need to be evaluated
+        pairs = sorted((set(self.gt) | set(self.det)))
+        pairs = [(img_id, cat_id) for img_id, cat_id in pairs if cat_id in self.categories]
         # compute iou matrix, matrix index is (img_id, cat_id), each element in matrix has shape (num_det, num_gt)
-        self.ious = {(img_id, cat_id): self.compute_iou(self.det[img_id, cat_id], self.gt[img_id, cat_id])
-                     for img_id in self.batch_image_ids for cat_id in self.categories}
+        for img_id, cat_id in pairs:
+            self.ious[img_id, cat_id] = self.compute_iou(self.det.get((img_id, cat_id), np.zeros((0, 5))),
+                                                         self.gt.get((img_id, cat_id), np.zeros((0, 4))))
+        for img_id, cat_id in pairs:
+            self.evalimgs[(cat_id, img_id)] = self.evaluate_img(cat_id, img_id)
+
+    @staticmethod
+    def _group(img_ids: np.ndarray, labels: np.ndarray) -> Dict[Tuple[int, int], np.ndarray]:
+        """Find which rows belong to each combination of image and category.
+
+        Args:
+            img_ids: The image id of each row.
+            labels: The category of each row.
 
-        for cat_id in self.categories:
-            for img_id in self.batch_image_ids:
-                self.evalimgs[(cat_id, img_id)] = self.evaluate_img(cat_id, img_id)
+        Returns:
+            A mapping from (img_id, cat_id) to the indices of the corresponding rows, in their original order.
+        """
+        if len(img_ids) == 0:
+            return {}
+        keys, inverse = np.unique(np.stack([img_ids, labels.astype(int)], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        rows = np.split(np.argsort(inverse, kind='mergesort'), np.cumsum(np.bincount(inverse))[:-1])
+        return {(int(img_id), int(cat_id)): row for (img_id, cat_id), row in zip(keys, rows)}
 
     def on_epoch_end(self, data: Data):
+        if get_world_size() > 1:
+            self._gather_evaluations()
         self.accumulate()
 
         mean_ap = self.summarize()
@@ -217,81 +203,76 @@ class MeanAveragePrecision(Trace):
         data[self.outputs[1]] = ap50
         data[self.outputs[2]] = ap75
 
-    def evaluate_img(self, cat_id: int, img_id: int) -> Dict:
+    def _gather_evaluations(self) -> None:
+        """Combine the per-image evaluations from every process (during distributed training)."""
+        world_size, rank = get_world_size(), get_rank()
+        # Image ids are only unique within a process, so interleave them in order to make them globally unique
+        self.image_ids = all_gather_list([img_id * world_size + rank for img_id in self.image_ids])
+        self.evalimgs = dict(
+            all_gather_list([((cat_id, img_id * world_size + rank), evaluation)
+                             for (cat_id, img_id), evaluation in self.evalimgs.items()]))
+
+    def evaluate_img(self, cat_id: int, img_id: int) -> Optional[Dict]:
         """Find gt matches for det given one image and one category.
 
+        Detections are greedily matched in order of decreasing score. Each detection is matched to the unmatched gt with
+        which it has the highest iou (if that is above the iou threshold), with every iou threshold being matched at
+        once.
+
         Args:
-            cat_id:
-            img_id:
+            cat_id: The category to evaluate.
+            img_id: The image to evaluate.
 
         Returns:
-
+            The matching results, or None if the image has neither gt nor det for the category.
         """
-        det = self.det[img_id, cat_id]
-        gt = self.gt[img_id, cat_id]
-
+        det = self.det.get((img_id, cat_id), np.zeros((0, 5)))
         num_det = len(det)
-        num_gt = len(gt)
+        num_gt = len(self.gt.get((img_id, cat_id), ()))
 
         if num_gt == 0 and num_det == 0:
             return None
 
-        # sort detections, is ths necessary?
-        det_index = np.argsort([-d['score'] for d in det], kind='mergesort')
-
-        # cap to max_detection
-        det = [det[i] for i in det_index[0:self.max_detection]]
-
-        # get iou matrix for given (img_id, cat_id), the output has shape (num_det, num_gt)
-        iou_mat = self.ious[img_id, cat_id]
-
         num_iou_thresh = len(self.iou_thres)
-
+        gt_match = np.zeros((num_iou_thresh, num_gt), dtype=bool)
         det_match = np.zeros((num_iou_thresh, num_det))
-        gt_match = np.zeros((num_iou_thresh, num_gt))
-
-        if len(iou_mat) != 0:
-            # loop through each iou thresh
-            for thres_idx, thres_value in enumerate(self.iou_thres):
-                # loop through each detection, for each detection, match only one gt
-                for det_idx, _ in enumerate(det):
-                    m = -1
-                    iou_threshold = min([thres_value, 1 - 1e-10])
-                    # loop through each gt, find the gt gives max iou
-                    for gt_idx, _ in enumerate(gt):
-                        if gt_match[thres_idx, gt_idx] > 0:
-                            continue
-                        if iou_mat[det_idx, gt_idx] >= iou_threshold:
-                            iou_threshold = iou_mat[det_idx, gt_idx]
-                            m = gt_idx
-
-                    if m != -1:
-                        det_match[thres_idx, det_idx] = gt[m]['idx']
-                        gt_match[thres_idx, m] = 1
+
+        if num_gt and num_det:
+            # get iou matrix for given (img_id, cat_id), the output has shape (num_det, num_gt)
+            iou_mat = self.ious[img_id, cat_id]
+            # shape (num_det, num_iou_thresh, num_gt)
+            above_thresh = iou_mat[:, None, :] >= np.minimum(self.iou_thres, 1 - 1e-10)[:, None]
+            thresh_idx = np.arange(num_iou_thresh)
+            for det_idx in range(num_det):
+                candidates = above_thresh[det_idx] & ~gt_match
+                if not candidates.any():
+                    continue
+                # find the unmatched gt with the max iou, preferring the last one in the event of a tie
+                ious = np.where(candidates, iou_mat[det_idx], -1.0)
+                best = num_gt - 1 - np.argmax(ious[:, ::-1], axis=1)
+                matched = candidates[thresh_idx, best]
+                gt_match[thresh_idx[matched], best[matched]] = True
+                det_match[matched, det_idx] = img_id
+                if gt_match.all():
+                    break
 
         return {
             'image_id': img_id,
             'category_id': cat_id,
-            'gtIds': [g['idx'] for g in gt],
+            'gtIds': [img_id] * num_gt,
             'dtMatches': det_match,  # shape (num_iou_thresh, num_det), value is zero or GT index
-            'gtMatches': gt_match,  # shape (num_iou_thresh, num_gt), value 1 or zero
-            'dtScores': [d['score'] for d in det],
+            'gtMatches': gt_match.astype(float),  # shape (num_iou_thresh, num_gt), value 1 or zero
+            'dtScores': det[:, 4].tolist(),
             'num_gt': num_gt,
         }
 
     def accumulate(self) -> None:
         """Generate precision-recall curve."""
-        key_list = sorted(self.evalimgs)  # key format (cat_id, img_id)
-        eval_list = [self.evalimgs[key] for key in key_list]
-
         self.image_ids = np.unique(self.image_ids)
 
         num_iou_thresh = len(self.iou_thres)
         num_recall_thresh = len(self.recall_thres)
         num_categories = len(self.categories)
-        cat_list_zeroidx = [n for n, cat in enumerate(self.categories)]
-
-        num_imgs = len(self.image_ids)
         maxdets = self.max_detection
 
         # initialize these at -1
@@ -299,71 +280,48 @@ class MeanAveragePrecision(Trace):
         recall_matrix = -np.ones((num_iou_thresh, num_categories))
         scores_matrix = -np.ones((num_iou_thresh, num_recall_thresh, num_categories))
 
-        # loop through category
-        for cat_index in cat_list_zeroidx:
-            Nk = cat_index * num_imgs
-            # each element is one image inside this category
-            eval_by_category = [eval_list[Nk + img_idx] for img_idx in range(num_imgs)]
-            # drop None
-            eval_by_category = [e for e in eval_by_category if not e is None]
+        # each element is one image inside the category, ordered by image id
+        eval_by_category = defaultdict(list)
+        for cat_id, img_id in sorted(self.evalimgs):
+            if self.evalimgs[cat_id, img_id] is not None:
+                eval_by_category[cat_id].append(self.evalimgs[cat_id, img_id])
 
+        for cat_index, cat_id in enumerate(self.categories):
+            evals = eval_by_category.get(cat_id)
             # no image inside this category
-            if len(eval_by_category) == 0:
+            if not evals:
                 continue
-
-            det_scores = np.concatenate([e['dtScores'][0:maxdets] for e in eval_by_category])
-            # sort from high score to low score, is this necessary?
-            sorted_score_inds = np.argsort(-det_scores, kind='mergesort')
-
-            det_scores_sorted = det_scores[sorted_score_inds]
-            det_match = np.concatenate([e['dtMatches'][:, 0:maxdets] for e in eval_by_category],
-                                       axis=1)[:, sorted_score_inds]  # shape (num_iou_thresh, num_det_all_images)
             # number of all image gts in one category
-            num_all_gt = np.sum([e['num_gt'] for e in eval_by_category])
+            num_all_gt = np.sum([e['num_gt'] for e in evals])
             # for all images no gt inside this category
             if num_all_gt == 0:
                 continue
 
-            tps = det_match > 0
-            fps = det_match == 0
-
-            tp_sum = np.cumsum(tps, axis=1).astype(dtype=np.float)
-            fp_sum = np.cumsum(fps, axis=1).astype(dtype=np.float)
-
-            for index, (true_positives, false_positives) in enumerate(zip(tp_sum, fp_sum)):
-                true_positives = np.array(true_positives)
-                false_positives = np.array(false_positives)
-                nd = len(true_positives)
-                recall = true_positives / num_all_gt
-                precision = true_positives / (false_positives + true_positives + np.spacing(1))
-
-                precision_at_recall = np.zeros((num_recall_thresh, ))
-                score = np.zeros((num_recall_thresh, ))
-
-                if nd:
-                    recall_matrix[index, cat_index] = recall[-1]
-                else:
-                    recall_matrix[index, cat_index] = 0
-
-                precision = precision.tolist()
-                precision_at_recall = precision_at_recall.tolist()
-
-                # smooth precision along the curve, remove zigzag
-                for i in range(nd - 1, 0, -1):
-                    if precision[i] > precision[i - 1]:
-                        precision[i - 1] = precision[i]
-
-                inds = np.searchsorted(recall, self.recall_thres, side='left')
-
-                try:
-                    for recall_index, precision_index in enumerate(inds):
-                        precision_at_recall[recall_index] = precision[precision_index]
-                        score[recall_index] = det_scores_sorted[precision_index]
-                except:
-                    pass
+            det_scores = np.concatenate([e['dtScores'][0:maxdets] for e in evals])
+            # sort from high score to low score
+            sorted_score_inds = np.argsort(-det_scores, kind='mergesort')
+            det_scores_sorted = det_scores[sorted_score_inds]
+            det_match = np.concatenate([e['dtMatches'][:, 0:maxdets] for e in evals],
+                                       axis=1)[:, sorted_score_inds]  # shape (num_iou_thresh, num_det_all_images)
+            nd = det_match.shape[1]
 
-                precision_matrix[index, :, cat_index] = np.array(precision_at_recall)
-                scores_matrix[index, :, cat_index] = np.array(score)
+            tps = det_match > 0
+            tp_sum = np.cumsum(tps, axis=1, dtype=float)
+            fp_sum = np.cumsum(~tps, axis=1, dtype=float)
+            recall = tp_sum / num_all_gt
+            precision = tp_sum / (fp_sum + tp_sum + np.spacing(1))
+            recall_matrix[:, cat_index] = recall[:, -1] if nd else 0
+            # smooth precision along the curve, remove zigzag
+            precision = np.maximum.accumulate(precision[:, ::-1], axis=1)[:, ::-1]
+
+            for index in range(num_iou_thresh):
+                inds = np.searchsorted(recall[index], self.recall_thres, side='left')
+                # recall thresholds which are never reached have 0 precision
+                inds = inds[inds < nd]
+                precision_matrix[index, :, cat_index] = 0
+                precision_matrix[index, :len(inds), cat_index] = precision[index, inds]
+                scores_matrix[index, :, cat_index] = 0
+                scores_matrix[index, :len(inds), cat_index] = det_scores_sorted[inds]
 
         self.eval = {
             'counts': [num_iou_thresh, num_recall_thresh, num_categories],
@@ -402,29 +360,17 @@ class MeanAveragePrecision(Trace):
         We leverage `maskUtils.iou`.
 
         Args:
-            det: Detection array.
-            gt: Ground truth array.
+            det: Detection array of [x1, y1, w, h, ...], sorted by score and capped to the max number of detections.
+            gt: Ground truth array of [x1, y1, w, h].
 
         Returns:
-            Intersection of union array.
+            Intersection of union array with shape (num_det, num_gt).
         """
         num_dt = len(det)
         num_gt = len(gt)
 
-        if num_gt == 0 and num_dt == 0:
-            return []
-
-        boxes_a = np.zeros(shape=(0, 4), dtype=float)
-        boxes_b = np.zeros(shape=(0, 4), dtype=float)
-
-        inds = np.argsort([-d['score'] for d in det], kind='mergesort')
-        det = [det[i] for i in inds]
-        if len(det) > self.max_detection:
-            det = det[0:self.max_detection]
-
-        boxes_a = [[dt_elem['x1'], dt_elem['y1'], dt_elem['w'], dt_elem['h']] for dt_elem in det]
-        boxes_b = [[gt_elem['x1'], gt_elem['y1'], gt_elem['w'], gt_elem['h']] for gt_elem in gt]
+        if num_gt == 0 or num_dt == 0:
+            return np.zeros((num_dt, num_gt))
 
         iscrowd = [0] * num_gt  # to leverage maskUtils.iou
-        iou_dt_gt = maskUtils.iou(boxes_a, boxes_b, iscrowd)
-        return iou_dt_gt
+        return maskUtils.iou(det[:, :4].tolist(), gt[:, :4].tolist(), iscrowd)
@@ -15,10 +15,17 @@
 from typing import Any, Dict, Set, Union
 
 import numpy as np
+import tensorflow as tf
+import torch
 from sklearn.metrics import precision_score
 
+from fastestimator.backend.argmax import argmax
+from fastestimator.backend.tensor_round import tensor_round
+from fastestimator.backend.to_tensor import to_tensor
 from fastestimator.trace.trace import Trace
 from fastestimator.util.data import Data
+from fastestimator.util.distributed import all_gather_list
+from fastestimator.util.metric_util import StreamingConfusionMatrix, precision_recall_fscore
 from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import to_number
 
@@ -34,7 +41,9 @@ class Precision(Trace):
             regardless of mode, pass None. To execute in all modes except for a particular one, you can pass an argument
             like "!infer" or "!train".
         output_name: Name of the key to store to the state.
-        **kwargs: Additional keyword arguments that pass to sklearn.metrics.precision_score()
+        **kwargs: Additional keyword arguments that pass to sklearn.metrics.precision_score(). If any are provided,
+            every prediction is stored until the end of the epoch so that sklearn can be invoked on them. Otherwise only
+            a confusion matrix is accumulated, which keeps memory usage constant regardless of the number of samples.
 
     Raises:
         ValueError: One of ["y_true", "y_pred", "average"] argument exists in `kwargs`.
@@ -50,6 +59,7 @@ class Precision(Trace):
         self.binary_classification = None
         self.y_true = []
         self.y_pred = []
+        self.matrix = StreamingConfusionMatrix()
         self.kwargs = kwargs
 
     @property
@@ -63,25 +73,35 @@ class Precision(Trace):
     def on_epoch_begin(self, data: Data) -> None:
         self.y_true = []
         self.y_pred = []
+        self.matrix.reset()
 
     def on_batch_end(self, data: Data) -> None:
-        y_true, y_pred = to_number(data[self.true_key]), to_number(data[self.pred_key])
+        y_true, y_pred = data.read_raw(self.true_key), data.read_raw(self.pred_key)
+        if self.kwargs or not isinstance(y_pred, (tf.Tensor, torch.Tensor)):
+            y_true, y_pred = to_number(y_true), to_number(y_pred)
+        else:
+            y_true = to_tensor(y_true, target_type="tf" if tf.is_tensor(y_pred) else "torch")
         self.binary_classification = y_pred.shape[-1] == 1
-        if y_true.shape[-1] > 1 and y_true.ndim > 1:
-            y_true = np.argmax(y_true, axis=-1)
+        if y_true.shape[-1] > 1 and len(y_true.shape) > 1:
+            y_true = argmax(y_true, axis=-1)
         if y_pred.shape[-1] > 1:
-            y_pred = np.argmax(y_pred, axis=-1)
+            y_pred = argmax(y_pred, axis=-1)
+        else:
+            y_pred = tensor_round(y_pred)
+        assert np.prod(y_pred.shape) == np.prod(y_true.shape)
+        if self.kwargs:
+            self.y_pred.extend(y_pred.ravel())
+            self.y_true.extend(y_true.ravel())
         else:
-            y_pred = np.round(y_pred)
-        assert y_pred.size == y_true.size
-        self.y_pred.extend(y_pred.ravel())
-        self.y_true.extend(y_true.ravel())
+            self.matrix.update(y_true, y_pred)
 
     def on_epoch_end(self, data: Data) -> None:
-        if self.binary_classification:
-            score = precision_score(self.y_true, self.y_pred, average='binary', **self.kwargs)
+        average = 'binary' if self.binary_classification else None
+        if self.kwargs:
+            self.y_true, self.y_pred = all_gather_list(self.y_true), all_gather_list(self.y_pred)
+            score = precision_score(self.y_true, self.y_pred, average=average, **self.kwargs)
         else:
-            score = precision_score(self.y_true, self.y_pred, average=None, **self.kwargs)
+            score = precision_recall_fscore(self.matrix.all_reduce(), average=average)[0]
         data.write_with_log(self.outputs[0], score)
 
     @staticmethod
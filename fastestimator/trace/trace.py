@@ -20,9 +20,11 @@ from natsort import humansorted
 import numpy as np
 
 from fastestimator.backend.get_lr import get_lr
+from fastestimator.backend.running_total import RunningTotal
 from fastestimator.summary.summary import ValWithError
 from fastestimator.summary.system import System
 from fastestimator.util.data import Data
+from fastestimator.util.distributed import all_reduce_sum
 from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import parse_modes, to_list, to_number, to_set
 
@@ -73,6 +75,9 @@ class Trace:
     # You can put keys in here to have them automatically added to EvalEssential without the user having to manually add
     # them to the Estimator monitor_names. See BestModelSaver for an example.
     fe_monitor_names: Set[str]
+    # Traces which only perform IO (printing, saving files, etc.) can set this to True so that they will only be run by
+    # the main process during distributed training. See fe.enable_distributed.
+    fe_main_process_only: bool = False
 
     def __init__(self,
                  inputs: Union[None, str, Iterable[str]] = None,
@@ -201,15 +206,16 @@ class EvalEssential(Trace):
 
     def on_batch_end(self, data: Data) -> None:
         if self.eval_results is None:
-            self.eval_results = {key: [data[key]] for key in self.inputs if key in data}
-        else:
-            for key in self.inputs:
-                if key in data:
-                    self.eval_results[key].append(data[key])
+            self.eval_results = {key: RunningTotal() for key in self.inputs if key in data}
+        for key, total in self.eval_results.items():
+            if key in data:
+                # Summed on the device the value is on, so that nothing needs to be copied until the epoch ends
+                total.add(data.read_raw(key))
 
     def on_epoch_end(self, data: Data) -> None:
-        for key, value_list in self.eval_results.items():
-            data.write_with_log(key, np.mean(np.array(value_list), axis=0))
+        for key, total in self.eval_results.items():
+            # Combine the results from every process (during distributed training)
+            data.write_with_log(key, all_reduce_sum(total.total()) / all_reduce_sum(total.count))
 
 
 @traceable()
@@ -230,15 +236,16 @@ class TestEssential(Trace):
 
     def on_batch_end(self, data: Data) -> None:
         if self.test_results is None:
-            self.test_results = {key: [data[key]] for key in self.inputs if key in data}
-        else:
-            for key in self.inputs:
-                if key in data:
-                    self.test_results[key].append(data[key])
+            self.test_results = {key: RunningTotal() for key in self.inputs if key in data}
+        for key, total in self.test_results.items():
+            if key in data:
+                # Summed on the device the value is on, so that nothing needs to be copied until the epoch ends
+                total.add(data.read_raw(key))
 
     def on_epoch_end(self, data: Data) -> None:
-        for key, value_list in self.test_results.items():
-            data.write_with_log(key, np.mean(np.array(value_list), axis=0))
+        for key, total in self.test_results.items():
+            # Combine the results from every process (during distributed training)
+            data.write_with_log(key, all_reduce_sum(total.total()) / all_reduce_sum(total.count))
 
 
 @traceable()
@@ -247,6 +254,8 @@ class Logger(Trace):
 
     Please don't add this trace into an estimator manually. FastEstimator will add it automatically.
     """
+    fe_main_process_only = True
+
     def __init__(self) -> None:
         super().__init__(inputs="*")
 
@@ -12,7 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
-from typing import Any, ChainMap, Dict, List, MutableMapping, Optional
+import collections
+from typing import Any, ChainMap, Dict, List, Mapping, MutableMapping, Optional
 
 
 class Data(ChainMap[str, Any]):
@@ -62,6 +63,24 @@ class Data(ChainMap[str, Any]):
         """
         self.maps[1][key] = value
 
+    def read_raw(self, key: str) -> Any:
+        """Read a value from the `Data` dictionary without moving it off of whichever device it is on.
+
+        Network predictions which live on a GPU are normally copied back to the CPU when they are first read. Traces
+        which compute their results using tensor ops (see for example fe.backend.RunningTotal) can use this method
+        instead in order to avoid a device sync and copy on every step.
+
+        Args:
+            key: The key to read.
+
+        Returns:
+            The value associated with the `key`.
+
+        Raises:
+            KeyError: If the `key` is not present.
+        """
+        return _read_raw(self, key)
+
     def read_logs(self) -> Dict[str, Any]:
         """Read all values from the `Data` dictionary which were intended to be logged.
 
@@ -69,3 +88,26 @@ class Data(ChainMap[str, Any]):
             A dictionary of all of the keys and values to be logged.
         """
         return self.maps[0]
+
+
+def _read_raw(mapping: Mapping[str, Any], key: str) -> Any:
+    """Read a value from a (possibly nested) mapping, preferring the raw form of any lazily materialized values.
+
+    Args:
+        mapping: The mapping to read from.
+        key: The key to read.
+
+    Returns:
+        The value associated with the `key`.
+
+    Raises:
+        KeyError: If the `key` is not present.
+    """
+    if isinstance(mapping, collections.ChainMap):
+        for inner in mapping.maps:
+            if key in inner:
+                return _read_raw(inner, key)
+        raise KeyError(key)
+    if hasattr(mapping, "read_raw"):
+        return mapping.read_raw(key)
+    return mapping[key]
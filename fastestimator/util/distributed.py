@@ -0,0 +1,296 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import multiprocessing as mp
+import os
+import pickle
+import random
+import socket
+import tempfile
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, List, Optional, TypeVar, Union
+
+import numpy as np
+import torch
+import torch.distributed as dist
+
+T = TypeVar('T')
+
+# How the processes should be launched, if enable_distributed() was called outside of a distributed launcher
+_LAUNCH_CONFIG: Optional[Dict[str, Any]] = None
+# A random seed which is shared by every process in the current process group
+_SHARED_SEED: Optional[int] = None
+
+
+def enable_distributed(num_processes: Optional[int] = None,
+                       backend: Optional[str] = None,
+                       master_addr: str = "127.0.0.1",
+                       master_port: Optional[int] = None) -> None:
+    """Invoke to train PyTorch models with DistributedDataParallel (DDP), using one process per device.
+
+    This should be called at the beginning of a program, before any models are built with fe.build. When the program
+    has been started by a distributed launcher such as `torchrun` (which is how multi-node training is performed), the
+    process group is initialized immediately using the environment variables which the launcher provides:
+
+    ```bash
+    torchrun --nnodes=2 --nproc_per_node=4 --rdzv_endpoint=<host>:29500 train.py
+    ```
+
+    Otherwise, the fe.Estimator will launch `num_processes` local processes itself whenever fit() or test() is invoked,
+    and then load the final model weights back into the calling process once they have finished.
+
+    While distributed:
+    * Each process places its data on its own GPU (or uses the CPU with the 'gloo' backend if there are no GPUs).
+    * The fe.Pipeline gives each process a different shard of the data, with the Pipeline `batch_size` being split
+        evenly between the processes (so it remains the global batch size).
+    * Models which are being trained are wrapped in DistributedDataParallel, so that their gradients are averaged
+        across processes.
+    * Metric Traces combine their results across processes, and Traces which perform IO (logging, saving models, etc.)
+        are only run by the main process.
+
+    Args:
+        num_processes: How many local processes to launch. Defaults to the number of GPUs (or 2 if there are no GPUs).
+            Ignored when the program was started by a distributed launcher.
+        backend: The torch.distributed backend to use. Defaults to 'nccl' when GPUs are available, otherwise 'gloo'.
+        master_addr: The address of the main process (when launching local processes).
+        master_port: A free port on which the main process can coordinate the others (when launching local processes).
+            A random free port will be used if not provided.
+    """
+    global _LAUNCH_CONFIG
+    if is_distributed():
+        return
+    if int(os.environ.get("WORLD_SIZE", "1")) > 1:
+        _init_process_group(backend)
+        return
+    if num_processes is None:
+        num_processes = torch.cuda.device_count() or 2
+    _LAUNCH_CONFIG = {
+        "num_processes": num_processes, "backend": backend, "master_addr": master_addr, "master_port": master_port
+    }
+
+
+def distributed_enabled() -> bool:
+    """Whether distributed training is in use, or will be used once the fe.Estimator launches its processes.
+
+    Returns:
+        True iff enable_distributed() has been invoked.
+    """
+    return is_distributed() or _LAUNCH_CONFIG is not None
+
+
+def needs_launch() -> bool:
+    """Whether processes still need to be launched in order to run distributed training.
+
+    Returns:
+        True iff enable_distributed() was invoked outside of a distributed launcher, and this is the launching process.
+    """
+    return _LAUNCH_CONFIG is not None and not is_distributed() and _LAUNCH_CONFIG["num_processes"] > 1
+
+
+def is_distributed() -> bool:
+    """Whether this process is part of an initialized process group.
+
+    Returns:
+        True iff this process is currently running distributed training.
+    """
+    return dist.is_available() and dist.is_initialized()
+
+
+def get_rank() -> int:
+    """Get the rank of this process within the process group.
+
+    Returns:
+        The global rank of this process, or 0 if not running distributed training.
+    """
+    return dist.get_rank() if is_distributed() else 0
+
+
+def get_world_size() -> int:
+    """Get the number of processes in the process group.
+
+    Returns:
+        The number of processes, or 1 if not running distributed training.
+    """
+    return dist.get_world_size() if is_distributed() else 1
+
+
+def is_main_process() -> bool:
+    """Whether this is the process which is responsible for IO (logging, saving models, etc.).
+
+    Returns:
+        True iff this process has rank 0, or distributed training is not being used.
+    """
+    return get_rank() == 0
+
+
+def get_device() -> torch.device:
+    """Get the device which this process should use.
+
+    Returns:
+        The GPU assigned to this process, or the CPU if no GPUs are available.
+    """
+    if not torch.cuda.is_available():
+        return torch.device("cpu")
+    return torch.device("cuda:{}".format(int(os.environ.get("LOCAL_RANK", "0")) if is_distributed() else 0))
+
+
+def get_shared_seed() -> int:
+    """Get a random seed which is identical in every process.
+
+    This can be used to shuffle data in the same way in every process, without needing to communicate.
+
+    Returns:
+        The shared seed.
+    """
+    return _SHARED_SEED if _SHARED_SEED is not None else 0
+
+
+def all_reduce_sum(value: Union[int, float, np.ndarray]) -> Union[int, float, np.ndarray]:
+    """Sum a value across every process.
+
+    Args:
+        value: The local value.
+
+    Returns:
+        The sum of the `value` from every process (with the same type and shape as the input), or the `value` itself if
+        not running distributed training.
+    """
+    if not is_distributed():
+        return value
+    array = np.asarray(value)
+    tensor = torch.as_tensor(array, dtype=torch.float64 if array.dtype.kind == 'f' else torch.int64,
+                             device=get_device() if dist.get_backend() == "nccl" else "cpu")
+    dist.all_reduce(tensor, op=dist.ReduceOp.SUM)
+    result = tensor.cpu().numpy().astype(array.dtype)
+    return result if isinstance(value, np.ndarray) else result.item()
+
+
+def all_gather_list(values: List[T]) -> List[T]:
+    """Concatenate lists from every process.
+
+    Args:
+        values: The local list. The elements must be picklable.
+
+    Returns:
+        The lists from every process concatenated in rank order, or the `values` themselves if not running distributed
+        training.
+    """
+    if not is_distributed():
+        return values
+    gathered = [None] * get_world_size()
+    dist.all_gather_object(gathered, list(values))
+    return [value for process_values in gathered for value in process_values]
+
+
+def _init_process_group(backend: Optional[str]) -> None:
+    """Join the process group described by the standard torch.distributed environment variables.
+
+    Args:
+        backend: The backend to use, or None to pick one automatically.
+    """
+    global _SHARED_SEED
+    if torch.cuda.is_available():
+        torch.cuda.set_device(int(os.environ.get("LOCAL_RANK", "0")))
+    dist.init_process_group(backend=backend or ("nccl" if torch.cuda.is_available() else "gloo"))
+    seed = [random.randint(0, 2**31 - 1)]
+    dist.broadcast_object_list(seed, src=0)
+    _SHARED_SEED = seed[0]
+
+
+def _find_free_port() -> int:
+    """Find a port which is not currently in use.
+
+    Returns:
+        The port number.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("", 0))
+        return sock.getsockname()[1]
+
+
+def _run_worker(rank: int, fn: Callable[[], Any], env: Dict[str, str], result_path: str) -> None:
+    """The entry point of a launched process.
+
+    Args:
+        rank: The rank of this process.
+        fn: The function to run.
+        env: Environment variables describing the process group.
+        result_path: Where the main process should save the result of `fn`.
+    """
+    global _LAUNCH_CONFIG
+    os.environ.update(env)
+    os.environ["RANK"] = os.environ["LOCAL_RANK"] = str(rank)
+    _LAUNCH_CONFIG = None
+    _init_process_group(env["FE_DIST_BACKEND"] or None)
+    try:
+        result = fn()
+        if rank == 0:
+            with open(result_path, 'wb') as result_file:
+                pickle.dump(result, result_file)
+    finally:
+        dist.destroy_process_group()
+
+
+def launch(fn: Callable[[], T]) -> T:
+    """Run a function in several local processes, which together form a process group.
+
+    The processes are forked from the current process, so they inherit all of its state (models, datasets, etc.)
+    without needing to pickle it. For this reason CUDA must not have been initialized before the processes are launched.
+
+    Args:
+        fn: The function to run in every process.
+
+    Returns:
+        The return value of `fn` from the main (rank 0) process.
+
+    Raises:
+        RuntimeError: If CUDA has already been initialized, or if any of the processes fails.
+    """
+    if torch.cuda.is_available() and torch.cuda.is_initialized():
+        raise RuntimeError("CUDA was initialized before the distributed processes could be launched. Either avoid using"
+                           " the GPU before calling fit() or test(), or start the program with torchrun instead.")
+    config = _LAUNCH_CONFIG
+    num_processes = config["num_processes"]
+    env = {
+        "MASTER_ADDR": config["master_addr"],
+        "MASTER_PORT": str(config["master_port"] or _find_free_port()),
+        "WORLD_SIZE": str(num_processes),
+        "LOCAL_WORLD_SIZE": str(num_processes),
+        "FE_DIST_BACKEND": config["backend"] or ""
+    }
+    context = mp.get_context("fork")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result_path = os.path.join(tmp_dir, "result.pkl")
+        processes = [
+            context.Process(target=_run_worker, args=(rank, fn, env, result_path)) for rank in range(num_processes)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            running = {process.sentinel: process for process in processes}
+            while running:
+                for sentinel in wait(list(running)):
+                    process = running.pop(sentinel)
+                    process.join()
+                    if process.exitcode != 0:
+                        raise RuntimeError("A distributed training process failed (exit code {})".format(
+                            process.exitcode))
+        finally:
+            # If one process fails the others could be stuck waiting for it forever
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+        with open(result_path, 'rb') as result_file:
+            return pickle.load(result_file)
@@ -0,0 +1,197 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+from typing import Optional, Tuple, TypeVar, Union
+
+import numpy as np
+import tensorflow as tf
+import torch
+
+from fastestimator.backend.confusion_matrix import confusion_matrix
+from fastestimator.backend.reduce_max import reduce_max
+from fastestimator.backend.to_tensor import to_tensor
+from fastestimator.util.distributed import all_gather_list
+from fastestimator.util.util import to_number
+
+Tensor = TypeVar('Tensor', tf.Tensor, torch.Tensor, np.ndarray)
+
+
+class StreamingConfusionMatrix:
+    """A class which accumulates a confusion matrix between y_true (rows) and y_pred (columns) one batch at a time.
+
+    This class is intentionally not @traceable.
+
+    Memory usage depends only on the number of classes rather than the number of samples, so that classification
+    metrics can be computed over arbitrarily large datasets. Each batch is counted by fe.backend.confusion_matrix
+    wherever the predictions already are (ex. on the GPU), so only the small per-batch matrix is copied to the host.
+
+    ```python
+    matrix = StreamingConfusionMatrix()
+    matrix.update(y_true=np.array([0, 1, 2]), y_pred=np.array([0, 2, 2]))
+    matrix.update(y_true=np.array([1]), y_pred=np.array([1]))
+    matrix.matrix  # [[1, 0, 0], [0, 1, 1], [0, 0, 1]]
+    ```
+
+    Args:
+        num_classes: The number of classes. Labels outside of [0, num_classes) are ignored. If None, the matrix instead
+            grows to fit the largest label which has been seen so far.
+    """
+    def __init__(self, num_classes: Optional[int] = None) -> None:
+        self.num_classes = num_classes
+        self.matrix = np.zeros((num_classes or 0, num_classes or 0), dtype=np.int64)
+
+    def reset(self) -> None:
+        """Clear all of the counts which have been accumulated so far.
+        """
+        self.matrix = np.zeros((self.num_classes or 0, self.num_classes or 0), dtype=np.int64)
+
+    def update(self, y_true: Tensor, y_pred: Tensor) -> None:
+        """Add a batch of class labels into the matrix.
+
+        Args:
+            y_true: The true class indices. These are converted to match the type of `y_pred` if necessary.
+            y_pred: The predicted class indices, with the same number of elements as `y_true`.
+        """
+        if tf.is_tensor(y_pred):
+            y_true = to_tensor(y_true, target_type="tf")
+        elif isinstance(y_pred, torch.Tensor):
+            y_true = to_tensor(y_true, target_type="torch")
+        else:
+            y_true, y_pred = to_number(y_true), np.asarray(y_pred)
+        size = self.matrix.shape[0]
+        if self.num_classes is None and np.prod(y_true.shape) > 0:
+            # Growing the matrix requires the largest label on the host, but that is only a single scalar per tensor
+            needed = int(max(to_number(reduce_max(y_true)), to_number(reduce_max(y_pred)))) + 1
+            if needed > size:
+                self.matrix = _pad(self.matrix, needed)
+                size = needed
+        if size:
+            self.matrix += to_number(confusion_matrix(y_true, y_pred, num_classes=size))
+
+    def all_reduce(self) -> np.ndarray:
+        """Get the total matrix across every process.
+
+        Returns:
+            The sum of the matrices from every process, or the local matrix if not running distributed training.
+        """
+        matrices = all_gather_list([self.matrix])
+        total = np.zeros((0, 0), dtype=np.int64)
+        for matrix in matrices:
+            size = max(total.shape[0], matrix.shape[0])
+            total = _pad(total, size)
+            total[:matrix.shape[0], :matrix.shape[0]] += matrix
+        return total
+
+
+def _pad(matrix: np.ndarray, size: int) -> np.ndarray:
+    """Grow a square matrix with zeros.
+
+    Args:
+        matrix: The matrix to grow.
+        size: The desired number of rows and columns. Must not be smaller than the current size.
+
+    Returns:
+        A `size` x `size` matrix containing the original `matrix` in its top left corner.
+    """
+    padding = size - matrix.shape[0]
+    return np.pad(matrix, ((0, padding), (0, padding))) if padding else matrix
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Divide two arrays, using 0 wherever the denominator is 0 (matching the sklearn default of zero_division).
+
+    Args:
+        numerator: The numerator.
+        denominator: The denominator.
+
+    Returns:
+        The element-wise quotient.
+    """
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=np.float64), where=denominator != 0)
+
+
+def precision_recall_fscore(matrix: np.ndarray,
+                            average: Optional[str] = None,
+                            beta: float = 1.0) -> Tuple[Union[float, np.ndarray], ...]:
+    """Compute the precision, recall, and F-beta score from a confusion matrix.
+
+    The results are the same as sklearn.metrics.precision_recall_fscore_support would give for the samples which were
+    counted into the `matrix`. In particular, classes which appear in neither the true nor the predicted labels are left
+    out, and any metric whose denominator is 0 is reported as 0.
+
+    Args:
+        matrix: A confusion matrix between y_true (rows) and y_pred (columns).
+        average: How to combine the classes. One of 'binary' (to report only class 1), 'micro', 'macro', 'weighted', or
+            None (to report every class separately).
+        beta: The weight of recall in the F-beta score.
+
+    Returns:
+        The (precision, recall, fscore). These are floats, unless `average` is None in which case they are arrays with
+        one entry per class.
+
+    Raises:
+        ValueError: If `average` is not a known value, or if it is 'binary' but the `matrix` contains other classes.
+    """
+    if average not in (None, 'binary', 'micro', 'macro', 'weighted'):
+        raise ValueError("average must be one of None, 'binary', 'micro', 'macro', or 'weighted', but got {}".format(
+            average))
+    matrix = _pad(matrix, max(matrix.shape[0], 2)).astype(np.float64)
+    true_sum, pred_sum, tp_sum = matrix.sum(axis=1), matrix.sum(axis=0), np.diag(matrix)
+    labels = np.flatnonzero(true_sum + pred_sum)
+    if average == 'binary':
+        if labels.size > 2:
+            raise ValueError("Target is multiclass but average='binary'")
+        if labels.size == 2 and 1 not in labels:
+            raise ValueError("pos_label=1 is not a valid label. It should be one of {}".format(labels.tolist()))
+        labels = [1]
+    true_sum, pred_sum, tp_sum = true_sum[labels], pred_sum[labels], tp_sum[labels]
+    if average == 'micro':
+        true_sum, pred_sum, tp_sum = true_sum.sum(keepdims=True), pred_sum.sum(keepdims=True), tp_sum.sum(keepdims=True)
+    beta2 = beta**2
+    precision = _divide(tp_sum, pred_sum)
+    recall = _divide(tp_sum, true_sum)
+    fscore = _divide((1 + beta2) * tp_sum, beta2 * true_sum + pred_sum)
+    if average is None:
+        return precision, recall, fscore
+    if average == 'weighted':
+        weights = true_sum
+    else:
+        weights = np.ones_like(true_sum)
+    if weights.sum() == 0:
+        return 0.0, 0.0, 0.0
+    return tuple(float(np.average(metric, weights=weights)) for metric in (precision, recall, fscore))
+
+
+def mcc_score(matrix: np.ndarray) -> float:
+    """Compute the Matthews Correlation Coefficient from a confusion matrix.
+
+    The result is the same as sklearn.metrics.matthews_corrcoef would give for the samples which were counted into the
+    `matrix`.
+
+    Args:
+        matrix: A confusion matrix between y_true (rows) and y_pred (columns).
+
+    Returns:
+        The (multiclass) MCC, or 0 if it is undefined.
+    """
+    true_sum = matrix.sum(axis=1, dtype=np.float64)
+    pred_sum = matrix.sum(axis=0, dtype=np.float64)
+    n_correct = np.trace(matrix, dtype=np.float64)
+    n_samples = pred_sum.sum()
+    cov_ytyp = n_correct * n_samples - np.dot(true_sum, pred_sum)
+    cov_ypyp = n_samples**2 - np.dot(pred_sum, pred_sum)
+    cov_ytyt = n_samples**2 - np.dot(true_sum, true_sum)
+    if cov_ypyp * cov_ytyt == 0:
+        return 0.0
+    return float(cov_ytyp / np.sqrt(cov_ytyt * cov_ypyp))
@@ -0,0 +1,260 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, ContextManager, Dict, List, Optional, Tuple, Type
+
+import tensorflow as tf
+import torch
+
+from fastestimator.util.util import NonContext
+
+# The timer which is currently recording, if any. The Estimator, Network, and UpdateOp all report into it.
+_ACTIVE: Optional['PhaseTimer'] = None
+# The recorder which is currently capturing spans, if any. It receives every phase, along with finer grained spans.
+_RECORDER: Optional['SpanRecorder'] = None
+_NO_TIMING = NonContext()
+
+
+class PhaseTimer:
+    """A class which records how much wall-clock time is spent within each phase of a training step.
+
+    This class is intentionally not @traceable.
+
+    Phases may be nested, in which case time spent within the inner phase is not counted towards the outer phase. For
+    example, time spent copying a prediction back to the CPU while a Trace is reading it counts as 'to_host' time rather
+    than Trace time.
+
+    ```python
+    timer = PhaseTimer()
+    set_phase_timer(timer)
+    with profile_phase("forward"):
+        ...
+        with profile_phase("backward"):
+            ...
+    set_phase_timer(None)
+    timer.collect()  # {"forward": 0.012, "backward": 0.025}
+    ```
+
+    Args:
+        sync: Whether to wait for any pending GPU work to finish at every phase boundary. Since GPU kernels run
+            asynchronously, the time taken by a phase would otherwise be attributed to whichever later phase happens to
+            wait on its results.
+    """
+    def __init__(self, sync: bool = True) -> None:
+        self.totals: Dict[str, float] = defaultdict(float)
+        # The currently open phases, along with when each of them last started (or resumed) accumulating time
+        self.stack: List[List[Any]] = []
+        self.sync_torch = sync and torch.cuda.is_available()
+        self.sync_tf = sync and bool(tf.config.list_physical_devices('GPU')) and hasattr(
+            tf.test.experimental, "sync_devices")
+
+    def _now(self) -> float:
+        """Get the current time, after waiting for outstanding device work if required.
+
+        Returns:
+            The current time in seconds.
+        """
+        if self.sync_torch:
+            torch.cuda.synchronize()
+        if self.sync_tf:
+            tf.test.experimental.sync_devices()
+        return time.perf_counter()
+
+    def start(self, name: str) -> None:
+        """Begin recording time towards a given phase, pausing whichever phase was previously being recorded.
+
+        Args:
+            name: The name of the phase.
+        """
+        now = self._now()
+        if self.stack:
+            outer = self.stack[-1]
+            self.totals[outer[0]] += now - outer[1]
+        self.stack.append([name, now])
+
+    def stop(self) -> None:
+        """Stop recording time towards the current phase, resuming whichever phase was being recorded before it.
+        """
+        now = self._now()
+        name, start = self.stack.pop()
+        self.totals[name] += now - start
+        if self.stack:
+            self.stack[-1][1] = now
+
+    def collect(self) -> Dict[str, float]:
+        """Get the time (in seconds) spent in each phase since the last collection, and then reset the totals.
+
+        Time spent so far by any phases which are still open is not included, but will instead count towards the next
+        collection.
+
+        Returns:
+            A dictionary mapping phase names to seconds.
+        """
+        totals = dict(self.totals)
+        self.totals.clear()
+        return totals
+
+
+class SpanRecorder:
+    """A class which records when each span of work starts and stops, in the form of Chrome trace events.
+
+    This class is intentionally not @traceable.
+
+    Spans may be nested. Timestamps are recorded in microseconds since the unix epoch, which is the same clock that the
+    PyTorch profiler uses, so that the events can be merged with its trace.
+
+    Args:
+        annotate_tf: Whether to also emit every span as a TensorFlow profiler annotation, so that they appear within
+            profiles which are being captured by tf.profiler.experimental.
+    """
+    def __init__(self, annotate_tf: bool = False) -> None:
+        self.annotate_tf = annotate_tf
+        self.events: List[Dict[str, Any]] = []
+        self.stack: List[Tuple[str, int, Optional[tf.profiler.experimental.Trace]]] = []
+        self.pid = os.getpid()
+        self.tid = threading.get_native_id()
+
+    def start(self, name: str) -> None:
+        """Begin a new span.
+
+        Args:
+            name: The name of the span.
+        """
+        annotation = None
+        if self.annotate_tf:
+            annotation = tf.profiler.experimental.Trace(name)
+            annotation.__enter__()
+        self.stack.append((name, time.time_ns(), annotation))
+
+    def stop(self) -> None:
+        """End the most recently started span.
+        """
+        end = time.time_ns()
+        name, start, annotation = self.stack.pop()
+        if annotation is not None:
+            annotation.__exit__(None, None, None)
+        self.events.append({
+            "ph": "X",
+            "cat": "fastestimator",
+            "name": name,
+            "pid": self.pid,
+            "tid": self.tid,
+            "ts": start / 1000,
+            "dur": (end - start) / 1000
+        })
+
+
+class _Phase:
+    """A context manager which records a phase into a PhaseTimer and/or a SpanRecorder.
+
+    This class is intentionally not @traceable.
+
+    Args:
+        name: The name of the phase.
+        timer: The timer to record into, if any.
+        recorder: The recorder to record into, if any.
+    """
+    def __init__(self, name: str, timer: Optional[PhaseTimer], recorder: Optional[SpanRecorder]) -> None:
+        self.name = name
+        self.timer = timer
+        self.recorder = recorder
+
+    def __enter__(self) -> None:
+        if self.timer is not None:
+            self.timer.start(self.name)
+        if self.recorder is not None:
+            self.recorder.start(self.name)
+
+    def __exit__(self, *exc: Tuple[Optional[Type], Optional[Exception], Optional[Any]]) -> None:
+        if self.recorder is not None:
+            self.recorder.stop()
+        if self.timer is not None:
+            self.timer.stop()
+
+
+def set_phase_timer(timer: Optional[PhaseTimer]) -> None:
+    """Set which timer (if any) should record the phases of subsequent training steps.
+
+    Args:
+        timer: The timer to record into, or None to stop recording.
+    """
+    global _ACTIVE
+    _ACTIVE = timer
+
+
+def get_phase_timer() -> Optional[PhaseTimer]:
+    """Get the timer which is currently recording.
+
+    Returns:
+        The active timer, or None if no timer is recording.
+    """
+    return _ACTIVE
+
+
+def set_span_recorder(recorder: Optional[SpanRecorder]) -> None:
+    """Set which recorder (if any) should capture the spans of subsequent training steps.
+
+    Args:
+        recorder: The recorder to capture into, or None to stop capturing.
+    """
+    global _RECORDER
+    _RECORDER = recorder
+
+
+def get_span_recorder() -> Optional[SpanRecorder]:
+    """Get the recorder which is currently capturing.
+
+    Returns:
+        The active recorder, or None if no recorder is capturing.
+    """
+    return _RECORDER
+
+
+def profile_phase(name: str) -> ContextManager:
+    """Get a context manager which records the time spent within it towards a given phase of the active PhaseTimer.
+
+    The phase is also captured as a span by the active SpanRecorder. When neither is active (or when invoked while a
+    tf.function or torch.compile graph is being traced, since the code would then not actually be running) this returns
+    a no-op context manager, so it is cheap enough to leave in place around every phase of every step.
+
+    Args:
+        name: The name of the phase.
+
+    Returns:
+        A context manager to wrap the phase in.
+    """
+    if (_ACTIVE is None and _RECORDER is None) or torch.compiler.is_compiling() or tf.inside_function():
+        return _NO_TIMING
+    return _Phase(name, _ACTIVE, _RECORDER)
+
+
+def profile_span(name: str) -> ContextManager:
+    """Get a context manager which captures the work done within it as a span of the active SpanRecorder.
+
+    Unlike `profile_phase`, the time is not recorded by the active PhaseTimer. This is intended for finer grained units
+    of work (such as individual ops), whose time is already accounted for by an enclosing phase.
+
+    Args:
+        name: The name of the span.
+
+    Returns:
+        A context manager to wrap the work in.
+    """
+    if _RECORDER is None or torch.compiler.is_compiling() or tf.inside_function():
+        return _NO_TIMING
+    return _Phase(name, None, _RECORDER)
@@ -45,3 +45,16 @@ class TestModelOp(unittest.TestCase):
         output = op.forward(data=self.torch_input_data, state=self.state)
         output = output.to("cpu")
         self.assertTrue(is_equal(output.detach().numpy(), self.output))
+
+    def test_torch_checkpoint_segments(self):
+        model = fe.build(
+            model_fn=lambda: torch.nn.Sequential(torch.nn.Linear(3, 4), torch.nn.ReLU(), torch.nn.Linear(4, 1)),
+            optimizer_fn="adam")
+        op = ModelOp(inputs='x', outputs='x', model=model, checkpoint_segments=2)
+        output = op.forward(data=self.torch_input_data, state=self.state)
+        self.assertTrue(is_equal(output.detach().numpy(), model(self.torch_input_data).detach().numpy()))
+
+    def test_negative_checkpoint_segments(self):
+        model = fe.build(model_fn=OneLayerTorchModel, optimizer_fn="adam")
+        with self.assertRaises(ValueError):
+            ModelOp(inputs='x', outputs='x', model=model, checkpoint_segments=-1)
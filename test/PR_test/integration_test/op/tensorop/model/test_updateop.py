@@ -184,7 +184,7 @@ class TestUpdateOp(unittest.TestCase):
                     with self.subTest("mixed_precision: {}, merge_grad: {}, take: {}".format(
                             mixed_precision, merge_grad, "gradient" if gradient else "loss")):
 
-                        if (mixed_precision and gradient) or (torch.cuda.device_count() > 1 and merge_grad > 1):
+                        if mixed_precision and gradient:
                             with self.assertRaises(ValueError):
                                 run_test(mixed_precision, merge_grad, gradient)
 
@@ -234,7 +234,7 @@ class TestUpdateOp(unittest.TestCase):
                     with self.subTest("mixed_precision: {}, merge_grad: {}, take: {}".format(
                             mixed_precision, merge_grad, "gradient" if gradient else "loss")):
 
-                        if (mixed_precision and gradient) or (torch.cuda.device_count() > 1 and merge_grad > 1):
+                        if mixed_precision and gradient:
                             with self.assertRaises(ValueError):
                                 run_test(mixed_precision, merge_grad, gradient)
 
@@ -289,7 +289,7 @@ class TestUpdateOp(unittest.TestCase):
                     with self.subTest("mixed_precision: {}, merge_grad: {}, take: {}".format(
                             mixed_precision, merge_grad, "gradient" if gradient else "loss")):
 
-                        if (mixed_precision and gradient) or (torch.cuda.device_count() > 1 and merge_grad > 1):
+                        if mixed_precision and gradient:
                             with self.assertRaises(ValueError):
                                 run_test(mixed_precision, merge_grad, gradient)
 
@@ -346,7 +346,7 @@ class TestUpdateOp(unittest.TestCase):
                     with self.subTest("mixed_precision: {}, merge_grad: {}, take: {}".format(
                             mixed_precision, merge_grad, "gradient" if gradient else "loss")):
 
-                        if (mixed_precision and gradient) or (torch.cuda.device_count() > 1 and merge_grad > 1):
+                        if mixed_precision and gradient:
                             with self.assertRaises(ValueError):
                                 run_test(mixed_precision, merge_grad, gradient)
 
@@ -398,7 +398,7 @@ class TestUpdateOp(unittest.TestCase):
                     with self.subTest("mixed_precision: {}, merge_grad: {}, take: {}".format(
                             mixed_precision, merge_grad, "gradient" if gradient else "loss")):
 
-                        if (mixed_precision and gradient) or (torch.cuda.device_count() > 1 and merge_grad > 1):
+                        if mixed_precision and gradient:
                             with self.assertRaises(ValueError):
                                 run_test(mixed_precision, merge_grad, gradient)
 
@@ -453,7 +453,7 @@ class TestUpdateOp(unittest.TestCase):
                     with self.subTest("mixed_precision: {}, merge_grad: {}, take: {}".format(
                             mixed_precision, merge_grad, "gradient" if gradient else "loss")):
 
-                        if (mixed_precision and gradient) or (torch.cuda.device_count() > 1 and merge_grad > 1):
+                        if mixed_precision and gradient:
                             with self.assertRaises(ValueError):
                                 run_test(mixed_precision, merge_grad, gradient)
 
@@ -27,9 +27,10 @@ from fastestimator.architecture.tensorflow.lenet import LeNet as LeNetTf
 from fastestimator.dataset.data import mnist
 from fastestimator.network import TFNetwork
 from fastestimator.op.tensorop import TensorOp
-from fastestimator.op.tensorop.loss import CrossEntropy
+from fastestimator.op.tensorop.loss import CrossEntropy, MeanSquaredError
 from fastestimator.op.tensorop.model import ModelOp, UpdateOp
 from fastestimator.schedule.schedule import EpochScheduler, get_current_items
+from fastestimator.test.unittest_util import OneLayerTorchModel, one_layer_tf_model
 from fastestimator.trace import Trace
 
 
@@ -470,6 +471,151 @@ class TestEstimatorFit(unittest.TestCase):
         self.assertEqual(iostream.getvalue(), iostream2.getvalue())
 
 
+class RecordBatchTrace(Trace):
+    def __init__(self, inputs, mode=None):
+        super().__init__(inputs=inputs, mode=mode)
+        self.values = []
+
+    def on_batch_end(self, data) -> None:
+        self.values.append([np.array(data[key]) for key in self.inputs])
+
+
+class ZeroInputTrace(Trace):
+    def on_batch_begin(self, data) -> None:
+        data["x"].zero_()
+
+
+class BrokenDataset(Dataset):
+    def __len__(self):
+        return 10
+
+    def __getitem__(self, idx):
+        if idx == 5:
+            raise ValueError("broken sample")
+        return {"x": np.ones((3, ), dtype=np.float32) * idx}
+
+
+class TestEstimatorStaging(unittest.TestCase):
+    """This test includes:
+    * fe.estimator.Estimator._run_epoch
+    * fe.estimator._BatchStager
+    * fe.network.TorchNetwork.stage_batch
+    """
+    def _fit(self, staging_depth):
+        dataset = fe.dataset.NumpyDataset({"x": np.random.rand(40, 3).astype(np.float32), "y": np.arange(40)})
+        pipeline = fe.Pipeline(train_data=dataset, batch_size=4, num_process=0)
+        model = fe.build(model_fn=OneLayerTorchModel, optimizer_fn="adam")
+        network = fe.Network(ops=[ModelOp(model=model, inputs="x", outputs="y_pred")])
+        trace = RecordBatchTrace(inputs=("y", "y_pred"))
+        est = fe.Estimator(pipeline=pipeline,
+                           network=network,
+                           epochs=2,
+                           traces=trace,
+                           max_train_steps_per_epoch=3,
+                           log_steps=None,
+                           staging_depth=staging_depth)
+        est.fit(warmup=False)
+        return trace.values
+
+    def test_estimator_staging_same_results(self):
+        np.random.seed(0)
+        torch.manual_seed(0)
+        unstaged = self._fit(staging_depth=0)
+        np.random.seed(0)
+        torch.manual_seed(0)
+        staged = self._fit(staging_depth=2)
+        self.assertEqual(len(staged), 6)
+        self.assertEqual(len(unstaged), len(staged))
+        for (y1, y_pred1), (y2, y_pred2) in zip(unstaged, staged):
+            np.testing.assert_array_equal(y1, y2)
+            np.testing.assert_allclose(y_pred1, y_pred2)
+
+    def test_estimator_staging_off_by_default(self):
+        dataset = fe.dataset.NumpyDataset({"x": np.random.rand(8, 3).astype(np.float32), "y": np.arange(8)})
+        pipeline = fe.Pipeline(train_data=dataset, batch_size=4, num_process=0)
+        model = fe.build(model_fn=OneLayerTorchModel, optimizer_fn="adam")
+        network = fe.Network(ops=[ModelOp(model=model, inputs="x", outputs="y_pred")])
+        trace = RecordBatchTrace(inputs="y_pred")
+        est = fe.Estimator(pipeline=pipeline,
+                           network=network,
+                           epochs=1,
+                           traces=[ZeroInputTrace(inputs="x"), trace],
+                           log_steps=None)
+        est.fit(warmup=False)
+        # In-place changes which a Trace makes to the batch in on_batch_begin must reach the network
+        for (y_pred, ) in trace.values:
+            np.testing.assert_array_equal(y_pred, 0)
+
+    def test_estimator_staging_error(self):
+        pipeline = fe.Pipeline(train_data=DataLoader(BrokenDataset(), batch_size=2))
+        model = fe.build(model_fn=OneLayerTorchModel, optimizer_fn="adam")
+        network = fe.Network(ops=[ModelOp(model=model, inputs="x", outputs="y_pred")])
+        est = fe.Estimator(pipeline=pipeline, network=network, epochs=1, log_steps=None, staging_depth=1)
+        with self.assertRaises(ValueError):
+            est.fit(warmup=False)
+
+
+class RecordStepTrace(Trace):
+    def __init__(self, inputs, mode=None):
+        super().__init__(inputs=inputs, mode=mode)
+        self.steps = []
+        self.values = []
+
+    def on_batch_end(self, data) -> None:
+        self.steps.append(self.system.batch_idx)
+        self.values.append([np.array(data[key]) for key in self.inputs])
+
+
+class TestEstimatorStepsPerExecution(unittest.TestCase):
+    """This test includes:
+    * fe.estimator.Estimator._run_epoch
+    * fe.network.TFNetwork.run_steps
+    """
+    @staticmethod
+    def _estimator(steps_per_execution, trace, train=True):
+        dataset = tf.data.Dataset.from_tensor_slices({
+            "x": np.arange(120, dtype=np.float32).reshape((40, 3)) / 120,
+            "y": np.arange(40, dtype=np.float32).reshape((40, 1))
+        }).batch(4)
+        pipeline = fe.Pipeline(train_data=dataset if train else None, test_data=dataset)
+        model = fe.build(model_fn=one_layer_tf_model, optimizer_fn="sgd" if train else None)
+        ops = [ModelOp(model=model, inputs="x", outputs="y_pred")]
+        if train:
+            ops.extend([MeanSquaredError(inputs=("y_pred", "y"), outputs="mse"), UpdateOp(model=model, loss_name="mse")])
+        network = fe.Network(ops=ops)
+        estimator = fe.Estimator(pipeline=pipeline,
+                                 network=network,
+                                 epochs=1,
+                                 traces=trace,
+                                 log_steps=None,
+                                 steps_per_execution=steps_per_execution)
+        return estimator, model
+
+    def test_estimator_steps_per_execution_train_traces(self):
+        trace = RecordStepTrace(inputs=("y", "y_pred"), mode="train")
+        estimator, _ = self._estimator(steps_per_execution=4, trace=trace)
+        estimator.fit(warmup=False)
+        self.assertEqual(trace.steps, [4, 8, 10])
+        np.testing.assert_array_equal(trace.values[0][0].ravel(), [12, 13, 14, 15])
+        np.testing.assert_array_equal(trace.values[-1][0].ravel(), [36, 37, 38, 39])
+        self.assertEqual(estimator.system.global_step, 10)
+
+    def test_estimator_steps_per_execution_same_training(self):
+        single, single_model = self._estimator(steps_per_execution=1, trace=None)
+        single.fit(warmup=False)
+        fused, fused_model = self._estimator(steps_per_execution=4, trace=None)
+        fused.fit(warmup=False)
+        for w1, w2 in zip(single_model.get_weights(), fused_model.get_weights()):
+            np.testing.assert_allclose(w1, w2, rtol=1e-5)
+
+    def test_estimator_steps_per_execution_test_sees_every_batch(self):
+        trace = RecordStepTrace(inputs=("y", "y_pred"), mode="test")
+        estimator, _ = self._estimator(steps_per_execution=4, trace=trace, train=False)
+        estimator.test()
+        self.assertEqual(trace.steps, list(range(1, 11)))
+        np.testing.assert_array_equal(np.concatenate([y for y, _ in trace.values]).ravel(), np.arange(40))
+
+
 class TestEstimatorTest(unittest.TestCase):
     """This test includes:
     * fe.estimator.Estimator.test
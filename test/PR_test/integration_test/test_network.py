@@ -13,6 +13,7 @@
 # limitations under the License.
 # ==============================================================================
 import unittest
+from collections import ChainMap
 from copy import deepcopy
 
 import numpy as np
@@ -22,7 +23,7 @@ import torch
 import fastestimator as fe
 from fastestimator.architecture.pytorch import LeNet as LeNetTorch
 from fastestimator.architecture.tensorflow import LeNet as LeNetTf
-from fastestimator.network import TFNetwork, TorchNetwork
+from fastestimator.network import LazyPrediction, TFNetwork, TorchNetwork
 from fastestimator.op.numpyop import NumpyOp
 from fastestimator.op.tensorop import TensorOp
 from fastestimator.op.tensorop.loss import CrossEntropy, MeanSquaredError
@@ -174,6 +175,61 @@ class TestNetworkNetwork(unittest.TestCase):
         with self.assertRaises(ValueError):
             network = fe.Network(ops=[ModelOp(model=self.unknown_model, inputs="x", outputs="y")])
 
+    def test_network_network_residency_args(self):
+        network = fe.Network(ops=[ModelOp(model=self.torch_model, inputs="x", outputs="y")],
+                             max_resident_models=2,
+                             memory_headroom=0.5)
+        self.assertEqual(network.max_resident_models, 2)
+        self.assertEqual(network.memory_headroom, 0.5)
+
+    def test_network_network_compile_ops(self):
+        network = fe.Network(ops=[ModelOp(model=self.torch_model, inputs="x", outputs="y")],
+                             compile_ops={"backend": "aot_eager"})
+        self.assertEqual(network.compile_ops, {"backend": "aot_eager"})
+
+
+class TestLazyPrediction(unittest.TestCase):
+    def setUp(self):
+        self.n_calls = 0
+
+        def materialize(value):
+            self.n_calls += 1
+            return value + 1
+
+        self.prediction = LazyPrediction({"a": 1, "b": 2}, materialize)
+
+    def test_lazy_prediction_only_materializes_on_read(self):
+        with self.subTest("membership and iteration are free"):
+            self.assertIn("a", self.prediction)
+            self.assertEqual(set(self.prediction), {"a", "b"})
+            self.assertEqual(self.n_calls, 0)
+        with self.subTest("values are materialized once"):
+            self.assertEqual(self.prediction["a"], 2)
+            self.assertEqual(self.prediction["a"], 2)
+            self.assertEqual(self.n_calls, 1)
+
+    def test_lazy_prediction_writes(self):
+        self.prediction["b"] = 5
+        self.prediction["c"] = 6
+        data = fe.util.Data(ChainMap(self.prediction, {"d": 7}))
+        self.assertEqual(data["b"], 5)
+        self.assertEqual(data["c"], 6)
+        self.assertEqual(data["d"], 7)
+        self.assertEqual(self.n_calls, 0)
+
+    def test_lazy_prediction_read_raw(self):
+        data = fe.util.Data(ChainMap(self.prediction, {"d": 7}))
+        with self.subTest("raw values are read without materializing"):
+            self.assertEqual(data.read_raw("a"), 1)
+            self.assertEqual(data.read_raw("d"), 7)
+            self.assertEqual(self.n_calls, 0)
+        with self.subTest("unreadable raw values are materialized"):
+            prediction = LazyPrediction({"a": 1}, lambda value: value + 1, raw_readable=False)
+            self.assertEqual(fe.util.Data(ChainMap(prediction, {})).read_raw("a"), 2)
+        with self.subTest("missing keys"):
+            with self.assertRaises(KeyError):
+                data.read_raw("e")
+
 
 class TestNetworkBuildOptimizer(unittest.TestCase):
     """This test includes:
@@ -523,3 +579,73 @@ class TestNetworkTransform(unittest.TestCase):
         with self.subTest("check whether model weight changed"):
             weight2 = get_torch_lenet_model_weight(model)
             self.assertFalse(is_equal(weight, weight2))
+
+
+@unittest.skipUnless(torch.cuda.is_available(), "The machine does not have a GPU")
+class TestTorchNetworkResidency(unittest.TestCase):
+    def setUp(self):
+        self.models = [fe.build(model_fn=OneLayerTorchModel, optimizer_fn="adam") for _ in range(3)]
+        model_op = EpochScheduler({
+            epoch: ModelOp(model=model, inputs="x", outputs="y_pred")
+            for epoch, model in enumerate(self.models, start=1)
+        })
+        self.network = TorchNetwork(ops=[model_op], max_resident_models=2)
+
+    def _is_on_gpu(self, model):
+        return next(model.parameters()).is_cuda
+
+    def test_models_stay_on_gpu(self):
+        self.network.load_epoch(mode="train", epoch=1)
+        self.network.unload_epoch()
+        self.network.load_epoch(mode="train", epoch=2)
+        self.network.unload_epoch()
+        self.assertTrue(self._is_on_gpu(self.models[0]))
+        self.assertTrue(self._is_on_gpu(self.models[1]))
+
+    def test_lru_eviction(self):
+        for epoch in [1, 2, 1, 3]:
+            self.network.load_epoch(mode="train", epoch=epoch)
+            self.network.unload_epoch()
+        self.assertTrue(self._is_on_gpu(self.models[0]))
+        self.assertFalse(self._is_on_gpu(self.models[1]))
+        self.assertTrue(self._is_on_gpu(self.models[2]))
+
+    def test_unload_models(self):
+        self.network.load_epoch(mode="train", epoch=1)
+        self.network.unload_epoch()
+        self.network.unload_models()
+        self.assertFalse(self._is_on_gpu(self.models[0]))
+
+
+class TestTorchNetworkCompile(unittest.TestCase):
+    def _train(self, compile_ops):
+        torch.manual_seed(0)
+        model = fe.build(model_fn=OneLayerTorchModel, optimizer_fn=lambda x: torch.optim.SGD(params=x, lr=0.01))
+        ops = [
+            ModelOp(model=model, inputs="x", outputs="y_pred"),
+            MeanSquaredError(inputs=("y_pred", "y"), outputs="ce"),
+            UpdateOp(model=model, loss_name="ce")
+        ]
+        network = TorchNetwork(ops=ops, compile_ops=compile_ops)
+        batch = {"x": torch.tensor([[1.0, 1.0, 1.0], [1.0, -1.0, -0.5]]), "y": torch.tensor([[1.0], [0.0]])}
+        for epoch in [1, 2]:
+            network.load_epoch(mode="train", epoch=epoch)
+            for _ in range(3):
+                network.run_step(batch)
+            network.unload_epoch()
+        return network, get_torch_one_layer_model_weight(model)
+
+    def test_compiled_matches_eager(self):
+        _, eager_weight = self._train(compile_ops=False)
+        network, compiled_weight = self._train(compile_ops={"backend": "aot_eager"})
+        self.assertTrue(np.allclose(eager_weight, compiled_weight, atol=1e-6))
+        # Both epochs share the same op chain, so the step should only be compiled once
+        self.assertEqual(len(network._compiled_steps), 1)
+
+    def test_eager_mode_not_compiled(self):
+        model = fe.build(model_fn=OneLayerTorchModel, optimizer_fn="adam")
+        network = TorchNetwork(ops=[ModelOp(model=model, inputs="x", outputs="y_pred")], compile_ops=True)
+        network.load_epoch(mode="eval", epoch=1, eager=True)
+        network.run_step({"x": torch.ones((2, 3))})
+        network.unload_epoch()
+        self.assertEqual(len(network._compiled_steps), 0)
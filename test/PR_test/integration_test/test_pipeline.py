@@ -12,7 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import os
+import tempfile
 import unittest
+from unittest.mock import patch
 
 import numpy as np
 import tensorflow as tf
@@ -21,6 +24,7 @@ from torch.utils.data import DataLoader, Dataset
 
 import fastestimator as fe
 from fastestimator.dataset.batch_dataset import BatchDataset
+from fastestimator.dataset.op_dataset import OpDataset, _OpCache
 from fastestimator.op.numpyop import NumpyOp
 from fastestimator.op.tensorop import TensorOp
 from fastestimator.schedule import EpochScheduler
@@ -43,6 +47,23 @@ class NumpyOpAdd1(NumpyOp):
         return data + 1
 
 
+class DeterministicAdd1(NumpyOp):
+    n_calls = 0
+
+    def __init__(self, inputs, outputs, mode=None):
+        super().__init__(inputs=inputs, outputs=outputs, mode=mode)
+        self.deterministic = True
+
+    def forward(self, data, state):
+        DeterministicAdd1.n_calls += 1
+        return data + 1
+
+
+class WorkerPid(NumpyOp):
+    def forward(self, data, state):
+        return np.array(os.getpid())
+
+
 class ListData(Dataset):
     def __init__(self, ds, key1="x", key2="y"):
         self.ds = ds
@@ -571,3 +592,257 @@ class TestPipelineGetLoader(unittest.TestCase):
 
         ans = {"x": torch.tensor([[[1, -1], [1, -1]], [[1, 1], [-1, -1]]], dtype=torch.float32)}
         self.assertTrue(is_equal(ans, result))
+
+
+class TestPipelineCache(unittest.TestCase):
+    """ This test cover:
+    * fe.dataset.op_dataset.OpDataset
+    * fe.dataset.op_dataset._OpCache
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_pipeline_cache_deterministic_prefix(self):
+        cache_dir = self.tmp_dir.name
+        dataset = get_sample_torch_dataset()
+        cached_op = DeterministicAdd1(inputs="x", outputs="x1")
+        pipeline = fe.Pipeline(train_data=dataset,
+                               ops=[cached_op, NumpyOpAdd1(inputs="x1", outputs="x2")],
+                               batch_size=10,
+                               num_process=0,
+                               cache_dir=cache_dir)
+        first = pipeline.get_results(mode="train", num_steps=10)
+        n_calls = DeterministicAdd1.n_calls
+        second = pipeline.get_results(mode="train", num_steps=10)
+        with self.subTest("cached op not re-run"):
+            self.assertEqual(DeterministicAdd1.n_calls, n_calls)
+        with self.subTest("results unchanged"):
+            for batch1, batch2 in zip(first, second):
+                self.assertTrue(np.array_equal(batch1["x1"].numpy(), batch2["x1"].numpy()))
+        with self.subTest("remaining ops still applied"):
+            self.assertTrue(np.array_equal(second[0]["x2"].numpy(), second[0]["x"].numpy() + 2))
+
+    def test_pipeline_cache_skip_nondeterministic_prefix(self):
+        op = NumpyOpAdd1(inputs="x", outputs="x1")
+        pipeline = fe.Pipeline(train_data=get_sample_torch_dataset(),
+                               ops=op,
+                               num_process=0,
+                               cache_dir=self.tmp_dir.name)
+        loader = pipeline.get_loader(mode="train")
+        self.assertIsNone(loader.dataset.cache)
+
+    def test_pipeline_cache_empty_dataset(self):
+        dataset = fe.dataset.NumpyDataset({"x": np.zeros((0, 3), dtype=np.float32)})
+        op_dataset = OpDataset(dataset, [DeterministicAdd1(inputs="x", outputs="x1")],
+                               mode="train",
+                               cache_dir=self.tmp_dir.name)
+        self.assertEqual(len(op_dataset), 0)
+        self.assertIsNone(op_dataset.cache)
+
+    def test_pipeline_cache_concurrent_initialization(self):
+        # Simulate another process (ex. a second distributed rank) finishing the same cache after this one has checked
+        # for it, which must not truncate the data that the other process has already stored
+        dataset = fe.dataset.NumpyDataset({"x": np.zeros((4, 2), dtype=np.float32)})
+        ops = [DeterministicAdd1(inputs="x", outputs="x1")]
+        winner = _OpCache(self.tmp_dir.name, ops, "train", dataset)
+        loser = _OpCache(self.tmp_dir.name, ops, "train", dataset)
+        exists = os.path.exists
+        checked = []
+
+        def exists_after_check(path):
+            if not checked:
+                checked.append(path)
+                winner.initialize(dataset[0])
+                winner.store(2, {"x1": np.full(2, 7.0, dtype=np.float32)})
+                return False
+            return exists(path)
+
+        with patch("os.path.exists", side_effect=exists_after_check):
+            loser.initialize(dataset[0])
+        self.assertTrue(loser.enabled)
+        self.assertTrue(np.array_equal(loser.load(2)["x1"], [7.0, 7.0]))
+        self.assertEqual(os.listdir(os.path.dirname(loser.path)), [os.path.basename(loser.path)])
+
+    def test_pipeline_cache_different_data_same_length(self):
+        results = []
+        for offset in (0, 100):
+            dataset = fe.dataset.NumpyDataset({"x": np.arange(offset, offset + 20, dtype=np.float32)})
+            pipeline = fe.Pipeline(train_data=dataset,
+                                   ops=DeterministicAdd1(inputs="x", outputs="x1"),
+                                   batch_size=20,
+                                   num_process=0,
+                                   cache_dir=self.tmp_dir.name)
+            results.append(pipeline.get_results(mode="train", shuffle=False)["x1"].numpy())
+        np.testing.assert_array_equal(results[1], np.arange(101, 121))
+
+
+class TestPipelineVectorizeOps(unittest.TestCase):
+    """ This test cover:
+    * fe.dataset.op_dataset.OpDataset._get_batch
+    * fe.pipeline.Pipeline.get_loader
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = fe.dataset.NumpyDataset({
+            "x": np.random.randint(0, 256, size=(20, 4, 4, 3), dtype=np.uint8),
+            "y": np.random.randint(0, 5, size=(20, ), dtype=np.int64)
+        })
+
+    @staticmethod
+    def _get_ops():
+        return [
+            fe.op.numpyop.univariate.Minmax(inputs="x", outputs="x1"),
+            NumpyOpAdd1(inputs="x1", outputs="x1"),
+            fe.op.numpyop.univariate.Onehot(inputs="y", outputs="y", num_classes=5),
+            fe.op.numpyop.univariate.ExpandDims(inputs="x1", outputs="x1", axis=0)
+        ]
+
+    def test_pipeline_vectorize_ops_same_results(self):
+        results = []
+        for vectorize_ops in [False, True]:
+            pipeline = fe.Pipeline(train_data=self.dataset,
+                                   ops=self._get_ops(),
+                                   batch_size=8,
+                                   num_process=0,
+                                   vectorize_ops=vectorize_ops)
+            results.append(list(pipeline.get_loader(mode="train", shuffle=False)))
+        self.assertEqual(len(results[0]), len(results[1]))
+        for batch1, batch2 in zip(*results):
+            self.assertEqual(batch1.keys(), batch2.keys())
+            for key in batch1:
+                self.assertTrue(np.allclose(batch1[key].numpy(), batch2[key].numpy()))
+
+    def test_pipeline_vectorize_ops_drop_last(self):
+        pipeline = fe.Pipeline(train_data=self.dataset,
+                               ops=self._get_ops(),
+                               batch_size=8,
+                               num_process=0,
+                               drop_last=True,
+                               vectorize_ops=True)
+        batches = list(pipeline.get_loader(mode="train"))
+        with self.subTest("number of batches"):
+            self.assertEqual(len(batches), 2)
+        with self.subTest("batch shape"):
+            self.assertEqual(batches[0]["x1"].shape, (8, 1, 4, 4, 3))
+
+
+class TestPipelineSharedMemory(unittest.TestCase):
+    """ This test cover:
+    * fe.dataset.shared_memory_loader.SharedMemoryDataLoader
+    * fe.pipeline.Pipeline.get_loader
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = fe.dataset.NumpyDataset({
+            "x": np.random.rand(50, 8, 8).astype(np.float32), "idx": np.arange(50), "name": [str(i) for i in range(50)]
+        })
+
+    def test_pipeline_shared_memory_same_results(self):
+        results = []
+        for shared_memory in [False, True]:
+            pipeline = fe.Pipeline(train_data=self.dataset, batch_size=4, num_process=2, shared_memory=shared_memory)
+            loader = pipeline.get_loader(mode="train", shuffle=False)
+            with self.subTest("loader type"):
+                self.assertEqual(isinstance(loader, fe.dataset.shared_memory_loader.SharedMemoryDataLoader),
+                                 shared_memory)
+            # Keep every batch alive so that re-use of the shared buffers would corrupt earlier batches
+            results.append(list(loader))
+        self.assertEqual(len(results[0]), len(results[1]))
+        for batch1, batch2 in zip(*results):
+            self.assertTrue(torch.equal(batch1["x"], batch2["x"]))
+            self.assertTrue(torch.equal(batch1["idx"], batch2["idx"]))
+            self.assertEqual(batch1["name"], batch2["name"])
+
+    def test_pipeline_shared_memory_early_stop(self):
+        pipeline = fe.Pipeline(train_data=self.dataset, batch_size=4, num_process=2, shared_memory=True)
+        loader = pipeline.get_loader(mode="train", shuffle=False)
+        for _ in range(2):
+            for idx, batch in enumerate(loader):
+                if idx == 1:
+                    break
+            self.assertTrue(torch.equal(batch["idx"], torch.arange(4, 8)))
+
+
+class TestPipelineAutotune(unittest.TestCase):
+    """ This test cover:
+    * fe.pipeline.Pipeline.get_loader
+    * fe.pipeline.Pipeline._autotune
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = fe.dataset.NumpyDataset({"x": np.arange(200, dtype=np.float32)})
+
+    def test_pipeline_autotune_results(self):
+        pipeline = fe.Pipeline(train_data=self.dataset, batch_size=8, ops=NumpyOpAdd1("x", "y"), num_process="auto")
+        loader = pipeline.get_loader(mode="train", shuffle=False)
+        with self.subTest("num_process chosen"):
+            self.assertIsInstance(loader.num_workers, int)
+            self.assertLessEqual(loader.num_workers, 2 * os.cpu_count())
+        with self.subTest("results unaffected"):
+            batch = next(iter(loader))
+            self.assertTrue(torch.equal(batch["y"], torch.arange(1, 9, dtype=torch.float32)))
+
+    def test_pipeline_autotune_reuse(self):
+        add1 = NumpyOpAdd1("x", "y")
+        add2 = NumpyOpAdd1("y", "y")
+        pipeline = fe.Pipeline(train_data=self.dataset,
+                               batch_size=8,
+                               ops=[add1, EpochScheduler({1: None, 2: add2})],
+                               num_process="auto")
+        pipeline.get_loader(mode="train", epoch=1)
+        pipeline.get_loader(mode="train", epoch=1)
+        with self.subTest("tuning is cached"):
+            self.assertEqual(len(pipeline._autotuned), 1)
+        pipeline.get_loader(mode="train", epoch=2)
+        with self.subTest("tuning is repeated when the ops change"):
+            self.assertEqual(len(pipeline._autotuned), 2)
+
+
+class TestPipelinePersistentWorkers(unittest.TestCase):
+    """ This test cover:
+    * fe.dataset.persistent_dataset.PersistentOpDataset
+    * fe.dataset.shared_memory_loader.SharedMemoryDataLoader
+    * fe.pipeline.Pipeline.get_loader
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = fe.dataset.NumpyDataset({"x": np.arange(20)})
+
+    def _run_epochs(self, shared_memory):
+        pipeline = fe.Pipeline(train_data=self.dataset,
+                               batch_size=EpochScheduler({1: 4, 2: 5}),
+                               ops=[WorkerPid("x", "pid"), EpochScheduler({1: None, 2: NumpyOpAdd1("x", "x")})],
+                               num_process=2,
+                               persistent_workers=True,
+                               shared_memory=shared_memory)
+        results = []
+        for epoch in [1, 2, 1]:
+            loader = pipeline.get_loader(mode="train", epoch=epoch, shuffle=False)
+            # Abandon an iterator part-way through, as the Estimator warmup does
+            next(iter(loader))
+            results.append(list(loader))
+        return results
+
+    def test_pipeline_persistent_workers(self):
+        for shared_memory in [False, True]:
+            results = self._run_epochs(shared_memory)
+            pids = [set(torch.cat([batch["pid"] for batch in batches]).tolist()) for batches in results]
+            with self.subTest("workers are re-used", shared_memory=shared_memory):
+                self.assertEqual(len(pids[0]), 2)
+                self.assertEqual(pids[0], pids[1])
+                self.assertEqual(pids[0], pids[2])
+            with self.subTest("batch size follows the schedule", shared_memory=shared_memory):
+                self.assertEqual([len(batches) for batches in results], [5, 4, 5])
+            with self.subTest("ops follow the schedule", shared_memory=shared_memory):
+                self.assertTrue(torch.equal(torch.cat([batch["x"] for batch in results[0]]), torch.arange(20)))
+                self.assertTrue(torch.equal(torch.cat([batch["x"] for batch in results[1]]), torch.arange(1, 21)))
+                self.assertTrue(torch.equal(torch.cat([batch["x"] for batch in results[2]]), torch.arange(20)))
+
+    def test_pipeline_persistent_workers_shuffle(self):
+        pipeline = fe.Pipeline(train_data=self.dataset, batch_size=4, num_process=2, persistent_workers=True)
+        orders = [torch.cat([batch["x"] for batch in pipeline.get_loader(mode="train")]) for _ in range(2)]
+        self.assertTrue(torch.equal(torch.sort(orders[0]).values, torch.arange(20)))
+        self.assertFalse(torch.equal(orders[0], orders[1]))
@@ -0,0 +1,74 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import torch
+
+import fastestimator as fe
+from fastestimator.op.tensorop.loss import CrossEntropy
+from fastestimator.op.tensorop.model import ModelOp, UpdateOp
+from fastestimator.trace.io import Profiler
+from fastestimator.util.profiler import get_span_recorder
+
+
+class TwoClassModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.fc = torch.nn.Linear(4, 2)
+
+    def forward(self, x):
+        return torch.softmax(self.fc(x), dim=-1)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_fit_profile(self):
+        x = np.random.rand(64, 4).astype(np.float32)
+        y = (x.sum(axis=1) > 2).astype(np.int64)
+        dataset = fe.dataset.NumpyDataset({"x": x, "y": y})
+        pipeline = fe.Pipeline(train_data=dataset, eval_data=dataset, batch_size=8)
+        model = fe.build(model_fn=TwoClassModel, optimizer_fn="adam")
+        network = fe.Network(ops=[
+            ModelOp(model=model, inputs="x", outputs="y_pred"),
+            CrossEntropy(inputs=("y_pred", "y"), outputs="ce"),
+            UpdateOp(model=model, loss_name="ce")
+        ])
+        estimator = fe.Estimator(pipeline=pipeline, network=network, epochs=2, log_steps=None)
+        save_path = os.path.join(tempfile.mkdtemp(), "profile", "trace.json")
+        estimator.fit(profile=Profiler(save_path, epoch=2, start_step=3, end_step=5))
+        with open(save_path) as file:
+            events = json.load(file)["traceEvents"]
+        spans = [event for event in events if event.get("cat") == "fastestimator"]
+        names = [span["name"] for span in spans]
+        with self.subTest("steps in window"):
+            self.assertEqual(names.count("forward"), 3)
+            self.assertEqual(names.count("ModelOp"), 3)
+            self.assertEqual(names.count("backward"), 3)
+            self.assertIn("data", names)
+            self.assertIn("trace:TrainEssential", names)
+        with self.subTest("native events merged"):
+            model_op = [span for span in spans if span["name"] == "ModelOp"][0]
+            matmuls = [event for event in events if event.get("name") == "aten::addmm"]
+            self.assertTrue(
+                any(model_op["ts"] <= event["ts"] <= model_op["ts"] + model_op["dur"] for event in matmuls))
+        with self.subTest("recorder removed"):
+            self.assertIsNone(get_span_recorder())
+
+    def test_invalid_window(self):
+        with self.assertRaises(ValueError):
+            Profiler("trace.json", start_step=5, end_step=4)
@@ -0,0 +1,67 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import unittest
+
+import numpy as np
+import torch
+
+import fastestimator as fe
+from fastestimator.op.tensorop.loss import CrossEntropy
+from fastestimator.op.tensorop.model import ModelOp, UpdateOp
+from fastestimator.trace.io import StepProfiler
+from fastestimator.trace.metric import Accuracy
+from fastestimator.util.profiler import get_phase_timer
+
+
+class TwoClassModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.fc = torch.nn.Linear(4, 2)
+
+    def forward(self, x):
+        return torch.softmax(self.fc(x), dim=-1)
+
+
+class TestStepProfiler(unittest.TestCase):
+    def test_fit(self):
+        x = np.random.rand(64, 4).astype(np.float32)
+        y = (x.sum(axis=1) > 2).astype(np.int64)
+        dataset = fe.dataset.NumpyDataset({"x": x, "y": y})
+        pipeline = fe.Pipeline(train_data=dataset, eval_data=dataset, batch_size=8)
+        model = fe.build(model_fn=TwoClassModel, optimizer_fn="adam")
+        network = fe.Network(ops=[
+            ModelOp(model=model, inputs="x", outputs="y_pred"),
+            CrossEntropy(inputs=("y_pred", "y"), outputs="ce"),
+            UpdateOp(model=model, loss_name="ce")
+        ])
+        estimator = fe.Estimator(pipeline=pipeline,
+                                 network=network,
+                                 epochs=2,
+                                 traces=[Accuracy(true_key="y", pred_key="y_pred"), StepProfiler()],
+                                 log_steps=4)
+        summary = estimator.fit("profile")
+        train, evaluation = summary.history["train"], summary.history["eval"]
+        with self.subTest("train phases"):
+            for key in ["ms/step", "ms/data", "ms/forward", "ms/backward", "ms/optimizer", "ms/trace:TrainEssential"]:
+                self.assertEqual(set(train[key].keys()), {1, 4, 8, 12, 16})
+        with self.subTest("eval phases"):
+            for key in ["ms/step", "ms/data", "ms/forward", "ms/trace:Accuracy"]:
+                self.assertEqual(set(evaluation[key].keys()), {8, 16})
+            self.assertNotIn("ms/backward", evaluation)
+        with self.subTest("phases within step time"):
+            phases = sum(float(train[key][12]) for key in train if key.startswith("ms/") and key != "ms/step")
+            self.assertLessEqual(phases, float(train["ms/step"][12]) + 0.1)
+        with self.subTest("timer removed"):
+            self.assertIsNone(get_phase_timer())
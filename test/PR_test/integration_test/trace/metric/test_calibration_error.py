@@ -14,9 +14,10 @@
 # ==============================================================================
 import unittest
 
+import calibration as cal
 import numpy as np
 
-from fastestimator.test.unittest_util import is_equal
+from fastestimator.summary.summary import ValWithError
 from fastestimator.trace.metric import CalibrationError
 from fastestimator.util import Data
 
@@ -26,50 +27,93 @@ class TestCalibrationError(unittest.TestCase):
     def setUpClass(cls):
         cls.calibration_error = CalibrationError(true_key='y', pred_key='y_pred')
 
+    def _run_epoch(self, y_true, y_pred, batch_size=32, trace=None):
+        trace = trace or self.calibration_error
+        trace.on_epoch_begin(data=Data())
+        for idx in range(0, len(y_true), batch_size):
+            trace.on_batch_end(data=Data({'y': y_true[idx:idx + batch_size], 'y_pred': y_pred[idx:idx + batch_size]}))
+        data = Data()
+        trace.on_epoch_end(data=data)
+        return data
+
     def test_on_epoch_begin(self):
         self.calibration_error.on_epoch_begin(data=Data())
-        with self.subTest('Check initial value of y_true'):
-            self.assertEqual(self.calibration_error.y_true, [])
-        with self.subTest('Check initial value of y_pred'):
-            self.assertEqual(self.calibration_error.y_pred, [])
+        with self.subTest('Check initial value of count'):
+            self.assertIsNone(self.calibration_error.count)
+        with self.subTest('Check initial value of confidence'):
+            self.assertIsNone(self.calibration_error.confidence)
 
     def test_on_batch_end(self):
-        self.calibration_error.y_true = []
-        self.calibration_error.y_pred = []
+        self.calibration_error.on_epoch_begin(data=Data())
         batch1 = {'y': np.array([0, 0, 1, 1]), 'y_pred': np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.0, 1.0]])}
         self.calibration_error.on_batch_end(data=Data(batch1))
-        with self.subTest('Check true values'):
-            self.assertTrue(is_equal(self.calibration_error.y_true, list(batch1['y'])))
-        with self.subTest('Check pred values'):
-            self.assertTrue(is_equal(self.calibration_error.y_pred, list(batch1['y_pred'])))
-        batch2 = {'y': np.array([1, 1, 0, 0]), 'y_pred': np.array([[0.0, 1.0], [0.0, 1.0], [1.0, 0.0], [1.0, 0.0]])}
+        batch2 = {'y': np.array([1, 1, 0, 0]), 'y_pred': np.array([[0.0, 1.0], [0.0, 1.0], [1.0, 0.0], [0.8, 0.2]])}
         self.calibration_error.on_batch_end(data=Data(batch2))
-        with self.subTest('Check true values (2 batches)'):
-            self.assertTrue(is_equal(self.calibration_error.y_true, list(batch1['y']) + list(batch2['y'])))
-        with self.subTest('Check pred values (2 batches)'):
-            self.assertTrue(is_equal(self.calibration_error.y_pred, list(batch1['y_pred']) + list(batch2['y_pred'])))
+        with self.subTest('Check memory is independent of the number of samples'):
+            self.assertEqual(self.calibration_error.count.shape, (2 * self.calibration_error.resolution, ))
+        with self.subTest('Check counts'):
+            self.assertEqual(self.calibration_error.count.sum(), 16)
+            self.assertEqual(self.calibration_error.positives.sum(), 8)
+        with self.subTest('Check confidence'):
+            self.assertAlmostEqual(self.calibration_error.confidence.sum(), 8.0)
+            self.assertAlmostEqual(self.calibration_error.positive_confidence.sum(), 7.8)
 
     def test_on_epoch_end(self):
-        self.calibration_error.y_true = [0] * 50 + [1] * 50
-        self.calibration_error.y_pred = list(np.array([1.0, 0.0] * 50 + [0.0, 1.0] * 50).reshape(100, 2))
-        data = Data()
-        self.calibration_error.on_epoch_end(data=data)
+        data = self._run_epoch(np.array([0] * 50 + [1] * 50),
+                               np.array([1.0, 0.0] * 50 + [0.0, 1.0] * 50).reshape(100, 2))
         with self.subTest('Check if calibration error exists'):
             self.assertIn('calibration_error', data)
         with self.subTest('Check the value of calibration error'):
             self.assertEqual(0.0, data['calibration_error'])
 
     def test_perfect_calibration(self):
-        self.calibration_error.y_true = [0] * 50 + [1] * 50
-        self.calibration_error.y_pred = list(
-            np.array([1.0, 0.0] * 25 + [0.5, 0.5] * 50 + [0.0, 1.0] * 25).reshape(100, 2))
-        data = Data()
-        self.calibration_error.on_epoch_end(data=data)
+        data = self._run_epoch(np.array([0] * 50 + [1] * 50),
+                               np.array([1.0, 0.0] * 25 + [0.5, 0.5] * 50 + [0.0, 1.0] * 25).reshape(100, 2))
         self.assertEqual(0.0, data['calibration_error'])
 
     def test_imperfect_calibration(self):
-        self.calibration_error.y_true = [0] * 50 + [1] * 50
-        self.calibration_error.y_pred = list(np.array([1.0, 0.0] * 50 + [0.5, 0.5] * 50).reshape(100, 2))
-        data = Data()
-        self.calibration_error.on_epoch_end(data=data)
+        data = self._run_epoch(np.array([0] * 50 + [1] * 50),
+                               np.array([1.0, 0.0] * 50 + [0.5, 0.5] * 50).reshape(100, 2))
         self.assertEqual(0.3536, data['calibration_error'])
+
+    @staticmethod
+    def _sample(seed, power):
+        # With power 1 the labels are drawn from the predictions themselves, so the true calibration error is 0
+        rng = np.random.default_rng(seed)
+        y_pred = rng.dirichlet(np.ones(4), size=2000)
+        y_true = np.array([rng.choice(4, p=prob**power / np.sum(prob**power)) for prob in y_pred])
+        return y_true, y_pred
+
+    def test_matches_calibration_library_discrete(self):
+        for seed in range(5):
+            for power in (1.0, 1.5):
+                y_true, y_pred = self._sample(seed, power)
+                y_pred = np.round(y_pred, 1)
+                for method in ('marginal', 'top-label'):
+                    with self.subTest(seed=seed, power=power, method=method):
+                        trace = CalibrationError(true_key='y', pred_key='y_pred', method=method)
+                        expected = cal.get_calibration_error(probs=y_pred, labels=y_true, mode=method)
+                        self.assertAlmostEqual(expected,
+                                               self._run_epoch(y_true, y_pred, trace=trace)['calibration_error'],
+                                               delta=1e-4)
+
+    def test_approximates_calibration_library_continuous(self):
+        for seed in range(5):
+            y_true, y_pred = self._sample(seed, 1.5)
+            for method in ('marginal', 'top-label'):
+                with self.subTest(seed=seed, method=method):
+                    trace = CalibrationError(true_key='y', pred_key='y_pred', method=method)
+                    expected = cal.get_calibration_error(probs=y_pred, labels=y_true, mode=method)
+                    self.assertAlmostEqual(expected,
+                                           self._run_epoch(y_true, y_pred, trace=trace)['calibration_error'],
+                                           delta=0.005)
+
+    def test_confidence_interval(self):
+        rng = np.random.default_rng(0)
+        y_pred = rng.dirichlet(np.ones(3), size=1000)
+        y_true = np.array([rng.choice(3, p=prob**2 / np.sum(prob**2)) for prob in y_pred])
+        trace = CalibrationError(true_key='y', pred_key='y_pred', confidence_interval=95)
+        result = self._run_epoch(y_true, y_pred, trace=trace)['calibration_error']
+        self.assertIsInstance(result, ValWithError)
+        self.assertLessEqual(result.y_min, result.y)
+        self.assertLessEqual(result.y, result.y_max)
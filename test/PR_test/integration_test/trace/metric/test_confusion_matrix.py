@@ -13,13 +13,16 @@
 # limitations under the License.
 # ==============================================================================
 import unittest
+from collections import ChainMap
 
 import numpy as np
 import tensorflow as tf
 import torch
 
+from fastestimator.network import LazyPrediction
 from fastestimator.test.unittest_util import TraceRun, is_equal
 from fastestimator.trace.metric import ConfusionMatrix
+from fastestimator.util.data import Data
 
 
 class TestConfusionMatrix(unittest.TestCase):
@@ -150,3 +153,14 @@ class TestConfusionMatrix(unittest.TestCase):
             run.run_trace()
             ans = np.array([[1, 1, 1], [1, 1, 0], [0, 0, 1]])  # col is pred, row is label
             self.assertTrue(is_equal(run.data_on_epoch_end[self.cm_key], ans))
+
+    def test_torch_predictions_not_materialized(self):
+        # Predictions should be counted wherever they are, rather than being copied to the host first
+        prediction = LazyPrediction({"pred": torch.tensor([[0.2, 0.8], [0.9, 0.1], [0.7, 0.3]])},
+                                    materialize=lambda value: self.fail("predictions were materialized"))
+        trace = ConfusionMatrix(true_key="label", pred_key="pred", num_classes=2, output_name=self.cm_key)
+        trace.on_epoch_begin(Data())
+        trace.on_batch_end(Data(ChainMap(prediction, {"label": torch.tensor([1, 1, 0])})))
+        data = Data()
+        trace.on_epoch_end(data)
+        np.testing.assert_allclose(data[self.cm_key], [[1, 0], [1, 1]])
@@ -15,6 +15,8 @@
 import unittest
 
 import numpy as np
+import tensorflow as tf
+import torch
 
 from fastestimator.trace.metric import Dice
 from fastestimator.util import Data
@@ -30,18 +32,34 @@ class TestDice(unittest.TestCase):
         cls.dice = Dice(true_key='x', pred_key='x_pred')
 
     def test_on_epoch_begin(self):
+        self.dice.dice.add(1.0)
         self.dice.on_epoch_begin(data=self.data)
-        self.assertEqual(self.dice.dice, [])
+        self.assertEqual(self.dice.dice.count, 0)
 
     def test_on_batch_end(self):
-        self.dice.dice = []
+        self.dice.dice.reset()
         self.dice.on_batch_end(data=self.data)
-        self.assertEqual(self.dice.dice, self.dice_output)
+        with self.subTest('Check the number of samples'):
+            self.assertEqual(self.dice.dice.count, 3)
+        with self.subTest('Check the sum of the dice scores'):
+            self.assertAlmostEqual(self.dice.dice.total(), sum(self.dice_output))
 
     def test_on_epoch_end(self):
-        self.dice.dice = [1.4999999987500001, 2.3999999972, 2.3999999972]
+        self.dice.dice.reset()
+        self.dice.dice.add(sum(self.dice_output), count=3)
         self.dice.on_epoch_end(data=self.data)
         with self.subTest('Check if dice exists'):
             self.assertIn('Dice', self.data)
         with self.subTest('Check the value of dice'):
-            self.assertEqual(self.data['Dice'], 2.0999999977166666)
+            self.assertAlmostEqual(self.data['Dice'], 2.0999999977166666)
+
+    def test_tensor_inputs(self):
+        dice = Dice(true_key='x', pred_key='x_pred')
+        for x, x_pred in ((tf.constant([1, 2, 3]), tf.constant([[1, 1, 3], [2, 3, 4], [1, 1, 0]])),
+                          (torch.tensor([1, 2, 3]), torch.tensor([[1, 1, 3], [2, 3, 4], [1, 1, 0]]))):
+            with self.subTest(type(x_pred)):
+                data = Data({'x': x, 'x_pred': x_pred})
+                dice.on_epoch_begin(data=data)
+                dice.on_batch_end(data=data)
+                dice.on_epoch_end(data=data)
+                self.assertAlmostEqual(data['Dice'], 2.0999999977166666, places=6)
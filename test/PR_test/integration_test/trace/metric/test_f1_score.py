@@ -13,12 +13,16 @@
 # limitations under the License.
 # ==============================================================================
 import unittest
+from collections import ChainMap
 
+import numpy as np
 import tensorflow as tf
 import torch
 
+from fastestimator.network import LazyPrediction
 from fastestimator.test.unittest_util import TraceRun
 from fastestimator.trace.metric import F1Score
+from fastestimator.util.data import Data
 
 
 class TestF1Score(unittest.TestCase):
@@ -157,3 +161,14 @@ class TestF1Score(unittest.TestCase):
                              2 / 4)  # for 1, [tp, tn, fp, fn] = [1, 3, 1, 1], f1 = 2/4
             self.assertEqual(run.data_on_epoch_end[self.f1_key][2],
                              2 / 3)  # for 2, [tp, tn, fp, fn] = [1, 4, 1, 0], f1 = 2/3
+
+    def test_torch_predictions_not_materialized(self):
+        # Predictions should be counted wherever they are, rather than being copied to the host first
+        prediction = LazyPrediction({"pred": torch.tensor([[0.2, 0.8], [0.9, 0.1], [0.7, 0.3]])},
+                                    materialize=lambda value: self.fail("predictions were materialized"))
+        trace = F1Score(true_key="label", pred_key="pred", output_name=self.f1_key)
+        trace.on_epoch_begin(Data())
+        trace.on_batch_end(Data(ChainMap(prediction, {"label": torch.tensor([1, 1, 0])})))
+        data = Data()
+        trace.on_epoch_end(data)
+        np.testing.assert_allclose(data[self.f1_key], [2 / 3, 2 / 3])
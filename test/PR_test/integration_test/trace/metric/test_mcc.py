@@ -13,13 +13,16 @@
 # limitations under the License.
 # ==============================================================================
 import unittest
+from collections import ChainMap
 
 import numpy as np
 import tensorflow as tf
 import torch
 
+from fastestimator.network import LazyPrediction
 from fastestimator.test.unittest_util import TraceRun
 from fastestimator.trace.metric import MCC
+from fastestimator.util.data import Data
 import pdb
 
 def mcc_func(tp, tn, fp, fn):
@@ -147,3 +150,14 @@ class TestMCC(unittest.TestCase):
             run = TraceRun(trace=trace, batch=batch, prediction=pred)
             run.run_trace()
             self.assertEqual(run.data_on_epoch_end[self.mcc_key], 0.26111648393354675)
+
+    def test_torch_predictions_not_materialized(self):
+        # Predictions should be counted wherever they are, rather than being copied to the host first
+        prediction = LazyPrediction({"pred": torch.tensor([[0.2, 0.8], [0.9, 0.1], [0.7, 0.3]])},
+                                    materialize=lambda value: self.fail("predictions were materialized"))
+        trace = MCC(true_key="label", pred_key="pred", output_name=self.mcc_key)
+        trace.on_epoch_begin(Data())
+        trace.on_batch_end(Data(ChainMap(prediction, {"label": torch.tensor([1, 1, 0])})))
+        data = Data()
+        trace.on_epoch_end(data)
+        np.testing.assert_allclose(data[self.mcc_key], 0.5)
@@ -12,14 +12,52 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import contextlib
+import io
 import unittest
 
 import numpy as np
+from pycocotools.coco import COCO
+from pycocotools.cocoeval import COCOeval
 
 from fastestimator.trace.metric import MeanAveragePrecision
 from fastestimator.util import Data
 
 
+def coco_reference(gt, pred, num_classes):
+    """Compute mAP, AP50, and AP75 with pycocotools (considering all box areas, with up to 100 detections)."""
+    images, annotations, detections = [], [], []
+    for img_idx in range(gt.shape[0]):
+        images.append({"id": img_idx + 1})
+        for x1, y1, w, h, label in gt[img_idx]:
+            if w > 0:
+                annotations.append({
+                    "id": len(annotations) + 1,
+                    "image_id": img_idx + 1,
+                    "category_id": int(label),
+                    "bbox": [x1, y1, w, h],
+                    "area": w * h,
+                    "iscrowd": 0
+                })
+        for x1, y1, w, h, label, score, select in pred[img_idx]:
+            if select > 0:
+                detections.append({"image_id": img_idx + 1, "category_id": int(label), "bbox": [x1, y1, w, h],
+                                   "score": score})
+    with contextlib.redirect_stdout(io.StringIO()):
+        coco_gt = COCO()
+        coco_gt.dataset = {"images": images, "annotations": annotations,
+                           "categories": [{"id": idx} for idx in range(num_classes)]}
+        coco_gt.createIndex()
+        coco_eval = COCOeval(coco_gt, coco_gt.loadRes(detections), "bbox")
+        coco_eval.params.areaRng = [[0, 1e10]]
+        coco_eval.params.areaRngLbl = ["all"]
+        coco_eval.params.maxDets = [100]
+        coco_eval.evaluate()
+        coco_eval.accumulate()
+    precision = coco_eval.eval["precision"][:, :, :, 0, 0]
+    return [np.mean(p[p > -1]) for p in (precision, precision[[0]], precision[[5]])]
+
+
 class TestMeanAveragePrecision(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -81,3 +119,32 @@ class TestMeanAveragePrecision(unittest.TestCase):
             self.assertEqual(self.data['AP50'], -1)
         with self.subTest('Check the value of AP75'):
             self.assertEqual(self.data['AP75'], -1)
+
+    def test_matches_pycocotools(self):
+        rng = np.random.default_rng(42)
+        num_classes, batch_size, num_gt, num_pred = 3, 6, 5, 120
+        gt = np.zeros((batch_size, num_gt, 5))
+        pred = np.zeros((batch_size, num_pred, 7))
+        for idx in range(batch_size):
+            gt[idx, :, :2] = rng.integers(0, 80, (num_gt, 2))
+            gt[idx, :, 2:4] = rng.integers(5, 40, (num_gt, 2))
+            gt[idx, :, 4] = rng.integers(0, num_classes, num_gt)
+            # Noisy copies of the ground truth boxes, with some wrong labels and plenty of tied scores
+            source = rng.integers(0, num_gt, num_pred)
+            pred[idx, :, :4] = gt[idx, source, :4] + np.round(rng.normal(0, 2, (num_pred, 4)))
+            pred[idx, :, 2:4] = np.maximum(pred[idx, :, 2:4], 1)
+            pred[idx, :, 4] = np.where(rng.uniform(size=num_pred) < 0.8, gt[idx, source, 4],
+                                       rng.integers(0, num_classes, num_pred))
+            pred[idx, :, 5] = np.round(rng.uniform(size=num_pred), 1)
+            pred[idx, :, 6] = rng.uniform(size=num_pred) < 0.9
+        mean_ap = MeanAveragePrecision(num_classes=num_classes, true_key='bbox', pred_key='pred')
+        data = Data()
+        mean_ap.on_epoch_begin(data)
+        # Split the images over two batches
+        for batch in (slice(0, 4), slice(4, batch_size)):
+            mean_ap.on_batch_begin(data)
+            mean_ap.on_batch_end(Data({'bbox': gt[batch], 'pred': pred[batch]}))
+        mean_ap.on_epoch_end(data)
+        np.testing.assert_allclose([data['mAP'], data['AP50'], data['AP75']],
+                                   coco_reference(gt, pred, num_classes),
+                                   rtol=1e-12)
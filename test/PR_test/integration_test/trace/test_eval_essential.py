@@ -14,6 +14,7 @@
 # ==============================================================================
 import unittest
 
+from fastestimator.backend import RunningTotal
 from fastestimator.test.unittest_util import sample_system_object
 from fastestimator.trace import EvalEssential
 from fastestimator.util.data import Data
@@ -33,21 +34,26 @@ class TestEvalEssential(unittest.TestCase):
     def test_on_batch_end_eval_results_not_none(self):
         eval_essential = EvalEssential(monitor_names='loss')
         eval_essential.system = sample_system_object()
-        eval_essential.eval_results = {'loss': [95]}
+        eval_essential.eval_results = {'loss': RunningTotal()}
+        eval_essential.eval_results['loss'].add(95)
         eval_essential.on_batch_end(data=self.data)
-        self.assertEqual(eval_essential.eval_results['loss'], [95, 10])
+        self.assertEqual(eval_essential.eval_results['loss'].total(), 105)
+        self.assertEqual(eval_essential.eval_results['loss'].count, 2)
 
     def test_on_batch_end_eval_results_none(self):
         data = Data({'loss': 5})
         eval_essential = EvalEssential(monitor_names='loss')
         eval_essential.system = sample_system_object()
         eval_essential.on_batch_end(data=data)
-        self.assertEqual(eval_essential.eval_results['loss'], [5])
+        self.assertEqual(eval_essential.eval_results['loss'].total(), 5)
+        self.assertEqual(eval_essential.eval_results['loss'].count, 1)
 
     def test_on_epoch_end(self):
         data = Data({})
         eval_essential = EvalEssential(monitor_names='loss')
         eval_essential.system = sample_system_object()
-        eval_essential.eval_results = {'loss': [10, 20]}
+        eval_essential.eval_results = {'loss': RunningTotal()}
+        eval_essential.eval_results['loss'].add(10)
+        eval_essential.eval_results['loss'].add(20)
         eval_essential.on_epoch_end(data=data)
         self.assertEqual(data['loss'], 15.0)
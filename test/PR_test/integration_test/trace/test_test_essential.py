@@ -14,6 +14,7 @@
 # ==============================================================================
 import unittest
 
+from fastestimator.backend import RunningTotal
 from fastestimator.test.unittest_util import sample_system_object
 from fastestimator.trace import TestEssential
 from fastestimator.util.data import Data
@@ -33,21 +34,26 @@ class TestTestEssential(unittest.TestCase):
     def test_on_batch_end_test_results_not_none(self):
         test_essential = TestEssential(monitor_names='loss')
         test_essential.system = sample_system_object()
-        test_essential.test_results = {'loss': [95]}
+        test_essential.test_results = {'loss': RunningTotal()}
+        test_essential.test_results['loss'].add(95)
         test_essential.on_batch_end(data=self.data)
-        self.assertEqual(test_essential.test_results['loss'], [95, 10])
+        self.assertEqual(test_essential.test_results['loss'].total(), 105)
+        self.assertEqual(test_essential.test_results['loss'].count, 2)
 
     def test_on_batch_end_test_results_none(self):
         data = Data({'loss': 5})
         test_essential = TestEssential(monitor_names='loss')
         test_essential.system = sample_system_object()
         test_essential.on_batch_end(data=data)
-        self.assertEqual(test_essential.test_results['loss'], [5])
+        self.assertEqual(test_essential.test_results['loss'].total(), 5)
+        self.assertEqual(test_essential.test_results['loss'].count, 1)
 
     def test_on_epoch_end(self):
         data = Data({})
         test_essential = TestEssential(monitor_names='loss')
         test_essential.system = sample_system_object()
-        test_essential.test_results = {'loss': [10, 20]}
+        test_essential.test_results = {'loss': RunningTotal()}
+        test_essential.test_results['loss'].add(10)
+        test_essential.test_results['loss'].add(20)
         test_essential.on_epoch_end(data=data)
         self.assertEqual(data['loss'], 15.0)
@@ -0,0 +1,213 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import contextlib
+import io
+import unittest
+
+import numpy as np
+import torch
+
+import fastestimator as fe
+from fastestimator.dataset.persistent_dataset import EpochSampler
+from fastestimator.network import TorchNetwork
+from fastestimator.op.tensorop.loss import CrossEntropy, MeanSquaredError
+from fastestimator.op.tensorop.model import ModelOp, UpdateOp
+from fastestimator.test.unittest_util import OneLayerTorchModel
+from fastestimator.trace import Trace
+from fastestimator.trace.metric import Accuracy
+from fastestimator.util import distributed
+
+
+class TwoClassModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.fc = torch.nn.Linear(4, 2)
+
+    def forward(self, x):
+        return torch.softmax(self.fc(x), dim=-1)
+
+
+def build_sgd_network(merge_grad=1):
+    model = fe.build(model_fn=OneLayerTorchModel, optimizer_fn=lambda x: torch.optim.SGD(params=x, lr=0.1))
+    network = TorchNetwork(ops=[
+        ModelOp(model=model, inputs="x", outputs="y_pred"),
+        MeanSquaredError(inputs=("y_pred", "y"), outputs="mse"),
+        UpdateOp(model=model, loss_name="mse", merge_grad=merge_grad)
+    ])
+    return model, network
+
+
+class TestDistributed(unittest.TestCase):
+    def setUp(self):
+        fe.enable_distributed(num_processes=2, backend="gloo")
+
+    def tearDown(self):
+        distributed._LAUNCH_CONFIG = None
+
+    def test_gradients_averaged(self):
+        x = torch.tensor([[1.0, 1.0, 1.0], [1.0, -1.0, -0.5], [0.5, 2.0, 1.0], [-1.0, 0.0, 3.0]])
+        y = torch.tensor([[1.0], [0.0], [2.0], [-1.0]])
+        model, network = build_sgd_network()
+
+        def step():
+            rank = distributed.get_rank()
+            network.load_epoch(mode="train", epoch=1)
+            network.run_step({"x": x[2 * rank:2 * rank + 2], "y": y[2 * rank:2 * rank + 2]})
+            network.unload_epoch()
+            return model.fc1.weight.detach().clone()
+
+        distributed_weight = distributed.launch(step)
+        # Training on half of the batch in each of 2 processes should match training on the whole batch at once
+        model, network = build_sgd_network()
+        network.load_epoch(mode="train", epoch=1)
+        network.run_step({"x": x, "y": y})
+        network.unload_epoch()
+        np.testing.assert_allclose(distributed_weight.numpy(), model.fc1.weight.detach().numpy(), rtol=1e-5)
+
+    def test_gradient_accumulation(self):
+        x = torch.tensor([[1.0, 1.0, 1.0], [1.0, -1.0, -0.5], [0.5, 2.0, 1.0], [-1.0, 0.0, 3.0]])
+        y = torch.tensor([[1.0], [0.0], [2.0], [-1.0]])
+        model, network = build_sgd_network(merge_grad=2)
+
+        def step():
+            rank = distributed.get_rank()
+            network.load_epoch(mode="train", epoch=1)
+            network.run_step({"x": x[rank:rank + 1], "y": y[rank:rank + 1]})
+            first_grad = model.fc1.weight.grad.detach().clone()
+            network.run_step({"x": x[rank + 2:rank + 3], "y": y[rank + 2:rank + 3]})
+            network.unload_epoch()
+            return first_grad, model.fc1.weight.detach().clone()
+
+        first_grad, distributed_weight = distributed.launch(step)
+        # The first step only accumulates gradients, so they should not have been averaged with the other process yet
+        model, network = build_sgd_network()
+        pred = model(x[0:1])
+        local_grad = torch.autograd.grad(torch.mean((pred - y[0:1])**2) / 2, model.fc1.weight)[0]
+        np.testing.assert_allclose(first_grad.numpy(), local_grad.numpy(), rtol=1e-5)
+        # Accumulating 2 steps in each of 2 processes should match training on the whole batch at once
+        network.load_epoch(mode="train", epoch=1)
+        network.run_step({"x": x, "y": y})
+        network.unload_epoch()
+        np.testing.assert_allclose(distributed_weight.numpy(), model.fc1.weight.detach().numpy(), rtol=1e-5)
+
+    def test_estimator_fit(self):
+        x = np.random.rand(64, 4).astype(np.float32)
+        y = (x.sum(axis=1) > 2).astype(np.int64)
+        dataset = fe.dataset.NumpyDataset({"x": x, "y": y})
+        pipeline = fe.Pipeline(train_data=dataset, eval_data=dataset, batch_size=8)
+        model = fe.build(model_fn=TwoClassModel, optimizer_fn=lambda x: torch.optim.SGD(params=x, lr=0.5))
+        network = fe.Network(ops=[
+            ModelOp(model=model, inputs="x", outputs="y_pred"),
+            CrossEntropy(inputs=("y_pred", "y"), outputs="ce"),
+            UpdateOp(model=model, loss_name="ce")
+        ])
+        est = fe.Estimator(pipeline=pipeline,
+                           network=network,
+                           epochs=2,
+                           traces=Accuracy(true_key="y", pred_key="y_pred"),
+                           log_steps=0)
+        weight = model.fc.weight.detach().clone()
+        summary = est.fit("distributed", warmup=False)
+        # The batch size is global, so each epoch should still have 64 / 8 steps
+        self.assertEqual(est.system.global_step, 16)
+        self.assertEqual(set(summary.history["eval"]["accuracy"].keys()), {8, 16})
+        self.assertFalse(torch.allclose(weight, model.fc.weight.detach()))
+
+    def test_estimator_test_counts_every_element_once(self):
+        # 7 elements can't be split evenly between 2 processes, but none should be repeated to even them out
+        dataset = fe.dataset.NumpyDataset({"x": np.random.rand(7, 4).astype(np.float32), "y": np.zeros(7)})
+        pipeline = fe.Pipeline(test_data=dataset, batch_size=2)
+        model = fe.build(model_fn=TwoClassModel, optimizer_fn=None)
+        network = fe.Network(ops=[ModelOp(model=model, inputs="x", outputs="y_pred")])
+        counter = CountTrace(inputs="y", mode="test")
+        est = fe.Estimator(pipeline=pipeline, network=network, epochs=1, traces=counter, log_steps=0)
+        summary = est.test("distributed")
+        self.assertEqual(summary.history["test"]["count"][0], 7)
+
+    def test_batch_size_not_divisible(self):
+        dataset = fe.dataset.NumpyDataset({"x": np.random.rand(20, 4).astype(np.float32)})
+        pipeline = fe.Pipeline(train_data=dataset, batch_size=5, num_process=0)
+
+        def get_batch_size():
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                loader = pipeline.get_loader(mode="train")
+            return loader.batch_size, stdout.getvalue()
+
+        batch_size, output = distributed.launch(get_batch_size)
+        self.assertEqual(batch_size, 2)
+        self.assertIn("not divisible", output)
+
+    def test_oversampled_batch_dataset_blocks_differ(self):
+        # Every process shuffles with the same shared seed, which must still give each oversampled block its own order
+        small_ds = fe.dataset.NumpyDataset({"x": np.arange(5)})
+        big_ds = fe.dataset.NumpyDataset({"x": np.arange(100)})
+        dataset = fe.dataset.BatchDataset(datasets=[small_ds, big_ds], num_samples=[1, 1])
+        pipeline = fe.Pipeline(train_data=dataset, num_process=0)
+
+        def get_index_map():
+            pipeline.get_loader(mode="train", shuffle=True)
+            return distributed.all_gather_list([list(dataset.index_maps[0])])
+
+        index_maps = distributed.launch(get_index_map)
+        self.assertEqual(index_maps[0], index_maps[1])
+        blocks = np.reshape(index_maps[0], (20, 5))
+        self.assertGreater(len({tuple(block) for block in blocks}), 1)
+
+
+class CountTrace(Trace):
+    def on_epoch_begin(self, data):
+        self.count = 0
+
+    def on_batch_end(self, data):
+        self.count += len(data[self.inputs[0]])
+
+    def on_epoch_end(self, data):
+        data.write_with_log("count", distributed.all_reduce_sum(self.count))
+
+
+class TestEpochSampler(unittest.TestCase):
+    def test_sharding(self):
+        shards = []
+        for rank in range(3):
+            sampler = EpochSampler()
+            sampler.configure(length=10,
+                              batch_size=None,
+                              shuffle=True,
+                              drop_last=False,
+                              num_replicas=3,
+                              rank=rank,
+                              seed=42)
+            shards.append([idx for batch in sampler for idx in batch])
+            self.assertEqual(len(sampler), 4)
+        self.assertTrue(all(len(shard) == 4 for shard in shards))
+        # Every index is covered, with 2 of them repeated to even out the shards
+        self.assertEqual(set(sum(shards, [])), set(range(10)))
+
+    def test_sharding_without_padding(self):
+        shards = []
+        for rank in range(3):
+            sampler = EpochSampler()
+            sampler.configure(length=10,
+                              batch_size=2,
+                              shuffle=True,
+                              drop_last=False,
+                              num_replicas=3,
+                              rank=rank,
+                              pad=False,
+                              seed=42)
+            shards.append([idx for batch in sampler for idx in batch])
+        self.assertEqual([len(shard) for shard in shards], [4, 3, 3])
+        self.assertEqual(sorted(sum(shards, [])), list(range(10)))
@@ -0,0 +1,120 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import copy
+import unittest
+
+import numpy as np
+import tensorflow as tf
+import torch
+
+import fastestimator as fe
+from fastestimator.architecture.pytorch import UNet
+from fastestimator.architecture.tensorflow import WideResidualNetwork
+from fastestimator.backend.checkpoint_forward import _PLANS
+
+
+class DataDependentModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.fc = torch.nn.Linear(3, 1)
+
+    def forward(self, x):
+        if x.sum() > 0:  # torch.fx can't trace this
+            return self.fc(x)
+        return -self.fc(x)
+
+
+def skip_tf_model():
+    inp = tf.keras.layers.Input((4, ))
+    x1 = tf.keras.layers.Dense(8)(inp)
+    x2 = tf.keras.layers.Dense(8, activation="relu")(x1)
+    x3 = tf.keras.layers.Dense(8)(x2)
+    x4 = tf.keras.layers.Dense(2)(tf.keras.layers.Concatenate()([x1, x3]))
+    return tf.keras.Model(inputs=inp, outputs=[x4, x2])
+
+
+class TestCheckpointForward(unittest.TestCase):
+    @staticmethod
+    def _tf_step(model, forward):
+        with tf.GradientTape() as tape:
+            outputs = tf.nest.flatten(forward())
+            loss = tf.add_n([tf.reduce_sum(output) for output in outputs])
+        grads = tape.gradient(loss, model.trainable_variables)
+        return [output.numpy() for output in outputs], [grad.numpy() for grad in grads]
+
+    @staticmethod
+    def _torch_step(model, forward):
+        output = forward()
+        return output.detach().numpy(), [g.numpy() for g in torch.autograd.grad(output.sum(), list(model.parameters()))]
+
+    def _assert_all_close(self, expected, actual):
+        for exp, act in zip(expected, actual):
+            np.testing.assert_allclose(act, exp, rtol=1e-5, atol=1e-6)
+
+    def test_checkpoint_forward_tf(self):
+        model = WideResidualNetwork(input_shape=(16, 16, 3), depth=10, widen_factor=1)
+        x = tf.random.uniform((2, 16, 16, 3))
+        weights = model.get_weights()
+        outputs, grads = self._tf_step(model, lambda: model(x, training=True))
+        model.set_weights(weights)
+        outputs2, grads2 = self._tf_step(model, lambda: fe.backend.checkpoint_forward(model, x, segments=3))
+        self.assertEqual(len(_PLANS[model][3].segments), 3)
+        self._assert_all_close(outputs, outputs2)
+        self._assert_all_close(grads, grads2)
+
+    def test_checkpoint_forward_tf_skip_connections(self):
+        model = skip_tf_model()
+        x = tf.random.uniform((2, 4))
+        outputs, grads = self._tf_step(model, lambda: model(x, training=True))
+        outputs2, grads2 = self._tf_step(
+            model, tf.function(lambda: fe.backend.checkpoint_forward(model, x, segments=4), autograph=False))
+        self.assertIsNotNone(_PLANS[model][4])
+        self._assert_all_close(outputs, outputs2)
+        self._assert_all_close(grads, grads2)
+
+    def test_checkpoint_forward_torch(self):
+        model = UNet(input_size=(1, 16, 16))
+        x = torch.rand(2, 1, 16, 16)
+        model2 = copy.deepcopy(model)
+        output, grads = self._torch_step(model, lambda: fe.backend.feed_forward(model, x))
+        output2, grads2 = self._torch_step(model2, lambda: fe.backend.checkpoint_forward(model2, x, segments=4))
+        self.assertEqual(len(_PLANS[model2][4].segments), 4)
+        self._assert_all_close([output], [output2])
+        self._assert_all_close(grads, grads2)
+
+    def test_checkpoint_forward_torch_saves_memory(self):
+        model = torch.nn.Sequential(*[torch.nn.Sequential(torch.nn.Linear(8, 8), torch.nn.ReLU()) for _ in range(8)])
+        x = torch.rand(4, 8)
+
+        def count_saved(forward):
+            saved = []
+            with torch.autograd.graph.saved_tensors_hooks(lambda t: saved.append(t) or t, lambda t: t):
+                forward()
+            return len(saved)
+
+        self.assertLess(count_saved(lambda: fe.backend.checkpoint_forward(model, x, segments=2)),
+                        count_saved(lambda: fe.backend.feed_forward(model, x)))
+
+    def test_checkpoint_forward_torch_untraceable(self):
+        model = DataDependentModel()
+        x = torch.ones(2, 3)
+        output = fe.backend.checkpoint_forward(model, x, segments=2)
+        np.testing.assert_allclose(output.detach().numpy(), model(x).detach().numpy())
+        self.assertIsNone(_PLANS[model][2])
+
+    def test_checkpoint_forward_not_training(self):
+        model = UNet(input_size=(1, 16, 16))
+        fe.backend.checkpoint_forward(model, torch.rand(1, 1, 16, 16), segments=2, training=False)
+        self.assertNotIn(model, _PLANS)
@@ -0,0 +1,45 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import unittest
+
+import numpy as np
+import tensorflow as tf
+import torch
+
+import fastestimator as fe
+from fastestimator.test.unittest_util import is_equal
+
+
+class TestConfusionMatrix(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.y_true = np.array([[0, 1], [1, 2], [2, 3]])
+        cls.y_pred = np.array([[0, 1], [2, 2], [0, 2]])
+        # The last pair contains a label outside of the 3 classes, so it is ignored
+        cls.ans = np.array([[1, 0, 0], [0, 1, 1], [1, 0, 1]])
+
+    def test_confusion_matrix_np(self):
+        obj1 = fe.backend.confusion_matrix(self.y_true, self.y_pred, num_classes=3)
+        self.assertTrue(is_equal(obj1, self.ans))
+
+    def test_confusion_matrix_tf(self):
+        obj1 = fe.backend.confusion_matrix(tf.constant(self.y_true), tf.constant(self.y_pred, dtype=tf.float32),
+                                           num_classes=3)
+        self.assertTrue(is_equal(obj1, tf.constant(self.ans, dtype=tf.int64)))
+
+    def test_confusion_matrix_torch(self):
+        obj1 = fe.backend.confusion_matrix(torch.tensor(self.y_true), torch.tensor(self.y_pred, dtype=torch.float32),
+                                           num_classes=3)
+        self.assertTrue(is_equal(obj1, torch.tensor(self.ans)))
@@ -0,0 +1,67 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import unittest
+
+import numpy as np
+import tensorflow as tf
+import torch
+
+import fastestimator as fe
+
+
+class TestCountCorrect(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.y_true = np.array([0, 1, 2])
+        cls.y_true_one_hot = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+        cls.y_pred = np.array([[0.8, 0.1, 0.1], [0.6, 0.3, 0.1], [0.1, 0.2, 0.7]], dtype=np.float32)
+        cls.y_true_binary = np.array([[0], [1], [0]])
+        cls.y_pred_binary = np.array([[-1.0], [2.0], [0.5]], dtype=np.float32)
+
+    def test_count_correct_np(self):
+        with self.subTest("multi-class"):
+            self.assertEqual(fe.backend.count_correct(self.y_true, self.y_pred), 2)
+            self.assertEqual(fe.backend.count_correct(self.y_true_one_hot, self.y_pred), 2)
+        with self.subTest("binary"):
+            self.assertEqual(fe.backend.count_correct(self.y_true_binary, self.y_pred_binary, from_logits=True), 2)
+
+    def test_count_correct_tf(self):
+        with self.subTest("multi-class"):
+            count = fe.backend.count_correct(tf.constant(self.y_true), tf.constant(self.y_pred))
+            self.assertEqual(count.numpy(), 2)
+            count = fe.backend.count_correct(tf.constant(self.y_true_one_hot), tf.constant(self.y_pred))
+            self.assertEqual(count.numpy(), 2)
+        with self.subTest("binary"):
+            count = fe.backend.count_correct(tf.constant(self.y_true_binary),
+                                             tf.constant(self.y_pred_binary),
+                                             from_logits=True)
+            self.assertEqual(count.numpy(), 2)
+
+    def test_count_correct_torch(self):
+        with self.subTest("multi-class"):
+            count = fe.backend.count_correct(torch.tensor(self.y_true), torch.tensor(self.y_pred))
+            self.assertEqual(count.item(), 2)
+            count = fe.backend.count_correct(torch.tensor(self.y_true_one_hot), torch.tensor(self.y_pred))
+            self.assertEqual(count.item(), 2)
+        with self.subTest("binary"):
+            count = fe.backend.count_correct(torch.tensor(self.y_true_binary),
+                                             torch.tensor(self.y_pred_binary),
+                                             from_logits=True)
+            self.assertEqual(count.item(), 2)
+
+    def test_count_correct_numpy_labels_torch_pred(self):
+        # Labels from the pipeline are moved to wherever the predictions are
+        count = fe.backend.count_correct(self.y_true, torch.tensor(self.y_pred))
+        self.assertEqual(count.item(), 2)
@@ -0,0 +1,45 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import unittest
+
+import numpy as np
+import tensorflow as tf
+import torch
+
+import fastestimator as fe
+
+
+class TestDiceScore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.y_true = np.array([[[0, 1], [1, 1]], [[1, 0], [0, 0]]])
+        cls.y_pred = np.array([[[0.1, 0.8], [0.7, 0.2]], [[0.9, 0.6], [0.2, 0.1]]], dtype=np.float32)
+        cls.ans = np.array([0.8, 2 / 3])
+
+    def test_dice_score_np(self):
+        obj1 = fe.backend.dice_score(self.y_true, self.y_pred)
+        np.testing.assert_allclose(obj1, self.ans, rtol=1e-6)
+
+    def test_dice_score_tf(self):
+        obj1 = fe.backend.dice_score(tf.constant(self.y_true), tf.constant(self.y_pred))
+        np.testing.assert_allclose(obj1.numpy(), self.ans, rtol=1e-6)
+
+    def test_dice_score_torch(self):
+        obj1 = fe.backend.dice_score(torch.tensor(self.y_true), torch.tensor(self.y_pred))
+        np.testing.assert_allclose(obj1.numpy(), self.ans, rtol=1e-6)
+
+    def test_dice_score_empty_masks(self):
+        obj1 = fe.backend.dice_score(np.zeros((1, 2, 2)), np.zeros((1, 2, 2)))
+        np.testing.assert_allclose(obj1, [1.0])
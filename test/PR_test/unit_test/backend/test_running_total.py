@@ -0,0 +1,65 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import unittest
+
+import numpy as np
+import tensorflow as tf
+import torch
+
+from fastestimator.backend import RunningTotal
+
+
+class TestRunningTotal(unittest.TestCase):
+    def test_empty(self):
+        total = RunningTotal()
+        self.assertEqual(total.total(), 0)
+        with self.assertRaises(ZeroDivisionError):
+            total.mean()
+
+    def test_stays_in_framework(self):
+        for values in ([tf.constant(1.5), tf.constant(2.5)], [torch.tensor(1.5), torch.tensor(2.5)]):
+            with self.subTest(type(values[0])):
+                total = RunningTotal()
+                for value in values:
+                    total.add(value)
+                self.assertIsInstance(total.value, type(values[0]))
+                self.assertEqual(total.total(), 4.0)
+                self.assertEqual(total.mean(), 2.0)
+
+    def test_counts(self):
+        total = RunningTotal()
+        total.add(np.array([3.0, 6.0]), count=3)
+        total.add(np.array([1.0, 2.0]))
+        np.testing.assert_array_equal(total.mean(), [1.0, 2.0])
+
+    def test_mixed_frameworks(self):
+        total = RunningTotal()
+        total.add(torch.tensor([1, 2]))
+        total.add(tf.constant([3, 4]))
+        total.add(5)
+        np.testing.assert_array_equal(total.total(), [9, 11])
+
+    def test_double_precision(self):
+        total = RunningTotal()
+        for _ in range(10):
+            total.add(torch.tensor(0.1, dtype=torch.float32))
+        self.assertEqual(total.value.dtype, torch.float64)
+
+    def test_reset(self):
+        total = RunningTotal()
+        total.add(torch.tensor(3))
+        total.reset()
+        self.assertEqual(total.count, 0)
+        self.assertEqual(total.total(), 0)
@@ -34,6 +34,23 @@ class TestBatchDataset(unittest.TestCase):
 
         self.assertEqual(len(unpaired_ds), 5)
 
+    def test_oversampled_blocks_differ(self):
+        small_ds = fe.dataset.NumpyDataset({"x": np.arange(5)})
+        big_ds = fe.dataset.NumpyDataset({"x": np.arange(100)})
+        ds = fe.dataset.BatchDataset(datasets=[small_ds, big_ds], num_samples=[1, 1])
+        for seed in (None, 42):
+            with self.subTest(seed=seed):
+                ds.reset_index_maps(seed)
+                blocks = np.reshape(ds.index_maps[0], (20, 5))
+                for block in blocks:
+                    self.assertEqual(sorted(block), [0, 1, 2, 3, 4])
+                self.assertGreater(len({tuple(block) for block in blocks}), 1)
+        with self.subTest("seeded shuffles are reproducible"):
+            ds.reset_index_maps(42)
+            first = list(ds.index_maps[0])
+            ds.reset_index_maps(42)
+            self.assertEqual(first, ds.index_maps[0])
+
     def test_split(self):
         (x_train, y_train), _ = tf.keras.datasets.mnist.load_data()
         train_data = fe.dataset.NumpyDataset({"x": x_train, "y": y_train})
@@ -16,6 +16,7 @@ import os
 import tempfile
 import unittest
 
+import numpy as np
 import pandas as pd
 
 import fastestimator as fe
@@ -32,3 +33,89 @@ class TestCSVDataset(unittest.TestCase):
         dataset = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'))
 
         self.assertEqual(len(dataset), 4)
+
+    def test_lazy_matches_eager(self):
+        tmpdirname = tempfile.mkdtemp()
+
+        data = {'x': ['a1.txt', 'a,2.txt', None, 'b2.txt'], 'y': [0, 0, 1, 1], 'z': [0.5, np.nan, 1.5, 2.5]}
+        df = pd.DataFrame(data=data)
+        df.to_csv(os.path.join(tmpdirname, 'data.csv'), index=False)
+
+        eager = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'))
+        lazy = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'), lazy=True)
+
+        self.assertEqual(len(lazy), 4)
+        for idx in range(4):
+            for key in data:
+                with self.subTest(idx=idx, key=key):
+                    np.testing.assert_equal(lazy[idx][key], eager[idx][key])
+        self.assertEqual(lazy['y'], [0, 0, 1, 1])
+        self.assertEqual(lazy.summary().keys['y'].num_unique_values, 2)
+
+    def test_lazy_split(self):
+        tmpdirname = tempfile.mkdtemp()
+
+        data = {'x': ["x{}".format(i) for i in range(100)], 'y': [i % 2 for i in range(100)]}
+        df = pd.DataFrame(data=data)
+        df.to_csv(os.path.join(tmpdirname, 'data.csv'), index=False)
+
+        dataset = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'), lazy=True)
+        split = dataset.split(0.2, stratify='y', seed=0)
+
+        self.assertEqual(len(split), 20)
+        self.assertEqual(len(dataset), 80)
+        self.assertEqual(sum(split['y']), 10)
+        self.assertEqual(set(split['x']) | set(dataset['x']), set(data['x']))
+
+    def test_lazy_pipeline_workers(self):
+        tmpdirname = tempfile.mkdtemp()
+
+        data = {'x': [float(i) for i in range(32)], 'y': [i % 4 for i in range(32)]}
+        df = pd.DataFrame(data=data)
+        df.to_csv(os.path.join(tmpdirname, 'data.csv'), index=False)
+
+        dataset = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'), lazy=True)
+        pipeline = fe.Pipeline(train_data=dataset, batch_size=8, num_process=2)
+        loader = pipeline.get_loader(mode="train", shuffle=False)
+        x = np.concatenate([batch['x'].numpy() for batch in loader])
+
+        np.testing.assert_array_equal(x, data['x'])
+
+    def test_lazy_late_values_outside_dtype(self):
+        tmpdirname = tempfile.mkdtemp()
+
+        # The unusual values appear after the rows which are sampled to infer the dtypes
+        y = [str(i) for i in range(1500)]
+        y[1200], y[1300] = 'NA', '2.5'
+        z = [str(i + 0.5) for i in range(1500)]
+        z[1400] = 'abc'
+        with open(os.path.join(tmpdirname, 'data.csv'), 'w') as file:
+            file.write("y,z\n")
+            file.writelines("{},{}\n".format(y_val, z_val) for y_val, z_val in zip(y, z))
+
+        eager = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'))
+        lazy = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'), lazy=True)
+        with self.subTest("values which fit"):
+            self.assertEqual(lazy[1199]['y'], 1199)
+            self.assertEqual(lazy[1199]['y'].dtype, np.int64)
+        for idx in (1200, 1300):
+            with self.subTest(idx=idx):
+                with self.assertRaises(ValueError):
+                    lazy[idx]
+                # The failure must not change how other rows are decoded
+                self.assertEqual(lazy[0]['y'].dtype, np.int64)
+        with self.subTest("entire column"):
+            with self.assertRaises(ValueError):
+                np.array(lazy['y'])
+
+        explicit = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'),
+                                         lazy=True,
+                                         dtype={'y': 'float64', 'z': str})
+        for idx in (0, 1199, 1200, 1300, 1499):
+            with self.subTest("explicit dtype", idx=idx):
+                np.testing.assert_equal(explicit[idx]['y'], eager[idx]['y'])
+                self.assertEqual(explicit[idx]['y'].dtype, np.float64)
+        with self.subTest("explicit dtype, non-numeric value"):
+            self.assertEqual(explicit[1400]['z'], 'abc')
+        with self.subTest("explicit dtype, entire column"):
+            np.testing.assert_array_equal(explicit['y'], eager['y'])
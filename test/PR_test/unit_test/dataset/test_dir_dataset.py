@@ -14,7 +14,9 @@
 # ==============================================================================
 import os
 import tempfile
+import time
 import unittest
+from unittest.mock import patch
 
 import fastestimator as fe
 
@@ -35,3 +37,44 @@ class TestDirDataset(unittest.TestCase):
         dataset = fe.dataset.DirDataset(root_dir=tmpdirname)
 
         self.assertEqual(len(dataset), 4)
+
+    def test_manifest_invalidation(self):
+        tmpdirname = tempfile.mkdtemp()
+        manifest_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(tmpdirname, "a", "b"))
+        for path in ["f1.txt", "f2.png", os.path.join("a", "f3.txt"), os.path.join("a", "b", ".hidden.txt")]:
+            open(os.path.join(tmpdirname, path), "x").close()
+
+        dataset = fe.dataset.DirDataset(root_dir=tmpdirname, file_extension=".txt", manifest_dir=manifest_dir)
+        self.assertEqual(dataset["x"], [os.path.join(tmpdirname, "a", "f3.txt"), os.path.join(tmpdirname, "f1.txt")])
+        self.assertEqual(len(os.listdir(manifest_dir)), 1)
+
+        # Adding a file to a sub-directory should be detected via the modification time of that directory
+        open(os.path.join(tmpdirname, "a", "b", "f4.txt"), "x").close()
+        dataset = fe.dataset.DirDataset(root_dir=tmpdirname, file_extension=".txt", manifest_dir=manifest_dir)
+        self.assertEqual(len(dataset), 3)
+
+        dataset = fe.dataset.DirDataset(root_dir=tmpdirname, recursive_search=False, manifest_dir=manifest_dir)
+        self.assertEqual(len(dataset), 2)
+
+    def test_manifest_is_opt_in(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            open(os.path.join(tmpdirname, "f1.txt"), "x").close()
+            with patch("fastestimator.dataset.dir_scan._save_manifest") as save_manifest:
+                dataset = fe.dataset.DirDataset(root_dir=tmpdirname)
+            self.assertEqual(len(dataset), 1)
+            save_manifest.assert_not_called()
+
+    def test_manifest_recently_modified_directory(self):
+        with tempfile.TemporaryDirectory() as tmpdirname, tempfile.TemporaryDirectory() as manifest_dir:
+            open(os.path.join(tmpdirname, "f1.txt"), "x").close()
+            # Pretend that the file system clock is 30 seconds behind, and that its timestamps are too coarse to show
+            # the directory being modified again
+            mtime = time.time_ns() - 30 * 10**9
+            os.utime(tmpdirname, ns=(mtime, mtime))
+            dataset = fe.dataset.DirDataset(root_dir=tmpdirname, manifest_dir=manifest_dir)
+            self.assertEqual(len(dataset), 1)
+            open(os.path.join(tmpdirname, "f2.txt"), "x").close()
+            os.utime(tmpdirname, ns=(mtime, mtime))
+            dataset = fe.dataset.DirDataset(root_dir=tmpdirname, manifest_dir=manifest_dir)
+            self.assertEqual(len(dataset), 2)
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import os
+import tempfile
 import unittest
 
 import numpy as np
@@ -107,6 +109,13 @@ class TestNumpyDataset(unittest.TestCase):
         with self.subTest("Both new datasets should be equivalent"):
             self.assertEqual(ds2["idx"], ds4["idx"])
 
+    def test_split_seed_selects_same_elements(self):
+        # A given seed must keep selecting the same elements across versions so that evaluation sets are reproducible
+        ds = fe.dataset.NumpyDataset({"idx": np.arange(20), "clz": np.arange(20) % 3})
+        self.assertEqual(sorted(ds.split(0.25, seed=42)["idx"]), [0, 3, 7, 8, 16])
+        ds = fe.dataset.NumpyDataset({"idx": np.arange(20), "clz": np.arange(20) % 3})
+        self.assertEqual(sorted(ds.split(0.25, seed=42, stratify="clz")["idx"]), [1, 7, 11, 14, 15])
+
     def test_multi_frac_split(self):
         ds1 = fe.dataset.NumpyDataset(
             {"idx": np.array([i for i in range(100)]), "clz": np.array([i % 4 for i in range(100)])})
@@ -251,3 +260,89 @@ class TestNumpyDataset(unittest.TestCase):
             self.assertEqual(ds3["clz"].count(4), 3)  # 12%
             self.assertEqual(ds3["clz"].count(5), 1)  # 4%
             self.assertEqual(ds3["clz"].count(6), 0)  # 0%
+
+    def test_zero_copy_columns(self):
+        x = np.random.rand(10, 4)
+        ds = fe.dataset.NumpyDataset({"x": x, "y": np.arange(10)})
+        with self.subTest("Elements are views"):
+            self.assertTrue(np.shares_memory(ds[3]["x"], x))
+        with self.subTest("Columns are views"):
+            self.assertTrue(np.shares_memory(ds["x"], x))
+        with self.subTest("Scalar columns are lists"):
+            self.assertEqual(ds["y"], list(range(10)))
+
+    def test_memmap_split(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "x.npy")
+            np.save(path, np.arange(40).reshape(20, 2))
+            x = np.load(path, mmap_mode='r')
+            ds1 = fe.dataset.NumpyDataset({"x": x, "idx": np.arange(20)})
+            ds2 = ds1.split([2, 5, 7])
+            with self.subTest("Split elements still backed by memmap"):
+                self.assertIsInstance(ds2[0]["x"], np.memmap)
+            with self.subTest("Split data"):
+                self.assertTrue(np.array_equal(ds2["x"], x[[2, 5, 7]]))
+                self.assertEqual(ds2["idx"], [2, 5, 7])
+            with self.subTest("Remaining data"):
+                self.assertEqual(len(ds1), 17)
+                self.assertTrue(np.array_equal(ds1[2]["x"], x[3]))
+
+    def test_element_setitem(self):
+        x = np.zeros((10, 2), dtype=np.int32)
+        ds1 = fe.dataset.NumpyDataset({"x": x, "idx": np.arange(10)})
+        ds2 = ds1.split([0, 1, 2])
+        ds2[0] = {"x": np.ones(2, dtype=np.int32), "idx": 5}
+        with self.subTest("New values"):
+            self.assertTrue(np.array_equal(ds2[0]["x"], [1, 1]))
+            self.assertEqual(ds2[0]["idx"], 5)
+        with self.subTest("Caller's array and other splits unchanged"):
+            self.assertEqual(x.sum(), 0)
+            self.assertEqual(ds1[0]["idx"], 3)
+        ds2[1] = {"x": np.array([0.5, 1.5, 2.5]), "idx": "a"}
+        with self.subTest("Mismatched values stored exactly"):
+            self.assertTrue(np.array_equal(ds2[1]["x"], [0.5, 1.5, 2.5]))
+            self.assertEqual(ds2[1]["idx"], "a")
+            self.assertTrue(np.array_equal(ds2[0]["x"], [1, 1]))
+            self.assertEqual(ds2[2]["idx"], 2)
+        with self.subTest("Modifying a retrieved element is not saved"):
+            elem = ds2[2]
+            elem["idx"] = 100
+            self.assertEqual(ds2[2]["idx"], 2)
+
+    def test_element_setitem_read_only_memmap(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "x.npy")
+            np.save(path, np.arange(40).reshape(20, 2))
+            x = np.load(path, mmap_mode='r')
+            ds = fe.dataset.NumpyDataset({"x": x})
+            ds[3] = {"x": np.array([-1, -1])}
+            with self.subTest("New value"):
+                self.assertTrue(np.array_equal(ds[3]["x"], [-1, -1]))
+            with self.subTest("File unchanged"):
+                self.assertTrue(np.array_equal(x[3], [6, 7]))
+
+    def test_column_setitem_after_split(self):
+        ds1 = fe.dataset.NumpyDataset({"idx": np.arange(10), "x": np.zeros((10, 2))})
+        ds2 = ds1.split([0, 1, 2])
+        ds2["idx"] = np.array([7, 8, 9])
+        ds2["y"] = ["a", "b", "c"]
+        with self.subTest("New values"):
+            self.assertEqual(ds2["idx"], [7, 8, 9])
+            self.assertEqual(ds2[1]["y"], "b")
+        with self.subTest("Original dataset unchanged"):
+            self.assertEqual(ds1["idx"], list(range(3, 10)))
+            self.assertNotIn("y", ds1[0])
+        with self.subTest("Summary updated"):
+            self.assertIn("y", ds2.summary().keys)
+
+    def test_stratify_split_string_labels(self):
+        ds1 = fe.dataset.NumpyDataset({"idx": np.arange(100), "clz": np.array(["c{}".format(i % 4) for i in range(100)])})
+        ds2 = ds1.split(0.2, stratify="clz", seed=5)
+        with self.subTest("Source class balance maintained"):
+            for clz in ["c0", "c1", "c2", "c3"]:
+                self.assertEqual(ds1["clz"].count(clz), 20)
+        with self.subTest("New class balance maintained"):
+            for clz in ["c0", "c1", "c2", "c3"]:
+                self.assertEqual(ds2["clz"].count(clz), 5)
+        with self.subTest("Disjoint datasets"):
+            self.assertEqual(set(), set(ds1["idx"]) & set(ds2["idx"]))
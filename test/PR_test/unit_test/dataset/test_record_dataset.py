@@ -0,0 +1,87 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import tempfile
+import unittest
+
+import numpy as np
+
+import fastestimator as fe
+from fastestimator.op.numpyop.univariate import Minmax
+
+
+class TestRecordDataset(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.x = np.random.randint(0, 255, size=(100, 8, 8), dtype=np.uint8)
+        cls.source = fe.dataset.NumpyDataset({"x": cls.x, "y": np.arange(100) % 4, "idx": np.arange(100)})
+        cls.root_dir = tempfile.mkdtemp()
+        cls.paths = fe.dataset.write_records(cls.source,
+                                             cls.root_dir,
+                                             ops=[Minmax(inputs="x", outputs="x_norm")],
+                                             max_shard_bytes=2048)
+
+    def test_multiple_shards(self):
+        self.assertGreater(len(self.paths), 1)
+
+    def test_random_access(self):
+        dataset = fe.dataset.RecordDataset(self.root_dir)
+        self.assertEqual(len(dataset), 100)
+        for idx in [0, 17, 99, 42]:
+            with self.subTest(idx=idx):
+                elem = dataset[idx]
+                np.testing.assert_array_equal(elem["x"], self.x[idx])
+                self.assertEqual(elem["idx"], idx)
+                self.assertAlmostEqual(elem["x_norm"].max(), 1.0, places=5)
+
+    def test_split(self):
+        dataset = fe.dataset.RecordDataset(self.root_dir)
+        split = dataset.split(0.2, stratify="y", seed=0)
+        self.assertEqual(len(split), 20)
+        self.assertEqual(len(dataset), 80)
+        idx = [split[i]["idx"] for i in range(20)] + [dataset[i]["idx"] for i in range(80)]
+        self.assertEqual(sorted(idx), list(range(100)))
+
+    def test_shard_shuffle(self):
+        dataset = fe.dataset.RecordDataset(self.root_dir, shard_shuffle=True, shuffle_buffer=4)
+        dataset.reset_index_maps(seed=1)
+        idx = [dataset[i]["idx"] for i in range(100)]
+        self.assertEqual(sorted(idx), list(range(100)))
+        self.assertNotEqual(idx, list(range(100)))
+        # Each buffer window can span at most two (consecutively visited) shards
+        for window in np.array(idx).reshape(25, 4):
+            self.assertLessEqual(len(set(dataset.shard_ids[window])), 2)
+
+    def test_split_after_shard_shuffle(self):
+        dataset = fe.dataset.RecordDataset(self.root_dir, shard_shuffle=True, shuffle_buffer=4)
+        dataset.reset_index_maps(seed=1)
+        expected = [dataset[i]["idx"] for i in (0, 5, 50)]
+        split = dataset.split([0, 5, 50])
+        self.assertEqual(sorted(split[i]["idx"] for i in range(3)), sorted(expected))
+        remaining = [dataset[i]["idx"] for i in range(97)]
+        self.assertEqual(set(remaining) & set(expected), set())
+        with self.subTest("stratified"):
+            dataset = fe.dataset.RecordDataset(self.root_dir, shard_shuffle=True, shuffle_buffer=4)
+            dataset.reset_index_maps(seed=1)
+            split = dataset.split(0.2, stratify="y", seed=0)
+            self.assertEqual(np.bincount([split[i]["y"] for i in range(20)]).tolist(), [5, 5, 5, 5])
+            idx = [split[i]["idx"] for i in range(20)] + [dataset[i]["idx"] for i in range(80)]
+            self.assertEqual(sorted(idx), list(range(100)))
+
+    def test_pipeline(self):
+        dataset = fe.dataset.RecordDataset(self.root_dir, shard_shuffle=True)
+        pipeline = fe.Pipeline(train_data=dataset, batch_size=10, num_process=2)
+        loader = pipeline.get_loader(mode="train")
+        idx = np.concatenate([batch["idx"].numpy() for batch in loader])
+        np.testing.assert_array_equal(np.sort(idx), np.arange(100))
@@ -37,3 +37,8 @@ class TestExpandDims(unittest.TestCase):
         op = ExpandDims(axis=0, inputs='x', outputs='x')
         data = op.forward(data=self.multi_input, state={})
         self.assertTrue(is_equal(data, self.multi_output))
+
+    def test_batch_input(self):
+        op = ExpandDims(axis=0, inputs='x', outputs='x')
+        data = op.forward_batch(data=[np.array([[1, 2], [3, 4]])], state={})
+        self.assertTrue(is_equal(data, [np.array([[[1, 2]], [[3, 4]]])]))
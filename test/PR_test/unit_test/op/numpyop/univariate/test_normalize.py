@@ -45,3 +45,10 @@ class TestNormalize(unittest.TestCase):
         for img_output in output:
             with self.subTest('Check output mask shape'):
                 self.assertEqual(img_output.shape, self.multi_output_shape)
+
+    def test_batch_input(self):
+        normalize = Normalize(inputs='x', outputs='x')
+        batch = np.stack(self.multi_input)
+        output = normalize.forward_batch(data=[batch], state={})
+        expected = np.stack([normalize.forward(data=[elem], state={})[0] for elem in self.multi_input])
+        self.assertTrue(np.allclose(output[0], expected))
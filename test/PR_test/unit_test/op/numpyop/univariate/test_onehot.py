@@ -35,3 +35,8 @@ class TestOnehot(unittest.TestCase):
         op = Onehot(inputs='x', outputs='x', num_classes=4)
         data = op.forward(data=self.single_input, state={})
         self.assertTrue(is_equal(data, self.single_output))
+
+    def test_batch_input(self):
+        op = Onehot(inputs='x', outputs='x', num_classes=4)
+        data = op.forward_batch(data=[np.array(self.single_input)], state={})
+        self.assertTrue(is_equal(data, [np.array(self.single_output)]))
@@ -37,3 +37,8 @@ class TestReshape(unittest.TestCase):
         op = Reshape(inputs='x', outputs='x', shape=(1, 2))
         data = op.forward(data=self.multi_input, state={})
         self.assertTrue(is_equal(data, self.multi_output))
+
+    def test_batch_input(self):
+        op = Reshape(inputs='x', outputs='x', shape=(2, 2))
+        data = op.forward_batch(data=[np.array([[1, 2, 3, 4], [5, 6, 7, 8]])], state={})
+        self.assertTrue(is_equal(data, [np.array([[[1, 2], [3, 4]], [[5, 6], [7, 8]]])]))
@@ -45,3 +45,10 @@ class TestToFloat(unittest.TestCase):
         for img_output in output:
             with self.subTest('Check output mask shape'):
                 self.assertEqual(img_output.shape, self.multi_output_shape)
+
+    def test_batch_input(self):
+        to_float = ToFloat(inputs='x', outputs='x')
+        batch = np.random.randint(0, 256, size=(2, 28, 28, 3), dtype=np.uint8)
+        output = to_float.forward_batch(data=[batch], state={})
+        expected = np.stack([to_float.forward(data=[elem], state={})[0] for elem in batch])
+        self.assertTrue(np.allclose(output[0], expected))
@@ -0,0 +1,88 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import unittest
+import warnings
+
+import numpy as np
+import tensorflow as tf
+import torch
+from sklearn.metrics import matthews_corrcoef, precision_recall_fscore_support
+
+from fastestimator.util.metric_util import StreamingConfusionMatrix, mcc_score, precision_recall_fscore
+
+
+class TestStreamingConfusionMatrix(unittest.TestCase):
+    def test_grows_to_fit_labels(self):
+        matrix = StreamingConfusionMatrix()
+        matrix.update(y_true=np.array([0, 1]), y_pred=np.array([0.0, 1.0]))
+        matrix.update(y_true=np.array([2, 1]), y_pred=np.array([1, 2]))
+        np.testing.assert_array_equal(matrix.all_reduce(), [[1, 0, 0], [0, 1, 1], [0, 1, 0]])
+
+    def test_fixed_num_classes_ignores_other_labels(self):
+        matrix = StreamingConfusionMatrix(num_classes=2)
+        matrix.update(y_true=np.array([0, 1, 2, 1]), y_pred=np.array([0, 1, 1, 3]))
+        np.testing.assert_array_equal(matrix.all_reduce(), [[1, 0], [0, 1]])
+
+    def test_tf_input(self):
+        matrix = StreamingConfusionMatrix()
+        matrix.update(y_true=np.array([0, 1, 2]), y_pred=tf.constant([0, 2, 2]))
+        matrix.update(y_true=tf.constant([[1]]), y_pred=tf.constant([[1.0]]))
+        np.testing.assert_array_equal(matrix.all_reduce(), [[1, 0, 0], [0, 1, 1], [0, 0, 1]])
+
+    def test_torch_input(self):
+        matrix = StreamingConfusionMatrix()
+        matrix.update(y_true=np.array([0, 1, 2]), y_pred=torch.tensor([0, 2, 2]))
+        matrix.update(y_true=torch.tensor([[1]]), y_pred=torch.tensor([[1.0]]))
+        np.testing.assert_array_equal(matrix.all_reduce(), [[1, 0, 0], [0, 1, 1], [0, 0, 1]])
+
+    def test_reset(self):
+        matrix = StreamingConfusionMatrix()
+        matrix.update(y_true=np.array([0, 1]), y_pred=np.array([1, 1]))
+        matrix.reset()
+        self.assertEqual(matrix.all_reduce().sum(), 0)
+
+
+class TestMatrixMetrics(unittest.TestCase):
+    def test_matches_sklearn(self):
+        rng = np.random.default_rng(0)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # sklearn warns about metrics with a zero denominator
+            for num_classes in (2, 5):
+                # Leave the last class out of the predictions entirely
+                y_true = rng.integers(0, num_classes, 50)
+                y_pred = np.where(rng.uniform(size=50) < 0.6, y_true, rng.integers(0, num_classes - 1, 50))
+                matrix = StreamingConfusionMatrix()
+                matrix.update(y_true, y_pred)
+                matrix = matrix.all_reduce()
+                averages = [None, 'micro', 'macro', 'weighted'] + (['binary'] if num_classes == 2 else [])
+                for average in averages:
+                    with self.subTest(num_classes=num_classes, average=average):
+                        expected = precision_recall_fscore_support(y_true, y_pred, average=average)[:3]
+                        for exp, act in zip(expected, precision_recall_fscore(matrix, average=average)):
+                            np.testing.assert_allclose(act, exp, rtol=1e-12)
+                with self.subTest(num_classes=num_classes, metric="mcc"):
+                    self.assertAlmostEqual(mcc_score(matrix), matthews_corrcoef(y_true, y_pred), places=12)
+
+    def test_absent_classes_left_out(self):
+        precision, recall, fscore = precision_recall_fscore(np.array([[2, 0, 1], [0, 0, 0], [0, 0, 1]]))
+        np.testing.assert_allclose(precision, [1.0, 0.5])
+        np.testing.assert_allclose(recall, [2 / 3, 1.0])
+
+    def test_binary_with_multiclass_labels(self):
+        with self.assertRaises(ValueError):
+            precision_recall_fscore(np.eye(3), average='binary')
+
+    def test_undefined_mcc(self):
+        self.assertEqual(mcc_score(np.array([[4, 0], [0, 0]])), 0.0)
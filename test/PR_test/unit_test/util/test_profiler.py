@@ -0,0 +1,72 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import time
+import unittest
+
+import tensorflow as tf
+
+from fastestimator.util.profiler import PhaseTimer, SpanRecorder, profile_phase, profile_span, set_phase_timer, \
+    set_span_recorder
+from fastestimator.util.util import NonContext
+
+
+class TestPhaseTimer(unittest.TestCase):
+    def tearDown(self):
+        set_phase_timer(None)
+
+    def test_nested_phases(self):
+        timer = PhaseTimer()
+        set_phase_timer(timer)
+        with profile_phase("outer"):
+            time.sleep(0.02)
+            with profile_phase("inner"):
+                time.sleep(0.05)
+            time.sleep(0.02)
+        totals = timer.collect()
+        self.assertGreaterEqual(totals["inner"], 0.05)
+        # Time within the inner phase is not counted towards the outer phase
+        self.assertGreaterEqual(totals["outer"], 0.04)
+        self.assertLess(totals["outer"], 0.05)
+        self.assertEqual(timer.collect(), {})
+
+    def test_disabled(self):
+        self.assertIsInstance(profile_phase("forward"), NonContext)
+
+    def test_inside_tf_function(self):
+        timer = PhaseTimer()
+        set_phase_timer(timer)
+        tf.function(lambda: self.assertIsInstance(profile_phase("forward"), NonContext))()
+        self.assertNotIsInstance(profile_phase("forward"), NonContext)
+
+
+class TestSpanRecorder(unittest.TestCase):
+    def tearDown(self):
+        set_span_recorder(None)
+        set_phase_timer(None)
+
+    def test_spans(self):
+        timer = PhaseTimer()
+        recorder = SpanRecorder()
+        set_phase_timer(timer)
+        set_span_recorder(recorder)
+        with profile_phase("forward"):
+            with profile_span("ModelOp"):
+                time.sleep(0.01)
+        self.assertEqual([event["name"] for event in recorder.events], ["ModelOp", "forward"])
+        inner, outer = recorder.events
+        self.assertGreaterEqual(inner["ts"], outer["ts"])
+        self.assertLessEqual(inner["ts"] + inner["dur"], outer["ts"] + outer["dur"])
+        # Spans are not phases, so the time within them still belongs to the enclosing phase
+        self.assertEqual(set(timer.collect().keys()), {"forward"})